@@ -24,6 +24,10 @@ def create_app(config_class='app.config.development'):
     from app.utils.response import CustomJSONEncoder
     app.json_encoder = CustomJSONEncoder
     
+    # 选择api_*响应使用的JSON序列化后端（orjson/标准库）
+    from app.utils.json_backend import json_backend
+    json_backend.init_app(app)
+    
     # 确保 SECRET_KEY 已设置（用于会话加密）
     if not app.config.get('SECRET_KEY'):
         app.config['SECRET_KEY'] = 'dev_secret_key_for_session'
@@ -34,6 +38,70 @@ def create_app(config_class='app.config.development'):
     ma.init_app(app)
     CORS(app)
 
+    # 初始化Auth0共享HTTP客户端（连接池、超时、重试、熔断）
+    from app.utils.http_client import auth0_http
+    auth0_http.init_app(app)
+
+    # 初始化JWKS公钥缓存
+    from app.utils.jwks import jwks_cache
+    jwks_cache.init_app(app)
+    
+    # 初始化Auth0管理令牌管理器
+    from app.utils.auth0_token import auth0_token_manager
+    auth0_token_manager.init_app(app)
+
+    # 初始化用户身份缓存
+    from app.utils.identity import identity_loader
+    identity_loader.init_app(app)
+
+    # 初始化用户活跃时间写缓冲
+    from app.utils.activity import activity_tracker
+    activity_tracker.init_app(app)
+
+    # 初始化周课表缓存
+    from app.api.v1.learning.timetable import timetable_engine
+    timetable_engine.init_app(app)
+
+    # 初始化成绩引擎（注册Session事件，增量维护GPA）
+    from app.api.v1.learning.gpa import grades_engine
+    grades_engine.init_app(app)
+
+    # 初始化学习计划进度计数器（注册Session事件，增量维护任务完成数）
+    from app.api.v1.learning.plan_progress import plan_progress
+    plan_progress.init_app(app)
+
+    # 初始化专注记录写缓冲（批量写入focus_record并累计学习时长）
+    from app.api.v1.learning.focus_ingest import focus_buffer
+    focus_buffer.init_app(app)
+
+    # 初始化仪表盘汇总缓存（注册Session事件，相关数据变化时失效）
+    from app.api.v1.learning.dashboard_summary import dashboard_cache
+    dashboard_cache.init_app(app)
+
+    # 初始化学期数据归档（读取分段大小和宽限期）
+    from app.api.v1.learning.semester_archive import semester_archiver
+    semester_archiver.init_app(app)
+
+    # 初始化专业培养方案索引（注册Session事件，启动时载入全部方案）
+    from app.api.v1.learning.curriculum import curriculum_index
+    curriculum_index.init_app(app)
+
+    # 初始化社区信息流（注册Session事件，帖子变化后更新排序）
+    from app.api.v1.community.feed import feed_engine
+    feed_engine.init_app(app)
+
+    # 初始化点赞计数写缓冲（批量原子累加likes_count）
+    from app.api.v1.community.like_counter import like_counter
+    like_counter.init_app(app)
+
+    # 初始化实时推送中心（启动broker，新私信和通知通过SSE推送）
+    from app.utils.push import push_hub
+    push_hub.init_app(app)
+
+    # 初始化任务截止提醒调度器（第一次请求时启动后台线程）
+    from app.api.v1.learning.reminders import reminder_scheduler
+    reminder_scheduler.init_app(app)
+
     # 初始化Auth0
     from app.api.v1.auth import auth_bp, setup_auth0
     setup_auth0(app)
@@ -64,6 +132,14 @@ def create_app(config_class='app.config.development'):
     except ImportError:
         pass
     
+    # 注册社区模块蓝图
+    from app.api.v1.community import community_bp
+    app.register_blueprint(community_bp, url_prefix='/api/v1/community')
+    
+    # 注册实时推送蓝图
+    from app.api.v1.push import push_bp
+    app.register_blueprint(push_bp, url_prefix='/api/v1/push')
+    
     # 创建一个简单的路由用于测试
     @app.route('/')
     def index():
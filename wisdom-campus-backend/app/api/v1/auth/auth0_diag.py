@@ -1,10 +1,12 @@
 """
 Auth0诊断工具 - 用于检查Auth0配置问题
 """
-import requests
 import logging
 import json
 from flask import current_app, Blueprint, jsonify
+from app.utils.auth0_token import auth0_token_manager, Auth0TokenError
+from app.utils.http_client import auth0_http
+from app.utils.auth import requires_auth, requires_admin
 
 logger = logging.getLogger(__name__)
 
@@ -37,23 +39,21 @@ def check_auth0_config():
     
     # 测试获取管理API令牌
     try:
-        token_url = f"https://{domain}/oauth/token"
-        token_payload = {
-            "client_id": client_id,
-            "client_secret": client_secret,
-            "audience": f"https://{domain}/api/v2/",
-            "grant_type": "client_credentials"
-        }
-        token_headers = {"content-type": "application/json"}
-        
-        token_response = requests.post(token_url, json=token_payload, headers=token_headers)
+        try:
+            management_token = auth0_token_manager.get_token()
+        except Auth0TokenError as token_error:
+            management_token = None
+            results['management_token'] = {
+                'status': 'error',
+                'message': f'获取管理API令牌失败: {token_error.status_code}',
+                'details': token_error.response_text or str(token_error)
+            }
         
-        if token_response.status_code == 200:
+        if management_token:
             results['management_token'] = {
                 'status': 'success',
                 'message': '成功获取管理API令牌'
             }
-            management_token = token_response.json().get('access_token')
             
             # 获取连接列表
             try:
@@ -61,7 +61,7 @@ def check_auth0_config():
                 connections_headers = {
                     "Authorization": f"Bearer {management_token}"
                 }
-                connections_response = requests.get(connections_url, headers=connections_headers)
+                connections_response = auth0_http.get(connections_url, headers=connections_headers)
                 
                 if connections_response.status_code == 200:
                     connections = connections_response.json()
@@ -92,7 +92,7 @@ def check_auth0_config():
                 client_headers = {
                     "Authorization": f"Bearer {management_token}"
                 }
-                client_response = requests.get(client_url, headers=client_headers)
+                client_response = auth0_http.get(client_url, headers=client_headers)
                 
                 if client_response.status_code == 200:
                     client_data = client_response.json()
@@ -116,12 +116,6 @@ def check_auth0_config():
                     'status': 'error',
                     'message': f'获取客户端信息异常: {str(e)}'
                 }
-        else:
-            results['management_token'] = {
-                'status': 'error',
-                'message': f'获取管理API令牌失败: {token_response.status_code}',
-                'details': token_response.text
-            }
     except Exception as e:
         results['management_token'] = {
             'status': 'error',
@@ -130,6 +124,18 @@ def check_auth0_config():
     
     return jsonify(results)
 
+@auth0_diag_bp.route('/metrics', methods=['GET'])
+@requires_auth
+@requires_admin
+def auth0_http_metrics():
+    """
+    查看Auth0 HTTP客户端统计（管理员）
+
+    返回:
+        各端点请求数、失败数、延迟，连接池复用情况以及熔断器状态
+    """
+    return jsonify(auth0_http.metrics())
+
 def check_auth0_client_connections():
     """
     检查Auth0客户端的连接配置
@@ -144,30 +150,19 @@ def check_auth0_client_connections():
         client_secret = current_app.config.get('AUTH0_CLIENT_SECRET')
         
         # 获取管理API令牌
-        token_url = f"https://{domain}/oauth/token"
-        token_payload = {
-            "client_id": client_id,
-            "client_secret": client_secret,
-            "audience": f"https://{domain}/api/v2/",
-            "grant_type": "client_credentials"
-        }
-        token_headers = {"content-type": "application/json"}
-        
-        token_response = requests.post(token_url, json=token_payload, headers=token_headers)
-        
-        if token_response.status_code != 200:
-            logger.error(f"获取管理API令牌失败: {token_response.text}")
+        try:
+            management_token = auth0_token_manager.get_token()
+        except Auth0TokenError as e:
+            logger.error(f"获取管理API令牌失败: {str(e)}")
             return None
         
-        management_token = token_response.json().get('access_token')
-        
         # 获取客户端连接
         client_url = f"https://{domain}/api/v2/clients/{client_id}"
         client_headers = {
             "Authorization": f"Bearer {management_token}"
         }
         
-        client_response = requests.get(client_url, headers=client_headers)
+        client_response = auth0_http.get(client_url, headers=client_headers)
         
         if client_response.status_code != 200:
             logger.error(f"获取客户端信息失败: {client_response.text}")
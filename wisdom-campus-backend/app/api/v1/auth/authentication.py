@@ -13,10 +13,12 @@ from app.models.user import User, Major, db, UserProfile
 from app.utils.response import api_success, api_error
 from app.utils.error_codes import ErrorCode
 from app.api.v1.auth.email_verification import send_verification_email, check_email_verification
+from app.api.v1.auth.utils import get_auth0_token
 from app.schemas.user import UserCreateSchema, UserSchema
 from sqlalchemy.exc import SQLAlchemyError
 import traceback
 import time
+from app.utils.http_client import auth0_http
 
 logger = logging.getLogger(__name__)
 
@@ -97,7 +99,7 @@ def api_login():
             debug_payload["password"] = "******"
             logger.info(f"方法1 - Auth0请求(使用Username-Password-Authentication连接): {auth_url}, 请求体={json.dumps(debug_payload)}")
             
-            auth_response = requests.post(auth_url, json=auth_payload, headers=auth_headers)
+            auth_response = auth0_http.post(auth_url, json=auth_payload, headers=auth_headers)
             
             # 如果方法1失败，尝试方法2
             if auth_response.status_code != 200:
@@ -109,25 +111,10 @@ def api_login():
                 logger.info("尝试使用方法2：获取管理API令牌进行登录")
                 
                 # 获取管理API令牌
-                token_url = f"https://{domain}/oauth/token"
-                token_payload = {
-                    "client_id": client_id,
-                    "client_secret": client_secret,
-                    "audience": f"https://{domain}/api/v2/",
-                    "grant_type": "client_credentials"
-                }
-                
-                token_headers = {"content-type": "application/json"}
-                logger.info(f"尝试获取管理令牌: URL={token_url}")
-                token_response = requests.post(token_url, json=token_payload, headers=token_headers)
+                management_token = get_auth0_token()
                 
-                if token_response.status_code != 200:
-                    logger.error(f"获取管理API令牌失败: 状态码={token_response.status_code}, 响应={token_response.text}")
+                if not management_token:
                     return api_error("身份验证服务暂时不可用", ErrorCode.AUTH0_ERROR)
-                else:
-                    logger.info(f"获取管理API令牌成功: 响应长度={len(token_response.text)}")
-                
-                management_token = token_response.json().get('access_token')
                 
                 # 使用管理API查询用户
                 # 1. 首先检查用户是否存在于Auth0
@@ -138,7 +125,7 @@ def api_login():
                 }
                 search_params = {"email": email}
                 
-                search_response = requests.get(search_url, headers=search_headers, params=search_params)
+                search_response = auth0_http.get(search_url, headers=search_headers, params=search_params)
                 
                 if search_response.status_code != 200:
                     logger.error(f"查询Auth0用户失败: {search_response.text}")
@@ -206,7 +193,7 @@ def api_login():
             user_url = f"https://{domain}/userinfo"
             user_headers = {"Authorization": f"Bearer {access_token}"}
             
-            user_response = requests.get(user_url, headers=user_headers)
+            user_response = auth0_http.get(user_url, headers=user_headers)
             
             if user_response.status_code != 200:
                 logger.error(f"获取用户信息失败: {user_response.text}")
@@ -367,29 +354,8 @@ def api_register():
         logger.info(f"Auth0配置: domain={domain}, client_id={'已设置' if client_id else '未设置'}")
         
         # 获取Auth0管理API令牌
-        token_url = f"https://{domain}/oauth/token"
-        token_payload = {
-            "client_id": client_id,
-            "client_secret": client_secret,
-            "audience": f"https://{domain}/api/v2/",
-            "grant_type": "client_credentials"
-        }
-        token_headers = {"content-type": "application/json"}
-        
-        logger.info(f"准备获取Auth0管理令牌, URL: {token_url}")
-        
-        try:
-            token_response = requests.post(token_url, json=token_payload, headers=token_headers)
-            logger.info(f"Auth0令牌请求响应状态码: {token_response.status_code}")
-            
-            if token_response.status_code != 200:
-                logger.error(f"获取Auth0管理令牌失败: 状态码={token_response.status_code}, 响应={token_response.text[:200]}")
-                return api_error(ErrorCode.AUTH0_ERROR, "连接认证服务失败，请稍后重试")
-            
-            management_api_token = token_response.json().get('access_token')
-            logger.info(f"成功获取Auth0管理令牌, 令牌长度: {len(management_api_token) if management_api_token else 0}")
-        except Exception as e:
-            logger.error(f"请求Auth0令牌时发生异常: {str(e)}")
+        management_api_token = get_auth0_token()
+        if not management_api_token:
             return api_error(ErrorCode.AUTH0_ERROR, "连接认证服务失败，请稍后重试")
             
         # 1. 先检查邮箱是否已在Auth0中存在，即使不在本地数据库中
@@ -401,7 +367,7 @@ def api_register():
         search_params = {"email": email}
         
         try:
-            search_response = requests.get(search_url, headers=search_headers, params=search_params)
+            search_response = auth0_http.get(search_url, headers=search_headers, params=search_params)
             logger.info(f"搜索Auth0用户响应状态码: {search_response.status_code}")
             
             if search_response.status_code == 200:
@@ -661,7 +627,7 @@ def api_register():
         logger.info(f"准备在Auth0中创建用户: email={email}, name={name}")
         
         try:
-            user_response = requests.post(user_url, json=user_payload, headers=user_headers)
+            user_response = auth0_http.post(user_url, json=user_payload, headers=user_headers)
             logger.info(f"Auth0创建用户响应状态码: {user_response.status_code}")
             
             # 处理Auth0创建用户响应
@@ -5,11 +5,12 @@
 from flask import current_app, request
 import json
 import logging
-import requests
+from app.utils.http_client import auth0_http
 from functools import wraps
 from app.models.user import User
 from app.utils.response import api_success, api_error
 from app.utils.error_codes import ErrorCode
+from app.utils.auth0_token import auth0_token_manager
 
 logger = logging.getLogger(__name__)
 
@@ -37,27 +38,7 @@ def get_auth0_management_token():
     返回:
         str: 访问令牌字符串
     """
-    domain = current_app.config['AUTH0_DOMAIN']
-    client_id = current_app.config['AUTH0_CLIENT_ID']
-    client_secret = current_app.config['AUTH0_CLIENT_SECRET']
-    audience = f"https://{domain}/api/v2/"
-    
-    token_url = f"https://{domain}/oauth/token"
-    token_payload = {
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "audience": audience,
-        "grant_type": "client_credentials"
-    }
-    
-    token_headers = {"content-type": "application/json"}
-    
-    response = requests.post(token_url, json=token_payload, headers=token_headers)
-    
-    if response.status_code != 200:
-        raise Exception(f"获取Auth0管理API令牌失败: {response.status_code}, {response.text}")
-    
-    return response.json()["access_token"]
+    return auth0_token_manager.get_token()
 
 def get_user_from_auth0(auth0_id):
     """
@@ -81,7 +62,7 @@ def get_user_from_auth0(auth0_id):
             "Authorization": f"Bearer {token}"
         }
         
-        response = requests.get(url, headers=headers)
+        response = auth0_http.get(url, headers=headers)
         
         if response.status_code == 200:
             return response.json()
@@ -129,7 +110,7 @@ def search_users_in_auth0(email=None, query=None, page=0, per_page=10):
             "Authorization": f"Bearer {token}"
         }
         
-        response = requests.get(url, headers=headers, params=params)
+        response = auth0_http.get(url, headers=headers, params=params)
         
         if response.status_code == 200:
             return response.json()
@@ -157,7 +138,7 @@ def validate_auth0_token(token):
         
         # 构建验证请求
         jwks_url = f"https://{domain}/.well-known/jwks.json"
-        jwks_client = requests.get(jwks_url).json()
+        jwks_client = auth0_http.get(jwks_url).json()
         
         # 这里应该使用适当的JWT库进行验证
         # 以下为简化示例，实际实现中应使用jose或pyjwt等库
@@ -205,7 +186,7 @@ def create_user_in_auth0(user_data):
         if "user_metadata" in user_data:
             payload["user_metadata"] = user_data["user_metadata"]
             
-        response = requests.post(url, headers=headers, json=payload)
+        response = auth0_http.post(url, headers=headers, json=payload)
         
         if response.status_code == 201:
             return response.json()
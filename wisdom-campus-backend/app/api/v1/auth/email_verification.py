@@ -10,16 +10,13 @@ from datetime import datetime, timedelta
 from app.models.user import User, db
 from app.utils.response import api_success, api_error
 from app.utils.error_codes import ErrorCode
+from app.utils.identity import identity_loader
 from functools import wraps
+from app.api.v1.auth.utils import get_auth0_token
+from app.utils.http_client import auth0_http
 
 logger = logging.getLogger(__name__)
 
-# 简单的令牌缓存，避免频繁请求Auth0 API
-_token_cache = {
-    'token': None,
-    'expires_at': None
-}
-
 # 邮件发送记录缓存 (使用内存缓存代替数据库字段)
 # 格式: {email: timestamp}
 _verification_sent_cache = {}
@@ -29,48 +26,9 @@ def get_cached_auth0_token():
     获取Auth0管理API令牌，带缓存功能
     
     返回:
-        str: Auth0管理API令牌
+        str: Auth0管理API令牌，获取失败返回None
     """
-    now = datetime.now()
-    
-    # 检查缓存中是否有有效令牌
-    if _token_cache['token'] and _token_cache['expires_at'] and _token_cache['expires_at'] > now:
-        return _token_cache['token']
-    
-    # 获取Auth0配置
-    domain = current_app.config.get('AUTH0_DOMAIN')
-    client_id = current_app.config.get('AUTH0_CLIENT_ID')
-    client_secret = current_app.config.get('AUTH0_CLIENT_SECRET')
-    
-    # 获取Auth0管理API令牌
-    token_url = f"https://{domain}/oauth/token"
-    token_payload = {
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "audience": f"https://{domain}/api/v2/",
-        "grant_type": "client_credentials"
-    }
-    token_headers = {"content-type": "application/json"}
-    
-    try:
-        token_response = requests.post(token_url, json=token_payload, headers=token_headers, timeout=10)
-        
-        if token_response.status_code != 200:
-            logger.error(f"获取Auth0管理令牌失败: {token_response.text}")
-            return None
-            
-        token_data = token_response.json()
-        access_token = token_data.get('access_token')
-        expires_in = token_data.get('expires_in', 86400)  # 默认24小时
-        
-        # 缓存令牌
-        _token_cache['token'] = access_token
-        _token_cache['expires_at'] = now + timedelta(seconds=expires_in - 300)  # 提前5分钟过期
-        
-        return access_token
-    except Exception as e:
-        logger.error(f"获取Auth0令牌时发生错误: {str(e)}")
-        return None
+    return get_auth0_token()
 
 def auth0_api_error_handler(f):
     """
@@ -126,7 +84,7 @@ def send_verification_email(email):
         "client_id": client_id
     }
     
-    job_response = requests.post(job_url, json=job_payload, headers=job_headers, timeout=10)
+    job_response = auth0_http.post(job_url, json=job_payload, headers=job_headers, timeout=10)
     
     if job_response.status_code != 201:
         logger.error(f"发送验证邮件失败: {job_response.text}")
@@ -262,7 +220,7 @@ def check_email_verification(auth0_id=None, email=None):
         "Authorization": f"Bearer {management_api_token}"
     }
     
-    user_response = requests.get(user_url, headers=user_headers, timeout=10)
+    user_response = auth0_http.get(user_url, headers=user_headers, timeout=10)
     
     if user_response.status_code != 200:
         logger.error(f"获取Auth0用户信息失败: {user_response.text}")
@@ -277,6 +235,7 @@ def check_email_verification(auth0_id=None, email=None):
         
         try:
             db.session.commit()
+            identity_loader.invalidate(user.id)
             logger.info(f"更新用户验证状态成功: {user.email}, verified: {email_verified}")
         except Exception as e:
             db.session.rollback()
@@ -3,7 +3,7 @@
 """
 from flask import request, current_app, jsonify, session, redirect
 import json
-import requests
+from app.utils.http_client import auth0_http
 from datetime import datetime, timedelta
 import logging
 from app.models.user import User
@@ -99,7 +99,7 @@ def api_login():
     
     try:
         # 调用Auth0 API
-        auth_response = requests.post(auth0_url, json=auth0_payload, headers=headers)
+        auth_response = auth0_http.post(auth0_url, json=auth0_payload, headers=headers)
         
         # 检查认证结果
         if auth_response.status_code != 200:
@@ -118,7 +118,7 @@ def api_login():
         # 获取用户信息
         user_info_url = f"https://{domain}/userinfo"
         headers = {'Authorization': f'Bearer {access_token}'}
-        user_info_response = requests.get(user_info_url, headers=headers)
+        user_info_response = auth0_http.get(user_info_url, headers=headers)
         
         if user_info_response.status_code != 200:
             logger.error(f"获取用户信息失败: {user_info_response.status_code}, {user_info_response.text}")
@@ -391,7 +391,7 @@ def api_admin_login():
         logger.info(f"方法1-1 - Auth0管理员认证请求: {auth_url}, 使用连接={auth_payload['realm']}, audience={audience}")
         logger.info(f"方法1-1 - 完整请求参数: {json.dumps(debug_payload)}")
         
-        auth_response = requests.post(auth_url, json=auth_payload, headers=auth_headers)
+        auth_response = auth0_http.post(auth_url, json=auth_payload, headers=auth_headers)
         
         # 如果方法1-1失败，尝试方法1-2：不使用audience
         if auth_response.status_code != 200:
@@ -404,7 +404,7 @@ def api_admin_login():
             auth_payload_no_audience.pop('audience', None)
             
             logger.info(f"方法1-2 - 尝试不使用audience进行管理员认证")
-            auth_response = requests.post(auth_url, json=auth_payload_no_audience, headers=auth_headers)
+            auth_response = auth0_http.post(auth_url, json=auth_payload_no_audience, headers=auth_headers)
             
             # 如果方法1-2失败，尝试方法1-3
             if auth_response.status_code != 200:
@@ -417,7 +417,7 @@ def api_admin_login():
                 auth_payload_mgmt['audience'] = f"https://{domain}/api/v2/"
                 
                 logger.info(f"方法1-3 - 尝试使用管理API作为audience: {auth_payload_mgmt['audience']}")
-                auth_response = requests.post(auth_url, json=auth_payload_mgmt, headers=auth_headers)
+                auth_response = auth0_http.post(auth_url, json=auth_payload_mgmt, headers=auth_headers)
                 
                 # 如果方法1-3失败，尝试方法2
                 if auth_response.status_code != 200:
@@ -437,7 +437,7 @@ def api_admin_login():
                     }
                     
                     logger.info(f"方法2 - 尝试使用标准password方式进行管理员认证")
-                    password_response = requests.post(auth_url, json=password_payload, headers=auth_headers)
+                    password_response = auth0_http.post(auth_url, json=password_payload, headers=auth_headers)
                     
                     if password_response.status_code != 200:
                         # 如果方法2也失败，返回错误信息
@@ -3,10 +3,11 @@
 """
 from flask import request, current_app
 import logging
-import requests
+from app.utils.http_client import auth0_http
 from app.models.user import User
 from app.utils.response import api_success, api_error
 from app.utils.error_codes import ErrorCode
+from app.api.v1.auth.utils import get_auth0_token
 
 logger = logging.getLogger(__name__)
 
@@ -53,7 +54,7 @@ def api_forgot_password():
             "connection": "Username-Password-Authentication"
         }
         
-        response = requests.post(url, headers=headers, json=data)
+        response = auth0_http.post(url, headers=headers, json=data)
         
         if response.status_code != 200:
             logger.error(f"发送密码重置邮件失败: {response.status_code}, {response.text}")
@@ -119,25 +120,15 @@ def api_change_password():
     
     # 获取Auth0管理API令牌
     try:
-        token_url = f"https://{domain}/oauth/token"
-        token_payload = {
-            "client_id": client_id,
-            "client_secret": client_secret,
-            "audience": f"https://{domain}/api/v2/",
-            "grant_type": "client_credentials"
-        }
-        token_headers = {"content-type": "application/json"}
-        
-        token_response = requests.post(token_url, json=token_payload, headers=token_headers)
+        token = get_auth0_token()
         
-        if token_response.status_code != 200:
-            logger.error(f"获取Auth0管理API令牌失败: {token_response.status_code}, {token_response.text}")
+        if not token:
             return api_error(
                 message="修改密码失败: 无法获取Auth0访问令牌",
                 error_code=ErrorCode.EXTERNAL_API_ERROR
             )
         
-        token = token_response.json()["access_token"]
+        token_headers = {"content-type": "application/json"}
         
         # 调用Auth0修改密码API
         # 注意：这需要使用Auth0的Password Change API，通常需要先验证旧密码
@@ -154,7 +145,7 @@ def api_change_password():
             "scope": "openid profile email"
         }
         
-        verify_response = requests.post(token_verify_url, json=verify_payload, headers=token_headers)
+        verify_response = auth0_http.post(token_verify_url, json=verify_payload, headers=token_headers)
         
         if verify_response.status_code != 200:
             logger.warning(f"验证旧密码失败: {verify_response.status_code}, {verify_response.text}")
@@ -174,7 +165,7 @@ def api_change_password():
             "password": new_password
         }
         
-        change_response = requests.patch(change_url, json=change_payload, headers=change_headers)
+        change_response = auth0_http.patch(change_url, json=change_payload, headers=change_headers)
         
         if change_response.status_code != 200:
             logger.error(f"修改密码失败: {change_response.status_code}, {change_response.text}")
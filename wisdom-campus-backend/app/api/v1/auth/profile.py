@@ -12,6 +12,7 @@ from werkzeug.utils import secure_filename
 from app.models.user import User, Major, db
 from app.utils.response import api_success, api_error
 from app.utils.error_codes import ErrorCode
+from app.utils.identity import identity_loader
 
 logger = logging.getLogger(__name__)
 
@@ -28,8 +29,8 @@ def api_get_user_profile():
         # 获取当前用户ID
         user_id = get_jwt_identity()
         
-        # 从数据库获取用户
-        user = User.query.get(user_id)
+        # 从数据库获取用户（同一请求内只查询一次）
+        user = identity_loader.get_user(user_id)
         
         if not user:
             logger.warning(f"获取用户资料失败: 用户不存在, id: {user_id}")
@@ -75,8 +76,8 @@ def api_update_user_profile():
         # 获取当前用户ID
         user_id = get_jwt_identity()
         
-        # 从数据库获取用户
-        user = User.query.get(user_id)
+        # 从数据库获取用户（同一请求内只查询一次）
+        user = identity_loader.get_user(user_id)
         
         if not user:
             logger.warning(f"更新用户资料失败: 用户不存在, id: {user_id}")
@@ -128,6 +129,7 @@ def api_update_user_profile():
         if has_update:
             try:
                 db.session.commit()
+                identity_loader.invalidate(user.id)
                 logger.info(f"用户资料更新成功: id: {user.id}, email: {user.email}")
                 
             except Exception as e:
@@ -172,8 +174,8 @@ def api_update_avatar():
         # 获取当前用户ID
         user_id = get_jwt_identity()
         
-        # 从数据库获取用户
-        user = User.query.get(user_id)
+        # 从数据库获取用户（同一请求内只查询一次）
+        user = identity_loader.get_user(user_id)
         
         if not user:
             logger.warning(f"更新头像失败: 用户不存在, id: {user_id}")
@@ -220,6 +222,7 @@ def api_update_avatar():
             user.avatar = avatar_url
             
             db.session.commit()
+            identity_loader.invalidate(user.id)
             logger.info(f"用户头像更新成功: id: {user.id}, email: {user.email}")
             
             return api_success({"avatar": avatar_url})
@@ -4,7 +4,7 @@
 """
 from flask import request, current_app, jsonify, Response
 import json
-import requests
+from app.utils.http_client import auth0_http
 import re
 from datetime import datetime
 import logging
@@ -117,7 +117,7 @@ def api_register():
         audience = current_app.config['AUTH0_API_AUDIENCE']
         domain = current_app.config['AUTH0_DOMAIN']
         url = f"https://{domain}/api/v2/users"
-        response = requests.post(url, headers=headers, json=auth0_data)
+        response = auth0_http.post(url, headers=headers, json=auth0_data)
         
         if response.status_code != 201:
             # 如果用户创建失败，检查是否是因为邮箱已存在
@@ -290,7 +290,7 @@ def cancel_registration():
             token = get_auth0_token()
             
             if token:
-                delete_auth0_user(auth0_id)
+                delete_auth0_user(auth0_id, token=token)
                 logger.info(f"从Auth0删除用户成功: {auth0_id}")
             else:
                 logger.error("获取Auth0令牌失败，无法删除Auth0用户")
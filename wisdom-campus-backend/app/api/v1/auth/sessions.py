@@ -13,6 +13,8 @@ import requests
 from app.models.user import User, db
 from app.utils.response import api_success, api_error
 from app.utils.error_codes import ErrorCode
+from app.utils.identity import identity_loader
+from app.utils.activity import activity_tracker
 
 logger = logging.getLogger(__name__)
 
@@ -49,15 +51,9 @@ def api_refresh_token():
         # 创建新的访问令牌
         access_token = create_access_token(identity=user.id, additional_claims=user_claims)
         
-        # 更新用户最后活跃时间
-        user.last_active = datetime.now()
-        
-        try:
-            db.session.commit()
-            logger.info(f"刷新令牌成功: 用户ID={user.id}")
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"更新用户活跃时间失败: {str(e)}")
+        # 记录用户最后活跃时间（缓冲后批量写入）
+        activity_tracker.touch(user.id)
+        logger.info(f"刷新令牌成功: 用户ID={user.id}")
             
         # 返回新令牌
         return api_success({
@@ -121,20 +117,14 @@ def verify_token():
         current_user_id = get_jwt_identity()
         jwt_data = get_jwt()
         
-        # 查询用户
-        user = User.query.get(current_user_id)
+        # 查询用户（同一请求内只查询一次）
+        user = identity_loader.get_user(current_user_id)
         if not user:
             logger.warning(f"验证令牌失败: 用户不存在 ID={current_user_id}")
             return api_error(ErrorCode.NOT_FOUND, "用户不存在")
             
-        # 更新最后活跃时间
-        user.last_active = datetime.now()
-        
-        try:
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"更新用户活跃时间失败: {str(e)}")
+        # 记录最后活跃时间（缓冲后批量写入）
+        activity_tracker.touch(user.id)
             
         # 返回用户信息
         return api_success({
@@ -145,7 +135,7 @@ def verify_token():
                 "student_id": user.student_id,
                 "email_verified": user.email_verified,
                 "major": user.major.name if user.major else None,
-                "grade": user.grade
+                "grade": getattr(user, "grade", None)  # User模型暂无grade字段
             }
         })
         
@@ -34,17 +34,10 @@ def setup_auth0(app):
     # 添加JWT标识加载回调函数
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
-        # 获取用户ID
-        identity = jwt_data["sub"]
-        # 从数据库中获取用户
-        from app.models.user import User
-        # 如果ID是字符串但可以转换为数字，就转换
-        if isinstance(identity, str) and identity.isdigit():
-            user_id = int(identity)
-        else:
-            user_id = identity
-        # 返回用户对象
-        return User.query.get(user_id)
+        # 每个JWT请求都会调用，返回进程内缓存的精简身份信息（用户不存在时为None，请求被拒绝），
+        # 不在每个请求中查询完整的User；需要User对象时使用identity模块的current_user()
+        from app.utils.identity import identity_loader
+        return identity_loader.get_identity(jwt_data["sub"])
     
     # 配置基本的 Auth0 参数
     oauth.register(
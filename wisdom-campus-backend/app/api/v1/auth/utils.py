@@ -2,12 +2,13 @@
 认证模块工具函数
 """
 import json
-import requests
+from app.utils.http_client import auth0_http
 from flask import current_app
 from app import db
 from app.models.user import User
 from app.utils.response import api_error
 from app.utils.error_codes import ErrorCode
+from app.utils.auth0_token import auth0_token_manager, Auth0TokenError
 from datetime import datetime
 
 def get_auth0_token():
@@ -17,41 +18,24 @@ def get_auth0_token():
     返回:
         str: Auth0访问令牌，如果获取失败则返回None
     """
-    domain = current_app.config.get("AUTH0_DOMAIN")
-    client_id = current_app.config.get("AUTH0_CLIENT_ID")
-    client_secret = current_app.config.get("AUTH0_CLIENT_SECRET")
-    audience = f"https://{domain}/api/v2/"
-    
-    payload = {
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "audience": audience,
-        "grant_type": "client_credentials"
-    }
-    
-    response = requests.post(
-        f"https://{domain}/oauth/token",
-        json=payload,
-        headers={"content-type": "application/json"}
-    )
-    
-    if response.status_code != 200:
-        current_app.logger.error(f"获取Auth0令牌失败: HTTP {response.status_code}, 响应: {response.text}")
+    try:
+        return auth0_token_manager.get_token()
+    except Auth0TokenError as e:
+        current_app.logger.error(f"获取Auth0令牌失败: {str(e)}")
         return None
-    
-    return response.json().get("access_token")
 
-def delete_auth0_user(auth0_id):
+def delete_auth0_user(auth0_id, token=None):
     """
     删除Auth0中的用户
     
     参数:
         auth0_id (str): Auth0用户ID
+        token (str): Auth0管理令牌，为空时自动获取
         
     返回:
         tuple: (成功标志, 错误消息)
     """
-    token = get_auth0_token()
+    token = token or get_auth0_token()
     if not token:
         return False, "获取Auth0管理Token失败"
     
@@ -62,7 +46,7 @@ def delete_auth0_user(auth0_id):
     }
     
     try:
-        response = requests.delete(
+        response = auth0_http.delete(
             f"https://{domain}/api/v2/users/{auth0_id}",
             headers=headers
         )
@@ -84,17 +68,18 @@ def delete_auth0_user(auth0_id):
         current_app.logger.error(f"删除Auth0用户异常: {str(e)}")
         return False, f"删除Auth0用户时发生异常: {str(e)}"
 
-def search_auth0_user_by_email(email):
+def search_auth0_user_by_email(email, token=None):
     """
     通过邮箱在Auth0中搜索用户
     
     参数:
         email (str): 用户邮箱
+        token (str): Auth0管理令牌，为空时自动获取
         
     返回:
         dict: 用户信息，如果未找到则返回None
     """
-    token = get_auth0_token()
+    token = token or get_auth0_token()
     if not token:
         return None
     
@@ -109,7 +94,7 @@ def search_auth0_user_by_email(email):
     query = f"email:\"{email}\""
     
     try:
-        response = requests.get(
+        response = auth0_http.get(
             f"https://{domain}/api/v2/users?q={query}&search_engine=v3",
             headers=headers
         )
@@ -3,14 +3,15 @@
 """
 from flask import request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-import requests
+from app.utils.http_client import auth0_http
 import logging
 from app.models.user import User, db
 from app.utils.response import api_success, api_error
 from app.utils.error_codes import ErrorCode
+from app.utils.identity import identity_loader
 import time
 from datetime import datetime, timedelta
-from app.api.v1.auth.utils import get_auth0_token
+from app.api.v1.auth.utils import get_auth0_token, delete_auth0_user
 
 logger = logging.getLogger(__name__)
 
@@ -45,33 +46,17 @@ def api_send_verification_email():
     # 获取Auth0配置
     domain = current_app.config['AUTH0_DOMAIN']
     client_id = current_app.config['AUTH0_CLIENT_ID']
-    client_secret = current_app.config['AUTH0_CLIENT_SECRET']
-    audience = f"https://{domain}/api/v2/"
-    
-    # 获取管理API访问令牌
-    token_url = f"https://{domain}/oauth/token"
-    token_payload = {
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "audience": audience,
-        "grant_type": "client_credentials"
-    }
-    
-    token_headers = {"content-type": "application/json"}
     
     try:
-        token_response = requests.post(token_url, json=token_payload, headers=token_headers)
-        token_data = token_response.json()
+        # 获取管理API访问令牌
+        access_token = get_auth0_token()
         
-        if 'access_token' not in token_data:
-            logger.error(f"获取Auth0令牌失败: {token_data}")
+        if not access_token:
             return api_error(
                 message="发送验证邮件失败：服务错误",
                 error_code=ErrorCode.AUTH0_ERROR
             )
         
-        access_token = token_data['access_token']
-        
         # 检查用户的Auth0 ID是否存在
         if not user.auth0_id:
             return api_error(
@@ -102,7 +87,7 @@ def api_send_verification_email():
             "client_id": client_id
         }
         
-        response = requests.post(user_url, json=payload, headers=headers)
+        response = auth0_http.post(user_url, json=payload, headers=headers)
         
         if response.status_code == 201:
             # 更新用户的验证邮件发送时间
@@ -159,6 +144,7 @@ def check_verification(user, force_update=False):
             user.email_verified = True
             try:
                 db.session.commit()
+                identity_loader.invalidate(user.id)
                 logger.info(f"模拟模式：用户 {user.id} 邮箱自动标记为已验证")
             except Exception as e:
                 db.session.rollback()
@@ -180,34 +166,17 @@ def check_verification(user, force_update=False):
     
     # 获取Auth0配置
     domain = current_app.config['AUTH0_DOMAIN']
-    client_id = current_app.config['AUTH0_CLIENT_ID']
-    client_secret = current_app.config['AUTH0_CLIENT_SECRET']
-    audience = f"https://{domain}/api/v2/"
-    
-    # 获取管理API访问令牌
-    token_url = f"https://{domain}/oauth/token"
-    token_payload = {
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "audience": audience,
-        "grant_type": "client_credentials"
-    }
-    
-    token_headers = {"content-type": "application/json"}
     
     try:
-        token_response = requests.post(token_url, json=token_payload, headers=token_headers)
-        token_data = token_response.json()
+        # 获取管理API访问令牌
+        access_token = get_auth0_token()
         
-        if 'access_token' not in token_data:
-            logger.error(f"获取Auth0令牌失败: {token_data}")
+        if not access_token:
             return api_error(
                 message="验证邮箱失败：服务错误",
                 error_code=ErrorCode.AUTH0_ERROR
             )
         
-        access_token = token_data['access_token']
-        
         # 获取用户信息
         auth0_id = user.auth0_id.replace("|", "%7C")  # URL编码
         user_url = f"https://{domain}/api/v2/users/{auth0_id}"
@@ -216,7 +185,7 @@ def check_verification(user, force_update=False):
             "content-type": "application/json"
         }
         
-        response = requests.get(user_url, headers=headers)
+        response = auth0_http.get(user_url, headers=headers)
         
         if response.status_code == 200:
             user_data = response.json()
@@ -227,6 +196,7 @@ def check_verification(user, force_update=False):
                 user.email_verified = is_verified
                 try:
                     db.session.commit()
+                    identity_loader.invalidate(user.id)
                     logger.info(f"用户 {user.id} 邮箱验证状态更新为: {is_verified}")
                 except Exception as e:
                     db.session.rollback()
@@ -355,17 +325,19 @@ def cleanup_unverified_users():
         auth0_ids = [user.auth0_id for user in users if user.auth0_id]
         
         deleted_count = 0
-        # 删除Auth0用户
-        for auth0_id in auth0_ids:
-            try:
-                token = get_auth0_token()
-                if token:
-                    from app.api.v1.auth.utils import delete_auth0_user
-                    delete_auth0_user(auth0_id)
-                    logger.info(f"从Auth0删除未验证用户: {auth0_id}")
-                    deleted_count += 1
-            except Exception as e:
-                logger.error(f"删除Auth0用户失败: {str(e)}")
+        # 删除Auth0用户，整批只获取一次管理令牌
+        if auth0_ids:
+            token = get_auth0_token()
+            if not token:
+                logger.error("获取Auth0令牌失败，无法删除Auth0用户")
+            else:
+                for auth0_id in auth0_ids:
+                    try:
+                        delete_auth0_user(auth0_id, token=token)
+                        logger.info(f"从Auth0删除未验证用户: {auth0_id}")
+                        deleted_count += 1
+                    except Exception as e:
+                        logger.error(f"删除Auth0用户失败: {str(e)}")
         
         # 删除本地用户记录
         try:
@@ -0,0 +1,9 @@
+"""
+社区模块API
+"""
+from flask import Blueprint
+
+community_bp = Blueprint('community', __name__)
+
+# 已实现的子模块（放在community_bp定义之后导入，子模块中注册路由）
+from . import posts, likes, comments, messages
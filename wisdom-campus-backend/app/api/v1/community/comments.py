@@ -0,0 +1,249 @@
+"""
+评论楼API
+热门问答帖子有上千条回复，不通过Comment.replies逐层懒加载（每个节点一条查询），
+一页评论楼固定三条查询，与回复数量和层数无关：
+1. 按(created_at, id)游标取一页顶层评论（或某条评论的直接回复）
+2. 一次取出帖子下全部正常状态回复的(id, parent_id)，在内存中建立父子关系（O(n)）
+3. 从本页的评论出发按层展开，受max_depth和max_replies限制，再按ID批量读取选中的回复
+被举报或封禁的评论连同其下的回复不展示；被截断的节点返回reply_count，客户端用parent_id参数继续展开
+发表和删除评论时在同一事务中原子增减Post.comments_count
+"""
+import logging
+from collections import defaultdict
+
+from flask import request
+from sqlalchemy import select, func, case
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.api.v1.community import community_bp
+from app.api.v1.community.feed import feed_engine
+from app.api.v1.community.likes import annotate_likes
+from app.api.v1.learning.utils import parse_int
+from app.models.community import Post, Comment, LikeRecord
+from app.schemas.community import comment_bulk_serializer
+from app.utils.auth import requires_auth
+from app.utils.error_codes import ErrorCode
+from app.utils.identity import current_user_id, current_identity
+from app.utils.pagination import cursor_paginate, InvalidCursor, CursorPage, api_cursor_page
+from app.utils.response import api_success, api_error
+
+logger = logging.getLogger(__name__)
+
+# 评论内容最大长度
+MAX_CONTENT_LENGTH = 2000
+
+# 展开层数和每页展开的回复数的默认值与上限
+DEFAULT_DEPTH, MAX_DEPTH = 3, 10
+DEFAULT_REPLIES, MAX_REPLIES = 200, 500
+
+# IN查询每批最多的ID数
+_BATCH_SIZE = 500
+
+
+def _reply_edges(post_id, normal_only=True):
+    """一条查询取出帖子下全部回复的(id, parent_id)，按发表顺序返回 父评论ID -> 子评论ID列表"""
+    comment = Comment.__table__
+    condition = [comment.c.post_id == post_id, comment.c.parent_id.isnot(None)]
+    if normal_only:
+        condition.append(comment.c.status == 'normal')
+    children = defaultdict(list)
+    for comment_id, parent_id in db.session.execute(
+            select(comment.c.id, comment.c.parent_id).where(*condition)
+            .order_by(comment.c.created_at, comment.c.id)):
+        children[parent_id].append(comment_id)
+    return children
+
+
+def select_replies(root_ids, children, max_depth, max_replies):
+    """
+    从root_ids出发按层（广度优先）选出要展开的回复，浅层的回复优先
+
+    参数:
+        root_ids: 本页评论ID（第0层）
+        children: 父评论ID -> 子评论ID列表
+        max_depth: 最多展开的层数，0表示不展开
+        max_replies: 最多展开的回复总数
+
+    返回:
+        选中的回复ID列表（每条回复的父评论都已被选中或是本页评论）
+    """
+    selected = []
+    level = list(root_ids)
+    for _ in range(max_depth):
+        next_level = []
+        for parent_id in level:
+            for child_id in children.get(parent_id, ()):
+                if len(selected) >= max_replies:
+                    return selected
+                selected.append(child_id)
+                next_level.append(child_id)
+        if not next_level:
+            break
+        level = next_level
+    return selected
+
+
+def build_thread(roots, replies, children):
+    """
+    把本页评论和选中的回复组装成树，O(n)
+
+    每个节点带replies（已展开的直接回复，按发表顺序）和reply_count（全部直接回复数），
+    len(replies) < reply_count时说明该节点被截断
+    """
+    nodes = {}
+    for item in roots + replies:
+        item['replies'] = []
+        item['reply_count'] = len(children.get(item['id'], ()))
+        nodes[item['id']] = item
+    # replies按select_replies的顺序排列，同一父评论的回复在其中保持发表顺序
+    for item in replies:
+        parent = nodes.get(item['parent_id'])
+        if parent is not None:
+            parent['replies'].append(item)
+    return roots
+
+
+def _load_comments(comment_ids):
+    """按给定顺序批量读取评论并序列化，每批一条查询"""
+    comment_ids = list(comment_ids)
+    by_id = {}
+    for start in range(0, len(comment_ids), _BATCH_SIZE):
+        by_id.update((row.id, row) for row in comment_bulk_serializer.query().filter(
+            Comment.id.in_(comment_ids[start:start + _BATCH_SIZE])
+        ))
+    return comment_bulk_serializer.dump_rows([by_id[comment_id] for comment_id in comment_ids if comment_id in by_id])
+
+
+def _bounded_int(name, default, low, high):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    value = parse_int(value)
+    if value is None or value < low or value > high:
+        raise ValueError(f"无效的参数: {name}，取值范围{low}-{high}")
+    return value
+
+
+def _post_visible(post_id):
+    return db.session.query(Post.id).filter(Post.id == post_id, Post.status == 'normal').first() is not None
+
+
+@community_bp.route('/posts/<int:post_id>/comments', methods=['GET'])
+@requires_auth
+def get_comments(post_id):
+    """
+    获取评论楼
+
+    查询参数:
+        parent_id: 只取该评论的直接回复（展开被截断的节点），默认取顶层评论
+        cursor: 上一页返回的next_cursor
+        per_page: 每页评论数，默认20，最大50
+        max_depth: 每条评论向下展开的层数，默认3，最大10，0表示不展开
+        max_replies: 本页最多展开的回复总数，默认200，最大500
+    """
+    try:
+        per_page = _bounded_int('per_page', 20, 1, 50)
+        max_depth = _bounded_int('max_depth', DEFAULT_DEPTH, 0, MAX_DEPTH)
+        max_replies = _bounded_int('max_replies', DEFAULT_REPLIES, 0, MAX_REPLIES)
+    except ValueError as e:
+        return api_error(message=str(e), code=ErrorCode.INVALID_REQUEST)
+    parent_id = request.args.get('parent_id')
+    if parent_id is not None:
+        parent_id = parse_int(parent_id)
+        if parent_id is None:
+            return api_error(message="无效的参数: parent_id", code=ErrorCode.INVALID_REQUEST)
+    if not _post_visible(post_id):
+        return api_error(message="帖子不存在", code=ErrorCode.POST_NOT_FOUND, status_code=404)
+
+    query = comment_bulk_serializer.query().filter(
+        Comment.post_id == post_id, Comment.status == 'normal',
+        Comment.parent_id.is_(None) if parent_id is None else Comment.parent_id == parent_id
+    )
+    try:
+        page = cursor_paginate(query, (Comment.created_at, Comment.id), per_page=per_page,
+                               cursor=request.args.get('cursor'), descending=False)
+    except InvalidCursor as e:
+        return api_error(message=str(e), code=ErrorCode.INVALID_REQUEST)
+
+    roots = comment_bulk_serializer.dump_rows(page.items)
+    children = _reply_edges(post_id) if roots else {}
+    replies = _load_comments(select_replies([item['id'] for item in roots], children, max_depth, max_replies))
+    annotate_likes(roots + replies, 'comment', current_user_id())
+    thread = build_thread(roots, replies, children)
+    return api_cursor_page(CursorPage(thread, page.next_cursor, per_page), items_key='comments')
+
+
+@community_bp.route('/posts/<int:post_id>/comments', methods=['POST'])
+@requires_auth
+def create_comment(post_id):
+    """
+    发表评论
+
+    请求体:
+        content: 评论内容，不超过2000个字符
+        parent_id: 回复的评论ID，默认为顶层评论
+    """
+    json_data = request.get_json(silent=True) or {}
+    content = (json_data.get('content') or '').strip()
+    parent_id = json_data.get('parent_id')
+    if not content or len(content) > MAX_CONTENT_LENGTH:
+        return api_error(message=f"评论内容不能为空且不超过{MAX_CONTENT_LENGTH}个字符", code=ErrorCode.INVALID_REQUEST)
+    if parent_id is not None and (not isinstance(parent_id, int) or isinstance(parent_id, bool)):
+        return api_error(message="无效的参数: parent_id", code=ErrorCode.INVALID_REQUEST)
+    if not _post_visible(post_id):
+        return api_error(message="帖子不存在", code=ErrorCode.POST_NOT_FOUND, status_code=404)
+    if parent_id is not None and db.session.query(Comment.id).filter(
+            Comment.id == parent_id, Comment.post_id == post_id, Comment.status == 'normal').first() is None:
+        return api_error(message="评论不存在", code=ErrorCode.COMMENT_NOT_FOUND, status_code=404)
+
+    comment = Comment(post_id=post_id, user_id=current_user_id(), content=content, parent_id=parent_id,
+                      likes_count=0, status='normal')
+    post = Post.__table__
+    try:
+        db.session.add(comment)
+        # 原子累加，不读取当前值，并发发表评论不会丢失计数
+        db.session.execute(post.update().where(post.c.id == post_id)
+                           .values(comments_count=func.coalesce(post.c.comments_count, 0) + 1))
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"发表评论时发生数据库错误: {str(e)}")
+        return api_error(message="发表评论失败", code=ErrorCode.DB_ERROR, status_code=500)
+    feed_engine.refresh([post_id])
+    data = _load_comments([comment.id])[0]
+    data.update(replies=[], reply_count=0, liked=False)
+    return api_success(message="评论已发表", data=data)
+
+
+@community_bp.route('/comments/<int:comment_id>', methods=['DELETE'])
+@requires_auth
+def delete_comment(comment_id):
+    """删除评论（作者或管理员），其下的全部回复和这些评论的点赞记录一并删除"""
+    comment = db.session.query(Comment.id, Comment.post_id, Comment.user_id).filter(Comment.id == comment_id).first()
+    identity = current_identity()
+    if comment is None or (comment.user_id != current_user_id() and not (identity is not None and identity.is_admin)):
+        return api_error(message="评论不存在", code=ErrorCode.COMMENT_NOT_FOUND, status_code=404)
+
+    # 在内存中从回复关系找出整棵子树，不逐层查询
+    children = _reply_edges(comment.post_id, normal_only=False)
+    subtree = [comment_id]
+    for parent_id in subtree:
+        subtree.extend(children.get(parent_id, ()))
+
+    table, like, post = Comment.__table__, LikeRecord.__table__, Post.__table__
+    try:
+        for start in range(0, len(subtree), _BATCH_SIZE):
+            batch = subtree[start:start + _BATCH_SIZE]
+            db.session.execute(like.delete().where(like.c.target_type == 'comment', like.c.target_id.in_(batch)))
+            db.session.execute(table.delete().where(table.c.id.in_(batch)))
+        db.session.execute(post.update().where(post.c.id == comment.post_id).values(
+                comments_count=case((post.c.comments_count > len(subtree), post.c.comments_count - len(subtree)), else_=0)
+        ))
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"删除评论时发生数据库错误: {str(e)}")
+        return api_error(message="删除评论失败", code=ErrorCode.DB_ERROR, status_code=500)
+    feed_engine.refresh([comment.post_id])
+    return api_success(message="评论已删除", data={'deleted': len(subtree)})
@@ -0,0 +1,231 @@
+"""
+社区信息流
+每个类别（以及全部类别）各维护两个有序集合：hot（热度）和new（最新），成员为帖子ID：
+- 热度分 = log10(max(点赞数 + 2×评论数, 1)) + (发布时间 - HOT_EPOCH)的秒数 / HOT_DECAY_SECONDS，
+  时间项让新帖子自然排在旧帖子前面（晚发布HOT_DECAY_SECONDS秒的帖子，旧帖子需要10倍的互动才能持平），
+  因此分数只在点赞、评论变化时重算，不需要定时刷新全部帖子
+- 最新分为发布时间的时间戳
+- 只有status为normal的帖子进入信息流，被举报(reported)或封禁(banned)时移除
+- 帖子通过ORM发布、修改、删除时，提交后由Session事件更新；不经过ORM的批量修改（如点赞计数）之后调用refresh
+- 第一次读取信息流时从数据库载入每个类别最新的FEED_MAX_ITEMS个帖子，每个集合最多保留FEED_MAX_ITEMS个
+- 取一页是对有序集合的一次切片（O(log n + 页大小)），再按ID批量读取这一页的帖子
+- 有序集合存储可以替换（store_factory，接口见app.utils.sorted_set）；使用默认的进程内存储时，
+  其他进程的写入最多在FEED_RELOAD_INTERVAL秒后整体重新载入时反映到本进程
+"""
+import math
+import time
+import logging
+import threading
+from datetime import datetime
+
+from sqlalchemy import event, inspect, select
+
+from app import db
+from app.utils.pagination import encode_cursor, decode_cursor, InvalidCursor
+from app.utils.sorted_set import MemorySortedSetStore
+
+logger = logging.getLogger(__name__)
+
+# 帖子类别，与Post.category枚举一致
+CATEGORIES = ('note_share', 'qa', 'discussion')
+FEED_KINDS = ('hot', 'new')
+
+# 热度分的时间起点和衰减周期（秒）
+HOT_EPOCH = datetime(2024, 1, 1)
+HOT_DECAY_SECONDS = 45000
+
+# 一条评论在热度中相当于几次点赞
+COMMENT_WEIGHT = 2
+
+# 这些字段变化时需要更新信息流
+_WATCHED_FIELDS = ('category', 'status', 'likes_count', 'comments_count', 'created_at')
+
+
+def hot_score(likes, comments, created_at):
+    engagement = max((likes or 0) + COMMENT_WEIGHT * (comments or 0), 1)
+    return round(math.log10(engagement) + (created_at - HOT_EPOCH).total_seconds() / HOT_DECAY_SECONDS, 7)
+
+
+def new_score(created_at):
+    return (created_at - HOT_EPOCH).total_seconds()
+
+
+def _key(kind, category=None):
+    return f'feed:{kind}:{category or "all"}'
+
+
+class FeedEngine:
+    """
+    社区信息流排序
+
+    在create_app中调用init_app注册Session事件
+    """
+
+    def __init__(self, store_factory=MemorySortedSetStore, max_items=20000, reload_interval=300):
+        self.store_factory = store_factory
+        self.store = None
+        self.max_items = max_items
+        self.reload_interval = reload_interval
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置读取参数并注册Session事件"""
+        self.max_items = app.config.get('FEED_MAX_ITEMS', self.max_items)
+        self.reload_interval = app.config.get('FEED_RELOAD_INTERVAL', self.reload_interval)
+        for name, listener in (('after_flush', self._after_flush), ('after_commit', self._after_commit),
+                               ('after_rollback', self._after_rollback)):
+            if not event.contains(db.session, name, listener):
+                event.listen(db.session, name, listener)
+
+    # ---- 载入 ----
+
+    def _ensure_loaded(self):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and (not self.reload_interval or time.monotonic() - loaded_at < self.reload_interval):
+            return
+        with self._lock:
+            if self._loaded_at == loaded_at:
+                self.load()
+
+    def load(self):
+        """从数据库载入每个类别最新的max_items个正常状态的帖子，构建新的存储后整体替换"""
+        from app.models.community import Post
+
+        post = Post.__table__
+        store = self.store_factory()
+        count = 0
+        with db.engine.connect() as conn:
+            for category in CATEGORIES:
+                rows = conn.execute(
+                    select(post.c.id, post.c.category, post.c.likes_count, post.c.comments_count,
+                           post.c.created_at, post.c.status)
+                    .where(post.c.category == category, post.c.status == 'normal')
+                    .order_by(post.c.created_at.desc(), post.c.id.desc()).limit(self.max_items)
+                )
+                for row in rows:
+                    self._index(store, row)
+                    count += 1
+        for kind in FEED_KINDS:
+            store.trim(_key(kind), self.max_items)
+        self.store = store
+        self._loaded_at = time.monotonic()
+        logger.info(f"信息流已载入 {count} 个帖子")
+
+    @staticmethod
+    def _index(store, row):
+        """按帖子的当前状态加入或移出各个集合"""
+        listed = row.status == 'normal' and row.created_at is not None
+        for kind in FEED_KINDS:
+            for category in CATEGORIES:
+                if not listed or category != row.category:
+                    store.remove(_key(kind, category), row.id)
+            if not listed:
+                store.remove(_key(kind), row.id)
+        if not listed:
+            return
+        for kind, score in (('hot', hot_score(row.likes_count, row.comments_count, row.created_at)),
+                            ('new', new_score(row.created_at))):
+            store.add(_key(kind, row.category), row.id, score)
+            store.add(_key(kind), row.id, score)
+
+    def refresh(self, post_ids):
+        """
+        帖子发布、状态或计数变化后调用，按数据库中的当前值重新排序（已删除的帖子移出信息流）
+
+        本进程还没有载入信息流时不做任何事，载入时会读到最新的值
+        """
+        from app.models.community import Post
+
+        store = self.store
+        post_ids = set(post_ids)
+        if store is None or not post_ids:
+            return
+        post = Post.__table__
+        with db.engine.connect() as conn:
+            rows = conn.execute(
+                select(post.c.id, post.c.category, post.c.likes_count, post.c.comments_count,
+                       post.c.created_at, post.c.status)
+                .where(post.c.id.in_(post_ids))
+            ).fetchall()
+        for row in rows:
+            self._index(store, row)
+        for post_id in post_ids - {row.id for row in rows}:
+            for kind in FEED_KINDS:
+                store.remove(_key(kind), post_id)
+                for category in CATEGORIES:
+                    store.remove(_key(kind, category), post_id)
+        for kind in FEED_KINDS:
+            for category in (None,) + CATEGORIES:
+                if store.card(_key(kind, category)) > self.max_items:
+                    store.trim(_key(kind, category), self.max_items)
+
+    # ---- 读取 ----
+
+    def page(self, kind='hot', category=None, cursor=None, limit=20):
+        """
+        取信息流的一页帖子ID
+
+        参数:
+            kind: hot或new
+            category: 类别，None表示全部
+            cursor: 上一页返回的next_cursor
+
+        返回:
+            (帖子ID列表, next_cursor)
+
+        异常:
+            InvalidCursor: 游标无效
+        """
+        after = None
+        if cursor:
+            score, post_id = decode_cursor(cursor, size=2)
+            if not isinstance(score, (int, float)) or not isinstance(post_id, int):
+                raise InvalidCursor("无效的分页游标")
+            after = (score, post_id)
+        self._ensure_loaded()
+        items = self.store.page(_key(kind, category), after, limit + 1)
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor([items[-1][1], items[-1][0]])
+        return [post_id for post_id, _ in items], next_cursor
+
+    # ---- Session事件 ----
+
+    @staticmethod
+    def _after_flush(session, flush_context):
+        """收集本次flush中发布、修改或删除的帖子，提交后再更新信息流（回滚时丢弃）"""
+        from app.models.community import Post
+
+        affected = set()
+        for obj in session.new:
+            if isinstance(obj, Post):
+                affected.add(obj.id)
+        for obj in session.dirty:
+            if isinstance(obj, Post) and any(
+                    inspect(obj).attrs[key].history.has_changes() for key in _WATCHED_FIELDS):
+                affected.add(obj.id)
+        for obj in session.deleted:
+            if isinstance(obj, Post):
+                affected.add(inspect(obj).dict.get('id'))
+        affected.discard(None)
+        if affected:
+            session.info.setdefault('_feed_posts', set()).update(affected)
+
+    def _after_commit(self, session):
+        affected = session.info.pop('_feed_posts', None)
+        if affected:
+            try:
+                self.refresh(affected)
+            except Exception as e:
+                # 信息流更新失败不影响已提交的写入，下次整体载入时修正
+                logger.error(f"更新信息流失败: {str(e)}")
+
+    @staticmethod
+    def _after_rollback(session):
+        session.info.pop('_feed_posts', None)
+
+
+# 全局信息流实例，在create_app中通过init_app注册
+feed_engine = FeedEngine()
@@ -0,0 +1,197 @@
+"""
+私信会话
+每个用户与每个私信对象在conversation表中有一行会话摘要（最后一条私信、该用户的未读数），
+收件箱直接按(user_id, last_message_at)翻页，不再对message表按对方分组：
+- 私信带pair_key（"较小用户ID:较大用户ID"），两个方向的私信共用，会话历史按(pair_key, sent_at)索引倒序翻页
+- 发送时在同一事务中插入私信并原子更新双方的会话行：两行都更新最后一条私信，接收方未读数+1；
+  两行按用户ID顺序加锁，互相发送私信的并发请求不会死锁
+- 标记会话已读是一条UPDATE，再按实际标记的条数减少未读数（不直接清零，避免吞掉同时到达的新私信）
+- 发送成功后向接收方推送message事件（app.utils.push），在线客户端不需要轮询收件箱
+- 上线前的历史私信由rebuild_conversations补写pair_key并重建会话行（scripts/backfill_conversations.py）
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import select, func, case, bindparam
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# 私信内容最大长度
+MAX_CONTENT_LENGTH = 2000
+
+# 回填每个事务处理的行数
+_CHUNK_SIZE = 1000
+
+
+def pair_key(user_id, peer_id):
+    """两个用户之间的会话键，与发送方向无关"""
+    low, high = sorted((user_id, peer_id))
+    return f'{low}:{high}'
+
+
+def _ensure_conversations(user_id, peer_id, now):
+    """确保双方的会话行存在；并发请求同时创建时由唯一索引去重"""
+    from app.models.community import Conversation
+
+    table = Conversation.__table__
+    existing = set(db.session.execute(
+        select(table.c.user_id).where(
+            ((table.c.user_id == user_id) & (table.c.peer_id == peer_id))
+            | ((table.c.user_id == peer_id) & (table.c.peer_id == user_id))
+        )
+    ).scalars())
+    missing = [(owner, other) for owner, other in ((user_id, peer_id), (peer_id, user_id)) if owner not in existing]
+    for owner, other in missing:
+        try:
+            db.session.execute(table.insert().values(user_id=owner, peer_id=other, last_message_at=now, unread_count=0))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
+
+def send_message(sender_id, receiver_id, content, now=None):
+    """
+    发送私信并更新双方的会话摘要
+
+    返回:
+        私信的字典（id, sender_id, receiver_id, content, is_read, sent_at）
+    """
+    from app.models.community import Message, Conversation
+    from app.utils.push import push_hub
+
+    now = now or datetime.utcnow()
+    _ensure_conversations(sender_id, receiver_id, now)
+
+    message, conversation = Message.__table__, Conversation.__table__
+    try:
+        message_id = db.session.execute(message.insert().values(
+            sender_id=sender_id, receiver_id=receiver_id, pair_key=pair_key(sender_id, receiver_id),
+            content=content, is_read=False, sent_at=now
+        )).inserted_primary_key[0]
+        newer = conversation.c.last_message_at <= now
+        for owner, other in sorted(((sender_id, receiver_id), (receiver_id, sender_id))):
+            values = {
+                # 并发发送时只让更晚的私信成为最后一条
+                'last_message_id': case((newer, message_id), else_=conversation.c.last_message_id),
+                'last_message_at': case((newer, now), else_=conversation.c.last_message_at),
+            }
+            if owner == receiver_id:
+                values['unread_count'] = conversation.c.unread_count + 1
+            db.session.execute(conversation.update().where(
+                conversation.c.user_id == owner, conversation.c.peer_id == other
+            ).values(**values))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    data = {'id': message_id, 'sender_id': sender_id, 'receiver_id': receiver_id, 'content': content,
+            'is_read': False, 'sent_at': now.isoformat()}
+    push_hub.publish(receiver_id, 'message', data)
+    return data
+
+
+def mark_read(user_id, peer_id):
+    """
+    把peer_id发给user_id的未读私信全部标记为已读（一条UPDATE），并减少会话未读数
+
+    返回:
+        标记的私信数
+    """
+    from app.models.community import Message, Conversation
+
+    message, conversation = Message.__table__, Conversation.__table__
+    try:
+        marked = db.session.execute(message.update().where(
+            message.c.pair_key == pair_key(user_id, peer_id),
+            message.c.receiver_id == user_id,
+            message.c.is_read.is_(False)
+        ).values(is_read=True)).rowcount
+        if marked:
+            db.session.execute(conversation.update().where(
+                conversation.c.user_id == user_id, conversation.c.peer_id == peer_id
+            ).values(unread_count=case(
+                (conversation.c.unread_count > marked, conversation.c.unread_count - marked), else_=0
+            )))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return marked
+
+
+def unread_total(user_id):
+    """用户全部会话的未读私信数"""
+    from app.models.community import Conversation
+
+    return int(db.session.execute(
+        select(func.coalesce(func.sum(Conversation.unread_count), 0)).where(Conversation.user_id == user_id)
+    ).scalar())
+
+
+def rebuild_conversations(chunk_size=_CHUNK_SIZE):
+    """
+    为没有pair_key的历史私信补写会话键，并由message表重建全部会话行
+
+    返回:
+        {'messages': 补写会话键的私信数, 'conversations': 重建的会话行数}
+    """
+    from app.models.community import Message, Conversation
+
+    message, conversation = Message.__table__, Conversation.__table__
+    result = {'messages': 0, 'conversations': 0}
+
+    # 按主键分段补写pair_key，每段一个事务
+    last_id = 0
+    while True:
+        with db.engine.begin() as conn:
+            rows = conn.execute(
+                select(message.c.id, message.c.sender_id, message.c.receiver_id)
+                .where(message.c.id > last_id, message.c.pair_key.is_(None))
+                .order_by(message.c.id).limit(chunk_size)
+            ).fetchall()
+            if not rows:
+                break
+            conn.execute(
+                message.update().where(message.c.id == bindparam('message_id')).values(pair_key=bindparam('key')),
+                [{'message_id': row.id, 'key': pair_key(row.sender_id, row.receiver_id)} for row in rows]
+            )
+        last_id = rows[-1].id
+        result['messages'] += len(rows)
+
+    # 每个方向一次分组查询：最后一条私信和接收方的未读数
+    last_ids = {}
+    unread = defaultdict(int)
+    with db.engine.connect() as conn:
+        for row in conn.execute(
+                select(message.c.sender_id, message.c.receiver_id, func.max(message.c.id).label('last_id'),
+                       func.sum(case((message.c.is_read.is_(False), 1), else_=0)).label('unread'))
+                .group_by(message.c.sender_id, message.c.receiver_id)):
+            if row.sender_id == row.receiver_id:
+                continue
+            key = tuple(sorted((row.sender_id, row.receiver_id)))
+            last_ids[key] = max(last_ids.get(key, 0), row.last_id)
+            unread[(row.receiver_id, row.sender_id)] += int(row.unread or 0)
+
+    pairs = sorted(last_ids.items())
+    with db.engine.begin() as conn:
+        conn.execute(conversation.delete())
+        for start in range(0, len(pairs), chunk_size):
+            batch = pairs[start:start + chunk_size]
+            sent_at = dict(conn.execute(
+                select(message.c.id, message.c.sent_at).where(message.c.id.in_([last for _, last in batch]))
+            ).fetchall())
+            values = []
+            for (low, high), last in batch:
+                for owner, other in ((low, high), (high, low)):
+                    values.append({'user_id': owner, 'peer_id': other, 'last_message_id': last,
+                                   'last_message_at': sent_at[last] or datetime.utcnow(),
+                                   'unread_count': unread[(owner, other)]})
+            if values:
+                conn.execute(conversation.insert(), values)
+                result['conversations'] += len(values)
+    logger.info(f"私信会话重建完成: 补写会话键 {result['messages']} 条, 会话 {result['conversations']} 行")
+    return result
@@ -0,0 +1,278 @@
+"""
+点赞计数
+like_record上的(user_id, target_type, target_id)唯一索引保证同一用户对同一目标只有一条记录，
+点赞/取消点赞只插入或删除这条记录，实际发生变化时才计入计数增量：
+- 帖子和评论的likes_count不在请求中读改写，增量在内存中按目标合并，
+  由后台线程每隔LIKE_FLUSH_INTERVAL秒写入，每批一条
+  UPDATE post SET likes_count = likes_count + CASE id ... END WHERE id IN (...)，
+  原子累加，不会丢失并发请求的更新，热门帖子也不会因每次点赞加行锁而排队
+- 写入帖子计数后刷新信息流排序
+- 接口返回的点赞数叠加本进程中尚未写入的增量
+- 待写入目标数超过LIKE_MAX_PENDING时立即写入，进程退出时（atexit）写入剩余数据；
+  进程异常退出时丢失的增量由reconcile按like_record重新统计修正（scripts/reconcile_like_counts.py）
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from contextlib import nullcontext
+
+from flask import has_app_context
+from sqlalchemy import select, case, func
+
+logger = logging.getLogger(__name__)
+
+TARGET_TYPES = ('post', 'comment')
+
+# IN查询、UPDATE每批最多的目标数
+_BATCH_SIZE = 500
+
+# reconcile每个事务处理的目标数
+_CHUNK_SIZE = 1000
+
+
+def _target_table(target_type):
+    from app.models.community import Post, Comment
+
+    return {'post': Post, 'comment': Comment}[target_type].__table__
+
+
+def liked_ids(user_id, target_type, target_ids):
+    """
+    批量查询用户点赞过其中哪些目标，每批一条查询（使用(user_id, target_type, target_id)唯一索引）
+
+    返回:
+        点赞过的目标ID集合
+    """
+    from app import db
+    from app.models.community import LikeRecord
+
+    target_ids = sorted(set(target_ids))
+    if user_id is None or not target_ids:
+        return set()
+    like = LikeRecord.__table__
+    liked = set()
+    for start in range(0, len(target_ids), _BATCH_SIZE):
+        liked.update(db.session.execute(
+            select(like.c.target_id).where(
+                like.c.user_id == user_id,
+                like.c.target_type == target_type,
+                like.c.target_id.in_(target_ids[start:start + _BATCH_SIZE])
+            )
+        ).scalars())
+    return liked
+
+
+class LikeCounter:
+    """
+    点赞计数写缓冲
+
+    flush_interval为0时关闭缓冲，每次add立即写入数据库
+    """
+
+    def __init__(self, flush_interval=1, max_pending=5000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.app = None
+        self._pending = defaultdict(int)  # (目标类型, 目标ID) -> 增量
+        self._writing = {}  # 正在写入的增量，写入完成前仍计入pending_deltas
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stopped = False
+
+    def init_app(self, app):
+        """从应用配置读取参数，并注册退出时写入（全局实例只在第一次init_app时注册）"""
+        if self.app is None:
+            atexit.register(self.shutdown)
+        self.app = app
+        self.flush_interval = app.config.get('LIKE_FLUSH_INTERVAL', self.flush_interval)
+        self.max_pending = app.config.get('LIKE_MAX_PENDING', self.max_pending)
+
+    def add(self, target_type, target_id, delta):
+        """
+        记录点赞数增量
+
+        参数:
+            target_type: post或comment
+            target_id: 目标ID
+            delta: 1（点赞）或-1（取消点赞）
+        """
+        if not self.flush_interval:
+            self._write({(target_type, target_id): delta})
+            return
+
+        with self._lock:
+            self._pending[(target_type, target_id)] += delta
+            pending_count = len(self._pending)
+
+        self._ensure_thread()
+        if pending_count >= self.max_pending:
+            self._wakeup.set()
+
+    def pending_deltas(self, target_type, target_ids):
+        """返回这些目标在本进程中尚未写入数据库的增量，没有增量的目标不在结果中"""
+        deltas = {}
+        with self._lock:
+            for target_id in target_ids:
+                key = (target_type, target_id)
+                delta = self._pending.get(key, 0) + self._writing.get(key, 0)
+                if delta:
+                    deltas[target_id] = delta
+        return deltas
+
+    def flush(self):
+        """把缓冲中的增量写入数据库，返回写入的目标数"""
+        with self._flush_lock:
+            with self._lock:
+                pending = {key: delta for key, delta in self._pending.items() if delta}
+                self._pending = defaultdict(int)
+                if not pending:
+                    return 0
+                self._writing = pending
+
+            try:
+                self._write(pending)
+            except Exception as e:
+                logger.error(f"写入点赞计数失败，{len(pending)}个目标的增量将在下次重试: {str(e)}")
+                with self._lock:
+                    for key, delta in pending.items():
+                        self._pending[key] += delta
+                return 0
+            finally:
+                with self._lock:
+                    self._writing = {}
+            return len(pending)
+
+    def shutdown(self):
+        """停止后台线程并写入剩余数据"""
+        self._stopped = True
+        self._wakeup.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"退出时写入点赞计数失败: {str(e)}")
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='like-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"后台写入点赞计数异常: {str(e)}")
+
+    def _write(self, pending):
+        """在一个事务中按目标类型分批原子累加likes_count，然后刷新信息流"""
+        from app import db
+        from app.api.v1.community.feed import feed_engine
+
+        by_type = defaultdict(dict)
+        for (target_type, target_id), delta in pending.items():
+            if delta:
+                by_type[target_type][target_id] = delta
+        with self._app_context():
+            with db.engine.begin() as conn:
+                for target_type, deltas in by_type.items():
+                    table = _target_table(target_type)
+                    items = list(deltas.items())
+                    for start in range(0, len(items), _BATCH_SIZE):
+                        batch = dict(items[start:start + _BATCH_SIZE])
+                        conn.execute(
+                            table.update()
+                            .where(table.c.id.in_(list(batch.keys())))
+                            .values(likes_count=func.coalesce(table.c.likes_count, 0) + case(batch, value=table.c.id))
+                        )
+            if by_type.get('post'):
+                try:
+                    feed_engine.refresh(by_type['post'].keys())
+                except Exception as e:
+                    # 信息流更新失败不影响已写入的计数，下次整体载入时修正
+                    logger.error(f"更新信息流失败: {str(e)}")
+        logger.debug(f"已写入{len(pending)}个目标的点赞计数")
+
+    def reconcile(self, target_type, target_ids=None, chunk_size=_CHUNK_SIZE):
+        """
+        按like_record重新统计并修正likes_count，先写入本进程的缓冲，每段目标一次分组查询，只更新有偏差的目标
+
+        参数:
+            target_type: post或comment
+            target_ids: 只检查这些目标，默认按主键分段检查全部
+            chunk_size: 每段的目标数
+
+        返回:
+            {'checked': 检查的目标数, 'fixed': 修正的目标数}
+        """
+        self.flush()
+        table = _target_table(target_type)
+        result = {'checked': 0, 'fixed': 0}
+        with self._app_context():
+            if target_ids is not None:
+                target_ids = sorted(set(target_ids))
+                for start in range(0, len(target_ids), chunk_size):
+                    self._run_chunk(target_type, table, table.c.id.in_(target_ids[start:start + chunk_size]),
+                                    chunk_size, result)
+            else:
+                # 按主键分段，每段一个事务，不长时间锁表
+                last_id = 0
+                while last_id is not None:
+                    last_id = self._run_chunk(target_type, table, table.c.id > last_id, chunk_size, result)
+        logger.info(f"点赞计数修正完成({target_type}): 检查 {result['checked']} 个, 修正 {result['fixed']} 个")
+        return result
+
+    def _run_chunk(self, target_type, table, condition, chunk_size, result):
+        from app import db
+        from app.api.v1.community.feed import feed_engine
+
+        with db.engine.begin() as conn:
+            last_id, drifted = self._reconcile_chunk(conn, target_type, table, condition, chunk_size, result)
+        if drifted and target_type == 'post':
+            feed_engine.refresh(drifted)
+        return last_id
+
+    def _reconcile_chunk(self, conn, target_type, table, condition, chunk_size, result):
+        """修正一段目标，返回(本段最大的目标ID, 修正的目标ID列表)，没有目标时ID为None"""
+        from app.models.community import LikeRecord
+
+        like = LikeRecord.__table__
+        stored = conn.execute(
+            select(table.c.id, table.c.likes_count).where(condition).order_by(table.c.id).limit(chunk_size)
+        ).fetchall()
+        if not stored:
+            return None, []
+
+        ids = [row.id for row in stored]
+        actual = dict(conn.execute(
+            select(like.c.target_id, func.count())
+            .where(like.c.target_type == target_type, like.c.target_id.in_(ids))
+            .group_by(like.c.target_id)
+        ).fetchall())
+        drifted = {row.id: actual.get(row.id, 0) for row in stored if row.likes_count != actual.get(row.id, 0)}
+        for target_id, count in drifted.items():
+            conn.execute(table.update().where(table.c.id == target_id).values(likes_count=count))
+
+        result['checked'] += len(stored)
+        result['fixed'] += len(drifted)
+        return ids[-1], list(drifted)
+
+    def _app_context(self):
+        if has_app_context() or self.app is None:
+            return nullcontext()
+        return self.app.app_context()
+
+
+# 全局点赞计数写缓冲实例，在create_app中通过init_app加载配置
+like_counter = LikeCounter()
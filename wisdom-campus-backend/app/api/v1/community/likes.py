@@ -0,0 +1,119 @@
+"""
+点赞API
+"""
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app import db
+from app.api.v1.community import community_bp
+from app.api.v1.community.like_counter import like_counter, liked_ids
+from app.models.community import Post, Comment, LikeRecord
+from app.utils.auth import requires_auth
+from app.utils.error_codes import ErrorCode
+from app.utils.identity import current_user_id
+from app.utils.response import api_success, api_error
+
+logger = logging.getLogger(__name__)
+
+
+def annotate_likes(items, target_type, user_id):
+    """
+    为序列化后的帖子或评论加上当前用户的点赞状态（liked），并叠加本进程尚未写入的点赞数增量
+
+    一条查询完成整页的点赞状态查询
+    """
+    ids = [item['id'] for item in items]
+    liked = liked_ids(user_id, target_type, ids)
+    deltas = like_counter.pending_deltas(target_type, ids)
+    for item in items:
+        item['liked'] = item['id'] in liked
+        if item['id'] in deltas:
+            item['likes_count'] = max((item.get('likes_count') or 0) + deltas[item['id']], 0)
+    return items
+
+
+def _target_likes(target_type, target_id):
+    """返回正常状态目标的点赞数（已叠加未写入的增量），目标不存在或不可见时返回None"""
+    model = Post if target_type == 'post' else Comment
+    likes_count = db.session.execute(
+        select(model.likes_count).where(model.id == target_id, model.status == 'normal')
+    ).first()
+    if likes_count is None:
+        return None
+    delta = like_counter.pending_deltas(target_type, [target_id]).get(target_id, 0)
+    return max((likes_count[0] or 0) + delta, 0)
+
+
+def _like(target_type, target_id):
+    """点赞，重复点赞不重复计数"""
+    if _target_likes(target_type, target_id) is None:
+        return None
+    try:
+        db.session.execute(LikeRecord.__table__.insert().values(
+            user_id=current_user_id(), target_type=target_type, target_id=target_id
+        ))
+        db.session.commit()
+    except IntegrityError:
+        # 唯一约束冲突：已经点赞过
+        db.session.rollback()
+    else:
+        like_counter.add(target_type, target_id, 1)
+    return _target_likes(target_type, target_id)
+
+
+def _unlike(target_type, target_id):
+    """取消点赞，没有点赞过时不计数"""
+    if _target_likes(target_type, target_id) is None:
+        return None
+    like = LikeRecord.__table__
+    deleted = db.session.execute(like.delete().where(
+        like.c.user_id == current_user_id(), like.c.target_type == target_type, like.c.target_id == target_id
+    )).rowcount
+    db.session.commit()
+    if deleted:
+        like_counter.add(target_type, target_id, -1)
+    return _target_likes(target_type, target_id)
+
+
+def _handle(action, target_type, target_id, liked):
+    not_found = (ErrorCode.POST_NOT_FOUND, "帖子不存在") if target_type == 'post' \
+        else (ErrorCode.COMMENT_NOT_FOUND, "评论不存在")
+    try:
+        likes_count = action(target_type, target_id)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"{'点赞' if liked else '取消点赞'}时发生数据库错误: {str(e)}")
+        return api_error(message="操作失败", code=ErrorCode.DB_ERROR, status_code=500)
+    if likes_count is None:
+        return api_error(message=not_found[1], code=not_found[0], status_code=404)
+    return api_success(data={'liked': liked, 'likes_count': likes_count})
+
+
+@community_bp.route('/posts/<int:post_id>/like', methods=['POST'])
+@requires_auth
+def like_post(post_id):
+    """点赞帖子（幂等）"""
+    return _handle(_like, 'post', post_id, True)
+
+
+@community_bp.route('/posts/<int:post_id>/like', methods=['DELETE'])
+@requires_auth
+def unlike_post(post_id):
+    """取消点赞帖子（幂等）"""
+    return _handle(_unlike, 'post', post_id, False)
+
+
+@community_bp.route('/comments/<int:comment_id>/like', methods=['POST'])
+@requires_auth
+def like_comment(comment_id):
+    """点赞评论（幂等）"""
+    return _handle(_like, 'comment', comment_id, True)
+
+
+@community_bp.route('/comments/<int:comment_id>/like', methods=['DELETE'])
+@requires_auth
+def unlike_comment(comment_id):
+    """取消点赞评论（幂等）"""
+    return _handle(_unlike, 'comment', comment_id, False)
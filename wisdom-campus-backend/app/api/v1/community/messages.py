@@ -0,0 +1,144 @@
+"""
+私信API
+"""
+import logging
+
+from flask import request
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.api.v1.community import community_bp
+from app.api.v1.community.inbox import send_message, mark_read, unread_total, pair_key, MAX_CONTENT_LENGTH
+from app.api.v1.learning.utils import parse_int
+from app.models.community import Message, Conversation
+from app.models.user import User
+from app.utils.auth import requires_auth
+from app.utils.error_codes import ErrorCode
+from app.utils.identity import current_user_id
+from app.utils.pagination import cursor_paginate, InvalidCursor, api_cursor_page
+from app.utils.response import api_success, api_error
+
+logger = logging.getLogger(__name__)
+
+
+def _per_page():
+    return min(max(parse_int(request.args.get('per_page')) or 20, 1), 50)
+
+
+def _dump_conversation(row):
+    return {
+        'id': row.id,
+        'peer': {'id': row.peer_id, 'name': row.name, 'nickname': row.nickname, 'avatar_url': row.avatar_url},
+        'last_message': {
+            'id': row.last_message_id,
+            'sender_id': row.sender_id,
+            'content': row.content,
+            'sent_at': row.last_message_at.isoformat(),
+        } if row.last_message_id is not None else None,
+        'last_message_at': row.last_message_at.isoformat(),
+        'unread_count': row.unread_count,
+    }
+
+
+def _dump_message(row):
+    return {
+        'id': row.id,
+        'sender_id': row.sender_id,
+        'receiver_id': row.receiver_id,
+        'content': row.content,
+        'is_read': bool(row.is_read),
+        'sent_at': row.sent_at.isoformat() if row.sent_at else None,
+    }
+
+
+@community_bp.route('/conversations', methods=['GET'])
+@requires_auth
+def get_conversations():
+    """
+    获取收件箱（会话列表），按最后一条私信时间倒序
+
+    查询参数:
+        cursor: 上一页返回的next_cursor
+        per_page: 每页数量，默认20，最大50
+    """
+    query = db.session.query(
+        Conversation.id, Conversation.peer_id, Conversation.last_message_id, Conversation.last_message_at,
+        Conversation.unread_count, Message.sender_id, Message.content, User.name, User.nickname, User.avatar_url
+    ).join(User, User.id == Conversation.peer_id) \
+        .outerjoin(Message, Message.id == Conversation.last_message_id) \
+        .filter(Conversation.user_id == current_user_id())
+    try:
+        page = cursor_paginate(query, (Conversation.last_message_at, Conversation.id), per_page=_per_page(),
+                               cursor=request.args.get('cursor'))
+    except InvalidCursor as e:
+        return api_error(message=str(e), code=ErrorCode.INVALID_REQUEST)
+    return api_cursor_page(page, items_key='conversations', serializer=_dump_conversation)
+
+
+@community_bp.route('/conversations/unread-count', methods=['GET'])
+@requires_auth
+def get_unread_count():
+    """获取全部会话的未读私信数"""
+    return api_success(data={'unread_count': unread_total(current_user_id())})
+
+
+@community_bp.route('/conversations/<int:peer_id>/messages', methods=['GET'])
+@requires_auth
+def get_conversation_messages(peer_id):
+    """
+    获取与某个用户的私信历史，按发送时间倒序
+
+    查询参数:
+        cursor: 上一页返回的next_cursor
+        per_page: 每页数量，默认20，最大50
+    """
+    query = db.session.query(
+        Message.id, Message.sender_id, Message.receiver_id, Message.content, Message.is_read, Message.sent_at
+    ).filter(Message.pair_key == pair_key(current_user_id(), peer_id))
+    try:
+        page = cursor_paginate(query, (Message.sent_at, Message.id), per_page=_per_page(),
+                               cursor=request.args.get('cursor'))
+    except InvalidCursor as e:
+        return api_error(message=str(e), code=ErrorCode.INVALID_REQUEST)
+    return api_cursor_page(page, items_key='messages', serializer=_dump_message)
+
+
+@community_bp.route('/conversations/<int:peer_id>/read', methods=['POST'])
+@requires_auth
+def mark_conversation_read(peer_id):
+    """把与某个用户的会话全部标记为已读"""
+    try:
+        marked = mark_read(current_user_id(), peer_id)
+    except SQLAlchemyError as e:
+        logger.error(f"标记私信已读时发生数据库错误: {str(e)}")
+        return api_error(message="标记已读失败", code=ErrorCode.DB_ERROR, status_code=500)
+    return api_success(data={'marked': marked})
+
+
+@community_bp.route('/messages', methods=['POST'])
+@requires_auth
+def create_message():
+    """
+    发送私信
+
+    请求体:
+        receiver_id: 接收者用户ID
+        content: 私信内容，不超过2000个字符
+    """
+    json_data = request.get_json(silent=True) or {}
+    receiver_id = json_data.get('receiver_id')
+    content = (json_data.get('content') or '').strip()
+    sender_id = current_user_id()
+    if not isinstance(receiver_id, int) or isinstance(receiver_id, bool) or receiver_id == sender_id:
+        return api_error(message="无效的参数: receiver_id", code=ErrorCode.INVALID_REQUEST)
+    if not content or len(content) > MAX_CONTENT_LENGTH:
+        return api_error(message=f"私信内容不能为空且不超过{MAX_CONTENT_LENGTH}个字符", code=ErrorCode.INVALID_REQUEST)
+    if db.session.query(User.id).filter(User.id == receiver_id).first() is None:
+        return api_error(message="用户不存在", code=ErrorCode.USER_NOT_FOUND, status_code=404)
+
+    try:
+        message = send_message(sender_id, receiver_id, content)
+    except SQLAlchemyError as e:
+        logger.error(f"发送私信时发生数据库错误: {str(e)}")
+        return api_error(message="发送私信失败", code=ErrorCode.DB_ERROR, status_code=500)
+    return api_success(message="私信已发送", data=message)
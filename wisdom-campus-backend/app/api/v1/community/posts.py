@@ -0,0 +1,195 @@
+"""
+帖子与信息流API
+"""
+import logging
+
+from flask import request
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.api.v1.community import community_bp
+from app.api.v1.community.feed import feed_engine, CATEGORIES, FEED_KINDS
+from app.api.v1.community.likes import annotate_likes
+from app.api.v1.learning.utils import parse_int
+from app.models.community import Post, Comment, LikeRecord
+from app.schemas.community import post_bulk_serializer
+from app.utils.auth import requires_auth, requires_admin
+from app.utils.error_codes import ErrorCode
+from app.utils.identity import current_user_id, current_identity
+from app.utils.pagination import InvalidCursor
+from app.utils.response import api_success, api_error
+
+logger = logging.getLogger(__name__)
+
+POST_STATUSES = ('normal', 'reported', 'banned')
+
+
+def dump_posts(rows):
+    """序列化帖子，匿名帖子不返回作者"""
+    posts = post_bulk_serializer.dump_rows(rows)
+    for post in posts:
+        if post.get('is_anonymous'):
+            post['user_id'] = None
+            post['user'] = None
+    return posts
+
+
+def load_posts(post_ids, user_id=None):
+    """按给定顺序读取一组正常状态的帖子，一条查询；再用一条查询标出user_id点赞过的帖子"""
+    if not post_ids:
+        return []
+    rows = post_bulk_serializer.query().filter(Post.id.in_(post_ids), Post.status == 'normal').all()
+    by_id = {row.id: row for row in rows}
+    posts = dump_posts([by_id[post_id] for post_id in post_ids if post_id in by_id])
+    return annotate_likes(posts, 'post', user_id)
+
+
+def _can_manage(post):
+    identity = current_identity()
+    return post.user_id == current_user_id() or (identity is not None and identity.is_admin)
+
+
+@community_bp.route('/feed', methods=['GET'])
+@requires_auth
+def get_feed():
+    """
+    获取社区信息流
+
+    查询参数:
+        sort: hot（热度，默认）或new（最新）
+        category: 帖子类别（note_share/qa/discussion），默认全部
+        cursor: 上一页返回的next_cursor
+        limit: 每页数量，默认20，最大50
+    """
+    kind = request.args.get('sort', 'hot')
+    category = request.args.get('category') or None
+    if kind not in FEED_KINDS:
+        return api_error(message="无效的参数: sort", code=ErrorCode.INVALID_REQUEST)
+    if category is not None and category not in CATEGORIES:
+        return api_error(message="无效的参数: category", code=ErrorCode.INVALID_REQUEST)
+    limit = min(max(parse_int(request.args.get('limit')) or 20, 1), 50)
+
+    try:
+        post_ids, next_cursor = feed_engine.page(kind, category, request.args.get('cursor'), limit)
+    except InvalidCursor as e:
+        return api_error(message=str(e), code=ErrorCode.INVALID_REQUEST)
+    return api_success(data={
+        'posts': load_posts(post_ids, current_user_id()),
+        'per_page': limit,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    })
+
+
+@community_bp.route('/posts', methods=['POST'])
+@requires_auth
+def create_post():
+    """
+    发布帖子
+
+    请求体:
+        title: 标题，不超过100个字符
+        content: 内容
+        category: note_share/qa/discussion
+        is_anonymous: 是否匿名，默认false
+    """
+    json_data = request.get_json(silent=True) or {}
+    title = (json_data.get('title') or '').strip()
+    content = (json_data.get('content') or '').strip()
+    category = json_data.get('category')
+    if not title or len(title) > 100:
+        return api_error(message="标题不能为空且不超过100个字符", code=ErrorCode.INVALID_REQUEST)
+    if not content:
+        return api_error(message="内容不能为空", code=ErrorCode.INVALID_REQUEST)
+    if category not in CATEGORIES:
+        return api_error(message="无效的参数: category", code=ErrorCode.INVALID_REQUEST)
+
+    post = Post(user_id=current_user_id(), title=title, content=content, category=category,
+                is_anonymous=json_data.get('is_anonymous') is True, likes_count=0, comments_count=0, status='normal')
+    try:
+        db.session.add(post)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"发布帖子时发生数据库错误: {str(e)}")
+        return api_error(message="发布帖子失败", code=ErrorCode.DB_ERROR, status_code=500)
+    return api_success(message="帖子已发布", data=load_posts([post.id], current_user_id())[0])
+
+
+@community_bp.route('/posts/<int:post_id>', methods=['GET'])
+@requires_auth
+def get_post(post_id):
+    """获取帖子详情"""
+    posts = load_posts([post_id], current_user_id())
+    if not posts:
+        return api_error(message="帖子不存在", code=ErrorCode.POST_NOT_FOUND, status_code=404)
+    return api_success(data=posts[0])
+
+
+@community_bp.route('/posts/<int:post_id>', methods=['DELETE'])
+@requires_auth
+def delete_post(post_id):
+    """删除帖子（作者或管理员），评论由外键级联删除，不逐条加载；同时删除帖子和评论的点赞记录"""
+    post = db.session.query(Post.id, Post.user_id).filter(Post.id == post_id).first()
+    if post is None or not _can_manage(post):
+        return api_error(message="帖子不存在", code=ErrorCode.POST_NOT_FOUND, status_code=404)
+    like = LikeRecord.__table__
+    try:
+        db.session.execute(like.delete().where(
+            like.c.target_type == 'comment',
+            like.c.target_id.in_(select(Comment.id).where(Comment.post_id == post_id).scalar_subquery())
+        ))
+        db.session.execute(like.delete().where(like.c.target_type == 'post', like.c.target_id == post_id))
+        Post.query.filter(Post.id == post_id).delete(synchronize_session=False)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"删除帖子时发生数据库错误: {str(e)}")
+        return api_error(message="删除帖子失败", code=ErrorCode.DB_ERROR, status_code=500)
+    feed_engine.refresh([post_id])
+    return api_success(message="帖子已删除")
+
+
+@community_bp.route('/posts/<int:post_id>/report', methods=['POST'])
+@requires_auth
+def report_post(post_id):
+    """举报帖子，帖子移出信息流等待管理员处理"""
+    try:
+        updated = Post.query.filter(Post.id == post_id, Post.status == 'normal').update(
+            {Post.status: 'reported'}, synchronize_session=False
+        )
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"举报帖子时发生数据库错误: {str(e)}")
+        return api_error(message="举报失败", code=ErrorCode.DB_ERROR, status_code=500)
+    if updated:
+        feed_engine.refresh([post_id])
+    return api_success(message="已举报，管理员会尽快处理")
+
+
+@community_bp.route('/posts/<int:post_id>/status', methods=['PUT'])
+@requires_auth
+@requires_admin
+def update_post_status(post_id):
+    """
+    修改帖子状态（管理员）
+
+    请求体:
+        status: normal（恢复）、reported或banned（封禁）
+    """
+    status = (request.get_json(silent=True) or {}).get('status')
+    if status not in POST_STATUSES:
+        return api_error(message="无效的参数: status", code=ErrorCode.INVALID_REQUEST)
+    post = db.session.get(Post, post_id)
+    if post is None:
+        return api_error(message="帖子不存在", code=ErrorCode.POST_NOT_FOUND, status_code=404)
+    try:
+        post.status = status
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"修改帖子状态时发生数据库错误: {str(e)}")
+        return api_error(message="修改帖子状态失败", code=ErrorCode.DB_ERROR, status_code=500)
+    return api_success(message="帖子状态已更新", data={'id': post_id, 'status': status})
@@ -5,10 +5,6 @@ from flask import Blueprint
 
 learning_bp = Blueprint('learning', __name__)
 
-# TODO: 以下模块尚未实现，需要创建相应的子模块文件
-# 暂时注释掉导入不存在的模块，避免导入错误
-# from . import courses, grades, tasks, focus, checkin, plans
-
 # 临时路由，表示模块正在建设中
 @learning_bp.route('/')
 def learning_index():
@@ -22,4 +18,7 @@ def learning_index():
                 "专注记录", "每日打卡", "学习计划"
             ]
         }
-    } 
\ No newline at end of file
+    }
+
+# 已实现的子模块（放在learning_bp定义之后导入，子模块中注册路由）
+from . import courses, grades, tasks, plans, focus, checkin, dashboard, history, degree
@@ -0,0 +1,106 @@
+"""
+每日打卡API
+"""
+import logging
+from datetime import date
+
+from flask import request
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app import db
+from app.api.v1.learning import learning_bp
+from app.api.v1.learning.checkin_calendar import check_in, get_streak, get_calendar, backfill
+from app.api.v1.learning.utils import parse_int, resolve_semester_id
+from app.models.learning import CheckIn
+from app.utils.auth import requires_auth, requires_admin
+from app.utils.error_codes import ErrorCode
+from app.utils.identity import current_user_id
+from app.utils.response import api_success, api_error
+
+logger = logging.getLogger(__name__)
+
+
+@learning_bp.route('/checkins', methods=['POST'])
+@requires_auth
+def create_check_in():
+    """
+    今日打卡
+
+    请求体（可选）:
+        note: 打卡备注，不超过200个字符
+    """
+    json_data = request.get_json(silent=True) or {}
+    note = json_data.get('note')
+    if note is not None and (not isinstance(note, str) or len(note) > 200):
+        return api_error(message="打卡备注不超过200个字符", code=ErrorCode.INVALID_REQUEST)
+
+    user_id = current_user_id()
+    today = date.today()
+    try:
+        record = check_in(db.session, user_id, today, note)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        if db.session.query(CheckIn.id).filter_by(user_id=user_id, check_in_date=today).first() is not None:
+            return api_error(message="今天已经打过卡了", code=ErrorCode.ALREADY_CHECKED_IN, status_code=409)
+        logger.error(f"用户 {user_id} 打卡时发生唯一约束冲突")
+        return api_error(message="打卡失败", code=ErrorCode.DB_ERROR, status_code=500)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"打卡时发生数据库错误: {str(e)}")
+        return api_error(message="打卡失败", code=ErrorCode.DB_ERROR, status_code=500)
+
+    return api_success(message="打卡成功", data={
+        'check_in_date': record.check_in_date.isoformat(),
+        'streak_count': record.streak_count,
+        'note': record.note
+    })
+
+
+@learning_bp.route('/checkins/streak', methods=['GET'])
+@requires_auth
+def get_check_in_streak():
+    """获取今天是否已打卡、当前连续打卡天数和最长连续打卡天数"""
+    return api_success(data=get_streak(current_user_id(), date.today()))
+
+
+@learning_bp.route('/checkins/calendar', methods=['GET'])
+@requires_auth
+def get_check_in_calendar():
+    """
+    获取学期打卡日历（热力图）
+
+    查询参数:
+        semester_id: 学期ID，默认当前学期
+    """
+    user_id = current_user_id()
+    semester_id = resolve_semester_id(user_id, parse_int(request.args.get('semester_id')))
+    calendar = get_calendar(user_id, semester_id) if semester_id is not None else None
+    if calendar is None:
+        return api_error(message="学期不存在", code=ErrorCode.NOT_FOUND, status_code=404)
+    return api_success(data=calendar)
+
+
+@learning_bp.route('/checkins/backfill', methods=['POST'])
+@requires_auth
+@requires_admin
+def backfill_check_in_calendar():
+    """
+    由打卡记录批量重建打卡日历并修正连续天数（管理员）
+
+    请求体（可选）:
+        user_ids: 只处理这些用户，默认全部
+    """
+    json_data = request.get_json(silent=True) or {}
+    user_ids = json_data.get('user_ids')
+    if user_ids is not None:
+        if not isinstance(user_ids, list):
+            return api_error(message="user_ids必须是用户ID的列表", code=ErrorCode.INVALID_REQUEST)
+        user_ids = {parse_int(user_id) for user_id in user_ids} - {None}
+
+    try:
+        result = backfill(user_ids=user_ids)
+    except SQLAlchemyError as e:
+        logger.error(f"回填打卡日历时发生数据库错误: {str(e)}")
+        return api_error(message="回填打卡日历失败", code=ErrorCode.DB_ERROR, status_code=500)
+    return api_success(message="打卡日历已回填", data=result)
@@ -0,0 +1,362 @@
+"""
+打卡连续天数与打卡日历
+- 打卡时按(user_id, check_in_date)唯一索引取前一天的记录，连续天数 = 前一天的连续天数 + 1，不扫描历史
+- check_in_calendar每个用户每学期一行位图（一天一位，低位在前），日历热力图、学期内的打卡天数和
+  最长连续打卡直接由位图计算（历史最长连续天数把该用户各学期的位图按日期拼接后计算，不扫描打卡记录）；某学期第一次打卡时按日期范围读取该学期已有的打卡记录建立位图
+- backfill按用户分段顺序读取已有打卡记录，批量重建位图并修正连续天数
+- 已归档学期的打卡记录在check_in_archive中，重建位图和回填都同时读取两张表
+"""
+import bisect
+import logging
+from datetime import timedelta
+
+from sqlalchemy import select, update, delete, bindparam, and_
+
+from app import db
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# 位图最多覆盖的天数（VARBINARY(255)）
+MAX_DAYS = 255 * 8
+
+# 一次处理的用户数
+_CHUNK_SIZE = 500
+
+# 学期表很小，整体缓存（全部学期的日期和当前active学期ID）；学期日期或状态调整后最多SEMESTER_CACHE_TTL秒生效
+SEMESTER_CACHE_TTL = 600
+_semesters = TTLCache(maxsize=2, ttl=SEMESTER_CACHE_TTL)
+
+
+# ---- 位图操作 ----
+
+def empty_bitmap(start_date, end_date):
+    days = min(MAX_DAYS, (end_date - start_date).days + 1)
+    return bytes((days + 7) // 8)
+
+
+def set_bit(bitmap, index):
+    """返回第index位置1后的位图，超出长度时补零"""
+    data = bytearray(bitmap)
+    if index // 8 >= len(data):
+        data.extend(bytes(index // 8 + 1 - len(data)))
+    data[index // 8] |= 1 << (index % 8)
+    return bytes(data)
+
+
+def bitmap_count(bitmap):
+    """打卡天数"""
+    return bin(int.from_bytes(bitmap, 'little')).count('1')
+
+
+def longest_run(bitmap):
+    """最长连续打卡天数"""
+    return _run_length(int.from_bytes(bitmap, 'little'))
+
+
+def _run_length(value):
+    """最长的连续1：每次x &= x >> 1使所有连续段缩短一天，循环次数即最长段的长度"""
+    length = 0
+    while value:
+        value &= value >> 1
+        length += 1
+    return length
+
+
+def bitmap_string(bitmap, days):
+    """按日期顺序返回'0'/'1'字符串，第i个字符对应start_date之后第i天"""
+    value = int.from_bytes(bitmap, 'little')
+    return format(value, f'0{max(days, 1)}b')[::-1][:days] if days else ''
+
+
+# ---- 学期 ----
+
+def _load_semesters():
+    """返回按开始日期排序的[(开始日期, 结束日期, 学期ID)]"""
+    semesters = _semesters.get('all')
+    if semesters is None:
+        from app.models.user import Semester
+
+        semesters = sorted(
+            (row.start_date, row.end_date, row.id)
+            for row in db.session.query(Semester.id, Semester.start_date, Semester.end_date)
+        )
+        _semesters.set('all', semesters)
+    return semesters
+
+
+def semester_for(day, semesters=None):
+    """返回包含该日期的(开始日期, 结束日期, 学期ID)，不在任何学期内时返回None"""
+    semesters = semesters if semesters is not None else _load_semesters()
+    index = bisect.bisect_right(semesters, (day, day.max, float('inf'))) - 1
+    # 学期一般不重叠，向前多看几个以兼容日期有重叠的数据
+    for start, end, semester_id in reversed(semesters[max(0, index - 2):index + 1]):
+        if start <= day <= end:
+            return start, end, semester_id
+    return None
+
+
+def get_semester(semester_id):
+    for semester in _load_semesters():
+        if semester[2] == semester_id:
+            return semester
+    return None
+
+
+def active_semester_id():
+    """状态为active的学期中开始日期最晚的一个，没有时返回None"""
+    cached = _semesters.get('active')
+    if cached is None:
+        from app.models.user import Semester
+
+        row = db.session.query(Semester.id).filter(Semester.status == 'active').order_by(
+            Semester.start_date.desc()
+        ).first()
+        # 包一层元组，没有active学期时也能缓存
+        cached = (row[0] if row else None,)
+        _semesters.set('active', cached)
+    return cached[0]
+
+
+def invalidate_semesters():
+    """学期新增、日期或状态修改后调用"""
+    _semesters.delete('all')
+    _semesters.delete('active')
+
+
+# ---- 打卡 ----
+
+def check_in(session, user_id, day, note=None):
+    """
+    在session的事务中打卡（调用方提交），同一天重复打卡时flush抛出IntegrityError
+
+    返回:
+        CheckIn
+    """
+    from app.models.learning import CheckIn
+
+    previous = session.query(CheckIn.streak_count).filter(
+        CheckIn.user_id == user_id, CheckIn.check_in_date == day - timedelta(days=1)
+    ).scalar()
+    record = CheckIn(user_id=user_id, check_in_date=day, streak_count=(previous or 0) + 1, note=note)
+    session.add(record)
+    session.flush()
+    _mark_calendar(session, user_id, day)
+    return record
+
+
+def _mark_calendar(session, user_id, day):
+    from app.models.learning import CheckInCalendar
+
+    semester = semester_for(day)
+    if semester is None:
+        return
+    start, end, semester_id = semester
+    index = (day - start).days
+    if index >= MAX_DAYS:
+        return
+
+    calendar = session.query(CheckInCalendar).filter(
+        CheckInCalendar.user_id == user_id, CheckInCalendar.semester_id == semester_id
+    ).with_for_update().first()
+    if calendar is None or calendar.start_date != start:
+        # 该学期第一次打卡（或学期开始日期被调整），按日期范围读取本学期已有记录
+        bitmap = _build_bitmap(session, user_id, start, end)
+        if calendar is None:
+            session.add(CheckInCalendar(user_id=user_id, semester_id=semester_id, start_date=start, bitmap=bitmap))
+        else:
+            calendar.start_date, calendar.bitmap = start, bitmap
+    else:
+        calendar.bitmap = set_bit(calendar.bitmap, index)
+
+
+def _build_bitmap(session, user_id, start, end):
+    from app.api.v1.learning.semester_archive import read_through
+
+    bitmap = bytearray(empty_bitmap(start, end))
+    check_ins = read_through('check_in', lambda table: and_(
+        table.c.user_id == user_id, table.c.check_in_date >= start, table.c.check_in_date <= end
+    ))
+    for (day,) in session.execute(select(check_ins.c.check_in_date)):
+        index = (day - start).days
+        if index < MAX_DAYS:
+            bitmap[index // 8] |= 1 << (index % 8)
+    return bytes(bitmap)
+
+
+def get_streak(user_id, today):
+    """
+    当前连续打卡天数和历史最长连续天数
+
+    今天或昨天的记录通过唯一索引直接取到；最长连续天数由该用户的打卡日历位图计算
+    """
+    from app.models.learning import CheckIn
+
+    rows = dict(db.session.query(CheckIn.check_in_date, CheckIn.streak_count).filter(
+        CheckIn.user_id == user_id, CheckIn.check_in_date.in_([today, today - timedelta(days=1)])
+    ))
+    current = rows.get(today) or rows.get(today - timedelta(days=1)) or 0
+    return {
+        'checked_in_today': today in rows,
+        'current_streak': current,
+        # 学期之外的打卡日不在位图中，当前连续天数可能更长
+        'longest_streak': max(longest_streak(user_id), current)
+    }
+
+
+def longest_streak(user_id):
+    """
+    历史最长连续打卡天数
+
+    按(user_id, semester_id)唯一索引读取该用户各学期的位图（每学期一行），按start_date移位拼接成一个整数，
+    相邻学期首尾相连的连续打卡也能算出
+    """
+    from app.models.learning import CheckInCalendar
+
+    rows = db.session.query(CheckInCalendar.start_date, CheckInCalendar.bitmap).filter(
+        CheckInCalendar.user_id == user_id
+    ).all()
+    if not rows:
+        return 0
+    first = min(row.start_date for row in rows)
+    value = 0
+    for row in rows:
+        value |= int.from_bytes(row.bitmap, 'little') << (row.start_date - first).days
+    return _run_length(value)
+
+
+def get_calendar(user_id, semester_id):
+    """
+    学期打卡日历
+
+    返回:
+        {'semester_id', 'start_date', 'end_date', 'days', 'checked_days', 'longest_streak'}，学期不存在时返回None
+        days为'0'/'1'字符串，第i个字符对应start_date之后第i天
+    """
+    from app.models.learning import CheckInCalendar
+
+    semester = get_semester(semester_id)
+    if semester is None:
+        return None
+    start, end, _ = semester
+    row = db.session.query(CheckInCalendar.start_date, CheckInCalendar.bitmap).filter(
+        CheckInCalendar.user_id == user_id, CheckInCalendar.semester_id == semester_id
+    ).first()
+    if row is not None and row.start_date == start:
+        bitmap = row.bitmap
+    else:
+        bitmap = _build_bitmap(db.session, user_id, start, end)
+
+    days = min(MAX_DAYS, (end - start).days + 1)
+    return {
+        'semester_id': semester_id,
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'days': bitmap_string(bitmap, days),
+        'checked_days': bitmap_count(bitmap),
+        'longest_streak': longest_run(bitmap)
+    }
+
+
+# ---- 批量回填 ----
+
+def backfill(user_ids=None, chunk_size=_CHUNK_SIZE):
+    """
+    由check_in表（包括已归档的记录）重建打卡日历位图并修正连续天数，每段用户一个事务
+
+    参数:
+        user_ids: 只处理这些用户，默认处理check_in表中有打卡记录的用户
+        chunk_size: 每段的用户数
+
+    返回:
+        {'users', 'check_ins', 'calendars', 'streaks_fixed'}
+    """
+    from app.models.learning import CheckIn
+
+    check_in_table = CheckIn.__table__
+    semesters = _load_semesters()
+    stats = {'users': 0, 'check_ins': 0, 'calendars': 0, 'streaks_fixed': 0}
+
+    if user_ids is not None:
+        user_ids = sorted(set(user_ids))
+        for start in range(0, len(user_ids), chunk_size):
+            _backfill_chunk(user_ids[start:start + chunk_size], semesters, stats)
+    else:
+        last_id = 0
+        while True:
+            with db.engine.connect() as conn:
+                chunk = [row[0] for row in conn.execute(
+                    select(check_in_table.c.user_id).where(check_in_table.c.user_id > last_id)
+                    .group_by(check_in_table.c.user_id).order_by(check_in_table.c.user_id).limit(chunk_size)
+                )]
+            if not chunk:
+                break
+            _backfill_chunk(chunk, semesters, stats)
+            last_id = chunk[-1]
+
+    logger.info(f"打卡日历回填完成: 用户 {stats['users']} 个, 打卡记录 {stats['check_ins']} 条, "
+                f"日历 {stats['calendars']} 行, 修正连续天数 {stats['streaks_fixed']} 条")
+    return stats
+
+
+def _backfill_chunk(user_ids, semesters, stats):
+    from app.api.v1.learning.semester_archive import read_through
+    from app.models.archive import archive_tables
+    from app.models.learning import CheckIn, CheckInCalendar
+
+    check_ins = read_through('check_in', lambda table: table.c.user_id.in_(user_ids), source=True)
+    with db.engine.begin() as conn:
+        rows = conn.execute(
+            select(check_ins.c.id, check_ins.c.user_id, check_ins.c.check_in_date, check_ins.c.streak_count,
+                   check_ins.c.archived)
+            .order_by(check_ins.c.user_id, check_ins.c.check_in_date)
+        )
+
+        calendars = {}
+        fixes = {False: [], True: []}
+        previous_user, previous_day, streak = None, None, 0
+        for row in rows:
+            stats['check_ins'] += 1
+            if row.user_id != previous_user:
+                stats['users'] += 1
+                previous_day, streak = None, 0
+            streak = streak + 1 if previous_day is not None and row.check_in_date - previous_day == timedelta(days=1) else 1
+            if row.streak_count != streak:
+                fixes[bool(row.archived)].append({'b_id': row.id, 'b_streak': streak})
+            previous_user, previous_day = row.user_id, row.check_in_date
+
+            semester = semester_for(row.check_in_date, semesters)
+            if semester is None:
+                continue
+            start, end, semester_id = semester
+            index = (row.check_in_date - start).days
+            if index >= MAX_DAYS:
+                continue
+            key = (row.user_id, semester_id)
+            if key not in calendars:
+                calendars[key] = (start, bytearray(empty_bitmap(start, end)))
+            bitmap = calendars[key][1]
+            bitmap[index // 8] |= 1 << (index % 8)
+
+        for table, table_fixes in ((CheckIn.__table__, fixes[False]), (archive_tables['check_in'], fixes[True])):
+            if table_fixes:
+                conn.execute(
+                    update(table).where(table.c.id == bindparam('b_id')).values(streak_count=bindparam('b_streak')),
+                    table_fixes
+                )
+        # 整体替换这些用户的日历，打卡记录被删除的学期也随之清除
+        calendar_table = CheckInCalendar.__table__
+        conn.execute(delete(calendar_table).where(calendar_table.c.user_id.in_(user_ids)))
+        if calendars:
+            conn.execute(calendar_table.insert(), [
+                {'user_id': user_id, 'semester_id': semester_id, 'start_date': start, 'bitmap': bytes(bitmap)}
+                for (user_id, semester_id), (start, bitmap) in calendars.items()
+            ])
+
+    fixed = len(fixes[False]) + len(fixes[True])
+    stats['calendars'] += len(calendars)
+    stats['streaks_fixed'] += fixed
+    if fixed:
+        from app.api.v1.learning.dashboard_summary import dashboard_cache
+
+        dashboard_cache.invalidate_users(user_ids)
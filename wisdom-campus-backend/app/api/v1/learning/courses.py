@@ -0,0 +1,186 @@
+"""
+课程与课表API
+"""
+import logging
+
+from flask import request
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.api.v1.learning import learning_bp
+from app.api.v1.learning.timetable import timetable_engine, WEEKDAYS
+from app.api.v1.learning.utils import parse_time, parse_int, resolve_semester_id
+from app.models.learning import Course, CourseSchedule
+from app.utils.auth import requires_auth
+from app.utils.error_codes import ErrorCode
+from app.utils.identity import current_user_id
+from app.utils.response import api_success, api_error
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_schedule(json_data, schedule=None):
+    """
+    校验课程安排参数，修改时未提供的字段沿用原值
+
+    返回:
+        (字段字典, 错误信息)
+    """
+    values = {
+        'course_id': json_data.get('course_id', schedule.course_id if schedule else None),
+        'day_of_week': json_data.get('day_of_week', schedule.day_of_week if schedule else None),
+        'start_time': parse_time(json_data['start_time']) if 'start_time' in json_data else (schedule.start_time if schedule else None),
+        'end_time': parse_time(json_data['end_time']) if 'end_time' in json_data else (schedule.end_time if schedule else None),
+        'location': json_data.get('location', schedule.location if schedule else None),
+    }
+    if parse_int(values['course_id']) is None:
+        return None, "缺少或无效的参数: course_id"
+    values['course_id'] = int(values['course_id'])
+    if values['day_of_week'] not in WEEKDAYS:
+        return None, "无效的参数: day_of_week"
+    if values['start_time'] is None or values['end_time'] is None:
+        return None, "时间格式应为HH:MM"
+    if values['end_time'] <= values['start_time']:
+        return None, "结束时间必须晚于开始时间"
+    return values, None
+
+
+def _conflict_error(conflicts):
+    return api_error(
+        message="与已有课程时间冲突",
+        code=ErrorCode.SCHEDULE_CONFLICT,
+        status_code=409,
+        errors={'conflicts': [slot.to_dict() for slot in conflicts]}
+    )
+
+
+@learning_bp.route('/timetable', methods=['GET'])
+@requires_auth
+def get_timetable():
+    """获取当前用户某学期的周课表及时间冲突"""
+    user_id = current_user_id()
+    semester_id = resolve_semester_id(user_id)
+    grid = timetable_engine.get_grid(user_id, semester_id)
+    return api_success(data=grid.to_dict())
+
+
+@learning_bp.route('/timetable/check', methods=['POST'])
+@requires_auth
+def check_timetable():
+    """检查一个时间段是否与当前用户已有课程冲突，不保存"""
+    json_data = request.get_json(silent=True) or {}
+    day_of_week = json_data.get('day_of_week')
+    start_time = parse_time(json_data.get('start_time'))
+    end_time = parse_time(json_data.get('end_time'))
+    if day_of_week not in WEEKDAYS or start_time is None or end_time is None or end_time <= start_time:
+        return api_error(message="无效的时间段", code=ErrorCode.INVALID_REQUEST)
+
+    user_id = current_user_id()
+    semester_id = resolve_semester_id(user_id, parse_int(json_data.get('semester_id')))
+    conflicts = timetable_engine.check(user_id, semester_id, day_of_week, start_time, end_time,
+                                       parse_int(json_data.get('exclude_schedule_id')))
+    return api_success(data={
+        'conflict': bool(conflicts),
+        'conflicts': [slot.to_dict() for slot in conflicts]
+    })
+
+
+@learning_bp.route('/schedules', methods=['POST'])
+@requires_auth
+def create_schedule():
+    """
+    添加课程安排
+    与已有课程时间冲突时返回409，传入allow_conflict=true可强制添加
+    """
+    json_data = request.get_json(silent=True)
+    if not json_data:
+        return api_error(message="请求必须是JSON格式", code=ErrorCode.INVALID_REQUEST)
+
+    values, error = _parse_schedule(json_data)
+    if error:
+        return api_error(message=error, code=ErrorCode.INVALID_REQUEST)
+
+    course = db.session.query(Course.id, Course.semester_id).filter(Course.id == values['course_id']).first()
+    if course is None:
+        return api_error(message="课程不存在", code=ErrorCode.COURSE_NOT_FOUND, status_code=404)
+
+    user_id = current_user_id()
+    if not json_data.get('allow_conflict'):
+        conflicts = timetable_engine.check(user_id, course.semester_id, values['day_of_week'],
+                                           values['start_time'], values['end_time'])
+        if conflicts:
+            return _conflict_error(conflicts)
+
+    try:
+        schedule = CourseSchedule(user_id=user_id, **values)
+        db.session.add(schedule)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"添加课程安排时发生数据库错误: {str(e)}")
+        return api_error(message="添加课程安排失败", code=ErrorCode.DB_ERROR, status_code=500)
+    finally:
+        timetable_engine.invalidate(user_id)
+
+    return api_success(message="课程安排添加成功", data={'schedule_id': schedule.id})
+
+
+@learning_bp.route('/schedules/<int:id>', methods=['PUT'])
+@requires_auth
+def update_schedule(id):
+    """修改课程安排，冲突处理同添加"""
+    user_id = current_user_id()
+    schedule = CourseSchedule.query.filter_by(id=id, user_id=user_id).first()
+    if schedule is None:
+        return api_error(message="课程安排不存在", code=ErrorCode.NOT_FOUND, status_code=404)
+
+    json_data = request.get_json(silent=True)
+    if not json_data:
+        return api_error(message="请求必须是JSON格式", code=ErrorCode.INVALID_REQUEST)
+
+    values, error = _parse_schedule(json_data, schedule)
+    if error:
+        return api_error(message=error, code=ErrorCode.INVALID_REQUEST)
+
+    course = db.session.query(Course.id, Course.semester_id).filter(Course.id == values['course_id']).first()
+    if course is None:
+        return api_error(message="课程不存在", code=ErrorCode.COURSE_NOT_FOUND, status_code=404)
+
+    if not json_data.get('allow_conflict'):
+        conflicts = timetable_engine.check(user_id, course.semester_id, values['day_of_week'],
+                                           values['start_time'], values['end_time'], exclude_schedule_id=id)
+        if conflicts:
+            return _conflict_error(conflicts)
+
+    try:
+        for key, value in values.items():
+            setattr(schedule, key, value)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"修改课程安排时发生数据库错误: {str(e)}")
+        return api_error(message="修改课程安排失败", code=ErrorCode.DB_ERROR, status_code=500)
+    finally:
+        timetable_engine.invalidate(user_id)
+
+    return api_success(message="课程安排修改成功", data={'schedule_id': schedule.id})
+
+
+@learning_bp.route('/schedules/<int:id>', methods=['DELETE'])
+@requires_auth
+def delete_schedule(id):
+    """删除课程安排"""
+    user_id = current_user_id()
+    try:
+        deleted = CourseSchedule.query.filter_by(id=id, user_id=user_id).delete(synchronize_session=False)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"删除课程安排时发生数据库错误: {str(e)}")
+        return api_error(message="删除课程安排失败", code=ErrorCode.DB_ERROR, status_code=500)
+    finally:
+        timetable_engine.invalidate(user_id)
+
+    if not deleted:
+        return api_error(message="课程安排不存在", code=ErrorCode.NOT_FOUND, status_code=404)
+    return api_success(message="课程安排删除成功")
@@ -0,0 +1,329 @@
+"""
+专业培养方案索引与学位进度
+每个专业的培养方案（major_course）在进程内保存为一个Curriculum：
+- 方案内的课程按课程ID排序后编号，必修课和选修课各是一个整数位集（第i位对应第i门课）
+- 学生已通过的课程换算成同样编号的位集，"还差哪些必修课"就是required & ~passed，
+  通过门数、学分等都由位运算得到，不再每次请求联表查询major_course、course和grade
+- 应用启动时（create_app）一条查询载入全部专业的方案；通过ORM修改major_course或课程学分/名称后，
+  提交时按专业失效，下次使用时重新载入该专业；不经过ORM的批量修改调用invalidate
+- 缓存是进程内的，多进程部署时其他进程的旧方案最多保留CURRICULUM_CACHE_TTL秒
+- 已通过的课程包括已归档学期的成绩（read_through）
+"""
+import logging
+import threading
+
+from sqlalchemy import event, inspect, select, and_
+
+from app import db
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# 60分及以上为通过，与绩点对照表一致
+PASS_SCORE = 60
+
+# 计算整个年级进度时每批读取的学生数
+_CHUNK_SIZE = 1000
+
+# Session.info中表示"全部专业失效"的标记
+_ALL = '*'
+
+
+def popcount(value):
+    return bin(value).count('1')
+
+
+def iter_bits(value):
+    """依次产出位集中为1的位的序号"""
+    while value:
+        low = value & -value
+        yield low.bit_length() - 1
+        value ^= low
+
+
+class Curriculum:
+    """一个专业的培养方案"""
+
+    __slots__ = ('major_id', 'course_ids', 'names', 'codes', 'credits', 'positions', 'required', 'elective')
+
+    def __init__(self, major_id, rows):
+        """
+        参数:
+            rows: 按课程ID排序的(course_id, name, code, credit, is_required)，同一课程出现多次时必修优先
+        """
+        self.major_id = major_id
+        self.course_ids, self.names, self.codes, self.credits = [], [], [], []
+        self.positions = {}
+        self.required = self.elective = 0
+        for course_id, name, code, credit, is_required in rows:
+            position = self.positions.get(course_id)
+            if position is None:
+                position = self.positions[course_id] = len(self.course_ids)
+                self.course_ids.append(course_id)
+                self.names.append(name)
+                self.codes.append(code)
+                self.credits.append(float(credit or 0))
+            if is_required:
+                self.required |= 1 << position
+        self.elective = ((1 << len(self.course_ids)) - 1) & ~self.required
+
+    def mask(self, course_ids):
+        """课程ID集合换算成本方案的位集，不在方案内的课程忽略"""
+        value = 0
+        for course_id in course_ids:
+            position = self.positions.get(course_id)
+            if position is not None:
+                value |= 1 << position
+        return value
+
+    def credits_of(self, value):
+        return sum(self.credits[position] for position in iter_bits(value))
+
+    def course(self, position):
+        return {
+            'course_id': self.course_ids[position],
+            'name': self.names[position],
+            'code': self.codes[position],
+            'credit': self.credits[position]
+        }
+
+    def progress(self, passed, detail=True):
+        """
+        学位进度
+
+        参数:
+            passed: 已通过课程的位集（mask的返回值）
+            detail: 是否列出未通过的必修课详情，否则只返回课程ID
+        """
+        missing = self.required & ~passed
+        required_total = popcount(self.required)
+        required_passed = popcount(self.required & passed)
+        return {
+            'required_total': required_total,
+            'required_passed': required_passed,
+            'required_percent': round(required_passed * 100 / required_total, 2) if required_total else 100.0,
+            'elective_passed': popcount(self.elective & passed),
+            'credits_passed': self.credits_of(passed),
+            'required_credits': self.credits_of(self.required),
+            'completed': missing == 0,
+            'missing_required': [
+                self.course(position) if detail else self.course_ids[position] for position in iter_bits(missing)
+            ]
+        }
+
+    def to_dict(self):
+        return {
+            'major_id': self.major_id,
+            'required': [self.course(position) for position in iter_bits(self.required)],
+            'elective': [self.course(position) for position in iter_bits(self.elective)]
+        }
+
+
+class CurriculumIndex:
+    """
+    培养方案索引
+
+    在create_app中调用init_app注册Session事件；缓存键包含专业的版本号，
+    避免"读取旧数据构建方案"与"修改后失效"并发时把旧方案写回缓存
+    """
+
+    def __init__(self, ttl=600, maxsize=2000):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置读取缓存参数，注册Session事件；开启预加载时立即载入全部方案"""
+        self.cache.configure(
+            maxsize=app.config.get('CURRICULUM_CACHE_MAXSIZE', self.cache.maxsize),
+            ttl=app.config.get('CURRICULUM_CACHE_TTL', self.cache.ttl)
+        )
+        for name, listener in (('after_flush', self._after_flush), ('after_commit', self._after_commit),
+                               ('after_rollback', self._after_rollback)):
+            if not event.contains(db.session, name, listener):
+                event.listen(db.session, name, listener)
+        if app.config.get('CURRICULUM_PRELOAD', True):
+            self.preload(app)
+
+    def _key(self, major_id):
+        return major_id, self._versions.get(major_id, 0), self._generation
+
+    def get(self, major_id):
+        """获取专业的培养方案，没有任何课程时返回空方案"""
+        key = self._key(major_id)
+        curriculum = self.cache.get(key)
+        if curriculum is None:
+            curriculum = self._load([major_id]).get(major_id) or Curriculum(major_id, [])
+            # 构建期间方案被修改过，不写入缓存
+            if self._key(major_id) == key:
+                self.cache.set(key, curriculum)
+        return curriculum
+
+    def load_all(self):
+        """一条查询载入全部专业的培养方案"""
+        generation, versions = self._generation, dict(self._versions)
+        curricula = self._load(None)
+        for major_id, curriculum in curricula.items():
+            key = (major_id, versions.get(major_id, 0), generation)
+            if self._key(major_id) == key:
+                self.cache.set(key, curriculum)
+        logger.info(f"已载入 {len(curricula)} 个专业的培养方案")
+        return len(curricula)
+
+    def preload(self, app):
+        """在应用启动时载入全部方案，不占用用户请求"""
+        with app.app_context():
+            try:
+                self.load_all()
+            except Exception as e:
+                # 预加载失败（如数据库暂不可用）不影响启动，之后按专业懒加载
+                logger.error(f"载入培养方案失败: {str(e)}")
+            finally:
+                db.session.remove()
+
+    @staticmethod
+    def _load(major_ids):
+        from app.models.learning import Course, MajorCourse
+
+        query = db.session.query(
+            MajorCourse.major_id, Course.id, Course.name, Course.code, Course.credit, MajorCourse.is_required
+        ).join(Course, Course.id == MajorCourse.course_id)
+        if major_ids is not None:
+            query = query.filter(MajorCourse.major_id.in_(major_ids))
+        rows = {}
+        for row in query.order_by(MajorCourse.major_id, Course.id):
+            rows.setdefault(row[0], []).append(row[1:])
+        return {major_id: Curriculum(major_id, major_rows) for major_id, major_rows in rows.items()}
+
+    def invalidate(self, major_id=None):
+        """专业的培养方案被修改后调用，major_id为None时全部失效"""
+        with self._lock:
+            if major_id is None:
+                self._generation += 1
+            else:
+                self._versions[major_id] = self._versions.get(major_id, 0) + 1
+
+    # ---- 学位进度 ----
+
+    @staticmethod
+    def passed_courses(user_ids):
+        """
+        学生已通过的课程（包括已归档的成绩）
+
+        返回:
+            {用户ID: {课程ID}}
+        """
+        from app.api.v1.learning.semester_archive import read_through
+
+        grade = read_through('grade', lambda table: and_(
+            table.c.user_id.in_(user_ids), table.c.score >= PASS_SCORE
+        ))
+        passed = {}
+        for user_id, course_id in db.session.execute(select(grade.c.user_id, grade.c.course_id)):
+            passed.setdefault(user_id, set()).add(course_id)
+        return passed
+
+    def user_progress(self, user_id, major_id):
+        curriculum = self.get(major_id)
+        passed = self.passed_courses([user_id]).get(user_id, ())
+        return dict(curriculum.progress(curriculum.mask(passed)), major_id=major_id)
+
+    def cohort_progress(self, major_id, student_id_prefix=None):
+        """
+        计算某专业（可按学号前缀限定年级）全部学生的学位进度，每批学生一条成绩查询
+
+        返回:
+            {'major_id', 'summary', 'students'}，students中未通过的必修课只列出课程ID；
+            summary.missing_by_course按未通过人数从多到少列出必修课
+        """
+        from app.models.user import User
+
+        curriculum = self.get(major_id)
+        students, missing_counts = [], [0] * len(curriculum.course_ids)
+        completed, percent_sum = 0, 0.0
+
+        last_id = 0
+        while True:
+            query = db.session.query(User.id, User.student_id, User.name).filter(
+                User.major_id == major_id, User.id > last_id
+            )
+            if student_id_prefix:
+                query = query.filter(User.student_id.like(f'{student_id_prefix}%'))
+            chunk = query.order_by(User.id).limit(_CHUNK_SIZE).all()
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+            passed = self.passed_courses([row.id for row in chunk])
+            for row in chunk:
+                mask = curriculum.mask(passed.get(row.id, ()))
+                for position in iter_bits(curriculum.required & ~mask):
+                    missing_counts[position] += 1
+                progress = curriculum.progress(mask, detail=False)
+                completed += progress['completed']
+                percent_sum += progress['required_percent']
+                students.append(dict(progress, user_id=row.id, student_id=row.student_id, name=row.name))
+
+        return {
+            'major_id': major_id,
+            'summary': {
+                'students': len(students),
+                'completed': completed,
+                'average_required_percent': round(percent_sum / len(students), 2) if students else 0,
+                'missing_by_course': [
+                    dict(curriculum.course(position), missing=missing_counts[position])
+                    for position in sorted(iter_bits(curriculum.required), key=lambda p: -missing_counts[p])
+                    if missing_counts[position]
+                ]
+            },
+            'students': students
+        }
+
+    # ---- Session事件 ----
+
+    @staticmethod
+    def _after_flush(session, flush_context):
+        """收集本次flush涉及的专业，提交后再失效（回滚时丢弃）"""
+        from app.models.learning import Course, MajorCourse
+        from app.models.user import Major
+
+        affected = set()
+        for obj in session.new:
+            if isinstance(obj, MajorCourse):
+                affected.add(obj.major_id)
+        for obj in session.deleted:
+            if isinstance(obj, MajorCourse):
+                affected.add(inspect(obj).dict.get('major_id'))
+            elif isinstance(obj, Major):
+                affected.add(inspect(obj).dict.get('id'))
+            elif isinstance(obj, Course):
+                affected.add(_ALL)
+        for obj in session.dirty:
+            if isinstance(obj, MajorCourse):
+                history = inspect(obj).attrs.major_id.history
+                affected.update(history.deleted or ())
+                affected.add(obj.major_id)
+            elif isinstance(obj, Course) and any(
+                    inspect(obj).attrs[key].history.has_changes() for key in ('name', 'code', 'credit')):
+                affected.add(_ALL)
+        affected.discard(None)
+        if affected:
+            session.info.setdefault('_curriculum_majors', set()).update(affected)
+
+    def _after_commit(self, session):
+        affected = session.info.pop('_curriculum_majors', None)
+        if not affected:
+            return
+        if _ALL in affected:
+            self.invalidate()
+            return
+        for major_id in affected:
+            self.invalidate(major_id)
+
+    @staticmethod
+    def _after_rollback(session):
+        session.info.pop('_curriculum_majors', None)
+
+
+# 全局培养方案索引实例，在create_app中通过init_app注册
+curriculum_index = CurriculumIndex()
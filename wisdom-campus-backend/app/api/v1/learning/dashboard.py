@@ -0,0 +1,30 @@
+"""
+学生仪表盘API
+"""
+import logging
+
+from app.api.v1.learning import learning_bp
+from app.api.v1.learning.dashboard_summary import dashboard_cache
+from app.api.v1.learning.utils import resolve_semester_id
+from app.utils.auth import requires_auth
+from app.utils.error_codes import ErrorCode
+from app.utils.identity import current_user_id
+from app.utils.response import api_success, api_error
+
+logger = logging.getLogger(__name__)
+
+
+@learning_bp.route('/dashboard', methods=['GET'])
+@requires_auth
+def get_dashboard_summary():
+    """
+    获取仪表盘汇总：今日课程、未完成任务、专注时长、连续打卡、GPA、未读通知、徽章、学习计划进度
+
+    查询参数:
+        semester_id: 今日课程所属学期，默认当前学期
+    """
+    user_id = current_user_id()
+    summary = dashboard_cache.get_summary(user_id, resolve_semester_id(user_id))
+    if summary is None:
+        return api_error(message="用户不存在", code=ErrorCode.USER_NOT_FOUND, status_code=404)
+    return api_success(data=summary)
@@ -0,0 +1,237 @@
+"""
+学生仪表盘汇总
+把今日课程、未完成任务、专注时长、连续打卡、GPA、未读通知、徽章和学习计划进度组装成一份汇总，
+按用户缓存，仪表盘加载时只需一次缓存查找：
+- 缓存键为(用户ID, 学期ID, 日期, 汇总版本号, 课表版本号)，跨天或课表变化时自然失效
+- 通过ORM写入相关表时由Session事件收集受影响的用户，事务提交后递增其版本号；
+  不经过ORM的批量写入（专注记录写缓冲、截止提醒、成绩导入、批量改任务状态等）直接调用invalidate_users
+- 各部分数据都来自已维护好的计数器或索引范围查询（User.gpa、study_plan计数器、打卡连续天数等），
+  未命中时构建一次也不需要统计全表
+- 缓存是进程内的，多进程部署时其他进程的旧汇总最多保留DASHBOARD_CACHE_TTL秒
+"""
+import logging
+import threading
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event, inspect, func, case
+
+from app import db
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# 这些模型的记录变化时，所属用户的汇总失效: 模型名 -> 用户ID属性
+WATCHED_MODELS = {
+    'Task': 'user_id',
+    'StudyPlan': 'user_id',
+    'FocusRecord': 'user_id',
+    'CheckIn': 'user_id',
+    'Grade': 'user_id',
+    'CourseSchedule': 'user_id',
+    'Notification': 'user_id',
+    'UserBadge': 'user_id',
+    'User': 'id',
+}
+
+# 各列表最多返回的条数
+UPCOMING_TASKS = 5
+ACTIVE_PLANS = 3
+RECENT_BADGES = 3
+
+
+class DashboardSummaryCache:
+    """
+    仪表盘汇总缓存
+
+    在create_app中调用init_app注册Session事件
+    """
+
+    def __init__(self, ttl=60, maxsize=20000):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置读取缓存参数并注册Session事件"""
+        self.cache.configure(
+            maxsize=app.config.get('DASHBOARD_CACHE_MAXSIZE', self.cache.maxsize),
+            ttl=app.config.get('DASHBOARD_CACHE_TTL', self.cache.ttl)
+        )
+        for name, listener in (('after_flush', self._after_flush), ('after_commit', self._after_commit),
+                               ('after_rollback', self._after_rollback)):
+            if not event.contains(db.session, name, listener):
+                event.listen(db.session, name, listener)
+
+    def get_summary(self, user_id, semester_id=None):
+        """
+        获取用户的仪表盘汇总
+
+        参数:
+            user_id: 用户ID
+            semester_id: 今日课程所属学期，None表示不区分学期
+        """
+        from app.api.v1.learning.timetable import timetable_engine
+
+        today = date.today()
+        version = self._versions.get(user_id, 0)
+        key = (user_id, semester_id, today, version, timetable_engine.version(user_id))
+        summary = self.cache.get(key)
+        if summary is None:
+            summary = self.build(user_id, today, semester_id)
+            # 构建期间数据被修改过，不写入缓存
+            if self._versions.get(user_id, 0) == version:
+                self.cache.set(key, summary)
+        return summary
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def invalidate_users(self, user_ids):
+        """批量写入（不经过ORM）后调用"""
+        with self._lock:
+            for user_id in set(user_ids):
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    # ---- 构建 ----
+
+    def build(self, user_id, today, semester_id=None):
+        """从数据库构建汇总，每部分一条走索引的查询"""
+        from app.models.user import User
+
+        user = db.session.query(User.id, User.name, User.gpa, User.total_study_time).filter(User.id == user_id).first()
+        if user is None:
+            return None
+        return {
+            'date': today.isoformat(),
+            'user': {'id': user.id, 'name': user.name},
+            'schedule': self._today_schedule(user_id, today, semester_id),
+            'tasks': self._tasks(user_id),
+            'focus': self._focus(user_id, today, user.total_study_time),
+            'check_in': self._check_in(user_id, today),
+            'gpa': float(user.gpa) if user.gpa is not None else None,
+            'notifications': {'unread': self._unread_notifications(user_id)},
+            'badges': self._badges(user_id),
+            'plans': self._plans(user_id),
+        }
+
+    @staticmethod
+    def _today_schedule(user_id, today, semester_id):
+        from app.api.v1.learning.timetable import timetable_engine
+
+        grid = timetable_engine.get_grid(user_id, semester_id)
+        return [slot.to_dict() for slot in grid.days[today.weekday()]]
+
+    @staticmethod
+    def _tasks(user_id):
+        from app.api.v1.learning.reminders import OPEN_STATUSES
+        from app.models.learning import Task
+
+        # 两条查询都是idx_task_user_status_deadline上的范围扫描
+        open_filter = (Task.user_id == user_id, Task.status.in_(OPEN_STATUSES))
+        open_count = db.session.query(func.count(Task.id)).filter(*open_filter).scalar()
+        upcoming = db.session.query(Task.id, Task.content, Task.deadline, Task.priority, Task.status).filter(
+            *open_filter, Task.deadline.isnot(None)
+        ).order_by(Task.deadline, Task.id).limit(UPCOMING_TASKS)
+        return {
+            'open': open_count or 0,
+            'upcoming': [
+                {'id': row.id, 'content': row.content, 'deadline': row.deadline.isoformat(),
+                 'priority': row.priority, 'status': row.status}
+                for row in upcoming
+            ]
+        }
+
+    @staticmethod
+    def _focus(user_id, today, total_study_time):
+        from app.models.learning import FocusRecord
+
+        week_start = datetime.combine(today - timedelta(days=today.weekday()), datetime.min.time())
+        day_start = datetime.combine(today, datetime.min.time())
+        # 本周的记录走idx_focus_record_user_start范围查询，今日时长在同一条查询中按条件求和
+        row = db.session.query(
+            func.coalesce(func.sum(FocusRecord.duration), 0),
+            func.coalesce(func.sum(case((FocusRecord.start_time >= day_start, FocusRecord.duration), else_=0)), 0)
+        ).filter(FocusRecord.user_id == user_id, FocusRecord.start_time >= week_start).first()
+        return {
+            'today_minutes': int(row[1]),
+            'week_minutes': int(row[0]),
+            'total_minutes': total_study_time or 0
+        }
+
+    @staticmethod
+    def _check_in(user_id, today):
+        from app.api.v1.learning.checkin_calendar import get_streak
+
+        return get_streak(user_id, today)
+
+    @staticmethod
+    def _unread_notifications(user_id):
+        from app.models.ai import Notification
+
+        return db.session.query(func.count(Notification.id)).filter(
+            Notification.user_id == user_id, Notification.is_read == False
+        ).scalar() or 0
+
+    @staticmethod
+    def _badges(user_id):
+        from app.models.resource import Badge, UserBadge
+
+        total = db.session.query(func.count(UserBadge.id)).filter(UserBadge.user_id == user_id).scalar()
+        recent = db.session.query(Badge.id, Badge.name, UserBadge.awarded_at).join(
+            UserBadge, UserBadge.badge_id == Badge.id
+        ).filter(UserBadge.user_id == user_id).order_by(UserBadge.awarded_at.desc()).limit(RECENT_BADGES)
+        return {
+            'total': total or 0,
+            'recent': [
+                {'id': row.id, 'name': row.name,
+                 'awarded_at': row.awarded_at.isoformat() if row.awarded_at else None}
+                for row in recent
+            ]
+        }
+
+    @staticmethod
+    def _plans(user_id):
+        from app.models.learning import StudyPlan
+
+        rows = db.session.query(
+            StudyPlan.id, StudyPlan.title, StudyPlan.progress, StudyPlan.task_total, StudyPlan.task_completed
+        ).filter(StudyPlan.user_id == user_id, StudyPlan.status == 'active').order_by(
+            StudyPlan.start_date.desc(), StudyPlan.id.desc()
+        ).limit(ACTIVE_PLANS)
+        return [
+            {'id': row.id, 'title': row.title, 'progress': float(row.progress or 0),
+             'task_total': row.task_total, 'task_completed': row.task_completed}
+            for row in rows
+        ]
+
+    # ---- Session事件 ----
+
+    @staticmethod
+    def _after_flush(session, flush_context):
+        """收集本次flush涉及的用户，提交后再失效（回滚时丢弃）"""
+        affected = set()
+        for objects, loaded_only in ((session.new, False), (session.dirty, False), (session.deleted, True)):
+            for obj in objects:
+                attribute = WATCHED_MODELS.get(type(obj).__name__)
+                if attribute is None:
+                    continue
+                # 已删除的对象不能再触发加载，只读取已加载的值
+                user_id = inspect(obj).dict.get(attribute) if loaded_only else getattr(obj, attribute, None)
+                if user_id is not None:
+                    affected.add(user_id)
+        if affected:
+            session.info.setdefault('_dashboard_users', set()).update(affected)
+
+    def _after_commit(self, session):
+        affected = session.info.pop('_dashboard_users', None)
+        if affected:
+            self.invalidate_users(affected)
+
+    @staticmethod
+    def _after_rollback(session):
+        session.info.pop('_dashboard_users', None)
+
+
+# 全局仪表盘汇总缓存实例，在create_app中通过init_app注册
+dashboard_cache = DashboardSummaryCache()
@@ -0,0 +1,55 @@
+"""
+培养方案与学位进度API
+"""
+import logging
+
+from flask import request
+
+from app import db
+from app.api.v1.learning import learning_bp
+from app.api.v1.learning.curriculum import curriculum_index
+from app.models.user import User, Major
+from app.utils.auth import requires_auth, requires_admin
+from app.utils.error_codes import ErrorCode
+from app.utils.identity import current_user_id
+from app.utils.response import api_success, api_error
+
+logger = logging.getLogger(__name__)
+
+
+@learning_bp.route('/majors/<int:major_id>/curriculum', methods=['GET'])
+@requires_auth
+def get_major_curriculum(major_id):
+    """获取专业的培养方案（必修课和选修课）"""
+    if db.session.query(Major.id).filter(Major.id == major_id).first() is None:
+        return api_error(message="专业不存在", code=ErrorCode.NOT_FOUND, status_code=404)
+    return api_success(data=curriculum_index.get(major_id).to_dict())
+
+
+@learning_bp.route('/degree-progress', methods=['GET'])
+@requires_auth
+def get_degree_progress():
+    """获取当前用户的学位进度：已通过的必修/选修课程数、学分和尚未通过的必修课"""
+    user_id = current_user_id()
+    major_id = db.session.query(User.major_id).filter(User.id == user_id).scalar()
+    if major_id is None:
+        return api_error(message="尚未设置专业", code=ErrorCode.INVALID_REQUEST)
+    return api_success(data=curriculum_index.user_progress(user_id, major_id))
+
+
+@learning_bp.route('/majors/<int:major_id>/progress', methods=['GET'])
+@requires_auth
+@requires_admin
+def get_cohort_progress(major_id):
+    """
+    批量计算某专业学生的学位进度（管理员）
+
+    查询参数:
+        student_id_prefix: 学号前缀（如入学年份），只统计该年级
+    """
+    if db.session.query(Major.id).filter(Major.id == major_id).first() is None:
+        return api_error(message="专业不存在", code=ErrorCode.NOT_FOUND, status_code=404)
+    prefix = (request.args.get('student_id_prefix') or '').strip()
+    if prefix and (len(prefix) > 20 or not prefix.isalnum()):
+        return api_error(message="学号前缀格式不正确", code=ErrorCode.INVALID_REQUEST)
+    return api_success(data=curriculum_index.cohort_progress(major_id, prefix or None))
@@ -0,0 +1,95 @@
+"""
+专注记录API
+"""
+import logging
+from datetime import datetime, timedelta
+
+from flask import request, current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.api.v1.learning import learning_bp
+from app.api.v1.learning.focus_ingest import focus_buffer, parse_event
+from app.api.v1.learning.utils import parse_int
+from app.models.learning import FocusRecord
+from app.schemas.learning import focus_record_bulk_serializer
+from app.utils.activity import activity_tracker
+from app.utils.auth import requires_auth
+from app.utils.error_codes import ErrorCode
+from app.utils.identity import current_user_id
+from app.utils.response import api_success, api_error
+
+logger = logging.getLogger(__name__)
+
+
+@learning_bp.route('/focus/events', methods=['POST'])
+@requires_auth
+def ingest_focus_events():
+    """
+    批量上报专注事件，校验通过的事件放入写缓冲，几秒内写入数据库
+
+    请求体:
+        events: 事件列表，字段见focus_ingest.parse_event；同一session_id重复上报只记录一次
+
+    返回:
+        accepted: 接受的事件数，heartbeats: 其中的心跳数，errors: 校验失败的事件（index, message）
+    """
+    json_data = request.get_json(silent=True) or {}
+    events = json_data.get('events')
+    max_events = current_app.config.get('FOCUS_MAX_EVENTS', 500)
+    if not isinstance(events, list) or not events or len(events) > max_events:
+        return api_error(message=f"events必须是1-{max_events}个事件的列表", code=ErrorCode.INVALID_REQUEST)
+
+    user_id = current_user_id()
+    now = datetime.now()
+    max_age = timedelta(days=current_app.config.get('FOCUS_MAX_AGE_DAYS', 7))
+    max_minutes = current_app.config.get('FOCUS_MAX_MINUTES_PER_DAY', 1440)
+    rows, errors, heartbeats = [], [], 0
+    # 本次请求内按开始日期累计时长，写入时还会按已有记录复核每日上限
+    minutes, counted = {}, set()
+    for index, event in enumerate(events):
+        event_type, row, error = parse_event(event, user_id, now, max_age)
+        if row is not None and row['client_key'] not in counted:
+            day = row['start_time'].date()
+            if minutes.get(day, 0) + row['duration'] > max_minutes:
+                row, error = None, f"{day}的专注时长超过每日上限{max_minutes}分钟"
+            else:
+                minutes[day] = minutes.get(day, 0) + row['duration']
+                counted.add(row['client_key'])
+        if error:
+            errors.append({'index': index, 'message': error})
+        elif event_type == 'heartbeat':
+            heartbeats += 1
+        else:
+            rows.append(row)
+
+    if heartbeats:
+        activity_tracker.touch(user_id, now)
+    if rows:
+        try:
+            focus_buffer.add(rows)
+        except SQLAlchemyError as e:
+            # 只有关闭缓冲（立即写入）时会在请求中访问数据库
+            logger.error(f"写入专注记录时发生数据库错误: {str(e)}")
+            return api_error(message="专注记录保存失败", code=ErrorCode.DB_ERROR, status_code=500)
+
+    return api_success(message="专注事件已接收", data={
+        'accepted': len(rows) + heartbeats,
+        'heartbeats': heartbeats,
+        'errors': errors
+    })
+
+
+@learning_bp.route('/focus/records', methods=['GET'])
+@requires_auth
+def get_focus_records():
+    """
+    获取当前用户的专注记录，按开始时间倒序（刚上报的记录写入数据库后才会出现）
+
+    查询参数:
+        limit: 返回数量，默认50，最大200
+    """
+    limit = min(max(parse_int(request.args.get('limit')) or 50, 1), 200)
+    rows = focus_record_bulk_serializer.query().filter(
+        FocusRecord.user_id == current_user_id()
+    ).order_by(FocusRecord.start_time.desc(), FocusRecord.id.desc()).limit(limit).all()
+    return api_success(data={'records': focus_record_bulk_serializer.dump_rows(rows)})
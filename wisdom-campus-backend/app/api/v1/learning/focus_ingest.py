@@ -0,0 +1,381 @@
+"""
+专注记录写入
+客户端在整点等时刻集中上报专注事件，接口只做不查库的参数校验后放入内存缓冲，
+由后台线程每隔FOCUS_FLUSH_INTERVAL秒批量写入：
+- 每个事件带客户端生成的session_id作为幂等键，缓冲内按(用户, session_id)去重，
+  写入前按批查询已存在的键过滤，focus_record上的(user_id, client_key)唯一索引兜底
+- 记录用executemany批量INSERT（PyMySQL改写为多行INSERT）
+- 每次写入只用一条 UPDATE user SET total_study_time = total_study_time + CASE id ... END 累计时长
+- start_time只接受最近FOCUS_MAX_AGE_DAYS天内、结束时间不晚于当前时间的专注；每个用户每天（按开始日期）
+  累计的专注时长不超过FOCUS_MAX_MINUTES_PER_DAY分钟，写入时按已有记录复核，超出的记录不写入
+- 待写入记录数超过FOCUS_MAX_PENDING时立即写入，进程退出时（atexit）写入剩余数据
+- 写入失败时：违反约束等逐行错误把批次二分后分别写入，单独失败的记录移入dead_letters不再重试；
+  数据库不可用等其他错误整批放回缓冲，每条记录最多重试FOCUS_MAX_RETRIES次
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict, deque
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+from flask import has_app_context
+from sqlalchemy import select, case, func
+from sqlalchemy.exc import IntegrityError, DataError
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ('end', 'heartbeat')
+
+# 单次专注的最长时长（分钟）
+MAX_DURATION = 1440
+
+# 默认只接受最近多少天内开始的专注
+MAX_AGE = timedelta(days=7)
+
+# 每个用户每天累计专注时长的默认上限（分钟）
+MAX_MINUTES_PER_DAY = 1440
+
+# 允许客户端时钟超前的时间
+_CLOCK_SKEW = timedelta(minutes=5)
+
+# IN查询、UPDATE每批最多的键数
+_BATCH_SIZE = 500
+
+# 单条INSERT最多的记录数
+_INSERT_BATCH_SIZE = 1000
+
+# 最多保留的无法写入的记录数
+_DEAD_LETTER_SIZE = 1000
+
+
+def _parse_datetime(value):
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        # 统一为服务器本地时间
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_event(event, user_id, now=None, max_age=MAX_AGE):
+    """
+    校验一个专注事件（不访问数据库）
+
+    事件字段:
+        type: end（一次专注结束，默认）或 heartbeat（专注进行中，只记录活跃）
+        session_id: 客户端生成的专注会话ID（幂等键，1-64个字符），重试时保持不变
+        start_time: 开始时间，ISO 8601，不早于max_age之前，开始时间加时长不晚于当前时间
+        duration: 专注时长（分钟），1-1440
+        focus_score: 专注度评分，0-100，可选
+        task_id: 关联任务ID，可选
+
+    返回:
+        (事件类型, 待写入的记录或None, 错误信息)
+    """
+    if not isinstance(event, dict):
+        return None, None, "事件必须是对象"
+    event_type = event.get('type', 'end')
+    if event_type not in EVENT_TYPES:
+        return None, None, "无效的参数: type"
+    session_id = event.get('session_id')
+    if not isinstance(session_id, str) or not 0 < len(session_id) <= 64:
+        return None, None, "session_id必须是1-64个字符的字符串"
+    if event_type == 'heartbeat':
+        return event_type, None, None
+
+    now = now or datetime.now()
+    start_time = _parse_datetime(event.get('start_time'))
+    if start_time is None:
+        return None, None, "start_time格式应为ISO 8601"
+    if start_time > now + _CLOCK_SKEW:
+        return None, None, "start_time不能晚于当前时间"
+    if start_time < now - max_age:
+        return None, None, f"只能上报最近{max_age.days}天内的专注"
+    duration = event.get('duration')
+    if not _is_int(duration) or not 0 < duration <= MAX_DURATION:
+        return None, None, f"duration必须是1-{MAX_DURATION}之间的整数（分钟）"
+    if start_time + timedelta(minutes=duration) > now + _CLOCK_SKEW:
+        return None, None, "专注结束时间不能晚于当前时间"
+    focus_score = event.get('focus_score')
+    if focus_score is not None and (not _is_int(focus_score) or not 0 <= focus_score <= 100):
+        return None, None, "focus_score必须是0-100之间的整数"
+    task_id = event.get('task_id')
+    if task_id is not None and (not _is_int(task_id) or task_id <= 0):
+        return None, None, "无效的参数: task_id"
+
+    return event_type, {
+        'user_id': user_id,
+        'start_time': start_time,
+        'duration': duration,
+        'focus_score': focus_score,
+        'task_id': task_id,
+        'client_key': session_id
+    }, None
+
+
+class FocusIngestBuffer:
+    """
+    专注记录写缓冲
+
+    flush_interval为0时关闭缓冲，每次add立即写入数据库
+    """
+
+    def __init__(self, flush_interval=2, max_pending=5000, max_retries=5, max_minutes_per_day=MAX_MINUTES_PER_DAY):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.max_minutes_per_day = max_minutes_per_day
+        self.app = None
+        self._pending = {}  # (用户ID, session_id) -> 记录
+        self._attempts = {}  # (用户ID, session_id) -> 已失败的写入次数
+        self.dead_letters = deque(maxlen=_DEAD_LETTER_SIZE)
+        self.rejected = 0  # 超过每日时长上限未写入的记录数
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stopped = False
+
+    def init_app(self, app):
+        """从应用配置读取参数，并注册退出时写入（全局实例只在第一次init_app时注册）"""
+        if self.app is None:
+            atexit.register(self.shutdown)
+        self.app = app
+        self.flush_interval = app.config.get('FOCUS_FLUSH_INTERVAL', self.flush_interval)
+        self.max_pending = app.config.get('FOCUS_MAX_PENDING', self.max_pending)
+        self.max_retries = app.config.get('FOCUS_MAX_RETRIES', self.max_retries)
+        self.max_minutes_per_day = app.config.get('FOCUS_MAX_MINUTES_PER_DAY', self.max_minutes_per_day)
+
+    def add(self, rows):
+        """
+        放入待写入记录
+
+        返回:
+            新加入缓冲的记录数（与缓冲中已有的session_id重复的不计入）
+        """
+        if not self.flush_interval:
+            rows = list({(row['user_id'], row['client_key']): row for row in rows}.values())
+            self._write_isolated(rows)
+            return len(rows)
+
+        added = 0
+        with self._lock:
+            for row in rows:
+                key = (row['user_id'], row['client_key'])
+                if key not in self._pending:
+                    self._pending[key] = row
+                    added += 1
+            pending_count = len(self._pending)
+
+        if pending_count >= self.max_pending * 2:
+            # 后台线程跟不上时在请求线程中写入，限制缓冲大小
+            self.flush()
+        else:
+            self._ensure_thread()
+            if pending_count >= self.max_pending:
+                self._wakeup.set()
+        return added
+
+    def flush(self):
+        """把缓冲中的记录写入数据库，返回实际新增的记录数"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                pending, self._pending = self._pending, {}
+
+            try:
+                written = self._write_isolated(list(pending.values()))
+            except Exception as e:
+                self._requeue(pending, e)
+                return 0
+            with self._lock:
+                for key in pending:
+                    self._attempts.pop(key, None)
+            return written
+
+    def _requeue(self, pending, error):
+        """整批写入失败（如数据库不可用）时放回缓冲，超过重试次数的记录移入dead_letters"""
+        retried = 0
+        with self._lock:
+            for key, row in pending.items():
+                attempts = self._attempts.get(key, 0) + 1
+                if attempts >= self.max_retries:
+                    self._attempts.pop(key, None)
+                    self._dead_letter(row, error)
+                else:
+                    self._attempts[key] = attempts
+                    self._pending.setdefault(key, row)
+                    retried += 1
+        logger.error(f"写入专注记录失败，{retried}条记录将在下次重试，"
+                     f"{len(pending) - retried}条超过重试次数已放弃: {str(error)}")
+
+    def _write_isolated(self, rows):
+        """
+        写入记录；违反约束等逐行错误时把批次二分后分别写入，找出并丢弃无法写入的记录，
+        其余记录照常写入，一条坏记录不会让整批一直重试
+
+        返回:
+            实际新增的记录数
+        """
+        try:
+            return self._write(rows)
+        except (IntegrityError, DataError) as e:
+            if len(rows) == 1:
+                self._dead_letter(rows[0], e)
+                return 0
+            middle = len(rows) // 2
+            return self._write_isolated(rows[:middle]) + self._write_isolated(rows[middle:])
+
+    def _dead_letter(self, row, error):
+        self.dead_letters.append((row, str(error)))
+        logger.error(f"专注记录无法写入，已放弃: 用户 {row['user_id']}, session_id {row['client_key']}, {str(error)}")
+
+    def shutdown(self):
+        """停止后台线程并写入剩余数据"""
+        self._stopped = True
+        self._wakeup.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"退出时写入专注记录失败: {str(e)}")
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='focus-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"后台写入专注记录异常: {str(e)}")
+
+    def _write(self, rows):
+        """在一个事务中写入记录并累计学习时长，其他进程并发写入同一幂等键时重新过滤后重试一次"""
+        from app import db
+        from app.api.v1.learning.dashboard_summary import dashboard_cache
+
+        with self._app_context():
+            try:
+                with db.engine.begin() as conn:
+                    written = self._insert(conn, rows)
+            except IntegrityError:
+                logger.warning("专注记录幂等键冲突，重新过滤后重试")
+                with db.engine.begin() as conn:
+                    written = self._insert(conn, rows)
+        if written:
+            dashboard_cache.invalidate_users(row['user_id'] for row in rows)
+        return written
+
+    def _insert(self, conn, rows):
+        from app.models.learning import FocusRecord, Task
+        from app.models.user import User
+
+        focus, task, user = FocusRecord.__table__, Task.__table__, User.__table__
+
+        # 过滤已经写入过的幂等键，每批一条查询（可使用(user_id, client_key)唯一索引）
+        existing = set()
+        for start in range(0, len(rows), _BATCH_SIZE):
+            batch = rows[start:start + _BATCH_SIZE]
+            existing.update(
+                (row.user_id, row.client_key) for row in conn.execute(
+                    select(focus.c.user_id, focus.c.client_key).where(
+                        focus.c.user_id.in_(sorted({row['user_id'] for row in batch})),
+                        focus.c.client_key.in_(sorted({row['client_key'] for row in batch}))
+                    )
+                )
+            )
+        rows = [row for row in rows if (row['user_id'], row['client_key']) not in existing]
+        if not rows:
+            return 0
+
+        rows = self._apply_daily_limit(conn, rows)
+        if not rows:
+            return 0
+
+        # 不属于该用户或不存在的任务不关联
+        task_ids = sorted({row['task_id'] for row in rows if row['task_id'] is not None})
+        owners = {}
+        for start in range(0, len(task_ids), _BATCH_SIZE):
+            owners.update(conn.execute(
+                select(task.c.id, task.c.user_id).where(task.c.id.in_(task_ids[start:start + _BATCH_SIZE]))
+            ).fetchall())
+        totals = defaultdict(int)
+        for row in rows:
+            if row['task_id'] is not None and owners.get(row['task_id']) != row['user_id']:
+                row['task_id'] = None
+            totals[row['user_id']] += row['duration']
+
+        for start in range(0, len(rows), _INSERT_BATCH_SIZE):
+            conn.execute(focus.insert(), rows[start:start + _INSERT_BATCH_SIZE])
+
+        items = list(totals.items())
+        for start in range(0, len(items), _BATCH_SIZE):
+            batch = dict(items[start:start + _BATCH_SIZE])
+            conn.execute(
+                user.update()
+                .where(user.c.id.in_(list(batch.keys())))
+                # updated_at赋值为自身，避免触发onupdate/ON UPDATE CURRENT_TIMESTAMP
+                .values(total_study_time=func.coalesce(user.c.total_study_time, 0) + case(batch, value=user.c.id),
+                        updated_at=user.c.updated_at)
+            )
+        logger.debug(f"已写入{len(rows)}条专注记录，涉及{len(items)}个用户")
+        return len(rows)
+
+    def _apply_daily_limit(self, conn, rows):
+        """按开始日期累计每个用户的专注时长（包括已写入的记录），超过每日上限的记录不写入"""
+        from app.models.learning import FocusRecord
+
+        focus = FocusRecord.__table__
+        earliest = datetime.combine(min(row['start_time'] for row in rows).date(), datetime.min.time())
+        used = defaultdict(int)
+        user_ids = sorted({row['user_id'] for row in rows})
+        for start in range(0, len(user_ids), _BATCH_SIZE):
+            # 使用idx_focus_record_user_start，start_time最多回溯FOCUS_MAX_AGE_DAYS天
+            for user_id, start_time, duration in conn.execute(
+                    select(focus.c.user_id, focus.c.start_time, focus.c.duration).where(
+                        focus.c.user_id.in_(user_ids[start:start + _BATCH_SIZE]),
+                        focus.c.start_time >= earliest
+                    )):
+                used[(user_id, start_time.date())] += duration
+
+        accepted = []
+        for row in sorted(rows, key=lambda item: item['start_time']):
+            key = (row['user_id'], row['start_time'].date())
+            if used[key] + row['duration'] > self.max_minutes_per_day:
+                self.rejected += 1
+                logger.warning(f"用户 {row['user_id']} 在 {key[1]} 的专注时长超过每日上限，"
+                               f"session_id {row['client_key']} 未写入")
+                continue
+            used[key] += row['duration']
+            accepted.append(row)
+        return accepted
+
+    def _app_context(self):
+        if has_app_context() or self.app is None:
+            return nullcontext()
+        return self.app.app_context()
+
+
+# 全局专注记录写缓冲实例，在create_app中通过init_app加载配置
+focus_buffer = FocusIngestBuffer()
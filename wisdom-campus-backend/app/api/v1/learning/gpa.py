@@ -0,0 +1,431 @@
+"""
+成绩引擎
+增量维护学分加权GPA和课程成绩分布：
+- grade_summary按(用户, 学期)保存课程数、学分合计、绩点×学分合计、成绩合计，
+  成绩新增/修改/删除时只把差值累加到对应行（批量upsert），不重新汇总全部成绩，
+  User.gpa由该用户的几行汇总值直接算出
+- 变更通过Session事件捕获：flush前批量读取被修改/删除成绩的原值，flush后写入差值，与成绩在同一事务中提交
+- 课程的学分或学期变化时，对选了该课程的用户整体重算
+- 批量导入使用bulk_mode（或直接调用recompute_users），结束时对受影响用户一次性重算
+- 课程成绩分布（均值、标准差、分位数、直方图）在进程内缓存，提交后按差值更新，
+  其他进程的缓存最多保留GRADE_STATS_CACHE_TTL秒
+"""
+import math
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy import event, inspect, select, case, func, delete, update, literal, and_
+
+from app import db
+from app.utils.cache import TTLCache
+from app.utils.upsert import upsert_rows
+
+logger = logging.getLogger(__name__)
+
+# 百分制成绩与绩点对照（4.0制），从高到低匹配，低于60分绩点为0
+GRADE_POINT_SCALE = (
+    (90, Decimal('4.0')),
+    (85, Decimal('3.7')),
+    (82, Decimal('3.3')),
+    (78, Decimal('3.0')),
+    (75, Decimal('2.7')),
+    (72, Decimal('2.3')),
+    (68, Decimal('2.0')),
+    (64, Decimal('1.5')),
+    (60, Decimal('1.0')),
+)
+
+# 直方图分段: (名称, 起始整数分, 结束整数分)，包含两端
+HISTOGRAM_BANDS = (('0-59', 0, 59), ('60-69', 60, 69), ('70-79', 70, 79), ('80-89', 80, 89), ('90-100', 90, 100))
+
+# 一次处理的用户数
+_CHUNK_SIZE = 500
+
+_ZERO = Decimal('0')
+_CENT = Decimal('0.01')
+
+
+def score_to_point(score):
+    """百分制成绩转换为绩点"""
+    for threshold, point in GRADE_POINT_SCALE:
+        if score >= threshold:
+            return point
+    return _ZERO
+
+
+def grade_point_expression(score_column):
+    """与score_to_point一致的SQL表达式，用于批量重算"""
+    return case(*[(score_column >= threshold, literal(point)) for threshold, point in GRADE_POINT_SCALE],
+                else_=literal(_ZERO))
+
+
+def _to_decimal(value):
+    if value is None:
+        return _ZERO
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+class CourseDistribution:
+    """
+    一门课程的成绩分布
+
+    按整数分数(0-100)计数，另外累计总和与平方和，
+    增删一条成绩都是O(1)，分位数按计数累加并在分数段内线性插值
+    """
+
+    def __init__(self, course_id):
+        self.course_id = course_id
+        self.counts = [0] * 101
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def add(self, score, sign=1):
+        score = float(score)
+        bucket = min(100, max(0, int(score)))
+        self.counts[bucket] += sign
+        self.count += sign
+        self.total += sign * score
+        self.total_sq += sign * score * score
+
+    def percentile(self, fraction):
+        """返回分位数（fraction取0-1），无成绩时返回None"""
+        if self.count <= 0:
+            return None
+        target = fraction * self.count
+        cumulative = 0
+        for bucket, bucket_count in enumerate(self.counts):
+            if bucket_count <= 0:
+                continue
+            if cumulative + bucket_count >= target:
+                return round(bucket + (target - cumulative) / bucket_count, 2) if bucket < 100 else 100.0
+            cumulative += bucket_count
+        return 100.0
+
+    def to_dict(self):
+        if self.count <= 0:
+            return {'course_id': self.course_id, 'count': 0, 'mean': None, 'stddev': None,
+                    'percentiles': {}, 'histogram': []}
+        mean = self.total / self.count
+        variance = max(0.0, self.total_sq / self.count - mean * mean)
+        return {
+            'course_id': self.course_id,
+            'count': self.count,
+            'mean': round(mean, 2),
+            'stddev': round(math.sqrt(variance), 2),
+            'percentiles': {
+                'p25': self.percentile(0.25),
+                'p50': self.percentile(0.5),
+                'p75': self.percentile(0.75),
+                'p90': self.percentile(0.9),
+            },
+            'histogram': [
+                {'range': name, 'count': sum(self.counts[low:high + 1])}
+                for name, low, high in HISTOGRAM_BANDS
+            ]
+        }
+
+
+class GradesEngine:
+    """
+    成绩与GPA引擎
+
+    在create_app中调用init_app注册Session事件，之后通过ORM对Grade的增删改都会自动维护汇总
+    """
+
+    def __init__(self, ttl=600, maxsize=5000):
+        self.distributions = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置读取缓存参数并注册Session事件"""
+        self.distributions.configure(
+            maxsize=app.config.get('GRADE_STATS_CACHE_MAXSIZE', self.distributions.maxsize),
+            ttl=app.config.get('GRADE_STATS_CACHE_TTL', self.distributions.ttl)
+        )
+        for name, listener in (('before_flush', self._before_flush), ('after_flush', self._after_flush),
+                               ('after_commit', self._after_commit), ('after_rollback', self._after_rollback)):
+            if not event.contains(db.session, name, listener):
+                event.listen(db.session, name, listener)
+
+    # ---- 查询 ----
+
+    def get_summary(self, user_id):
+        """
+        获取用户各学期及总体的GPA汇总
+
+        返回:
+            {'gpa', 'credits', 'course_count', 'average_score', 'semesters': [...]}
+        """
+        from app.models.learning import GradeSummary
+
+        rows = db.session.query(
+            GradeSummary.semester_id, GradeSummary.course_count, GradeSummary.credit_sum,
+            GradeSummary.point_sum, GradeSummary.score_sum
+        ).filter(GradeSummary.user_id == user_id).order_by(GradeSummary.semester_id).all()
+
+        semesters = [self._summary_dict(row.course_count, row.credit_sum, row.point_sum, row.score_sum,
+                                        semester_id=row.semester_id or None) for row in rows if row.course_count]
+        overall = self._summary_dict(
+            sum(row.course_count for row in rows),
+            sum((_to_decimal(row.credit_sum) for row in rows), _ZERO),
+            sum((_to_decimal(row.point_sum) for row in rows), _ZERO),
+            sum((_to_decimal(row.score_sum) for row in rows), _ZERO)
+        )
+        overall['semesters'] = semesters
+        return overall
+
+    @staticmethod
+    def _summary_dict(course_count, credit_sum, point_sum, score_sum, **extra):
+        credit_sum, point_sum, score_sum = _to_decimal(credit_sum), _to_decimal(point_sum), _to_decimal(score_sum)
+        data = dict(extra)
+        data.update({
+            # 与SQL的ROUND一致，四舍五入
+            'gpa': float((point_sum / credit_sum).quantize(_CENT, ROUND_HALF_UP)) if credit_sum > 0 else None,
+            'credits': float(credit_sum),
+            'course_count': course_count,
+            'average_score': float((score_sum / course_count).quantize(_CENT, ROUND_HALF_UP)) if course_count else None
+        })
+        return data
+
+    def get_distribution(self, course_id):
+        """获取课程成绩分布，未缓存时读取该课程全部成绩（包括已归档的成绩）构建"""
+        from app.api.v1.learning.semester_archive import read_through
+
+        distribution = self.distributions.get(course_id)
+        if distribution is None:
+            distribution = CourseDistribution(course_id)
+            grade = read_through('grade', lambda table: and_(table.c.course_id == course_id, table.c.score.isnot(None)))
+            for (score,) in db.session.execute(select(grade.c.score)):
+                distribution.add(score)
+            self.distributions.set(course_id, distribution)
+        with self._lock:
+            return distribution.to_dict()
+
+    # ---- 批量模式 ----
+
+    @contextmanager
+    def bulk_mode(self, session=None):
+        """
+        批量写入成绩时使用，期间不逐条维护汇总，退出时对受影响用户整体重算一次
+
+        示例:
+            with grades_engine.bulk_mode():
+                db.session.add_all(grades)
+            db.session.commit()
+        """
+        session = session or db.session()
+        affected = {'users': set(), 'courses': set()}
+        session.info['_grades_bulk'] = affected
+        try:
+            yield affected
+            session.flush()
+        finally:
+            session.info.pop('_grades_bulk', None)
+        self.recompute_users(affected['users'], session=session)
+        self._stale_courses(session).update(affected['courses'])
+
+    def recompute_users(self, user_ids, session=None, connection=None):
+        """
+        根据grade表（包括已归档的成绩）重算用户的汇总和GPA，每批用户一条INSERT ... SELECT
+
+        参数:
+            user_ids: 用户ID集合
+            session / connection: 在其事务中执行，默认使用db.session
+        """
+        from app.api.v1.learning.semester_archive import read_through
+        from app.models.learning import Course, GradeSummary
+        from app.models.user import User
+
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return
+        if connection is None:
+            connection = (session or db.session()).connection()
+
+        summary = GradeSummary.__table__
+        course = Course.__table__
+        credit = func.coalesce(course.c.credit, 0)
+        semester = func.coalesce(course.c.semester_id, 0)
+
+        for start in range(0, len(user_ids), _CHUNK_SIZE):
+            chunk = user_ids[start:start + _CHUNK_SIZE]
+            connection.execute(delete(summary).where(summary.c.user_id.in_(chunk)))
+            grade = read_through('grade', lambda table: table.c.user_id.in_(chunk))
+            aggregate = select(
+                grade.c.user_id,
+                semester,
+                func.count(),
+                func.sum(credit),
+                func.sum(grade_point_expression(grade.c.score) * credit),
+                func.sum(grade.c.score)
+            ).select_from(grade.join(course, course.c.id == grade.c.course_id)).where(
+                grade.c.score.isnot(None)
+            ).group_by(grade.c.user_id, semester)
+            connection.execute(summary.insert().from_select(
+                ['user_id', 'semester_id', 'course_count', 'credit_sum', 'point_sum', 'score_sum'], aggregate
+            ))
+            self._update_user_gpa(connection, chunk, User.__table__, summary)
+
+    def invalidate_course(self, course_id):
+        """使课程成绩分布缓存失效"""
+        self.distributions.delete(course_id)
+
+    # ---- Session事件 ----
+
+    @staticmethod
+    def _pending(session):
+        return session.info.setdefault('_grades_pending', {'old': [], 'dirty': [], 'courses': set()})
+
+    @staticmethod
+    def _stale_courses(session):
+        return session.info.setdefault('_grades_stale_courses', set())
+
+    def _before_flush(self, session, flush_context, instances):
+        """flush前读取被修改/删除成绩的原值（数据库中的值），一条SELECT"""
+        from app.models.learning import Grade, Course
+
+        changed = [obj for obj in session.dirty if isinstance(obj, Grade) and session.is_modified(obj)]
+        deleted = [obj for obj in session.deleted if isinstance(obj, Grade)]
+        courses = [
+            obj.id for obj in session.dirty if isinstance(obj, Course)
+            and any(inspect(obj).attrs[key].history.has_changes() for key in ('credit', 'semester_id'))
+        ]
+        if not (changed or deleted or courses):
+            return
+
+        pending = self._pending(session)
+        pending['courses'].update(courses)
+        ids = [obj.id for obj in changed + deleted if obj.id is not None]
+        if ids:
+            rows = session.connection().execute(
+                select(Grade.__table__.c.user_id, Grade.__table__.c.course_id, Grade.__table__.c.score)
+                .where(Grade.__table__.c.id.in_(ids))
+            )
+            pending['old'].extend((row.user_id, row.course_id, row.score) for row in rows)
+        pending['dirty'].extend(changed)
+
+    def _after_flush(self, session, flush_context):
+        """flush后把成绩差值写入grade_summary并更新GPA"""
+        from app.models.learning import Grade
+
+        pending = session.info.pop('_grades_pending', None)
+        added = [obj for obj in session.new if isinstance(obj, Grade)]
+        if pending is None and not added:
+            return
+        pending = pending or {'old': [], 'dirty': [], 'courses': set()}
+
+        # (符号, 用户ID, 课程ID, 成绩)
+        changes = [(-1, user_id, course_id, score) for user_id, course_id, score in pending['old']]
+        changes.extend((1, obj.user_id, obj.course_id, obj.score) for obj in added + pending['dirty'])
+
+        bulk = session.info.get('_grades_bulk')
+        if bulk is not None:
+            bulk['users'].update(user_id for _, user_id, _, _ in changes)
+            bulk['courses'].update(course_id for _, _, course_id, _ in changes)
+            bulk['users'].update(self._users_of_courses(session, pending['courses']))
+            return
+
+        self._apply(session, changes, pending['courses'])
+
+    def _apply(self, session, changes, changed_courses):
+        from app.models.learning import Course, GradeSummary
+        from app.models.user import User
+
+        connection = session.connection()
+        recompute = self._users_of_courses(session, changed_courses)
+
+        changes = [change for change in changes if change[3] is not None]
+        course_ids = {course_id for _, _, course_id, _ in changes}
+        course_info = {}
+        if course_ids:
+            course = Course.__table__
+            rows = connection.execute(
+                select(course.c.id, course.c.credit, course.c.semester_id).where(course.c.id.in_(course_ids))
+            )
+            course_info = {row.id: (_to_decimal(row.credit), row.semester_id or 0) for row in rows}
+
+        # 按(用户, 学期)合并差值
+        deltas = defaultdict(lambda: [0, _ZERO, _ZERO, _ZERO])
+        course_deltas = []
+        for sign, user_id, course_id, score in changes:
+            course_deltas.append((sign, course_id, score))
+            if user_id in recompute or course_id not in course_info:
+                continue
+            credit, semester_id = course_info[course_id]
+            score = _to_decimal(score)
+            delta = deltas[(user_id, semester_id)]
+            delta[0] += sign
+            delta[1] += sign * credit
+            delta[2] += sign * score_to_point(score) * credit
+            delta[3] += sign * score
+
+        rows = [
+            {'user_id': user_id, 'semester_id': semester_id, 'course_count': delta[0],
+             'credit_sum': delta[1], 'point_sum': delta[2], 'score_sum': delta[3]}
+            for (user_id, semester_id), delta in deltas.items() if any(delta)
+        ]
+        upsert_rows(connection, GradeSummary.__table__, rows, key_columns=('user_id', 'semester_id'),
+                    increment=('course_count', 'credit_sum', 'point_sum', 'score_sum'))
+
+        if recompute:
+            self.recompute_users(recompute, connection=connection)
+        users = sorted({row['user_id'] for row in rows} - recompute)
+        for start in range(0, len(users), _CHUNK_SIZE):
+            self._update_user_gpa(connection, users[start:start + _CHUNK_SIZE], User.__table__, GradeSummary.__table__)
+
+        if course_deltas:
+            session.info.setdefault('_grades_course_deltas', []).extend(course_deltas)
+
+    def _after_commit(self, session):
+        """事务提交后更新已缓存的课程成绩分布"""
+        deltas = session.info.pop('_grades_course_deltas', None)
+        stale = session.info.pop('_grades_stale_courses', None)
+        if stale:
+            for course_id in stale:
+                self.distributions.delete(course_id)
+        if not deltas:
+            return
+        with self._lock:
+            for sign, course_id, score in deltas:
+                distribution = self.distributions.get(course_id)
+                if distribution is not None:
+                    distribution.add(score, sign)
+
+    @staticmethod
+    def _after_rollback(session):
+        for key in ('_grades_pending', '_grades_course_deltas', '_grades_stale_courses'):
+            session.info.pop(key, None)
+
+    # ---- 内部工具 ----
+
+    @staticmethod
+    def _users_of_courses(session, course_ids):
+        from app.models.learning import Grade
+
+        if not course_ids:
+            return set()
+        grade = Grade.__table__
+        rows = session.connection().execute(
+            select(grade.c.user_id).where(grade.c.course_id.in_(list(course_ids))).distinct()
+        )
+        return {row.user_id for row in rows}
+
+    @staticmethod
+    def _update_user_gpa(connection, user_ids, user_table, summary):
+        """由grade_summary计算User.gpa（每个用户只有几行汇总）"""
+        credits = func.sum(summary.c.credit_sum)
+        # 乘1.0避免SQLite把整数值的NUMERIC按整数相除
+        gpa = select(
+            case((credits > 0, func.round(func.sum(summary.c.point_sum) * 1.0 / credits, 2)), else_=0)
+        ).where(summary.c.user_id == user_table.c.id).scalar_subquery()
+        connection.execute(
+            update(user_table).where(user_table.c.id.in_(user_ids)).values(gpa=func.coalesce(gpa, 0))
+        )
+
+
+# 全局成绩引擎实例，在create_app中通过init_app注册
+grades_engine = GradesEngine()
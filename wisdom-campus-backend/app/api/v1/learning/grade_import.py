@@ -0,0 +1,395 @@
+"""
+成绩批量导入
+期末成绩单（CSV/XLSX）的流式导入：
+- 逐行读取文件，不整体加载到内存；XLSX使用openpyxl只读模式（可选依赖）
+- 学号→user.id、课程代码→course.id通过内存映射解析，每批只查询尚未见过的键（IN查询）
+- 每批记录批量upsert写入grade（依赖(user_id, course_id)唯一索引），每批一个事务；
+  已归档学期的成绩不在热表的唯一索引范围内，已存在于grade_archive的(学生, 课程)直接更新归档行，
+  不在热表中再插入一行（否则read_through会读到两条成绩）
+- 全部写完后由成绩引擎对受影响用户一次性重算GPA汇总
+- 导入任务在后台线程执行，进度和逐行错误通过任务状态查询
+"""
+import io
+import os
+import csv
+import uuid
+import logging
+import threading
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import select, and_, bindparam
+
+from app import db
+from app.utils.cache import TTLCache
+from app.utils.upsert import upsert_rows
+
+try:
+    import openpyxl
+except ImportError:  # openpyxl为可选依赖，只有导入XLSX时需要
+    openpyxl = None
+
+logger = logging.getLogger(__name__)
+
+# 表头别名: 字段 -> 可接受的列名（不区分大小写）
+HEADER_ALIASES = {
+    'student_id': ('student_id', '学号'),
+    'course_code': ('course_code', 'code', '课程代码'),
+    'score': ('score', '成绩'),
+}
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx')
+
+# IN查询每次最多的键数
+_LOOKUP_BATCH = 500
+
+# 导入任务状态，保留一天
+_jobs = TTLCache(maxsize=500, ttl=86400)
+
+
+class GradeImportError(ValueError):
+    """文件格式错误等导致整个导入无法进行的错误"""
+
+
+class GradeSheetReader:
+    """
+    成绩单读取器，逐行产出 (行号, {'student_id', 'course_code', 'score'})
+
+    progress()返回已读取比例（0-1），无法估计时返回None
+    """
+
+    def __init__(self, path, filename=None):
+        self.path = path
+        self.extension = os.path.splitext(filename or path)[1].lower()
+        if self.extension not in SUPPORTED_EXTENSIONS:
+            raise GradeImportError("仅支持CSV或XLSX格式的成绩单")
+        if self.extension == '.xlsx' and openpyxl is None:
+            raise GradeImportError("导入XLSX需要安装openpyxl，或将成绩单另存为CSV")
+        self._progress = None
+
+    def progress(self):
+        return self._progress() if self._progress else None
+
+    def __iter__(self):
+        if self.extension == '.csv':
+            return self._iter_csv()
+        return self._iter_xlsx()
+
+    def _iter_csv(self):
+        size = os.path.getsize(self.path) or 1
+        with open(self.path, 'rb') as raw:
+            # utf-8-sig兼容Excel另存的带BOM文件
+            text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+            self._progress = lambda: min(1.0, raw.tell() / size)
+            reader = csv.reader(text)
+            yield from self._iter_records(reader)
+            self._progress = lambda: 1.0
+
+    def _iter_xlsx(self):
+        workbook = openpyxl.load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            total = sheet.max_row or 0
+            state = {'row': 0}
+            self._progress = (lambda: min(1.0, state['row'] / total)) if total else None
+            for line, record in self._iter_records(sheet.iter_rows(values_only=True)):
+                state['row'] = line
+                yield line, record
+            self._progress = lambda: 1.0
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _iter_records(rows):
+        rows = iter(rows)
+        header = next(rows, None)
+        if header is None:
+            raise GradeImportError("成绩单为空")
+        positions = _header_positions(header)
+
+        for line, row in enumerate(rows, start=2):
+            if not row or all(value in (None, '') for value in row):
+                continue
+            yield line, {
+                field: (row[index] if index < len(row) else None) for field, index in positions.items()
+            }
+
+
+def _header_positions(header):
+    """根据表头找到各字段所在的列"""
+    names = [str(value).strip().lower() if value is not None else '' for value in header]
+    positions = {}
+    for field, aliases in HEADER_ALIASES.items():
+        for alias in aliases:
+            if alias in names:
+                positions[field] = names.index(alias)
+                break
+        else:
+            raise GradeImportError(f"成绩单缺少列: {aliases[0]}（或{'/'.join(aliases[1:])}）")
+    return positions
+
+
+def _clean_key(value):
+    """学号、课程代码统一为字符串，Excel中的纯数字学号会被读成数字"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _parse_score(value):
+    if value is None or value == '':
+        return None, "成绩为空"
+    try:
+        score = Decimal(str(value).strip())
+    except InvalidOperation:
+        return None, f"成绩格式错误: {value}"
+    if not score.is_finite() or score < 0 or score > 100:
+        return None, f"成绩必须在0-100之间: {value}"
+    return score.quantize(Decimal('0.01')), None
+
+
+class GradeImporter:
+    """
+    把成绩记录分批写入grade表
+
+    参数:
+        connection: 数据库连接（每批开启一个事务）
+        chunk_size: 每批（每个事务）的记录数
+        max_errors: 最多保留的逐行错误数，超过后只计数
+        on_progress: 每批提交后的回调，参数为当前统计
+    """
+
+    def __init__(self, connection, chunk_size=2000, max_errors=1000, on_progress=None):
+        self.connection = connection
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.on_progress = on_progress
+        self.users = {}    # 学号 -> user.id，不存在时为None
+        self.courses = {}  # 课程代码 -> course.id，不存在时为None
+        self.affected_users = set()
+        self.affected_courses = set()
+        self.stats = {'processed': 0, 'written': 0, 'archived': 0, 'failed': 0}
+        self.errors = []
+
+    def run(self, records):
+        """
+        执行导入
+
+        参数:
+            records: 产出(行号, 记录字典)的可迭代对象，如GradeSheetReader
+
+        返回:
+            统计结果字典
+        """
+        chunk = []
+        for item in records:
+            chunk.append(item)
+            if len(chunk) >= self.chunk_size:
+                self._write_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._write_chunk(chunk)
+        self._finish()
+        return self.result()
+
+    def result(self):
+        data = dict(self.stats)
+        data['errors'] = self.errors
+        data['affected_users'] = len(self.affected_users)
+        return data
+
+    def _error(self, line, message):
+        self.stats['failed'] += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': line, 'message': message})
+
+    def _write_chunk(self, chunk):
+        from app.models.learning import Grade
+
+        self._resolve(chunk)
+        now = datetime.utcnow()
+        records = {}
+        for line, record in chunk:
+            self.stats['processed'] += 1
+            student_id, course_code = _clean_key(record['student_id']), _clean_key(record['course_code'])
+            user_id = self.users.get(student_id)
+            if user_id is None:
+                self._error(line, f"学号不存在: {student_id}" if student_id else "学号为空")
+                continue
+            course_id = self.courses.get(course_code)
+            if course_id is None:
+                self._error(line, f"课程代码不存在: {course_code}" if course_code else "课程代码为空")
+                continue
+            score, message = _parse_score(record['score'])
+            if message:
+                self._error(line, message)
+                continue
+            # 同一文件中重复的(学生, 课程)以最后一行为准
+            records[(user_id, course_id)] = {'user_id': user_id, 'course_id': course_id, 'score': score, 'recorded_at': now}
+
+        if records:
+            with self.connection.begin():
+                archived = self._archived_keys(records)
+                upsert_rows(self.connection, Grade.__table__,
+                            [row for key, row in records.items() if key not in archived],
+                            key_columns=('user_id', 'course_id'), replace=('score', 'recorded_at'), batch_size=1000)
+                if archived:
+                    self._update_archived([records[key] for key in sorted(archived)])
+            self.stats['written'] += len(records)
+            self.stats['archived'] += len(archived)
+            for user_id, course_id in records:
+                self.affected_users.add(user_id)
+                self.affected_courses.add(course_id)
+
+        if self.on_progress:
+            self.on_progress(self.result())
+
+    def _archived_keys(self, records):
+        """本批中成绩已在grade_archive中的(学生, 课程)"""
+        from app.models.archive import archive_tables
+
+        archive = archive_tables['grade']
+        user_ids = sorted({user_id for user_id, _ in records})
+        course_ids = sorted({course_id for _, course_id in records})
+        archived = set()
+        for start in range(0, len(user_ids), _LOOKUP_BATCH):
+            rows = self.connection.execute(select(archive.c.user_id, archive.c.course_id).where(
+                archive.c.user_id.in_(user_ids[start:start + _LOOKUP_BATCH]), archive.c.course_id.in_(course_ids)
+            ))
+            archived.update(key for key in map(tuple, rows) if key in records)
+        return archived
+
+    def _update_archived(self, rows):
+        """更新已归档的成绩（executemany，每行一条按(user_id, course_id)的UPDATE）"""
+        from app.models.archive import archive_tables
+
+        archive = archive_tables['grade']
+        self.connection.execute(
+            archive.update().where(and_(
+                archive.c.user_id == bindparam('key_user_id'), archive.c.course_id == bindparam('key_course_id')
+            )).values(score=bindparam('new_score'), recorded_at=bindparam('new_recorded_at')),
+            [{'key_user_id': row['user_id'], 'key_course_id': row['course_id'],
+              'new_score': row['score'], 'new_recorded_at': row['recorded_at']} for row in rows]
+        )
+
+    def _resolve(self, chunk):
+        """只为本批中未见过的学号、课程代码查询数据库"""
+        from app.models.user import User
+        from app.models.learning import Course
+
+        students = {_clean_key(record['student_id']) for _, record in chunk} - self.users.keys()
+        codes = {_clean_key(record['course_code']) for _, record in chunk} - self.courses.keys()
+        self._lookup(self.users, students, User.__table__.c.student_id, User.__table__.c.id)
+        self._lookup(self.courses, codes, Course.__table__.c.code, Course.__table__.c.id)
+
+    def _lookup(self, mapping, keys, key_column, id_column):
+        keys = sorted(key for key in keys if key)
+        for start in range(0, len(keys), _LOOKUP_BATCH):
+            batch = keys[start:start + _LOOKUP_BATCH]
+            for key in batch:
+                mapping[key] = None
+            rows = self.connection.execute(select(key_column, id_column).where(key_column.in_(batch)))
+            for key, row_id in rows:
+                mapping[key] = row_id
+        if '' not in mapping:
+            mapping[''] = None
+
+    def _finish(self):
+        """一次性重算受影响用户的GPA汇总，并使课程成绩分布、仪表盘汇总缓存失效"""
+        from app.api.v1.learning.gpa import grades_engine
+        from app.api.v1.learning.dashboard_summary import dashboard_cache
+
+        if self.affected_users:
+            with self.connection.begin():
+                grades_engine.recompute_users(self.affected_users, connection=self.connection)
+            dashboard_cache.invalidate_users(self.affected_users)
+        for course_id in self.affected_courses:
+            grades_engine.invalidate_course(course_id)
+
+
+def import_grade_file(path, filename=None, on_progress=None, chunk_size=None, max_errors=None):
+    """在当前应用上下文中同步导入成绩单，返回统计结果"""
+    from flask import current_app
+
+    reader = GradeSheetReader(path, filename)
+    with db.engine.connect() as connection:
+        importer = GradeImporter(
+            connection,
+            chunk_size=chunk_size or current_app.config.get('GRADE_IMPORT_CHUNK_SIZE', 2000),
+            max_errors=max_errors or current_app.config.get('GRADE_IMPORT_MAX_ERRORS', 1000),
+            on_progress=(lambda stats: on_progress(stats, reader.progress())) if on_progress else None
+        )
+        return importer.run(reader)
+
+
+class ImportJob:
+    """后台导入任务的状态"""
+
+    def __init__(self, filename, created_by=None):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.created_by = created_by
+        self.status = 'pending'
+        self.progress = None
+        self.stats = {'processed': 0, 'written': 0, 'failed': 0, 'errors': [], 'affected_users': 0}
+        self.message = None
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+
+    def update(self, stats, progress=None):
+        self.stats = stats
+        self.progress = progress
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'progress': round(self.progress, 4) if self.progress is not None else None,
+            'message': self.message,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            **self.stats
+        }
+
+
+def _run_job(app, job, path):
+    with app.app_context():
+        job.status = 'running'
+        try:
+            job.stats = import_grade_file(path, job.filename, on_progress=job.update)
+            job.progress = 1.0
+            job.status = 'completed'
+        except GradeImportError as e:
+            job.status, job.message = 'failed', str(e)
+        except Exception as e:
+            logger.exception(f"成绩导入任务 {job.id} 失败")
+            job.status, job.message = 'failed', f"导入失败: {str(e)}"
+        finally:
+            job.finished_at = datetime.utcnow()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        logger.info(f"成绩导入任务 {job.id} 结束: {job.status}, 写入 {job.stats.get('written')} 条, "
+                    f"失败 {job.stats.get('failed')} 条")
+
+
+def start_import_job(app, path, filename, created_by=None):
+    """
+    创建后台导入任务，导入完成后删除path
+
+    返回:
+        ImportJob
+    """
+    job = ImportJob(filename, created_by)
+    _jobs.set(job.id, job)
+    threading.Thread(target=_run_job, args=(app, job, path), name=f'grade-import-{job.id[:8]}', daemon=True).start()
+    return job
+
+
+def get_import_job(job_id):
+    """获取导入任务，不存在或已过期时返回None"""
+    return _jobs.get(job_id)
@@ -0,0 +1,101 @@
+"""
+成绩与GPA API
+"""
+import os
+import logging
+import tempfile
+
+from flask import request, current_app
+
+from app import db
+from app.api.v1.learning import learning_bp
+from app.api.v1.learning.gpa import grades_engine
+from app.api.v1.learning.grade_import import (
+    GradeImportError, SUPPORTED_EXTENSIONS, import_grade_file, start_import_job, get_import_job
+)
+from app.api.v1.learning.utils import parse_int
+from app.models.learning import Course, Grade
+from app.schemas.learning import grade_bulk_serializer
+from app.utils.auth import requires_auth, requires_admin
+from app.utils.error_codes import ErrorCode
+from app.utils.identity import current_user_id
+from app.utils.response import api_success, api_error
+
+logger = logging.getLogger(__name__)
+
+
+@learning_bp.route('/grades', methods=['GET'])
+@requires_auth
+def get_grades():
+    """获取当前用户的成绩列表，可按semester_id筛选"""
+    user_id = current_user_id()
+    query = grade_bulk_serializer.query().filter(Grade.user_id == user_id)
+    semester_id = parse_int(request.args.get('semester_id'))
+    if semester_id is not None:
+        query = query.filter(Grade.course_id.in_(
+            db.session.query(Course.id).filter(Course.semester_id == semester_id)
+        ))
+    rows = query.order_by(Grade.recorded_at.desc(), Grade.id.desc()).all()
+    return api_success(data={'grades': grade_bulk_serializer.dump_rows(rows)})
+
+
+@learning_bp.route('/gpa', methods=['GET'])
+@requires_auth
+def get_gpa():
+    """获取当前用户的总体及各学期GPA"""
+    return api_success(data=grades_engine.get_summary(current_user_id()))
+
+
+@learning_bp.route('/courses/<int:id>/grade-stats', methods=['GET'])
+@requires_auth
+def get_course_grade_stats(id):
+    """获取课程成绩分布：均值、标准差、分位数、分数段人数"""
+    if db.session.query(Course.id).filter(Course.id == id).first() is None:
+        return api_error(message="课程不存在", code=ErrorCode.COURSE_NOT_FOUND, status_code=404)
+    return api_success(data=grades_engine.get_distribution(id))
+
+
+@learning_bp.route('/grades/import', methods=['POST'])
+@requires_auth
+@requires_admin
+def import_grades():
+    """
+    批量导入成绩单（CSV/XLSX，表头包含 学号/student_id、课程代码/course_code、成绩/score）
+    默认创建后台任务并返回job_id，通过 GET /grades/import/<job_id> 查询进度和逐行错误；
+    小文件可传sync=1同步导入并直接返回结果
+    """
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return api_error(message="请上传成绩单文件", code=ErrorCode.INVALID_REQUEST)
+    extension = os.path.splitext(upload.filename)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        return api_error(message="仅支持CSV或XLSX格式的成绩单", code=ErrorCode.INVALID_REQUEST)
+
+    # 请求结束后上传流不可再读，先保存为临时文件
+    fd, path = tempfile.mkstemp(prefix='grade-import-', suffix=extension)
+    os.close(fd)
+    upload.save(path)
+
+    sync = request.values.get('sync') in ('1', 'true')
+    if sync and os.path.getsize(path) <= current_app.config.get('GRADE_IMPORT_SYNC_MAX_BYTES', 1024 * 1024):
+        try:
+            result = import_grade_file(path, upload.filename)
+        except GradeImportError as e:
+            return api_error(message=str(e), code=ErrorCode.INVALID_INPUT)
+        finally:
+            os.remove(path)
+        return api_success(data=result, message="成绩导入完成")
+
+    job = start_import_job(current_app._get_current_object(), path, upload.filename, created_by=current_user_id())
+    return api_success(data=job.to_dict(), message="成绩导入任务已创建")
+
+
+@learning_bp.route('/grades/import/<job_id>', methods=['GET'])
+@requires_auth
+@requires_admin
+def get_grade_import_job(job_id):
+    """查询成绩导入任务的状态、进度和逐行错误"""
+    job = get_import_job(job_id)
+    if job is None:
+        return api_error(message="导入任务不存在或已过期", code=ErrorCode.NOT_FOUND, status_code=404)
+    return api_success(data=job.to_dict())
@@ -0,0 +1,49 @@
+"""
+历史学期报表与学期数据归档API
+"""
+import logging
+
+from flask import request
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.api.v1.learning import learning_bp
+from app.api.v1.learning.semester_archive import semester_archiver, SemesterArchiveError
+from app.utils.auth import requires_auth, requires_admin
+from app.utils.error_codes import ErrorCode
+from app.utils.identity import current_user_id
+from app.utils.response import api_success, api_error
+
+logger = logging.getLogger(__name__)
+
+
+@learning_bp.route('/semesters/<int:semester_id>/report', methods=['GET'])
+@requires_auth
+def get_semester_report(semester_id):
+    """获取当前用户某学期的成绩、专注、打卡和任务统计（学期数据已归档时从归档表读取）"""
+    report = semester_archiver.semester_report(current_user_id(), semester_id)
+    if report is None:
+        return api_error(message="学期不存在", code=ErrorCode.NOT_FOUND, status_code=404)
+    return api_success(data=report)
+
+
+@learning_bp.route('/semesters/<int:semester_id>/archive', methods=['POST'])
+@requires_auth
+@requires_admin
+def archive_semester(semester_id):
+    """
+    把已结束学期的学习数据移入归档表（管理员）
+
+    请求体（可选）:
+        force: 为true时不检查学期状态和宽限期
+    """
+    json_data = request.get_json(silent=True) or {}
+    try:
+        result = semester_archiver.archive_semester(semester_id, force=json_data.get('force') is True)
+    except SemesterArchiveError as e:
+        return api_error(message=str(e), code=ErrorCode.INVALID_REQUEST)
+    except SQLAlchemyError as e:
+        logger.error(f"归档学期 {semester_id} 时发生数据库错误: {str(e)}")
+        return api_error(message="学期数据归档失败", code=ErrorCode.DB_ERROR, status_code=500)
+    if result is None:
+        return api_error(message="学期不存在", code=ErrorCode.NOT_FOUND, status_code=404)
+    return api_success(message="学期数据已归档", data={'archived': result})
@@ -0,0 +1,239 @@
+"""
+学习计划进度
+study_plan上保存task_total（任务总数）和task_completed（已完成任务数）两个计数器，
+progress由这两个值算出，读取计划时不需要再统计task表：
+- 任务通过ORM新增、删除、修改状态或所属计划时，由Session事件捕获，
+  flush前读取被修改/删除任务的原值，flush后按计划合并差值，每个计划一条原子UPDATE（executemany）
+- 批量修改任务状态的UPDATE不经过ORM事件，调用bulk_status_change用一条分组SELECT算出差值
+- 计数器可能因直接改库、其他未经ORM的写入而漂移，reconcile按ID分段批量比对并修正
+"""
+import logging
+from collections import defaultdict
+
+from sqlalchemy import event, inspect, select, update, case, func, bindparam
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+COMPLETED_STATUS = 'completed'
+
+# 一次处理的计划数
+_CHUNK_SIZE = 1000
+
+
+def progress_expression(plan_table):
+    """由计数器计算进度百分比的SQL表达式（乘1.0避免整数相除）"""
+    return case(
+        (plan_table.c.task_total > 0,
+         func.round(plan_table.c.task_completed * 1.0 * 100 / plan_table.c.task_total, 2)),
+        else_=0
+    )
+
+
+class PlanProgressTracker:
+    """
+    学习计划进度计数器
+
+    在create_app中调用init_app注册Session事件，之后通过ORM对Task的增删改都会自动维护计数
+    """
+
+    def init_app(self, app):
+        """注册Session事件"""
+        for name, listener in (('before_flush', self._before_flush), ('after_flush', self._after_flush),
+                               ('after_rollback', self._after_rollback)):
+            if not event.contains(db.session, name, listener):
+                event.listen(db.session, name, listener)
+
+    # ---- 计数器更新 ----
+
+    def apply_deltas(self, connection, deltas):
+        """
+        把计数差值累加到study_plan并刷新进度
+
+        参数:
+            connection: 数据库连接（在其事务中执行）
+            deltas: {计划ID: (任务总数差值, 已完成数差值)}
+        """
+        from app.models.learning import StudyPlan
+
+        rows = [
+            {'b_plan_id': plan_id, 'b_total': total, 'b_completed': completed}
+            for plan_id, (total, completed) in deltas.items() if plan_id is not None and (total or completed)
+        ]
+        if not rows:
+            return
+        plan = StudyPlan.__table__
+        connection.execute(
+            update(plan).where(plan.c.id == bindparam('b_plan_id')).values(
+                task_total=plan.c.task_total + bindparam('b_total'),
+                task_completed=plan.c.task_completed + bindparam('b_completed')
+            ),
+            rows
+        )
+        # 进度单独一条UPDATE：MySQL的SET按从左到右使用已更新的值，与其他数据库不一致
+        self._refresh_progress(connection, plan, sorted(row['b_plan_id'] for row in rows))
+
+    def bulk_status_change(self, session, conditions, status):
+        """
+        批量修改任务状态前调用（与UPDATE在同一事务中），按计划统计完成数的变化
+
+        参数:
+            session: 执行UPDATE的Session
+            conditions: UPDATE使用的Task过滤条件列表
+            status: 目标状态
+        """
+        from app.models.learning import Task
+
+        if status == COMPLETED_STATUS:
+            # 未完成 -> 已完成
+            changing, sign = Task.status != COMPLETED_STATUS, 1
+        else:
+            # 只有原来已完成的任务影响完成数
+            changing, sign = Task.status == COMPLETED_STATUS, -1
+        rows = session.query(Task.plan_id, func.count()).filter(
+            *conditions, Task.plan_id.isnot(None), changing
+        ).group_by(Task.plan_id).all()
+        self.apply_deltas(session.connection(), {plan_id: (0, sign * count) for plan_id, count in rows})
+
+    # ---- 修正 ----
+
+    def reconcile(self, connection=None, plan_ids=None, chunk_size=_CHUNK_SIZE):
+        """
+        按task表（包括已归档的任务）重新统计并修正计数器，每段计划一次分组查询，只更新有偏差的计划
+
+        参数:
+            connection: 数据库连接，默认每段在db.engine上开启一个事务
+            plan_ids: 只检查这些计划，默认检查全部
+            chunk_size: 每段的计划数
+
+        返回:
+            {'checked': 检查的计划数, 'fixed': 修正的计划数}
+        """
+        from app.models.learning import StudyPlan
+
+        plan = StudyPlan.__table__
+        result = {'checked': 0, 'fixed': 0}
+        if plan_ids is not None:
+            plan_ids = sorted(set(plan_ids))
+            for start in range(0, len(plan_ids), chunk_size):
+                self._run_chunk(connection, plan, plan.c.id.in_(plan_ids[start:start + chunk_size]),
+                                chunk_size, result)
+        else:
+            # 按主键分段，每段一个事务，不长时间锁表
+            last_id = 0
+            while last_id is not None:
+                last_id = self._run_chunk(connection, plan, plan.c.id > last_id, chunk_size, result)
+        logger.info(f"学习计划进度修正完成: 检查 {result['checked']} 个, 修正 {result['fixed']} 个")
+        return result
+
+    def _run_chunk(self, connection, plan, condition, chunk_size, result):
+        if connection is not None:
+            return self._reconcile_chunk(connection, plan, condition, chunk_size, result)
+        with db.engine.begin() as conn:
+            return self._reconcile_chunk(conn, plan, condition, chunk_size, result)
+
+    def _reconcile_chunk(self, connection, plan, condition, chunk_size, result):
+        """修正一段计划，返回本段最大的计划ID，没有计划时返回None"""
+        from app.api.v1.learning.semester_archive import read_through
+
+        stored = connection.execute(
+            select(plan.c.id, plan.c.task_total, plan.c.task_completed, plan.c.progress)
+            .where(condition).order_by(plan.c.id).limit(chunk_size)
+        ).fetchall()
+        if not stored:
+            return None
+
+        ids = [row.id for row in stored]
+        # 已归档的任务仍计入所属计划
+        task = read_through('task', lambda table: table.c.plan_id.in_(ids))
+        actual = {
+            row.plan_id: (row.total, int(row.completed or 0))
+            for row in connection.execute(
+                select(
+                    task.c.plan_id,
+                    func.count().label('total'),
+                    func.sum(case((task.c.status == COMPLETED_STATUS, 1), else_=0)).label('completed')
+                ).group_by(task.c.plan_id)
+            )
+        }
+
+        drifted = []
+        for row in stored:
+            total, completed = actual.get(row.id, (0, 0))
+            expected = round(completed * 100 / total, 2) if total else 0
+            if (row.task_total, row.task_completed) != (total, completed) \
+                    or row.progress is None or abs(float(row.progress) - expected) >= 0.01:
+                drifted.append({'b_plan_id': row.id, 'b_total': total, 'b_completed': completed})
+        if drifted:
+            connection.execute(
+                update(plan).where(plan.c.id == bindparam('b_plan_id')).values(
+                    task_total=bindparam('b_total'), task_completed=bindparam('b_completed')
+                ),
+                drifted
+            )
+            self._refresh_progress(connection, plan, [row['b_plan_id'] for row in drifted])
+
+        result['checked'] += len(stored)
+        result['fixed'] += len(drifted)
+        return ids[-1]
+
+    @staticmethod
+    def _refresh_progress(connection, plan, plan_ids):
+        for start in range(0, len(plan_ids), _CHUNK_SIZE):
+            connection.execute(
+                update(plan).where(plan.c.id.in_(plan_ids[start:start + _CHUNK_SIZE]))
+                .values(progress=progress_expression(plan))
+            )
+
+    # ---- Session事件 ----
+
+    def _before_flush(self, session, flush_context, instances):
+        """flush前读取被修改/删除任务的原所属计划和状态（数据库中的值），一条SELECT"""
+        from app.models.learning import Task
+
+        changed = [
+            obj for obj in session.dirty if isinstance(obj, Task)
+            and any(inspect(obj).attrs[key].history.has_changes() for key in ('plan_id', 'status'))
+        ]
+        deleted = [obj for obj in session.deleted if isinstance(obj, Task)]
+        if not (changed or deleted):
+            return
+
+        pending = session.info.setdefault('_plan_progress_pending', {'old': [], 'dirty': []})
+        ids = [obj.id for obj in changed + deleted if obj.id is not None]
+        if ids:
+            task = Task.__table__
+            rows = session.connection().execute(
+                select(task.c.plan_id, task.c.status).where(task.c.id.in_(ids), task.c.plan_id.isnot(None))
+            )
+            pending['old'].extend((row.plan_id, row.status) for row in rows)
+        pending['dirty'].extend(changed)
+
+    def _after_flush(self, session, flush_context):
+        """flush后按计划合并任务数和完成数的差值并写入"""
+        from app.models.learning import Task
+
+        pending = session.info.pop('_plan_progress_pending', None)
+        added = [obj for obj in session.new if isinstance(obj, Task) and obj.plan_id is not None]
+        if pending is None and not added:
+            return
+        pending = pending or {'old': [], 'dirty': []}
+
+        deltas = defaultdict(lambda: [0, 0])
+        for plan_id, status in pending['old']:
+            deltas[plan_id][0] -= 1
+            deltas[plan_id][1] -= status == COMPLETED_STATUS
+        for obj in added + pending['dirty']:
+            if obj.plan_id is not None:
+                deltas[obj.plan_id][0] += 1
+                deltas[obj.plan_id][1] += obj.status == COMPLETED_STATUS
+        self.apply_deltas(session.connection(), deltas)
+
+    @staticmethod
+    def _after_rollback(session):
+        session.info.pop('_plan_progress_pending', None)
+
+
+# 全局学习计划进度计数器实例，在create_app中通过init_app注册
+plan_progress = PlanProgressTracker()
@@ -0,0 +1,187 @@
+"""
+学习计划API
+"""
+import logging
+from datetime import date
+
+from flask import request
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.api.v1.learning import learning_bp
+from app.api.v1.learning.plan_progress import plan_progress
+from app.api.v1.learning.utils import parse_int
+from app.models.learning import StudyPlan
+from app.schemas.learning import study_plan_bulk_serializer
+from app.utils.auth import requires_auth, requires_admin
+from app.utils.error_codes import ErrorCode
+from app.utils.identity import current_user_id
+from app.utils.response import api_success, api_error
+
+logger = logging.getLogger(__name__)
+
+PLAN_STATUSES = ('active', 'completed', 'abandoned')
+
+
+def _parse_date(value):
+    """解析YYYY-MM-DD格式的日期，返回(date或None, 是否有效)"""
+    if value in (None, ''):
+        return None, True
+    try:
+        return date.fromisoformat(str(value)), True
+    except ValueError:
+        return None, False
+
+
+def _validate_plan(json_data, plan=None):
+    """
+    校验学习计划参数，修改时只校验提供的字段；progress由任务完成情况计算，不接受修改
+
+    返回:
+        (字段字典, 错误信息)
+    """
+    values = {}
+    if 'title' in json_data or plan is None:
+        title = (json_data.get('title') or '').strip()
+        if not title or len(title) > 100:
+            return None, "计划标题不能为空且不超过100个字符"
+        values['title'] = title
+    if 'description' in json_data:
+        values['description'] = json_data['description']
+    for key in ('start_date', 'end_date'):
+        if key in json_data or (key == 'start_date' and plan is None):
+            value, valid = _parse_date(json_data.get(key))
+            if not valid:
+                return None, f"{key}格式应为YYYY-MM-DD"
+            values[key] = value
+    if 'start_date' in values and values['start_date'] is None:
+        return None, "开始日期不能为空"
+    start_date = values.get('start_date', plan.start_date if plan else None)
+    end_date = values.get('end_date', plan.end_date if plan else None)
+    if start_date and end_date and end_date < start_date:
+        return None, "结束日期不能早于开始日期"
+    if 'status' in json_data:
+        if json_data['status'] not in PLAN_STATUSES:
+            return None, "无效的参数: status"
+        values['status'] = json_data['status']
+    return values, None
+
+
+@learning_bp.route('/plans', methods=['GET'])
+@requires_auth
+def get_plans():
+    """
+    获取当前用户的学习计划及进度（进度、任务数直接读取计数器，不统计task表）
+
+    查询参数:
+        status: 按计划状态筛选
+    """
+    query = study_plan_bulk_serializer.query().filter(StudyPlan.user_id == current_user_id())
+    status = request.args.get('status')
+    if status:
+        if status not in PLAN_STATUSES:
+            return api_error(message="无效的参数: status", code=ErrorCode.INVALID_REQUEST)
+        query = query.filter(StudyPlan.status == status)
+    rows = query.order_by(StudyPlan.start_date.desc(), StudyPlan.id.desc()).all()
+    return api_success(data={'plans': study_plan_bulk_serializer.dump_rows(rows)})
+
+
+@learning_bp.route('/plans/<int:id>', methods=['GET'])
+@requires_auth
+def get_plan(id):
+    """获取学习计划详情"""
+    row = study_plan_bulk_serializer.query().filter(
+        StudyPlan.id == id, StudyPlan.user_id == current_user_id()
+    ).first()
+    if row is None:
+        return api_error(message="学习计划不存在", code=ErrorCode.PLAN_NOT_FOUND, status_code=404)
+    return api_success(data={'plan': study_plan_bulk_serializer.dump_rows([row])[0]})
+
+
+@learning_bp.route('/plans', methods=['POST'])
+@requires_auth
+def create_plan():
+    """创建学习计划"""
+    json_data = request.get_json(silent=True)
+    if not json_data:
+        return api_error(message="请求必须是JSON格式", code=ErrorCode.INVALID_REQUEST)
+    values, error = _validate_plan(json_data)
+    if error:
+        return api_error(message=error, code=ErrorCode.INVALID_REQUEST)
+
+    try:
+        plan = StudyPlan(user_id=current_user_id(), **values)
+        db.session.add(plan)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"创建学习计划时发生数据库错误: {str(e)}")
+        return api_error(message="创建学习计划失败", code=ErrorCode.DB_ERROR, status_code=500)
+    return api_success(message="学习计划创建成功", data={'plan': study_plan_bulk_serializer.dump_objects([plan])[0]})
+
+
+@learning_bp.route('/plans/<int:id>', methods=['PUT'])
+@requires_auth
+def update_plan(id):
+    """修改学习计划标题、描述、日期或状态"""
+    plan = StudyPlan.query.filter_by(id=id, user_id=current_user_id()).first()
+    if plan is None:
+        return api_error(message="学习计划不存在", code=ErrorCode.PLAN_NOT_FOUND, status_code=404)
+    json_data = request.get_json(silent=True)
+    if not json_data:
+        return api_error(message="请求必须是JSON格式", code=ErrorCode.INVALID_REQUEST)
+    values, error = _validate_plan(json_data, plan)
+    if error:
+        return api_error(message=error, code=ErrorCode.INVALID_REQUEST)
+
+    try:
+        for key, value in values.items():
+            setattr(plan, key, value)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"修改学习计划时发生数据库错误: {str(e)}")
+        return api_error(message="修改学习计划失败", code=ErrorCode.DB_ERROR, status_code=500)
+    return api_success(message="学习计划修改成功", data={'plan': study_plan_bulk_serializer.dump_objects([plan])[0]})
+
+
+@learning_bp.route('/plans/<int:id>', methods=['DELETE'])
+@requires_auth
+def delete_plan(id):
+    """删除学习计划及其任务"""
+    plan = StudyPlan.query.filter_by(id=id, user_id=current_user_id()).first()
+    if plan is None:
+        return api_error(message="学习计划不存在", code=ErrorCode.PLAN_NOT_FOUND, status_code=404)
+    try:
+        db.session.delete(plan)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"删除学习计划时发生数据库错误: {str(e)}")
+        return api_error(message="删除学习计划失败", code=ErrorCode.DB_ERROR, status_code=500)
+    return api_success(message="学习计划删除成功")
+
+
+@learning_bp.route('/plans/reconcile', methods=['POST'])
+@requires_auth
+@requires_admin
+def reconcile_plan_progress():
+    """
+    按task表修正学习计划的任务数、完成数和进度（管理员）
+
+    请求体（可选）:
+        plan_ids: 只修正这些计划，默认全部
+    """
+    json_data = request.get_json(silent=True) or {}
+    plan_ids = json_data.get('plan_ids')
+    if plan_ids is not None:
+        if not isinstance(plan_ids, list):
+            return api_error(message="plan_ids必须是计划ID的列表", code=ErrorCode.INVALID_REQUEST)
+        plan_ids = {parse_int(plan_id) for plan_id in plan_ids} - {None}
+
+    try:
+        result = plan_progress.reconcile(plan_ids=plan_ids)
+    except SQLAlchemyError as e:
+        logger.error(f"修正学习计划进度时发生数据库错误: {str(e)}")
+        return api_error(message="修正学习计划进度失败", code=ErrorCode.DB_ERROR, status_code=500)
+    return api_success(message="学习计划进度已修正", data=result)
@@ -0,0 +1,249 @@
+"""
+任务截止提醒
+在截止时间前TASK_REMINDER_LEAD秒向Notification写入提醒，不轮询整张task表：
+- 内存中用最小堆按提醒时间排列任务，后台线程睡眠到堆顶的提醒时间（或有更早的任务加入时被唤醒）
+- 只把未来TASK_REMINDER_HORIZON秒内到期的任务放入堆中，每隔TASK_REMINDER_RELOAD_INTERVAL秒按deadline索引范围查询加载一次，
+  其他进程新建或修改的任务在下一次加载时生效；提醒时间未变的任务不重复入堆
+- 本进程内创建、修改任务时直接调用schedule/cancel更新堆，修改后的旧条目按序号惰性删除
+- 触发时按任务ID批量复核状态和截止时间，已提醒过的任务不重复提醒，通知批量插入
+- 通知写入后通过实时推送（app.utils.push）发送notification事件，多进程部署时需配置跨进程的PUSH_BROKER
+调度器默认关闭，只在一个进程中开启：设置环境变量TASK_REMINDER_ENABLED=1，或单独运行scripts/run_task_reminders.py；
+开启后在create_app中启动后台线程，不在请求处理过程中查询数据库
+"""
+import atexit
+import heapq
+import logging
+import threading
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+from flask import has_app_context
+from sqlalchemy import select, and_
+
+logger = logging.getLogger(__name__)
+
+# 未完成的任务状态
+OPEN_STATUSES = ('pending', 'in_progress', 'reviewing', 'revising', 'delayed')
+
+REMINDER_TITLE = '任务即将截止'
+
+# 单次批量处理的任务数
+_BATCH_SIZE = 500
+
+
+class DeadlineReminderScheduler:
+    """
+    任务截止提醒调度器
+
+    开启时在init_app中启动后台线程
+    """
+
+    def __init__(self, lead=3600, horizon=6 * 3600, reload_interval=60, enabled=False):
+        self.lead = timedelta(seconds=lead)
+        self.horizon = timedelta(seconds=horizon)
+        self.reload_interval = timedelta(seconds=reload_interval)
+        self.enabled = enabled
+        self.app = None
+        self._heap = []      # (提醒时间, 序号, 任务ID)
+        self._entries = {}   # 任务ID -> (当前有效的序号, 提醒时间)
+        self._fired = {}     # 任务ID -> 已提醒的截止时间，窗口重新加载时不再重复触发
+        self._seq = 0
+        self._window_end = None
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self.fired = 0
+
+    def init_app(self, app):
+        """从应用配置读取参数（全局实例只在第一次init_app时注册退出时停止）"""
+        if self.app is None:
+            atexit.register(self.shutdown)
+        self.app = app
+        self.lead = timedelta(seconds=app.config.get('TASK_REMINDER_LEAD', self.lead.total_seconds()))
+        self.horizon = timedelta(seconds=app.config.get('TASK_REMINDER_HORIZON', self.horizon.total_seconds()))
+        self.reload_interval = timedelta(seconds=app.config.get('TASK_REMINDER_RELOAD_INTERVAL',
+                                                                self.reload_interval.total_seconds()))
+        self.enabled = app.config.get('TASK_REMINDER_ENABLED', self.enabled)
+        if self.enabled:
+            self._ensure_thread()
+
+    def schedule(self, task_id, deadline, status='pending'):
+        """任务创建或截止时间、状态变化后调用，重新安排提醒"""
+        if not self.enabled:
+            return
+        if deadline is None or status not in OPEN_STATUSES or deadline <= datetime.now():
+            self.cancel(task_id)
+            return
+
+        remind_at = deadline - self.lead
+        with self._condition:
+            # 超出当前窗口的任务由下次窗口加载处理
+            if self._window_end is not None and remind_at > self._window_end:
+                self._entries.pop(task_id, None)
+                return
+            # 已在堆中或已提醒过的任务（窗口重新加载时）不重复入堆
+            entry = self._entries.get(task_id)
+            if (entry is not None and entry[1] == remind_at) or self._fired.get(task_id) == deadline:
+                return
+            self._seq += 1
+            self._entries[task_id] = (self._seq, remind_at)
+            heapq.heappush(self._heap, (remind_at, self._seq, task_id))
+            if self._heap[0][2] == task_id:
+                self._condition.notify()
+        self._ensure_thread()
+
+    def schedule_many(self, tasks):
+        """批量安排提醒，tasks为(任务ID, 截止时间, 状态)"""
+        for task_id, deadline, status in tasks:
+            self.schedule(task_id, deadline, status)
+
+    def cancel(self, task_id):
+        """任务完成、取消或删除后调用"""
+        with self._condition:
+            self._entries.pop(task_id, None)
+
+    def pending_count(self):
+        return len(self._entries)
+
+    def shutdown(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def _ensure_thread(self):
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='task-reminder', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        next_load = datetime.min
+        while not self._stopped:
+            now = datetime.now()
+            if now >= next_load:
+                try:
+                    self._load_window(now)
+                except Exception as e:
+                    logger.error(f"加载待提醒任务失败: {str(e)}")
+                next_load = now + self.reload_interval
+
+            due = []
+            with self._condition:
+                now = datetime.now()
+                while self._heap and self._heap[0][0] <= now:
+                    _, seq, task_id = heapq.heappop(self._heap)
+                    if self._entries.get(task_id, (None,))[0] == seq:
+                        del self._entries[task_id]
+                        due.append(task_id)
+                if not due:
+                    wake_at = min(self._heap[0][0], next_load) if self._heap else next_load
+                    self._condition.wait(max(0.0, (wake_at - now).total_seconds()))
+                    continue
+
+            try:
+                self._fire(due)
+            except Exception as e:
+                logger.error(f"写入任务截止提醒失败: {str(e)}")
+
+    def _load_window(self, now):
+        """范围查询截止时间在窗口内的未完成任务（使用idx_task_deadline）"""
+        from app import db
+        from app.models.learning import Task
+
+        window_end = now + self.horizon
+        table = Task.__table__
+        with self._app_context():
+            with db.engine.connect() as conn:
+                rows = conn.execute(
+                    select(table.c.id, table.c.deadline, table.c.status).where(
+                        table.c.status.in_(OPEN_STATUSES),
+                        table.c.deadline > now,
+                        table.c.deadline <= window_end + self.lead
+                    )
+                ).fetchall()
+        with self._condition:
+            self._window_end = window_end
+            # 已经截止的任务不会再被加载，清理其提醒记录
+            self._fired = {task_id: deadline for task_id, deadline in self._fired.items() if deadline > now}
+        self.schedule_many(rows)
+        logger.debug(f"已加载{len(rows)}个待提醒任务")
+
+    def _fire(self, task_ids):
+        """复核任务状态后批量写入提醒通知"""
+        from app import db
+        from app.models.learning import Task
+        from app.models.ai import Notification
+        from app.api.v1.learning.dashboard_summary import dashboard_cache
+        from app.utils.push import push_hub
+
+        task, notification = Task.__table__, Notification.__table__
+        now = datetime.now()
+        sent = []
+        with self._app_context():
+            with db.engine.begin() as conn:
+                for start in range(0, len(task_ids), _BATCH_SIZE):
+                    batch = task_ids[start:start + _BATCH_SIZE]
+                    rows = conn.execute(
+                        select(task.c.id, task.c.user_id, task.c.content, task.c.deadline).where(
+                            task.c.id.in_(batch), task.c.status.in_(OPEN_STATUSES), task.c.deadline > now
+                        )
+                    ).fetchall()
+
+                    # 截止时间被其他进程推迟的任务重新安排
+                    ready = []
+                    for row in rows:
+                        if row.deadline - self.lead > now + timedelta(seconds=1):
+                            self.schedule(row.id, row.deadline)
+                        else:
+                            ready.append(row)
+                    if not ready:
+                        continue
+                    with self._condition:
+                        self._fired.update((row.id, row.deadline) for row in ready)
+
+                    # 同一截止时间已经提醒过的任务不再提醒
+                    earliest = min(row.deadline for row in ready) - self.lead * 2
+                    reminded = {}
+                    for target_id, created_at in conn.execute(
+                        select(notification.c.target_id, notification.c.created_at).where(and_(
+                            notification.c.target_type == 'task',
+                            notification.c.target_id.in_([row.id for row in ready]),
+                            notification.c.title == REMINDER_TITLE,
+                            notification.c.created_at >= earliest
+                        ))
+                    ):
+                        reminded[target_id] = max(created_at, reminded.get(target_id, created_at))
+                    values = [
+                        {
+                            'user_id': row.user_id,
+                            'title': REMINDER_TITLE,
+                            'content': f"任务「{row.content[:50]}」将于{row.deadline:%Y-%m-%d %H:%M}截止",
+                            'type': 'task',
+                            'is_read': False,
+                            'created_at': now,
+                            'target_type': 'task',
+                            'target_id': row.id
+                        }
+                        for row in ready
+                        if row.id not in reminded or reminded[row.id] < row.deadline - self.lead * 2
+                    ]
+                    if values:
+                        conn.execute(notification.insert(), values)
+                        self.fired += len(values)
+                        sent.extend(values)
+        dashboard_cache.invalidate_users({value['user_id'] for value in sent})
+        # 事务提交后推送给在线用户
+        push_hub.publish_many((value['user_id'], 'notification', value) for value in sent)
+        logger.debug(f"已发送{self.fired}条任务截止提醒")
+
+    def _app_context(self):
+        if has_app_context() or self.app is None:
+            return nullcontext()
+        return self.app.app_context()
+
+
+# 全局提醒调度器实例，在create_app中通过init_app加载配置
+reminder_scheduler = DeadlineReminderScheduler()
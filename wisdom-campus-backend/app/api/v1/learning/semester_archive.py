@@ -0,0 +1,298 @@
+"""
+学期数据归档
+Semester.status为completed且结束超过ARCHIVE_GRACE_DAYS天的学期，其学习数据从热表移入*_archive表
+（定义见app/models/archive.py），课表、任务看板、仪表盘等热路径查询只面对近期的数据量：
+- 按主键分段，每段在一个事务中INSERT ... SELECT写入归档表后DELETE热表，中途失败可以直接重跑
+- 用归档表而不是MySQL分区表：分区表不支持外键，而这些表都通过外键关联user/course
+- 依赖全部历史的统计（GPA重算、计划进度修正、打卡回填和最长连续天数）通过read_through同时读取热表和归档表；
+  历史学期报表用semester_report，学期是否已归档（或只归档了一部分）返回的结果相同
+- 未完成的任务和仍被热表专注记录引用的任务留在热表中
+- 每个(学生, 课程)的成绩在热表和归档表中合计只有一行：成绩导入对已归档的成绩直接更新归档行；
+  重新归档时热表中的成绩替换归档表中同一(学生, 课程)的旧成绩
+"""
+import logging
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import select, delete, update, and_, literal, union_all, func, case, tuple_
+
+from app import db
+from app.models.archive import archive_tables
+
+logger = logging.getLogger(__name__)
+
+# 可以归档的任务状态
+CLOSED_TASK_STATUSES = ('completed', 'cancelled')
+
+# 归档顺序：专注记录先于任务，使被引用的任务在同一次归档中也能移走
+ARCHIVE_ORDER = ('focus_record', 'task', 'check_in', 'learning_behavior', 'course_schedule', 'grade')
+
+
+def _datetime_range(column, semester):
+    start = datetime.combine(semester.start_date, time.min)
+    end = datetime.combine(semester.end_date + timedelta(days=1), time.min)
+    return and_(column >= start, column < end)
+
+
+def _semester_courses(semester):
+    from app.models.learning import Course
+
+    course = Course.__table__
+    return select(course.c.id).where(course.c.semester_id == semester.id)
+
+
+def in_semester(name, table, semester):
+    """
+    热表或归档表中属于某学期的记录的条件
+
+    参数:
+        name: 热表名
+        table: 热表或对应的归档表
+        semester: 带id、start_date、end_date的学期行
+    """
+    if table is archive_tables[name]:
+        return table.c.semester_id == semester.id
+    if name in ('grade', 'course_schedule'):
+        return table.c.course_id.in_(_semester_courses(semester))
+    if name == 'focus_record':
+        return _datetime_range(table.c.start_time, semester)
+    if name == 'check_in':
+        return table.c.check_in_date.between(semester.start_date, semester.end_date)
+    if name == 'task':
+        return _datetime_range(table.c.deadline, semester)
+    if name == 'learning_behavior':
+        return _datetime_range(table.c.created_at, semester)
+    raise KeyError(name)
+
+
+def _archivable(name, table, semester):
+    """热表中可以归档的记录"""
+    condition = in_semester(name, table, semester)
+    if name == 'task':
+        condition = and_(condition, table.c.status.in_(CLOSED_TASK_STATUSES))
+    return condition
+
+
+def _referenced_tasks(connection, task_ids):
+    """仍被热表专注记录引用的任务（删除任务会把这些专注记录的task_id置空）"""
+    focus = db.metadata.tables['focus_record']
+    return {row[0] for row in connection.execute(
+        select(focus.c.task_id).where(focus.c.task_id.in_(task_ids)).distinct()
+    )}
+
+
+def read_through(name, where=None, source=False):
+    """
+    热表与归档表的UNION ALL子查询，列与热表相同
+
+    参数:
+        name: 热表名
+        where: where(table)返回过滤条件，分别加在两个分支上，两边都能走各自的索引
+        source: 是否增加archived列标明记录来自归档表
+    """
+    hot = db.metadata.tables[name]
+    branches = []
+    for table, archived in ((hot, False), (archive_tables[name], True)):
+        columns = [table.c[column.name] for column in hot.c]
+        if source:
+            columns.append(literal(archived).label('archived'))
+        query = select(*columns)
+        if where is not None:
+            query = query.where(where(table))
+        branches.append(query)
+    return union_all(*branches).subquery(name)
+
+
+class SemesterArchiveError(ValueError):
+    """学期尚不能归档"""
+
+
+class SemesterArchiver:
+    """
+    学期数据归档
+
+    在create_app中调用init_app读取配置
+    """
+
+    def __init__(self, batch_size=5000, grace_days=30):
+        self.batch_size = batch_size
+        self.grace_days = grace_days
+
+    def init_app(self, app):
+        self.batch_size = app.config.get('ARCHIVE_BATCH_SIZE', self.batch_size)
+        self.grace_days = app.config.get('ARCHIVE_GRACE_DAYS', self.grace_days)
+
+    def archive_completed(self, today=None):
+        """
+        归档所有已结束超过宽限期且尚未归档的学期
+
+        返回:
+            {学期ID: archive_semester的统计}
+        """
+        from app.models.user import Semester
+
+        table = Semester.__table__
+        cutoff = (today or date.today()) - timedelta(days=self.grace_days)
+        with db.engine.connect() as conn:
+            semester_ids = [row[0] for row in conn.execute(select(table.c.id).where(
+                table.c.status == 'completed', table.c.end_date <= cutoff, table.c.archived_at.is_(None)
+            ).order_by(table.c.start_date))]
+        return {semester_id: self.archive_semester(semester_id, today=today) for semester_id in semester_ids}
+
+    def archive_semester(self, semester_id, today=None, force=False):
+        """
+        归档一个学期的学习数据；已归档的学期再次执行会移走之后补写到热表的记录
+
+        参数:
+            force: 不检查学期状态和宽限期
+
+        返回:
+            {表名: 归档行数}，学期不存在时返回None
+
+        异常:
+            SemesterArchiveError: 学期未结束或仍在宽限期内
+        """
+        from app.models.user import Semester
+
+        semester_table = Semester.__table__
+        with db.engine.connect() as conn:
+            semester = conn.execute(select(
+                semester_table.c.id, semester_table.c.start_date, semester_table.c.end_date, semester_table.c.status
+            ).where(semester_table.c.id == semester_id)).first()
+        if semester is None:
+            return None
+        cutoff = (today or date.today()) - timedelta(days=self.grace_days)
+        if not force and (semester.status != 'completed' or semester.end_date > cutoff):
+            raise SemesterArchiveError(f"只能归档已结束{self.grace_days}天以上的学期")
+
+        now = datetime.now()
+        stats, users, timetable_users = {}, set(), set()
+        for name in ARCHIVE_ORDER:
+            stats[name] = 0
+            last_id = 0
+            while last_id is not None:
+                last_id = self._archive_chunk(name, semester, now, last_id, stats, users,
+                                              timetable_users if name == 'course_schedule' else None)
+
+        with db.engine.begin() as conn:
+            conn.execute(update(semester_table).where(semester_table.c.id == semester.id).values(archived_at=now))
+        self._invalidate(users, timetable_users)
+        logger.info(f"学期 {semester.id} 归档完成: " + ', '.join(f'{name} {count} 条' for name, count in stats.items()))
+        return stats
+
+    def _archive_chunk(self, name, semester, now, last_id, stats, users, timetable_users):
+        """归档一段记录，返回本段最大的主键，没有记录时返回None"""
+        hot, archive = db.metadata.tables[name], archive_tables[name]
+        with db.engine.begin() as conn:
+            rows = conn.execute(
+                select(hot.c.id, hot.c.user_id).where(hot.c.id > last_id, _archivable(name, hot, semester))
+                .order_by(hot.c.id).limit(self.batch_size)
+            ).fetchall()
+            if not rows:
+                return None
+            last_id = rows[-1].id
+            if name == 'task':
+                referenced = _referenced_tasks(conn, [row.id for row in rows])
+                rows = [row for row in rows if row.id not in referenced]
+                if not rows:
+                    return last_id
+            ids = [row.id for row in rows]
+            if name == 'grade':
+                # 归档表没有(user_id, course_id)唯一约束，移入前删除同一课程的旧成绩
+                moved = select(hot.c.user_id, hot.c.course_id).where(hot.c.id.in_(ids))
+                conn.execute(delete(archive).where(tuple_(archive.c.user_id, archive.c.course_id).in_(moved)))
+            conn.execute(archive.insert().from_select(
+                [column.name for column in hot.c] + ['semester_id', 'archived_at'],
+                select(*hot.c, literal(semester.id, db.Integer), literal(now, db.DateTime)).where(hot.c.id.in_(ids))
+            ))
+            conn.execute(delete(hot).where(hot.c.id.in_(ids)))
+
+        stats[name] += len(ids)
+        users.update(row.user_id for row in rows)
+        if timetable_users is not None:
+            timetable_users.update(row.user_id for row in rows)
+        return last_id
+
+    @staticmethod
+    def _invalidate(users, timetable_users):
+        from app.api.v1.learning.dashboard_summary import dashboard_cache
+        from app.api.v1.learning.timetable import timetable_engine
+
+        for user_id in timetable_users:
+            timetable_engine.invalidate(user_id)
+        dashboard_cache.invalidate_users(users)
+
+    # ---- 历史报表 ----
+
+    def semester_report(self, user_id, semester_id):
+        """
+        用户某学期的成绩、专注、打卡和任务统计，同时读取热表和归档表
+
+        返回:
+            报表字典，学期不存在时返回None
+        """
+        from app.models.learning import Course, GradeSummary
+        from app.models.user import Semester
+
+        semester = db.session.query(
+            Semester.id, Semester.name, Semester.start_date, Semester.end_date, Semester.status, Semester.archived_at
+        ).filter(Semester.id == semester_id).first()
+        if semester is None:
+            return None
+
+        def source(name):
+            return read_through(name, lambda table: and_(
+                table.c.user_id == user_id, in_semester(name, table, semester)
+            ))
+
+        grade, course = source('grade'), Course.__table__
+        grades = db.session.execute(
+            select(course.c.id, course.c.name, course.c.credit, grade.c.score)
+            .select_from(grade.join(course, course.c.id == grade.c.course_id)).order_by(course.c.id)
+        ).fetchall()
+        summary = db.session.query(GradeSummary.credit_sum, GradeSummary.point_sum).filter(
+            GradeSummary.user_id == user_id, GradeSummary.semester_id == semester_id
+        ).first()
+
+        focus = source('focus_record')
+        focus_row = db.session.execute(
+            select(func.count(), func.coalesce(func.sum(focus.c.duration), 0))
+        ).first()
+
+        check_in = source('check_in')
+        check_in_row = db.session.execute(
+            select(func.count(), func.coalesce(func.max(check_in.c.streak_count), 0))
+        ).first()
+
+        task = source('task')
+        task_row = db.session.execute(select(
+            func.count(),
+            func.coalesce(func.sum(case((task.c.status == 'completed', 1), else_=0)), 0)
+        )).first()
+
+        gpa = None
+        if summary is not None and summary.credit_sum:
+            gpa = round(float(summary.point_sum) / float(summary.credit_sum), 2)
+        return {
+            'semester': {
+                'id': semester.id,
+                'name': semester.name,
+                'start_date': semester.start_date.isoformat(),
+                'end_date': semester.end_date.isoformat(),
+                'status': semester.status,
+                'archived': semester.archived_at is not None
+            },
+            'grades': [
+                {'course_id': row.id, 'course_name': row.name,
+                 'credit': float(row.credit) if row.credit is not None else None,
+                 'score': float(row.score) if row.score is not None else None}
+                for row in grades
+            ],
+            'gpa': gpa,
+            'focus': {'sessions': focus_row[0], 'minutes': int(focus_row[1])},
+            'check_in': {'days': check_in_row[0], 'longest_streak': int(check_in_row[1])},
+            'tasks': {'total': task_row[0], 'completed': int(task_row[1])}
+        }
+
+
+# 全局学期归档实例，在create_app中通过init_app读取配置
+semester_archiver = SemesterArchiver()
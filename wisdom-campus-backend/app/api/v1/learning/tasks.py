@@ -0,0 +1,223 @@
+"""
+任务API
+"""
+import logging
+from datetime import datetime
+
+from flask import request
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.api.v1.learning import learning_bp
+from app.api.v1.learning.dashboard_summary import dashboard_cache
+from app.api.v1.learning.plan_progress import plan_progress
+from app.api.v1.learning.reminders import reminder_scheduler, OPEN_STATUSES
+from app.api.v1.learning.utils import parse_int
+from app.models.learning import Task, StudyPlan
+from app.schemas.learning import task_bulk_serializer
+from app.utils.auth import requires_auth
+from app.utils.error_codes import ErrorCode
+from app.utils.identity import current_user_id
+from app.utils.response import api_success, api_error
+
+logger = logging.getLogger(__name__)
+
+TASK_STATUSES = ('pending', 'in_progress', 'reviewing', 'revising', 'completed', 'delayed', 'cancelled')
+TASK_PRIORITIES = ('low', 'medium', 'high')
+
+# 批量修改状态时一次最多的任务数
+MAX_BATCH_TASKS = 500
+
+
+def _parse_deadline(value):
+    """解析ISO格式的截止时间，返回(datetime或None, 错误信息)"""
+    if value in (None, ''):
+        return None, None
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '')), None
+    except ValueError:
+        return None, "截止时间格式应为ISO 8601，例如2024-01-01T18:00:00"
+
+
+def _validate_task(json_data, task=None):
+    """
+    校验任务参数，修改时只校验提供的字段
+
+    返回:
+        (字段字典, 错误信息)
+    """
+    values = {}
+    if 'content' in json_data or task is None:
+        content = (json_data.get('content') or '').strip()
+        if not content or len(content) > 200:
+            return None, "任务内容不能为空且不超过200个字符"
+        values['content'] = content
+    if 'priority' in json_data:
+        if json_data['priority'] not in TASK_PRIORITIES:
+            return None, "无效的参数: priority"
+        values['priority'] = json_data['priority']
+    if 'status' in json_data:
+        if json_data['status'] not in TASK_STATUSES:
+            return None, "无效的参数: status"
+        values['status'] = json_data['status']
+    if 'deadline' in json_data:
+        deadline, error = _parse_deadline(json_data['deadline'])
+        if error:
+            return None, error
+        values['deadline'] = deadline
+    if 'plan_id' in json_data:
+        plan_id = json_data['plan_id']
+        if plan_id is not None:
+            plan_id = parse_int(plan_id)
+            if plan_id is None or db.session.query(StudyPlan.id).filter_by(id=plan_id, user_id=current_user_id()).first() is None:
+                return None, "学习计划不存在"
+        values['plan_id'] = plan_id
+    return values, None
+
+
+@learning_bp.route('/tasks', methods=['GET'])
+@requires_auth
+def get_tasks():
+    """
+    获取当前用户的任务，按截止时间排序（无截止时间的排在最后）
+
+    查询参数:
+        status: open（默认，全部未完成状态）、all 或逗号分隔的具体状态
+        plan_id: 按学习计划筛选
+        limit: 返回数量，默认50，最大200
+    """
+    user_id = current_user_id()
+    status = request.args.get('status', 'open')
+    limit = min(max(parse_int(request.args.get('limit')) or 50, 1), 200)
+
+    # 条件顺序与idx_task_user_status_deadline(user_id, status, deadline)一致
+    query = task_bulk_serializer.query().filter(Task.user_id == user_id)
+    if status == 'open':
+        query = query.filter(Task.status.in_(OPEN_STATUSES))
+    elif status != 'all':
+        statuses = [item for item in status.split(',') if item in TASK_STATUSES]
+        if not statuses:
+            return api_error(message="无效的参数: status", code=ErrorCode.INVALID_REQUEST)
+        query = query.filter(Task.status.in_(statuses))
+    plan_id = parse_int(request.args.get('plan_id'))
+    if plan_id is not None:
+        query = query.filter(Task.plan_id == plan_id)
+
+    rows = query.order_by(Task.deadline.is_(None), Task.deadline, Task.id).limit(limit).all()
+    return api_success(data={'tasks': task_bulk_serializer.dump_rows(rows)})
+
+
+@learning_bp.route('/tasks', methods=['POST'])
+@requires_auth
+def create_task():
+    """创建任务"""
+    json_data = request.get_json(silent=True)
+    if not json_data:
+        return api_error(message="请求必须是JSON格式", code=ErrorCode.INVALID_REQUEST)
+    values, error = _validate_task(json_data)
+    if error:
+        return api_error(message=error, code=ErrorCode.INVALID_REQUEST)
+
+    try:
+        task = Task(user_id=current_user_id(), **values)
+        db.session.add(task)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"创建任务时发生数据库错误: {str(e)}")
+        return api_error(message="创建任务失败", code=ErrorCode.DB_ERROR, status_code=500)
+
+    reminder_scheduler.schedule(task.id, task.deadline, task.status)
+    return api_success(message="任务创建成功", data={'task': task_bulk_serializer.dump_objects([task])[0]})
+
+
+@learning_bp.route('/tasks/<int:id>', methods=['PUT'])
+@requires_auth
+def update_task(id):
+    """修改任务内容、截止时间、优先级、状态或所属计划"""
+    task = Task.query.filter_by(id=id, user_id=current_user_id()).first()
+    if task is None:
+        return api_error(message="任务不存在", code=ErrorCode.TASK_NOT_FOUND, status_code=404)
+    json_data = request.get_json(silent=True)
+    if not json_data:
+        return api_error(message="请求必须是JSON格式", code=ErrorCode.INVALID_REQUEST)
+    values, error = _validate_task(json_data, task)
+    if error:
+        return api_error(message=error, code=ErrorCode.INVALID_REQUEST)
+
+    try:
+        for key, value in values.items():
+            setattr(task, key, value)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"修改任务时发生数据库错误: {str(e)}")
+        return api_error(message="修改任务失败", code=ErrorCode.DB_ERROR, status_code=500)
+
+    if 'deadline' in values or 'status' in values:
+        reminder_scheduler.schedule(task.id, task.deadline, task.status)
+    return api_success(message="任务修改成功", data={'task': task_bulk_serializer.dump_objects([task])[0]})
+
+
+@learning_bp.route('/tasks/<int:id>', methods=['DELETE'])
+@requires_auth
+def delete_task(id):
+    """删除任务"""
+    task = Task.query.filter_by(id=id, user_id=current_user_id()).first()
+    if task is None:
+        return api_error(message="任务不存在", code=ErrorCode.TASK_NOT_FOUND, status_code=404)
+    try:
+        db.session.delete(task)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"删除任务时发生数据库错误: {str(e)}")
+        return api_error(message="删除任务失败", code=ErrorCode.DB_ERROR, status_code=500)
+
+    reminder_scheduler.cancel(id)
+    return api_success(message="任务删除成功")
+
+
+@learning_bp.route('/tasks/batch-status', methods=['POST'])
+@requires_auth
+def batch_update_task_status():
+    """
+    批量修改任务状态，一条UPDATE完成，所属学习计划的完成数按计划合并更新
+
+    请求体:
+        task_ids: 任务ID列表（最多500个）
+        status: 目标状态
+    """
+    json_data = request.get_json(silent=True) or {}
+    status = json_data.get('status')
+    task_ids = json_data.get('task_ids')
+    if status not in TASK_STATUSES:
+        return api_error(message="无效的参数: status", code=ErrorCode.INVALID_REQUEST)
+    if not isinstance(task_ids, list) or not task_ids or len(task_ids) > MAX_BATCH_TASKS:
+        return api_error(message=f"task_ids必须是1-{MAX_BATCH_TASKS}个任务ID的列表", code=ErrorCode.INVALID_REQUEST)
+    task_ids = sorted({parse_int(task_id) for task_id in task_ids} - {None})
+
+    user_id = current_user_id()
+    try:
+        conditions = [Task.user_id == user_id, Task.id.in_(task_ids), Task.status != status]
+        # 批量UPDATE不触发Session事件，先按计划统计完成数的变化
+        plan_progress.bulk_status_change(db.session, conditions, status)
+        updated = Task.query.filter(*conditions).update({Task.status: status}, synchronize_session=False)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"批量修改任务状态时发生数据库错误: {str(e)}")
+        return api_error(message="批量修改任务状态失败", code=ErrorCode.DB_ERROR, status_code=500)
+
+    if updated:
+        dashboard_cache.invalidate(user_id)
+        if status in OPEN_STATUSES:
+            deadlines = db.session.query(Task.id, Task.deadline).filter(
+                Task.user_id == user_id, Task.id.in_(task_ids), Task.deadline.isnot(None)
+            )
+            reminder_scheduler.schedule_many((task_id, deadline, status) for task_id, deadline in deadlines)
+        else:
+            for task_id in task_ids:
+                reminder_scheduler.cancel(task_id)
+
+    return api_success(message="任务状态已更新", data={'updated': updated, 'status': status})
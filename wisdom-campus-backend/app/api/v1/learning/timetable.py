@@ -0,0 +1,250 @@
+"""
+课表引擎
+把用户某学期的CourseSchedule整理成按星期划分的紧凑时间区间表（周课表），并检测时间冲突：
+- 时间统一换算为当天的分钟数，每天的课程按开始时间排序
+- 冲突检测使用扫描线：按开始时间依次处理，维护"仍在进行中"的课程集合（按结束时间的最小堆），
+  新课程只与集合中的课程比较，复杂度O(n log n + 冲突数)，不做两两比较
+- 新增/修改课程安排前的冲突预检在排好序的区间上二分查找，配合前缀最大结束时间提前结束扫描
+- 周课表按(用户, 学期)缓存，课程安排变化后调用invalidate失效
+"""
+import heapq
+import logging
+import threading
+from bisect import bisect_left
+
+from app import db
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# 星期顺序，与CourseSchedule.day_of_week枚举一致
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+_WEEKDAY_INDEX = {day: index for index, day in enumerate(WEEKDAYS)}
+
+
+def to_minutes(value):
+    """datetime.time转换为当天的分钟数"""
+    return value.hour * 60 + value.minute
+
+
+def format_minutes(minutes):
+    """分钟数转换为HH:MM"""
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+class Slot:
+    """周课表中的一节课"""
+
+    __slots__ = ('schedule_id', 'course_id', 'course_name', 'course_code', 'day', 'start', 'end', 'location')
+
+    def __init__(self, schedule_id, course_id, course_name, course_code, day, start, end, location):
+        self.schedule_id = schedule_id
+        self.course_id = course_id
+        self.course_name = course_name
+        self.course_code = course_code
+        self.day = day
+        self.start = start
+        self.end = end
+        self.location = location
+
+    def to_dict(self):
+        return {
+            'schedule_id': self.schedule_id,
+            'course_id': self.course_id,
+            'course_name': self.course_name,
+            'course_code': self.course_code,
+            'day_of_week': WEEKDAYS[self.day],
+            'start_time': format_minutes(self.start),
+            'end_time': format_minutes(self.end),
+            'location': self.location
+        }
+
+
+def find_conflicts(slots):
+    """
+    扫描线检测同一天内的时间冲突
+
+    参数:
+        slots: 同一天的Slot列表，已按(start, end)排序
+
+    返回:
+        [(slot_a, slot_b), ...]，slot_a开始时间不晚于slot_b
+    """
+    conflicts = []
+    active = []  # (end, 序号, slot)的最小堆，保存尚未结束的课程
+    for index, slot in enumerate(slots):
+        # 结束时间不晚于当前开始时间的课程不再与后续课程冲突
+        while active and active[0][0] <= slot.start:
+            heapq.heappop(active)
+        for _, _, other in active:
+            conflicts.append((other, slot))
+        heapq.heappush(active, (slot.end, index, slot))
+    return conflicts
+
+
+class WeeklyGrid:
+    """
+    用户某学期的周课表
+
+    days[0..6]分别是周一到周日按开始时间排序的Slot列表，
+    starts[d]为days[d]的开始时间列表，max_ends[d][i]为days[d]前i+1节课的最大结束时间，用于冲突预检
+    """
+
+    def __init__(self, user_id, semester_id, slots):
+        self.user_id = user_id
+        self.semester_id = semester_id
+        self.days = tuple([] for _ in WEEKDAYS)
+        for slot in slots:
+            self.days[slot.day].append(slot)
+
+        self.starts = []
+        self.max_ends = []
+        self.conflicts = []
+        for day_slots in self.days:
+            day_slots.sort(key=lambda slot: (slot.start, slot.end, slot.schedule_id))
+            running, max_ends = 0, []
+            for slot in day_slots:
+                running = max(running, slot.end)
+                max_ends.append(running)
+            self.starts.append([slot.start for slot in day_slots])
+            self.max_ends.append(max_ends)
+            self.conflicts.extend(find_conflicts(day_slots))
+        self._payload = None
+
+    def overlapping(self, day, start, end, exclude_schedule_id=None):
+        """
+        查找与[start, end)重叠的课程
+
+        参数:
+            day: 星期序号（0为周一）
+            start, end: 当天分钟数
+            exclude_schedule_id: 修改课程安排时排除其自身
+        """
+        day_slots = self.days[day]
+        max_ends = self.max_ends[day]
+        # 开始时间早于end的课程才可能重叠，二分找到边界后向前扫描
+        index = bisect_left(self.starts[day], end)
+        result = []
+        for i in range(index - 1, -1, -1):
+            # 前面所有课程的最大结束时间都不晚于start，不可能再有重叠
+            if max_ends[i] <= start:
+                break
+            slot = day_slots[i]
+            if slot.end > start and slot.schedule_id != exclude_schedule_id:
+                result.append(slot)
+        result.reverse()
+        return result
+
+    def to_dict(self):
+        """序列化为响应数据，结果随缓存复用"""
+        if self._payload is None:
+            self._payload = {
+                'semester_id': self.semester_id,
+                'days': {WEEKDAYS[day]: [slot.to_dict() for slot in slots] for day, slots in enumerate(self.days)},
+                'conflicts': [
+                    {
+                        'day_of_week': WEEKDAYS[first.day],
+                        'schedule_ids': [first.schedule_id, second.schedule_id],
+                        'start_time': format_minutes(max(first.start, second.start)),
+                        'end_time': format_minutes(min(first.end, second.end))
+                    }
+                    for first, second in self.conflicts
+                ]
+            }
+        return self._payload
+
+
+class TimetableEngine:
+    """
+    周课表构建与缓存
+
+    缓存键包含用户的版本号：invalidate递增版本号，使该用户所有学期的旧课表立即失效，
+    同时避免"读取旧数据构建课表"与"修改后失效"并发时把旧课表写回缓存。
+    缓存是进程内的，多进程部署时其他进程的旧课表最多保留TIMETABLE_CACHE_TTL秒
+    """
+
+    def __init__(self, ttl=300, maxsize=20000):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置读取缓存参数"""
+        self.cache.configure(
+            maxsize=app.config.get('TIMETABLE_CACHE_MAXSIZE', self.cache.maxsize),
+            ttl=app.config.get('TIMETABLE_CACHE_TTL', self.cache.ttl)
+        )
+
+    def get_grid(self, user_id, semester_id=None):
+        """
+        获取用户某学期的周课表
+
+        参数:
+            user_id: 用户ID
+            semester_id: 学期ID，None表示不区分学期（全部课程安排）
+
+        返回:
+            WeeklyGrid
+        """
+        version = self._versions.get(user_id, 0)
+        key = (user_id, semester_id, version)
+        grid = self.cache.get(key)
+        if grid is None:
+            grid = self.build_grid(user_id, semester_id)
+            # 构建期间课表被修改过，不写入缓存
+            if self._versions.get(user_id, 0) == version:
+                self.cache.set(key, grid)
+        return grid
+
+    @staticmethod
+    def build_grid(user_id, semester_id=None):
+        """从数据库构建周课表，只查询需要的列"""
+        from app.models.learning import Course, CourseSchedule
+
+        query = db.session.query(
+            CourseSchedule.id, CourseSchedule.course_id, Course.name, Course.code,
+            CourseSchedule.day_of_week, CourseSchedule.start_time, CourseSchedule.end_time,
+            CourseSchedule.location
+        ).join(Course, Course.id == CourseSchedule.course_id).filter(CourseSchedule.user_id == user_id)
+        if semester_id is not None:
+            query = query.filter(Course.semester_id == semester_id)
+
+        slots = [
+            Slot(row[0], row[1], row[2], row[3], _WEEKDAY_INDEX[row[4]], to_minutes(row[5]), to_minutes(row[6]), row[7])
+            for row in query
+        ]
+        return WeeklyGrid(user_id, semester_id, slots)
+
+    def check(self, user_id, semester_id, day_of_week, start_time, end_time, exclude_schedule_id=None):
+        """
+        检查新的时间段是否与用户已有课程冲突
+
+        返回:
+            冲突的Slot列表
+        """
+        grid = self.get_grid(user_id, semester_id)
+        return grid.overlapping(_WEEKDAY_INDEX[day_of_week], to_minutes(start_time), to_minutes(end_time),
+                                exclude_schedule_id)
+
+    def version(self, user_id):
+        """用户课表的当前版本号，依赖周课表的其他缓存可以把它放进缓存键"""
+        return self._versions.get(user_id, 0)
+
+    def invalidate(self, user_id):
+        """用户的课程安排被新增、修改或删除后调用"""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def invalidate_course(self, course_id):
+        """课程信息（名称、学期等）变化后，使所有选了该课程的用户课表失效"""
+        from app.models.learning import CourseSchedule
+
+        user_ids = db.session.query(CourseSchedule.user_id).filter(
+            CourseSchedule.course_id == course_id
+        ).distinct()
+        for (user_id,) in user_ids:
+            self.invalidate(user_id)
+
+
+# 全局课表引擎实例，在create_app中通过init_app加载配置
+timetable_engine = TimetableEngine()
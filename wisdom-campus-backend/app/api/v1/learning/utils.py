@@ -0,0 +1,56 @@
+"""
+学习模块工具函数
+"""
+from datetime import datetime, time
+
+from flask import request
+
+from app.api.v1.learning.checkin_calendar import active_semester_id
+from app.utils.identity import identity_loader
+
+
+def parse_time(value):
+    """
+    解析HH:MM或HH:MM:SS格式的时间
+
+    返回:
+        datetime.time，格式错误时返回None
+    """
+    if isinstance(value, time):
+        return value
+    if not isinstance(value, str):
+        return None
+    for fmt in ('%H:%M', '%H:%M:%S'):
+        try:
+            return datetime.strptime(value.strip(), fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_int(value):
+    """解析整数参数，无效时返回None"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def resolve_semester_id(user_id, semester_id=None):
+    """
+    确定请求对应的学期
+
+    依次使用: 请求参数semester_id、用户的current_semester_id、状态为active的学期；
+    都没有时返回None，表示不区分学期。用户的当前学期取自缓存的精简身份信息，active学期在进程内缓存，
+    缓存命中时不查询数据库
+    """
+    if semester_id is None:
+        semester_id = parse_int(request.args.get('semester_id'))
+    if semester_id is not None:
+        return semester_id
+
+    identity = identity_loader.get_identity(user_id)
+    if identity is not None and identity.current_semester_id:
+        return identity.current_semester_id
+
+    return active_semester_id()
@@ -0,0 +1,9 @@
+"""
+实时推送API
+"""
+from flask import Blueprint
+
+push_bp = Blueprint('push', __name__)
+
+# 已实现的子模块（放在push_bp定义之后导入，子模块中注册路由）
+from . import stream
@@ -0,0 +1,100 @@
+"""
+实时推送连接API
+浏览器的EventSource不能设置Authorization头，客户端先用访问令牌换取一个短期推送票据，
+再以 /api/v1/push/stream?ticket=... 建立SSE连接，访问令牌不出现在URL和访问日志中：
+- 票据不是JWT，用独立的salt签名（itsdangerous），不能作为Bearer令牌调用其他API
+- 票据带随机nonce，第一次建立连接时通过broker占用（push_hub.consume_ticket），同一票据不能再次使用
+"""
+import logging
+import secrets
+
+from flask import Response, request, current_app
+from itsdangerous import URLSafeTimedSerializer, BadData
+
+from app.api.v1.push import push_bp
+from app.utils.auth import requires_auth, requires_admin
+from app.utils.error_codes import ErrorCode
+from app.utils.identity import current_user_id, normalize_user_id
+from app.utils.push import push_hub
+from app.utils.response import api_success, api_error
+
+logger = logging.getLogger(__name__)
+
+# 推送票据签名的salt，与会话、JWT等其他用途的签名区分
+TICKET_SALT = 'push-ticket'
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=TICKET_SALT)
+
+
+def create_ticket(user_id):
+    """签发推送票据，返回(票据, 有效期秒数)"""
+    ttl = current_app.config.get('PUSH_TICKET_TTL', 60)
+    return _serializer().dumps({'uid': str(user_id), 'nonce': secrets.token_urlsafe(16)}), ttl
+
+
+def redeem_ticket(ticket):
+    """
+    校验并占用推送票据
+
+    返回:
+        用户ID，票据无效、过期或已使用过时返回None
+    """
+    ttl = current_app.config.get('PUSH_TICKET_TTL', 60)
+    try:
+        payload = _serializer().loads(ticket, max_age=ttl)
+    except BadData as e:
+        logger.debug(f"推送票据无效: {str(e)}")
+        return None
+    if not isinstance(payload, dict) or not payload.get('nonce'):
+        return None
+    if not push_hub.consume_ticket(payload['nonce'], ttl):
+        logger.warning(f"推送票据被重复使用: 用户 {payload.get('uid')}")
+        return None
+    return normalize_user_id(payload.get('uid'))
+
+
+@push_bp.route('/ticket', methods=['POST'])
+@requires_auth
+def get_ticket():
+    """获取推送票据，票据有效期内只能用于建立一次SSE连接（断线重连时重新获取），不能用于其他API"""
+    ticket, ttl = create_ticket(current_user_id())
+    return api_success(data={'ticket': ticket, 'expires_in': ttl, 'stream_url': '/api/v1/push/stream'})
+
+
+@push_bp.route('/stream', methods=['GET'])
+def stream():
+    """
+    建立SSE连接，接收事件:
+        ready: 连接建立
+        message: 新私信
+        notification: 新通知
+        resync: 客户端读取太慢丢弃了部分事件，应通过REST接口重新拉取未读数
+
+    查询参数:
+        ticket: POST /api/v1/push/ticket 返回的票据
+    """
+    ticket = request.args.get('ticket')
+    if not ticket:
+        return api_error(message="缺少推送票据", code=ErrorCode.UNAUTHORIZED, status_code=401)
+    user_id = redeem_ticket(ticket)
+    if user_id is None:
+        return api_error(message="推送票据无效、已过期或已使用", code=ErrorCode.UNAUTHORIZED, status_code=401)
+
+    connection = push_hub.connect(user_id)
+    if connection is None:
+        return api_error(message="连接数已达上限，请稍后重试", code=ErrorCode.SYSTEM_ERROR, status_code=503)
+    return Response(push_hub.stream(connection), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # 关闭Nginx等反向代理的响应缓冲
+        'X-Accel-Buffering': 'no',
+    })
+
+
+@push_bp.route('/stats', methods=['GET'])
+@requires_auth
+@requires_admin
+def get_stats():
+    """本进程的推送连接统计（管理员）"""
+    return api_success(data=push_hub.stats())
@@ -4,15 +4,18 @@
 from flask import Blueprint, jsonify, request, session, current_app
 from app.utils.auth import requires_auth, requires_verified_email, requires_admin
 from app.models.user import User, UserProfile, Major
-from app.schemas.user import user_schema, users_schema, user_update_schema, major_schema, majors_schema
+from app.schemas.user import user_schema, users_schema, user_update_schema, major_schema, majors_schema, user_bulk_serializer
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload, selectinload
 from app import db
 import logging
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request, get_jwt
-import requests
+from app.utils.http_client import auth0_http
 from datetime import datetime
 from app.utils.response import api_success, api_error
 from app.utils.error_codes import ErrorCode
+from app.utils.identity import identity_loader
+from app.utils.pagination import cursor_paginate, api_cursor_page, CursorPage, InvalidCursor
 
 # 创建蓝图
 user_bp = Blueprint('user', __name__)
@@ -22,6 +25,7 @@ logger = logging.getLogger(__name__)
 
 # 从check.py导入函数
 from app.api.v1.user.check import check_student_id_exists
+from app.api.v1.user.search import search_users
 
 # 注册学号检查接口
 user_bp.route('/check', methods=['GET'])(check_student_id_exists)
@@ -41,23 +45,18 @@ def get_profile():
         user_id = get_jwt_identity()
         logger.info(f"从JWT获取到用户ID: {user_id} (类型: {type(user_id).__name__})")
         
-        # 将字符串ID转换为整数（如果是字符串）
-        if isinstance(user_id, str):
-            # 如果是数字字符串，则转换为整数
-            if user_id.isdigit():
-                user_id = int(user_id)
-                logger.info(f"将字符串用户ID转换为整数: {user_id}")
-            else:
-                # 非数字字符串，可能是auth0_id
-                logger.info(f"使用非数字字符串用户ID: {user_id}")
-                user = User.query.filter_by(auth0_id=user_id).first()
-                if user:
-                    logger.info(f"通过auth0_id找到用户: {user.name}")
-                    user_id = user.id  # 获取数据库中的用户ID
+        user = None
+        if isinstance(user_id, str) and not user_id.isdigit():
+            # 非数字字符串，可能是auth0_id
+            logger.info(f"使用非数字字符串用户ID: {user_id}")
+            user = User.query.filter_by(auth0_id=user_id).first()
+            if user:
+                logger.info(f"通过auth0_id找到用户: {user.name}")
+                user_id = user.id  # 获取数据库中的用户ID
         
-        # 查询用户（如果上面没有通过auth0_id找到）
-        if 'user' not in locals() or user is None:
-            user = User.query.get(user_id)
+        # 查询用户（如果上面没有通过auth0_id找到），与认证装饰器共用请求级缓存
+        if user is None:
+            user = identity_loader.get_user(user_id)
         
         if user:
             logger.info(f"通过JWT找到用户: {user.name}")
@@ -89,7 +88,7 @@ def get_profile():
     try:
         user_id = session.get('user_id')
         if user_id:
-            user = User.query.get(user_id)
+            user = identity_loader.get_user(user_id)
             if user:
                 logger.info(f"从会话中找到用户: {user.name}")
                 # 返回用户信息，放在data属性中以保持一致的API格式
@@ -184,6 +183,7 @@ def update_profile():
     
     try:
         db.session.commit()
+        identity_loader.invalidate(user.id)
         return jsonify({"message": "个人资料更新成功", "user": user_schema.dump(user)})
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -230,52 +230,77 @@ def check_student_id():
     return jsonify({"valid": True, "message": "学号可用"})
 
 # 管理员API
+def _admin_user_load_options():
+    """管理员用户接口的预加载选项：专业和用户画像在同一批查询中加载"""
+    return (joinedload(User.major), selectinload(User.profile))
+
+def _dump_admin_user(user):
+    """序列化用户并附加专业名称，专业已随用户预加载，不再单独查询"""
+    user_info = user_schema.dump(user)
+    user_info['major_name'] = user.major.name if user.major else None
+    return user_info
+
+def _dump_admin_user_rows(rows):
+    """批量序列化user_bulk_serializer.query()查询出的行，并附加专业名称"""
+    users = user_bulk_serializer.dump_rows(rows)
+    for user_info in users:
+        user_info['major_name'] = user_info['major']['name'] if user_info['major'] else None
+    return users
+
 @user_bp.route("/admin/users", methods=["GET"])
 @requires_auth
 @requires_admin
 def admin_get_users():
-    """获取所有用户列表（管理员权限）"""
-    # 支持分页
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    """
+    获取所有用户列表（管理员权限）
+    
+    查询参数:
+        per_page: 每页数量（1-100）
+        keyword/search: 搜索关键词
+        cursor: 游标分页，传入上一页返回的next_cursor
+        page: 页码分页（兼容旧版管理后台），传入page时使用页码分页
+        with_total: 游标分页时是否返回近似总数
+    """
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), 100)
     
     # 支持搜索
     search = request.args.get('search', '')
-    keyword = request.args.get('keyword', search)  # 兼容前端使用keyword参数
+    keyword = request.args.get('keyword', search).strip()  # 兼容前端使用keyword参数
+    cursor = request.args.get('cursor')
     
-    query = User.query
+    # 游标分页和搜索只查询序列化需要的列（专业、用户画像通过LEFT JOIN），直接批量序列化行数据
+    row_query = user_bulk_serializer.query()
     
-    # 如果有搜索条件
+    # 如果有搜索条件，按学号/邮箱前缀和姓名索引分档搜索，使用游标翻页
     if keyword:
-        query = query.filter(
-            (User.name.ilike(f'%{keyword}%')) | 
-            (User.email.ilike(f'%{keyword}%')) | 
-            (User.student_id.ilike(f'%{keyword}%'))
-        )
-    
-    # 执行分页查询
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    users = pagination.items
-    
-    # 对用户数据进行处理，添加专业名称等信息
-    user_data = []
-    for user in users:
-        user_info = user_schema.dump(user)
-        # 添加专业名称
-        if user.major_id:
-            major = Major.query.get(user.major_id)
-            user_info['major_name'] = major.name if major else None
-        else:
-            user_info['major_name'] = None
-        user_data.append(user_info)
-    
-    return api_success(data={
-        'users': user_data,
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'page': page,
-        'per_page': per_page
-    })
+        try:
+            rows, next_cursor = search_users(keyword, limit=per_page, cursor=cursor, base_query=row_query)
+        except InvalidCursor:
+            return api_error(message="无效的分页游标", code=ErrorCode.INVALID_REQUEST)
+        return api_cursor_page(CursorPage(_dump_admin_user_rows(rows), next_cursor, per_page), items_key='users')
+    
+    # 页码分页，兼容使用page参数的管理后台
+    if 'page' in request.args:
+        page = request.args.get('page', 1, type=int)
+        # 专业和用户画像随用户一起加载，避免逐个用户查询
+        query = User.query.options(*_admin_user_load_options())
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        return api_success(data={
+            'users': [_dump_admin_user(user) for user in pagination.items],
+            'total': pagination.total,
+            'pages': pagination.pages,
+            'page': page,
+            'per_page': per_page
+        })
+    
+    # 游标分页，按ID倒序（即注册先后）；created_at可以为NULL，不能作为键集排序列，否则这些用户会从游标分页中漏掉
+    with_total = request.args.get('with_total', 'false').lower() in ('1', 'true', 'yes')
+    try:
+        page = cursor_paginate(row_query, (User.id,), per_page=per_page, cursor=cursor, with_total=with_total)
+    except InvalidCursor:
+        return api_error(message="无效的分页游标", code=ErrorCode.INVALID_REQUEST)
+    page.items = _dump_admin_user_rows(page.items)
+    return api_cursor_page(page, items_key='users')
 
 @user_bp.route("/admin/users", methods=["POST"])
 @requires_auth
@@ -357,7 +382,7 @@ def admin_create_user():
         
         # 创建Auth0用户
         url = f"https://{domain}/api/v2/users"
-        response = requests.post(url, headers=headers, json=auth0_data)
+        response = auth0_http.post(url, headers=headers, json=auth0_data)
         
         if response.status_code != 201:
             return api_error(
@@ -388,14 +413,7 @@ def admin_create_user():
         db.session.add(new_user)
         db.session.commit()
         
-        # 获取专业名称
-        major_name = None
-        if major_id:
-            major = Major.query.get(major_id)
-            major_name = major.name if major else None
-        
-        user_data = user_schema.dump(new_user)
-        user_data['major_name'] = major_name
+        user_data = _dump_admin_user(new_user)
         
         return api_success(
             message="用户创建成功",
@@ -417,20 +435,14 @@ def admin_create_user():
 @requires_admin
 def admin_get_user(id):
     """获取指定用户信息（管理员权限）"""
-    user = User.query.get(id)
+    user = User.query.options(*_admin_user_load_options()).get(id)
     if not user:
         return api_error(
             message="用户不存在",
             error_code=ErrorCode.USER_NOT_FOUND
         )
     
-    user_data = user_schema.dump(user)
-    # 添加专业名称
-    if user.major_id:
-        major = Major.query.get(user.major_id)
-        user_data['major_name'] = major.name if major else None
-    else:
-        user_data['major_name'] = None
+    user_data = _dump_admin_user(user)
     
     return api_success(data={
         'user': user_data
@@ -520,7 +532,7 @@ def admin_update_user(id):
                 }
                 
                 url = f"https://{domain}/api/v2/users/{user.auth0_id}"
-                response = requests.patch(url, headers=headers, json=password_data)
+                response = auth0_http.patch(url, headers=headers, json=password_data)
                 
                 if response.status_code != 200:
                     logger.error(f"更新用户密码失败: {response.text}")
@@ -532,15 +544,9 @@ def admin_update_user(id):
     try:
         user.updated_at = datetime.now()
         db.session.commit()
+        identity_loader.invalidate(user.id)
         
-        # 获取专业名称
-        major_name = None
-        if user.major_id:
-            major = Major.query.get(user.major_id)
-            major_name = major.name if major else None
-        
-        user_data = user_schema.dump(user)
-        user_data['major_name'] = major_name
+        user_data = _dump_admin_user(user)
         
         return api_success(
             message="用户信息更新成功",
@@ -576,7 +582,7 @@ def admin_delete_user(id):
             if user.auth0_id:
                 token = get_auth0_token()
                 if token:
-                    delete_auth0_user(user.auth0_id)
+                    delete_auth0_user(user.auth0_id, token=token)
         except Exception as e:
             logger.error(f"删除Auth0用户时发生错误: {str(e)}")
             # 继续删除本地用户
@@ -584,6 +590,7 @@ def admin_delete_user(id):
         # 删除本地用户
         db.session.delete(user)
         db.session.commit()
+        identity_loader.invalidate(id)
         
         return api_success(
             message="用户删除成功"
@@ -0,0 +1,126 @@
+"""
+管理员用户搜索模块
+按匹配方式分档搜索用户，每一档都能使用索引，不再对name/email/student_id做前后模糊扫描：
+  0. 学号完全匹配（唯一索引）
+  1. 学号前缀匹配（唯一索引范围扫描），学号可能包含字母，不按关键词字符跳过
+  2. 邮箱前缀匹配（idx_user_email范围扫描）
+  3. 姓名匹配：MySQL下使用ngram全文索引ft_user_name，可以匹配姓名中间的字；
+     其他数据库、短于ngram分词长度的关键词或索引不存在时回退为姓名前缀匹配（idx_user_name范围扫描），
+     只能匹配姓名开头，不再使用前后模糊的LIKE
+结果按(档位, id)排序，使用游标（编码了上一页最后一条的档位和id）翻页，不执行COUNT(*)和OFFSET
+"""
+import logging
+
+from flask import current_app
+from sqlalchemy import or_, and_, not_, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from app import db
+from app.models.user import User
+from app.utils.pagination import encode_cursor, decode_cursor, InvalidCursor
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 档位数量
+_BUCKETS = 4
+
+# 全文索引不可用时置为False，之后不再尝试
+_fulltext_available = True
+
+
+def _escape_like(keyword):
+    """转义LIKE通配符"""
+    return keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _use_fulltext(keyword):
+    """是否使用全文索引搜索姓名（ngram默认最小分词长度为2）"""
+    return (
+        _fulltext_available
+        and current_app.config.get('USER_SEARCH_FULLTEXT', True)
+        and db.engine.dialect.name == 'mysql'
+        and len(keyword) >= current_app.config.get('USER_SEARCH_NGRAM_SIZE', 2)
+    )
+
+
+def _name_condition(keyword, fulltext):
+    if fulltext:
+        phrase = '"' + keyword.replace('"', ' ') + '"'
+        return text("MATCH (user.name) AGAINST (:name_phrase IN BOOLEAN MODE)").bindparams(name_phrase=phrase)
+    return User.name.like(f'{_escape_like(keyword)}%', escape='\\')
+
+
+def _bucket_condition(bucket, keyword, fulltext):
+    """第bucket档的匹配条件，排除已在前面档位出现的用户"""
+    prefix = f'{_escape_like(keyword)}%'
+    student_id_prefix = User.student_id.like(prefix, escape='\\')
+    not_student_id_prefix = or_(User.student_id.is_(None), not_(student_id_prefix))
+    email_prefix = User.email.like(prefix, escape='\\')
+
+    if bucket == 0:
+        return User.student_id == keyword
+    if bucket == 1:
+        return and_(student_id_prefix, User.student_id != keyword)
+    if bucket == 2:
+        return and_(email_prefix, not_student_id_prefix)
+    return and_(_name_condition(keyword, fulltext), not_student_id_prefix, not_(email_prefix))
+
+
+def search_users(keyword, limit=20, cursor=None, base_query=None):
+    """
+    搜索用户
+
+    参数:
+        keyword: 搜索关键词
+        limit: 每页数量
+        cursor: 上一页返回的游标，None表示第一页
+        base_query: 基础查询（可带预加载选项），默认User.query
+
+    返回:
+        (users, next_cursor): 用户列表和下一页游标，没有下一页时游标为None
+
+    异常:
+        InvalidCursor: 游标无效
+    """
+    global _fulltext_available
+
+    keyword = keyword.strip()
+    base_query = base_query if base_query is not None else User.query
+    start_bucket, after_id = 0, 0
+    if cursor:
+        start_bucket, after_id = decode_cursor(cursor, size=2)
+        if not isinstance(start_bucket, int) or not isinstance(after_id, int) or not 0 <= start_bucket < _BUCKETS:
+            raise InvalidCursor("无效的分页游标")
+    fulltext = _use_fulltext(keyword)
+
+    matched = []
+    for bucket in range(start_bucket, _BUCKETS):
+        def fetch():
+            query = base_query.filter(_bucket_condition(bucket, keyword, fulltext))
+            if bucket == start_bucket and after_id:
+                query = query.filter(User.id > after_id)
+            return query.order_by(User.id).limit(limit + 1 - len(matched)).all()
+
+        try:
+            rows = fetch()
+        except (OperationalError, ProgrammingError) as e:
+            if not fulltext or bucket != _BUCKETS - 1:
+                raise
+            # 全文索引不存在（例如尚未执行建索引脚本），回退为姓名前缀匹配
+            logger.warning(f"姓名全文索引不可用，回退为姓名前缀搜索: {str(e)}")
+            db.session.rollback()
+            _fulltext_available = False
+            fulltext = False
+            rows = fetch()
+
+        matched.extend((bucket, user) for user in rows)
+        if len(matched) > limit:
+            break
+
+    next_cursor = None
+    if len(matched) > limit:
+        matched = matched[:limit]
+        last_bucket, last_user = matched[-1]
+        next_cursor = encode_cursor([last_bucket, last_user.id])
+
+    return [user for _, user in matched], next_cursor
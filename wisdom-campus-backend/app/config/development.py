@@ -26,6 +26,100 @@ AUTH0_AUDIENCE = os.environ.get('AUTH0_AUDIENCE', 'https://dev-4pz5hir1kcywjn8m.
 # 对于Resource Owner Password模式，audience应该是你的API的标识符，而不是Auth0管理API
 AUTH0_API_AUDIENCE = os.environ.get('AUTH0_API_AUDIENCE', "")
 
+# JWKS公钥缓存配置（令牌验证使用）
+AUTH0_JWKS_URL = os.environ.get('AUTH0_JWKS_URL', "")  # 为空时使用 https://{AUTH0_DOMAIN}/.well-known/jwks.json
+JWKS_DEFAULT_MAX_AGE = 600  # 响应未携带缓存头时的缓存时间（秒）
+JWKS_MIN_REFETCH_INTERVAL = 30  # 两次重新获取的最小间隔（秒），适用于后台刷新和遇到未知kid时的同步获取
+JWKS_MAX_STALE = 86400  # 获取失败时旧公钥最长可继续使用的时间（秒）
+JWKS_FETCH_TIMEOUT = 5  # 请求jwks.json的超时时间（秒）
+
+# Auth0管理API令牌配置
+AUTH0_TOKEN_REFRESH_MARGIN = 300  # 令牌过期前多少秒开始后台刷新
+AUTH0_TOKEN_TIMEOUT = 10  # 请求/oauth/token的超时时间（秒）
+
+# Auth0 HTTP客户端配置
+AUTH0_HTTP_POOL_MAXSIZE = 20  # 每个主机保持的最大连接数
+AUTH0_HTTP_MAX_RETRIES = 2  # 可重试请求的最大重试次数
+AUTH0_HTTP_TIMEOUTS = {  # 按端点设置的超时时间 (连接超时, 读取超时)，未列出的端点使用default
+    'default': (3.05, 10),
+    'userinfo': (3.05, 5),
+    'mgmt:users-by-email': (3.05, 5),
+}
+AUTH0_CIRCUIT_FAILURE_THRESHOLD = 5  # 连续失败多少次后熔断
+AUTH0_CIRCUIT_RESET_TIMEOUT = 30  # 熔断后多少秒放行试探请求
+
+# 用户身份缓存配置（认证装饰器使用）
+USER_IDENTITY_CACHE_TTL = 30  # 精简身份信息跨请求缓存时间（秒），0表示只做请求级缓存
+USER_IDENTITY_CACHE_MAXSIZE = 10000  # 最多缓存的用户数
+
+# 用户活跃时间写缓冲配置
+ACTIVITY_FLUSH_INTERVAL = 5  # 批量写入last_active的间隔（秒），0表示每次立即写入
+ACTIVITY_MAX_PENDING = 5000  # 待写入用户数达到该值时立即写入
+
+# 管理员用户搜索配置
+USER_SEARCH_FULLTEXT = True  # MySQL下使用ngram全文索引ft_user_name搜索姓名，索引不存在时自动回退为姓名前缀匹配
+USER_SEARCH_NGRAM_SIZE = 2  # 与MySQL ngram_token_size一致，短于该长度的关键词只按姓名前缀匹配
+
+# 周课表缓存配置
+TIMETABLE_CACHE_TTL = 300  # 每个(用户, 学期)周课表的缓存时间（秒），课程安排变化时立即失效
+TIMETABLE_CACHE_MAXSIZE = 20000  # 最多缓存的周课表数
+
+# 成绩引擎配置
+GRADE_STATS_CACHE_TTL = 600  # 课程成绩分布的缓存时间（秒），本进程内的成绩变化会立即更新
+GRADE_STATS_CACHE_MAXSIZE = 5000  # 最多缓存的课程数
+
+# 成绩批量导入配置
+GRADE_IMPORT_CHUNK_SIZE = 2000  # 每个事务写入的成绩记录数
+GRADE_IMPORT_MAX_ERRORS = 1000  # 任务状态中最多保留的逐行错误数
+GRADE_IMPORT_SYNC_MAX_BYTES = 1024 * 1024  # 不超过该大小的文件可以用sync=1同步导入
+
+# 任务截止提醒配置
+# 是否在本进程运行提醒调度器，默认关闭；只在一个进程中设置TASK_REMINDER_ENABLED=1，或单独运行scripts/run_task_reminders.py
+TASK_REMINDER_ENABLED = os.environ.get('TASK_REMINDER_ENABLED', '0') == '1'
+TASK_REMINDER_LEAD = 3600  # 截止前多少秒提醒（秒）
+TASK_REMINDER_HORIZON = 6 * 3600  # 内存中只保留该时间内需要提醒的任务（秒）
+TASK_REMINDER_RELOAD_INTERVAL = 60  # 重新加载窗口内任务的间隔（秒），其他进程新建或修改的任务在此时间内生效
+
+# 专注记录写缓冲配置
+FOCUS_FLUSH_INTERVAL = 2  # 批量写入focus_record的间隔（秒），0表示每次请求立即写入
+FOCUS_MAX_PENDING = 5000  # 待写入记录数达到该值时立即写入
+FOCUS_MAX_EVENTS = 500  # 单次请求最多上报的事件数
+FOCUS_MAX_AGE_DAYS = 7  # 只接受最近多少天内开始的专注
+FOCUS_MAX_MINUTES_PER_DAY = 1440  # 每个用户每天（按开始日期）累计专注时长的上限（分钟），超出的记录不写入
+FOCUS_MAX_RETRIES = 5  # 数据库不可用等整批写入失败时，每条记录最多重试的次数
+
+# 仪表盘汇总缓存配置
+DASHBOARD_CACHE_TTL = 60  # 每个用户仪表盘汇总的缓存时间（秒），本进程内的数据变化会立即失效
+DASHBOARD_CACHE_MAXSIZE = 20000  # 最多缓存的用户数
+
+# 学期数据归档配置
+ARCHIVE_BATCH_SIZE = 5000  # 每个事务移入归档表的行数
+ARCHIVE_GRACE_DAYS = 30  # 学期结束多少天后才能归档（留出补录成绩、补传专注记录的时间）
+
+# 专业培养方案索引配置
+CURRICULUM_PRELOAD = True  # 应用启动时（create_app）载入全部专业的培养方案
+CURRICULUM_CACHE_TTL = 600  # 培养方案的缓存时间（秒），本进程内通过ORM的修改会立即失效
+CURRICULUM_CACHE_MAXSIZE = 2000  # 最多缓存的专业数
+
+# 社区信息流配置
+FEED_MAX_ITEMS = 20000  # 每个排序列表最多保留的帖子数
+FEED_RELOAD_INTERVAL = 300  # 进程内信息流整体重新载入的间隔（秒），多进程部署时其他进程的写入在此时间内反映
+
+# 点赞计数写缓冲配置
+LIKE_FLUSH_INTERVAL = 1  # 批量写入likes_count增量的间隔（秒），0表示每次点赞立即写入
+LIKE_MAX_PENDING = 5000  # 待写入目标数达到该值时立即写入
+
+# 实时推送配置
+PUSH_BROKER = None  # broker类或其导入路径，None使用进程内broker（只投递给本进程的连接）
+PUSH_QUEUE_SIZE = 100  # 每个连接最多积压的事件数，超过时丢弃积压并通知客户端重新拉取
+PUSH_MAX_CONNECTIONS = 20000  # 本进程最多保持的连接数
+PUSH_MAX_PER_USER = 5  # 每个用户最多的连接数（多个页面），超过时关闭最早的连接
+PUSH_HEARTBEAT_INTERVAL = 25  # 空闲连接的保活间隔（秒）
+PUSH_TICKET_TTL = 60  # 推送票据的有效期（秒）
+
+# API响应JSON序列化后端：auto（已安装orjson时使用orjson）、orjson、json（标准库）
+JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto')
+
 # 会话配置
 SESSION_COOKIE_SECURE = False  # 本地开发环境关闭
 SESSION_COOKIE_HTTPONLY = True
@@ -0,0 +1,38 @@
+"""
+学习数据归档表
+已结束学期的记录从热表移入对应的 *_archive 表：列与热表相同（不带外键和唯一约束），
+另加semester_id（所属学期）和archived_at（归档时间），按(user_id, semester_id)建索引
+"""
+from app import db
+from app.models.learning import Grade, CourseSchedule, FocusRecord, CheckIn, Task
+from app.models.resource import LearningBehavior
+
+
+def _archive_table(model, *extra_indexes):
+    source = model.__table__
+    columns = [
+        db.Column(column.name, column.type.copy(), primary_key=column.primary_key, autoincrement=False,
+                  nullable=column.nullable, comment=column.comment)
+        for column in source.columns
+    ]
+    name = f'{source.name}_archive'
+    return db.Table(
+        name, db.metadata,
+        *columns,
+        db.Column('semester_id', db.Integer, nullable=False, comment='所属学期ID'),
+        db.Column('archived_at', db.DateTime, nullable=False, comment='归档时间'),
+        db.Index(f'idx_{name}_user_semester', 'user_id', 'semester_id'),
+        *[db.Index(f'idx_{name}_{"_".join(index)}', *index) for index in extra_indexes],
+        comment=f'{source.comment or source.name}归档'
+    )
+
+
+# 热表名 -> 归档表
+archive_tables = {
+    'grade': _archive_table(Grade, ('course_id',)),
+    'course_schedule': _archive_table(CourseSchedule),
+    'focus_record': _archive_table(FocusRecord),
+    'check_in': _archive_table(CheckIn, ('user_id', 'check_in_date')),
+    'task': _archive_table(Task, ('plan_id',)),
+    'learning_behavior': _archive_table(LearningBehavior),
+}
@@ -102,6 +102,10 @@ class Comment(db.Model):
 class LikeRecord(db.Model):
     """点赞记录模型"""
     __tablename__ = 'like_record'
+    __table_args__ = (
+        # 同一用户对同一目标只能点赞一次，重复点赞由唯一约束拒绝；也用于批量查询点赞状态
+        db.UniqueConstraint('user_id', 'target_type', 'target_id', name='idx_user_target_unique'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, comment='用户ID，外键')
@@ -134,10 +138,16 @@ class Favorite(db.Model):
 class Message(db.Model):
     """私信模型"""
     __tablename__ = 'message'
+    __table_args__ = (
+        # 会话历史按(pair_key, sent_at)倒序翻页；未读私信按(receiver_id, is_read)查找
+        db.Index('idx_message_pair_sent', 'pair_key', 'sent_at'),
+        db.Index('idx_message_receiver_read', 'receiver_id', 'is_read'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     sender_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, comment='发送者ID，外键')
     receiver_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, comment='接收者ID，外键')
+    pair_key = db.Column(db.String(23), comment='会话键，"较小用户ID:较大用户ID"，两个方向的私信相同')
     content = db.Column(db.Text, nullable=False, comment='私信内容')
     is_read = db.Column(db.Boolean, default=False, comment='是否已读')
     sent_at = db.Column(db.DateTime, default=datetime.utcnow, comment='发送时间')
@@ -147,4 +157,24 @@ class Message(db.Model):
     receiver = db.relationship('User', foreign_keys=[receiver_id], backref=db.backref('received_messages', lazy='dynamic'))
     
     def __repr__(self):
-        return f'<Message {self.sender_id} to {self.receiver_id}>' 
\ No newline at end of file
+        return f'<Message {self.sender_id} to {self.receiver_id}>'
+
+
+class Conversation(db.Model):
+    """会话摘要模型，每个用户与每个私信对象一行，发送和已读时维护最后一条私信和未读数"""
+    __tablename__ = 'conversation'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'peer_id', name='idx_conversation_user_peer'),
+        # 收件箱按最后私信时间倒序翻页
+        db.Index('idx_conversation_user_last', 'user_id', 'last_message_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, comment='用户ID，外键')
+    peer_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, comment='私信对象ID，外键')
+    last_message_id = db.Column(db.Integer, db.ForeignKey('message.id', ondelete='SET NULL'), comment='最后一条私信ID，外键')
+    last_message_at = db.Column(db.DateTime, nullable=False, comment='最后一条私信的发送时间')
+    unread_count = db.Column(db.Integer, nullable=False, default=0, comment='该用户在此会话中的未读私信数')
+    
+    def __repr__(self):
+        return f'<Conversation {self.user_id} - {self.peer_id}>'
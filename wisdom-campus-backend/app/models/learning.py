@@ -43,6 +43,10 @@ class CourseSchedule(db.Model):
 class Grade(db.Model):
     """成绩模型"""
     __tablename__ = 'grade'
+    __table_args__ = (
+        # 每个学生每门课程只有一条成绩，批量导入依赖该唯一索引做upsert
+        db.UniqueConstraint('user_id', 'course_id', name='idx_user_course_unique'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, comment='用户ID，外键')
@@ -53,6 +57,24 @@ class Grade(db.Model):
     def __repr__(self):
         return f'<Grade {self.user_id} - {self.course_id}>'
 
+class GradeSummary(db.Model):
+    """成绩汇总模型，按(用户, 学期)保存学分加权GPA的累计值，由成绩引擎增量维护"""
+    __tablename__ = 'grade_summary'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'semester_id', name='idx_grade_summary_user_semester'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, comment='用户ID，外键')
+    semester_id = db.Column(db.Integer, nullable=False, default=0, comment='学期ID，0表示课程未关联学期')
+    course_count = db.Column(db.Integer, nullable=False, default=0, comment='已出成绩的课程数')
+    credit_sum = db.Column(db.Numeric(10, 2), nullable=False, default=0, comment='学分合计')
+    point_sum = db.Column(db.Numeric(10, 2), nullable=False, default=0, comment='绩点×学分合计')
+    score_sum = db.Column(db.Numeric(12, 2), nullable=False, default=0, comment='成绩合计')
+    
+    def __repr__(self):
+        return f'<GradeSummary {self.user_id} - {self.semester_id}>'
+
 class MajorCourse(db.Model):
     """专业课程模型"""
     __tablename__ = 'major_course'
@@ -76,6 +98,8 @@ class StudyPlan(db.Model):
     start_date = db.Column(db.Date, nullable=False, comment='开始日期')
     end_date = db.Column(db.Date, comment='结束日期')
     progress = db.Column(db.Numeric(5, 2), default=0.00, comment='进度百分比')
+    task_total = db.Column(db.Integer, nullable=False, default=0, comment='任务总数（增量维护）')
+    task_completed = db.Column(db.Integer, nullable=False, default=0, comment='已完成任务数（增量维护）')
     created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
     status = db.Column(db.Enum('active', 'completed', 'abandoned'), default='active', comment='计划状态')
@@ -108,6 +132,10 @@ class Task(db.Model):
 class FocusRecord(db.Model):
     """专注记录模型"""
     __tablename__ = 'focus_record'
+    __table_args__ = (
+        # 客户端重试同一事件时按该唯一索引去重，不重复累计学习时长
+        db.UniqueConstraint('user_id', 'client_key', name='idx_focus_user_client_key'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, comment='用户ID，外键')
@@ -115,6 +143,7 @@ class FocusRecord(db.Model):
     duration = db.Column(db.Integer, nullable=False, comment='专注时长（分钟）')
     focus_score = db.Column(db.Integer, comment='专注度评分')
     task_id = db.Column(db.Integer, db.ForeignKey('task.id', ondelete='SET NULL'), comment='关联任务ID，外键')
+    client_key = db.Column(db.String(64), comment='客户端生成的幂等键')
     
     def __repr__(self):
         return f'<FocusRecord {self.user_id} - {self.start_time}>'
@@ -122,6 +151,10 @@ class FocusRecord(db.Model):
 class CheckIn(db.Model):
     """打卡模型"""
     __tablename__ = 'check_in'
+    __table_args__ = (
+        # 打卡时按(用户, 前一天)查询连续天数，同一天重复打卡由该唯一索引拦截
+        db.UniqueConstraint('user_id', 'check_in_date', name='idx_user_check_in_date_unique'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, comment='用户ID，外键')
@@ -130,4 +163,21 @@ class CheckIn(db.Model):
     note = db.Column(db.String(200), comment='打卡备注')
     
     def __repr__(self):
-        return f'<CheckIn {self.user_id} - {self.check_in_date}>' 
\ No newline at end of file
+        return f'<CheckIn {self.user_id} - {self.check_in_date}>'
+
+
+class CheckInCalendar(db.Model):
+    """打卡日历模型，每个用户每学期一行，bitmap中第i位表示学期第i天（从start_date起）是否打卡"""
+    __tablename__ = 'check_in_calendar'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'semester_id', name='idx_check_in_calendar_user_semester'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, comment='用户ID，外键')
+    semester_id = db.Column(db.Integer, db.ForeignKey('semester.id', ondelete='CASCADE'), nullable=False, comment='学期ID，外键')
+    start_date = db.Column(db.Date, nullable=False, comment='第0位对应的日期（学期开始日期）')
+    bitmap = db.Column(db.LargeBinary(255), nullable=False, comment='打卡位图，每天一位，低位在前')
+    
+    def __repr__(self):
+        return f'<CheckInCalendar {self.user_id} - {self.semester_id}>'
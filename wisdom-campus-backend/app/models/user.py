@@ -13,6 +13,7 @@ class Semester(db.Model):
     start_date = db.Column(db.Date, nullable=False, comment='学期开始日期')
     end_date = db.Column(db.Date, nullable=False, comment='学期结束日期')
     status = db.Column(db.Enum('upcoming', 'active', 'completed'), default='upcoming', comment='学期状态')
+    archived_at = db.Column(db.DateTime, comment='学习数据归档时间，未归档为NULL')
     
     # 关系
     courses = db.relationship('Course', backref='semester', lazy='dynamic')
@@ -60,6 +61,7 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
     auth0_updated_at = db.Column(db.DateTime, comment='Auth0用户信息最后更新时间')
+    last_active = db.Column(db.DateTime, comment='最后活跃时间')
     status = db.Column(db.Enum('active', 'inactive', 'banned'), default='active', comment='用户状态')
     
     # 关系
@@ -16,7 +16,8 @@ CREATE TABLE semester (
     name VARCHAR(20) NOT NULL COMMENT '学期名称，如"2023-秋"',
     start_date DATE NOT NULL COMMENT '学期开始日期',
     end_date DATE NOT NULL COMMENT '学期结束日期',
-    status ENUM('upcoming', 'active', 'completed') DEFAULT 'upcoming' COMMENT '学期状态'
+    status ENUM('upcoming', 'active', 'completed') DEFAULT 'upcoming' COMMENT '学期状态',
+    archived_at DATETIME COMMENT '学习数据归档时间，未归档为NULL'
 );
 
 -- 表：徽章表 (Badge)
@@ -52,6 +53,7 @@ CREATE TABLE user (
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
     auth0_updated_at DATETIME COMMENT 'Auth0用户信息最后更新时间 (updated_at字段)',
+    last_active DATETIME COMMENT '最后活跃时间',
     status ENUM('active', 'inactive', 'banned') DEFAULT 'active' COMMENT '用户状态',
     FOREIGN KEY (major_id) REFERENCES major(id) ON DELETE SET NULL,
     FOREIGN KEY (current_semester_id) REFERENCES semester(id) ON DELETE SET NULL
@@ -109,6 +111,19 @@ CREATE TABLE grade (
     FOREIGN KEY (course_id) REFERENCES course(id) ON DELETE CASCADE
 );
 
+-- 表：成绩汇总表 (GradeSummary)，按(用户, 学期)累计学分加权GPA
+CREATE TABLE grade_summary (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL COMMENT '用户ID，外键',
+    semester_id INT NOT NULL DEFAULT 0 COMMENT '学期ID，0表示课程未关联学期',
+    course_count INT NOT NULL DEFAULT 0 COMMENT '已出成绩的课程数',
+    credit_sum DECIMAL(10,2) NOT NULL DEFAULT 0 COMMENT '学分合计',
+    point_sum DECIMAL(10,2) NOT NULL DEFAULT 0 COMMENT '绩点×学分合计',
+    score_sum DECIMAL(12,2) NOT NULL DEFAULT 0 COMMENT '成绩合计',
+    UNIQUE KEY idx_grade_summary_user_semester (user_id, semester_id),
+    FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE
+);
+
 -- 表：专业课程表 (MajorCourse)
 CREATE TABLE major_course (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -128,6 +143,8 @@ CREATE TABLE study_plan (
     start_date DATE NOT NULL COMMENT '开始日期',
     end_date DATE COMMENT '结束日期',
     progress DECIMAL(5,2) DEFAULT 0.00 COMMENT '进度百分比',
+    task_total INT NOT NULL DEFAULT 0 COMMENT '任务总数（增量维护）',
+    task_completed INT NOT NULL DEFAULT 0 COMMENT '已完成任务数（增量维护）',
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
     status ENUM('active', 'completed', 'abandoned') DEFAULT 'active' COMMENT '计划状态',
@@ -155,6 +172,7 @@ CREATE TABLE focus_record (
     duration INT NOT NULL COMMENT '专注时长（分钟）',
     focus_score INT COMMENT '专注度评分',
     task_id INT COMMENT '关联任务ID，外键',
+    client_key VARCHAR(64) COMMENT '客户端生成的幂等键',
     FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE,
     FOREIGN KEY (task_id) REFERENCES task(id) ON DELETE SET NULL
 );
@@ -169,6 +187,18 @@ CREATE TABLE check_in (
     FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE
 );
 
+-- 表：打卡日历表 (CheckInCalendar)
+CREATE TABLE check_in_calendar (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL COMMENT '用户ID，外键',
+    semester_id INT NOT NULL COMMENT '学期ID，外键',
+    start_date DATE NOT NULL COMMENT '第0位对应的日期（学期开始日期）',
+    bitmap VARBINARY(255) NOT NULL COMMENT '打卡位图，每天一位，低位在前',
+    UNIQUE KEY idx_check_in_calendar_user_semester (user_id, semester_id),
+    FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE,
+    FOREIGN KEY (semester_id) REFERENCES semester(id) ON DELETE CASCADE
+);
+
 -- 表：笔记表 (Note)
 CREATE TABLE note (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -262,6 +292,7 @@ CREATE TABLE message (
     id INT AUTO_INCREMENT PRIMARY KEY,
     sender_id INT NOT NULL COMMENT '发送者ID，外键',
     receiver_id INT NOT NULL COMMENT '接收者ID，外键',
+    pair_key VARCHAR(23) COMMENT '会话键，"较小用户ID:较大用户ID"，两个方向的私信相同',
     content TEXT NOT NULL COMMENT '私信内容',
     is_read BOOLEAN DEFAULT FALSE COMMENT '是否已读',
     sent_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '发送时间',
@@ -269,6 +300,20 @@ CREATE TABLE message (
     FOREIGN KEY (receiver_id) REFERENCES user(id) ON DELETE CASCADE
 );
 
+-- 表：会话摘要表 (Conversation)，每个用户与每个私信对象一行
+CREATE TABLE conversation (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL COMMENT '用户ID，外键',
+    peer_id INT NOT NULL COMMENT '私信对象ID，外键',
+    last_message_id INT COMMENT '最后一条私信ID，外键',
+    last_message_at DATETIME NOT NULL COMMENT '最后一条私信的发送时间',
+    unread_count INT NOT NULL DEFAULT 0 COMMENT '该用户在此会话中的未读私信数',
+    UNIQUE KEY idx_conversation_user_peer (user_id, peer_id),
+    FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE,
+    FOREIGN KEY (peer_id) REFERENCES user(id) ON DELETE CASCADE,
+    FOREIGN KEY (last_message_id) REFERENCES message(id) ON DELETE SET NULL
+);
+
 -- 表：用户徽章表 (UserBadge)
 CREATE TABLE user_badge (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -432,6 +477,90 @@ CREATE TABLE admin_log (
     FOREIGN KEY (admin_id) REFERENCES user(id) ON DELETE CASCADE
 );
 
+-- 归档表：已结束学期的学习数据（见app/api/v1/learning/semester_archive.py），
+-- 列与热表相同，另加所属学期和归档时间；不设外键和唯一约束，id沿用热表中的值
+-- 表：成绩归档表
+CREATE TABLE grade_archive (
+    id INT PRIMARY KEY,
+    user_id INT NOT NULL COMMENT '用户ID',
+    course_id INT NOT NULL COMMENT '课程ID',
+    score DECIMAL(5,2) COMMENT '成绩',
+    recorded_at DATETIME COMMENT '记录时间',
+    semester_id INT NOT NULL COMMENT '所属学期ID',
+    archived_at DATETIME NOT NULL COMMENT '归档时间',
+    KEY idx_grade_archive_user_semester (user_id, semester_id),
+    KEY idx_grade_archive_course_id (course_id)
+);
+
+-- 表：课程安排归档表
+CREATE TABLE course_schedule_archive (
+    id INT PRIMARY KEY,
+    course_id INT NOT NULL COMMENT '课程ID',
+    user_id INT NOT NULL COMMENT '用户ID',
+    day_of_week ENUM('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday') NOT NULL COMMENT '星期几',
+    start_time TIME NOT NULL COMMENT '开始时间',
+    end_time TIME NOT NULL COMMENT '结束时间',
+    location VARCHAR(100) COMMENT '上课地点',
+    semester_id INT NOT NULL COMMENT '所属学期ID',
+    archived_at DATETIME NOT NULL COMMENT '归档时间',
+    KEY idx_course_schedule_archive_user_semester (user_id, semester_id)
+);
+
+-- 表：专注记录归档表
+CREATE TABLE focus_record_archive (
+    id INT PRIMARY KEY,
+    user_id INT NOT NULL COMMENT '用户ID',
+    start_time DATETIME NOT NULL COMMENT '开始时间',
+    duration INT NOT NULL COMMENT '专注时长（分钟）',
+    focus_score INT COMMENT '专注度评分',
+    task_id INT COMMENT '关联任务ID',
+    client_key VARCHAR(64) COMMENT '客户端生成的幂等键',
+    semester_id INT NOT NULL COMMENT '所属学期ID',
+    archived_at DATETIME NOT NULL COMMENT '归档时间',
+    KEY idx_focus_record_archive_user_semester (user_id, semester_id)
+);
+
+-- 表：打卡归档表
+CREATE TABLE check_in_archive (
+    id INT PRIMARY KEY,
+    user_id INT NOT NULL COMMENT '用户ID',
+    check_in_date DATE NOT NULL COMMENT '打卡日期',
+    streak_count INT DEFAULT 0 COMMENT '连续打卡天数',
+    note VARCHAR(200) COMMENT '打卡备注',
+    semester_id INT NOT NULL COMMENT '所属学期ID',
+    archived_at DATETIME NOT NULL COMMENT '归档时间',
+    KEY idx_check_in_archive_user_semester (user_id, semester_id),
+    KEY idx_check_in_archive_user_id_check_in_date (user_id, check_in_date)
+);
+
+-- 表：任务归档表（只归档已完成或已取消的任务）
+CREATE TABLE task_archive (
+    id INT PRIMARY KEY,
+    user_id INT NOT NULL COMMENT '用户ID',
+    plan_id INT COMMENT '学习计划ID',
+    content VARCHAR(200) NOT NULL COMMENT '任务内容',
+    deadline DATETIME COMMENT '截止日期',
+    priority ENUM('low', 'medium', 'high') DEFAULT 'medium' COMMENT '优先级',
+    status ENUM('pending', 'in_progress', 'reviewing', 'revising', 'completed', 'delayed', 'cancelled') DEFAULT 'pending' COMMENT '任务状态',
+    semester_id INT NOT NULL COMMENT '所属学期ID',
+    archived_at DATETIME NOT NULL COMMENT '归档时间',
+    KEY idx_task_archive_user_semester (user_id, semester_id),
+    KEY idx_task_archive_plan_id (plan_id)
+);
+
+-- 表：学习行为归档表
+CREATE TABLE learning_behavior_archive (
+    id INT PRIMARY KEY,
+    user_id INT NOT NULL COMMENT '用户ID',
+    behavior_type ENUM('study_time', 'task_completion', 'note_creation', 'post_interaction') NOT NULL COMMENT '行为类型',
+    target_id INT COMMENT '目标ID，具体对象ID',
+    duration INT COMMENT '持续时间（分钟）',
+    created_at DATETIME COMMENT '行为发生时间',
+    semester_id INT NOT NULL COMMENT '所属学期ID',
+    archived_at DATETIME NOT NULL COMMENT '归档时间',
+    KEY idx_learning_behavior_archive_user_semester (user_id, semester_id)
+);
+
 -- 创建索引以优化查询性能
 CREATE INDEX idx_user_email ON user(email);
 CREATE INDEX idx_user_auth0_id ON user(auth0_id);
@@ -439,15 +568,18 @@ CREATE INDEX idx_user_auth0_sid ON user(auth0_sid);
 CREATE INDEX idx_user_auth0_aud ON user(auth0_aud);
 CREATE INDEX idx_user_auth0_iss ON user(auth0_iss);
 CREATE INDEX idx_course_code ON course(code);
-CREATE INDEX idx_task_user_id ON task(user_id);
+-- 任务看板"我的未完成任务按截止时间排序"，前缀(user_id)同时覆盖按用户查询
+CREATE INDEX idx_task_user_status_deadline ON task(user_id, status, deadline);
 CREATE INDEX idx_task_deadline ON task(deadline);
 CREATE INDEX idx_task_plan_id ON task(plan_id);
 CREATE INDEX idx_note_user_id ON note(user_id);
 CREATE INDEX idx_post_user_id ON post(user_id);
-CREATE INDEX idx_post_category ON post(category);
-CREATE INDEX idx_comment_post_id ON comment(post_id);
+-- 信息流按类别载入最新的正常帖子，前缀(category)同时覆盖按类别查询
+CREATE INDEX idx_post_category_status_created ON post(category, status, created_at);
+-- 评论楼按帖子载入回复、按(created_at, id)游标翻页顶层评论，前缀(post_id)同时覆盖外键
+CREATE INDEX idx_comment_post_parent_created ON comment(post_id, parent_id, created_at);
 CREATE INDEX idx_comment_user_id ON comment(user_id);
-CREATE INDEX idx_notification_user_id ON notification(user_id);
+CREATE INDEX idx_notification_user_read ON notification(user_id, is_read);
 CREATE INDEX idx_notification_is_read ON notification(is_read);
 CREATE INDEX idx_search_history_user_id ON search_history(user_id);
 CREATE INDEX idx_search_history_query ON search_history(query);
@@ -456,18 +588,31 @@ CREATE INDEX idx_course_schedule_course_id ON course_schedule(course_id);
 CREATE INDEX idx_note_file_note_id ON note_file(note_id);
 CREATE INDEX idx_note_tag_note_id ON note_tag(note_id);
 CREATE INDEX idx_message_sender_id ON message(sender_id);
-CREATE INDEX idx_message_receiver_id ON message(receiver_id);
+-- 未读私信按(receiver_id, is_read)查找，前缀(receiver_id)同时覆盖外键
+CREATE INDEX idx_message_receiver_read ON message(receiver_id, is_read);
+-- 会话历史按(pair_key, sent_at)倒序翻页
+CREATE INDEX idx_message_pair_sent ON message(pair_key, sent_at);
+-- 收件箱按最后私信时间倒序翻页
+CREATE INDEX idx_conversation_user_last ON conversation(user_id, last_message_at);
 CREATE INDEX idx_learning_resource_uploaded_by ON learning_resource(uploaded_by);
 CREATE INDEX idx_resource_recommendation_user_id ON resource_recommendation(user_id);
 CREATE INDEX idx_resource_comment_resource_id ON resource_comment(resource_id);
 CREATE INDEX idx_semester_status ON semester(status);
 CREATE INDEX idx_user_current_semester ON user(current_semester_id);
+CREATE INDEX idx_user_last_active ON user(last_active);
+CREATE INDEX idx_user_name ON user(name);
+-- 姓名全文索引（ngram分词，支持中文姓名中间字搜索，需MySQL 5.7.6+）
+CREATE FULLTEXT INDEX ft_user_name ON user(name) WITH PARSER ngram;
+CREATE INDEX idx_focus_record_user_start ON focus_record(user_id, start_time);
+-- 归档任务时查找仍被专注记录引用的任务（MySQL外键会复用该索引）
+CREATE INDEX idx_focus_record_task_id ON focus_record(task_id);
 CREATE INDEX idx_ai_config_user_id ON ai_config(user_id);
 CREATE INDEX idx_ai_config_api_type ON ai_config(api_type);
 
 -- 创建唯一约束以避免重复数据
 ALTER TABLE grade ADD UNIQUE INDEX idx_user_course_unique (user_id, course_id);
 ALTER TABLE check_in ADD UNIQUE INDEX idx_user_check_in_date_unique (user_id, check_in_date);
+ALTER TABLE focus_record ADD UNIQUE INDEX idx_focus_user_client_key (user_id, client_key);
 ALTER TABLE like_record ADD UNIQUE INDEX idx_user_target_unique (user_id, target_type, target_id);
 ALTER TABLE favorite ADD UNIQUE INDEX idx_user_favorite_unique (user_id, target_type, target_id);
 
@@ -0,0 +1,227 @@
+"""
+批量序列化
+marshmallow逐个对象dump时，每个字段都要经过Field.serialize、get_value等多层调用。
+BulkSerializer根据Schema的字段定义预先生成一份序列化计划（字段名、属性名、转换函数），
+之后对整批数据只做属性读取和简单转换，输出与schema.dump编码为JSON后一致：
+- dump_objects: 序列化ORM对象列表
+- query + dump_rows: 直接查询所需列（含Nested关联表的列，LEFT JOIN），序列化Row，不构造ORM对象
+- Decimal字段直接输出float（API响应的JSON编码同样把Decimal编码为数字），
+  大列表交给orjson序列化时不需要逐个值回调Python的default函数
+"""
+from decimal import Decimal
+
+from marshmallow import fields
+from marshmallow.decorators import PRE_DUMP, POST_DUMP
+from sqlalchemy import inspect
+from sqlalchemy.orm import aliased
+
+from app import db
+
+# 序列化计划缓存: (schema类, only, exclude) -> _Plan
+_plan_cache = {}
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _to_decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _decimal_to_float(value):
+    return float(value)
+
+
+def _quantizer(places, rounding):
+    """与fields.Decimal(places=...)一致：转换为Decimal后按精度取整，再输出float"""
+    def convert(value):
+        value = _to_decimal(value)
+        return float(value.quantize(places, rounding=rounding) if value.is_finite() else value)
+    return convert
+
+
+# 字段类型 -> 转换函数，None表示原样输出
+_CONVERTERS = [
+    (fields.DateTime, _isoformat),
+    (fields.Date, _isoformat),
+    (fields.Time, _isoformat),
+    (fields.Decimal, _decimal_to_float),
+    (fields.Boolean, bool),
+    (fields.Float, float),
+    (fields.Integer, int),
+    (fields.String, str),
+]
+
+
+def _converter_for(field):
+    """返回字段的转换函数；不认识的字段类型或带格式参数的字段返回False，使用marshmallow原生序列化"""
+    field_type = type(field)
+    if field_type is fields.Field or field_type is fields.Raw:
+        return None
+    if getattr(field, 'as_string', False):
+        return False
+    if isinstance(field, fields.Decimal) and field.places is not None and field_type._serialize is fields.Decimal._serialize:
+        return _quantizer(field.places, field.rounding)
+    if isinstance(field, (fields.DateTime, fields.Date, fields.Time)) and field.format not in (None, 'iso'):
+        return False
+    for base, converter in _CONVERTERS:
+        if isinstance(field, base):
+            # 子类可能重写了_serialize，只对原生类型使用快速转换
+            if field_type._serialize is base._serialize:
+                return converter
+            break
+    return False
+
+
+class _Plan:
+    """一个Schema的序列化计划"""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.model = getattr(getattr(schema, 'opts', None), 'model', None)
+        self.simple = []   # (输出键, 属性名, 转换函数)
+        self.nested = []   # (输出键, 属性名, 子计划)
+        self.fallback = [] # (输出键, 字段名, 字段对象)
+        self.order = []
+        # 带pre_dump/post_dump钩子的Schema无法生成计划，整体交给schema.dump
+        self.has_hooks = any(schema._hooks[(tag, many)] for tag in (PRE_DUMP, POST_DUMP) for many in (False, True))
+
+        for name, field in schema.dump_fields.items():
+            key = field.data_key or name
+            attribute = field.attribute or name
+            self.order.append(key)
+            if isinstance(field, fields.Nested) and not field.many:
+                self.nested.append((key, attribute, _get_plan(field.schema)))
+                continue
+            converter = _converter_for(field)
+            if converter is False:
+                self.fallback.append((key, name, field))
+            else:
+                self.simple.append((key, attribute, converter))
+
+    def dump_object(self, obj):
+        if obj is None:
+            return None
+        data = {}
+        for key, attribute, converter in self.simple:
+            value = getattr(obj, attribute, None)
+            if value is not None and converter is not None:
+                value = converter(value)
+            data[key] = value
+        for key, attribute, plan in self.nested:
+            data[key] = plan.dump_object(getattr(obj, attribute, None)) if not plan.has_hooks \
+                else plan.schema.dump(getattr(obj, attribute, None))
+        for key, name, field in self.fallback:
+            data[key] = field.serialize(name, obj)
+        return self._ordered(data)
+
+    def _ordered(self, data):
+        return {key: data[key] for key in self.order}
+
+
+def _get_plan(schema):
+    key = (type(schema), tuple(schema.only) if schema.only else None, tuple(sorted(schema.exclude)))
+    plan = _plan_cache.get(key)
+    if plan is None:
+        plan = _Plan(schema)
+        _plan_cache[key] = plan
+    return plan
+
+
+class BulkSerializer:
+    """
+    基于Schema的批量序列化器
+
+    示例:
+        serializer = BulkSerializer(user_schema)
+        users = serializer.dump_objects(User.query.all())
+        rows = serializer.query().filter(User.status == 'active').all()
+        users = serializer.dump_rows(rows)
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._plan = None
+        self._row_spec = None
+
+    @property
+    def plan(self):
+        if self._plan is None:
+            self._plan = _get_plan(self.schema)
+        return self._plan
+
+    def dump_objects(self, objects):
+        """序列化ORM对象列表"""
+        if self.plan.has_hooks:
+            return self.schema.dump(objects, many=True)
+        dump_object = self.plan.dump_object
+        return [dump_object(obj) for obj in objects]
+
+    def query(self):
+        """
+        构造只查询所需列的查询，Nested关联表通过LEFT JOIN取列，
+        返回的Row可以交给dump_rows序列化，主模型的列以原属性名作为标签，可直接用于过滤和游标分页
+        """
+        columns, joins = self._build_row_spec()
+        query = db.session.query(*columns).select_from(self.plan.model)
+        for relationship in joins:
+            query = query.outerjoin(relationship)
+        return query
+
+    def dump_rows(self, rows):
+        """序列化query()返回的Row列表"""
+        self._build_row_spec()
+        root_keys, nested_specs = self._row_spec[2], self._row_spec[3]
+
+        result = []
+        for row in rows:
+            mapping = row._mapping
+            data = {key: _convert(mapping[label], converter) for key, label, converter in root_keys}
+            for key, pk_label, children in nested_specs:
+                if mapping[pk_label] is None:
+                    data[key] = None
+                else:
+                    data[key] = {child_key: _convert(mapping[label], converter) for child_key, label, converter in children}
+            result.append(self.plan._ordered(data))
+        return result
+
+    def _build_row_spec(self):
+        if self._row_spec is not None:
+            return self._row_spec[0], self._row_spec[1]
+
+        plan = self.plan
+        if plan.model is None or plan.fallback or plan.has_hooks:
+            raise ValueError(f"{type(self.schema).__name__} 含有无法按列读取的字段，只能使用dump_objects")
+
+        model = plan.model
+        columns = [getattr(model, attribute).label(attribute) for _, attribute, _ in plan.simple]
+        root_keys = [(key, attribute, converter) for key, attribute, converter in plan.simple]
+        joins = []
+        nested_specs = []
+
+        for key, attribute, child in plan.nested:
+            relationship = getattr(model, attribute)
+            if child.nested or child.fallback or child.has_hooks:
+                raise ValueError(f"Nested字段 {key} 嵌套层级过深，只能使用dump_objects")
+            alias = aliased(inspect(model).relationships[attribute].mapper.class_)
+            joins.append(relationship.of_type(alias))
+            pk_name = inspect(alias).mapper.primary_key[0].key
+            pk_label = f'{key}__{pk_name}'
+            columns.append(getattr(alias, pk_name).label(pk_label))
+            children = []
+            for child_key, child_attribute, converter in child.simple:
+                label = f'{key}__{child_attribute}'
+                if label != pk_label:
+                    columns.append(getattr(alias, child_attribute).label(label))
+                children.append((child_key, label, converter))
+            nested_specs.append((key, pk_label, children))
+
+        self._row_spec = (columns, joins, root_keys, nested_specs)
+        return columns, joins
+
+
+def _convert(value, converter):
+    if value is None or converter is None:
+        return value
+    return converter(value)
@@ -0,0 +1,30 @@
+"""
+社区模块序列化 Schema
+"""
+from app import ma
+from app.models.community import Post, Comment
+from app.schemas.user import UserSchema
+from marshmallow import fields
+from app.schemas.bulk import BulkSerializer
+
+class PostSchema(ma.SQLAlchemyAutoSchema):
+    """帖子序列化Schema"""
+    class Meta:
+        model = Post
+        load_instance = True
+        include_fk = True
+
+    user = fields.Nested(UserSchema, only=('id', 'name', 'nickname', 'avatar_url'), dump_only=True)
+
+class CommentSchema(ma.SQLAlchemyAutoSchema):
+    """评论序列化Schema"""
+    class Meta:
+        model = Comment
+        load_instance = True
+        include_fk = True
+
+    user = fields.Nested(UserSchema, only=('id', 'name', 'nickname', 'avatar_url'), dump_only=True)
+
+# 批量序列化（列表接口使用）
+post_bulk_serializer = BulkSerializer(PostSchema())
+comment_bulk_serializer = BulkSerializer(CommentSchema())
@@ -5,6 +5,7 @@ from app import ma
 from app.models.learning import Semester, Course, CourseSchedule, Grade, MajorCourse, StudyPlan, Task, FocusRecord, CheckIn
 from marshmallow import fields, validates, ValidationError
 from datetime import datetime, time
+from app.schemas.bulk import BulkSerializer
 
 class SemesterSchema(ma.SQLAlchemyAutoSchema):
     """学期序列化Schema"""
@@ -154,4 +155,12 @@ class CheckInSchema(ma.SQLAlchemyAutoSchema):
     def validate_check_in_date(self, value):
         """验证打卡日期"""
         if value and value > datetime.now().date():
-            raise ValidationError("打卡日期不能晚于当前日期") 
\ No newline at end of file
+            raise ValidationError("打卡日期不能晚于当前日期") 
+
+# 批量序列化（列表接口使用）
+course_schedule_bulk_serializer = BulkSerializer(CourseScheduleSchema())
+grade_bulk_serializer = BulkSerializer(GradeSchema())
+study_plan_bulk_serializer = BulkSerializer(StudyPlanSchema())
+task_bulk_serializer = BulkSerializer(TaskSchema())
+focus_record_bulk_serializer = BulkSerializer(FocusRecordSchema())
+check_in_bulk_serializer = BulkSerializer(CheckInSchema())
@@ -4,6 +4,7 @@
 from app import ma
 from app.models.user import User, UserProfile, Major
 from marshmallow import fields, validate, post_load, validates_schema, ValidationError
+from app.schemas.bulk import BulkSerializer
 
 class MajorSchema(ma.SQLAlchemyAutoSchema):
     """专业Schema"""
@@ -102,4 +103,7 @@ user_profile_schema = UserProfileSchema()
 major_schema = MajorSchema()
 majors_schema = MajorSchema(many=True)
 user_create_schema = UserCreateSchema()
-user_update_schema = UserUpdateSchema() 
\ No newline at end of file
+user_update_schema = UserUpdateSchema() 
+
+# 批量序列化（列表接口使用）
+user_bulk_serializer = BulkSerializer(user_schema)
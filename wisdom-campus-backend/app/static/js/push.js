@@ -0,0 +1,129 @@
+/**
+ * 智慧校园学习助手系统
+ * 实时推送客户端 - 通过Server-Sent Events接收新私信和通知，替代定时刷新页面
+ *
+ * 用法:
+ *     const channel = startPushChannel({
+ *         onMessage: data => {...},       // 新私信
+ *         onNotification: data => {...},  // 新通知
+ *         onResync: () => {...}           // 连接中断或事件积压被丢弃，应重新拉取未读数
+ *     });
+ *     channel.close();
+ */
+(function(window) {
+    'use strict';
+
+    const TICKET_URL = '/api/v1/push/ticket';
+    const MIN_RETRY = 1000;
+    const MAX_RETRY = 60000;
+
+    function startPushChannel(handlers) {
+        handlers = handlers || {};
+        let source = null;
+        let retryDelay = MIN_RETRY;
+        let retryTimer = null;
+        let closed = false;
+
+        function call(name, data) {
+            if (typeof handlers[name] === 'function') {
+                try {
+                    handlers[name](data);
+                } catch (error) {
+                    console.error(`推送事件处理失败(${name}):`, error);
+                }
+            }
+        }
+
+        function parse(event) {
+            try {
+                return JSON.parse(event.data);
+            } catch (error) {
+                return null;
+            }
+        }
+
+        // EventSource不能设置Authorization头，先用访问令牌换取短期票据
+        function requestTicket() {
+            const token = localStorage.getItem('auth_token');
+            if (!token) {
+                return Promise.reject(new Error('未登录'));
+            }
+            return fetch(TICKET_URL, {
+                method: 'POST',
+                headers: {
+                    'Authorization': `Bearer ${token}`,
+                    'Accept': 'application/json'
+                }
+            }).then(response => {
+                if (response.status === 401) {
+                    closed = true;
+                    throw new Error('登录已失效，停止推送');
+                }
+                if (!response.ok) {
+                    throw new Error(`获取推送票据失败: HTTP ${response.status}`);
+                }
+                return response.json();
+            }).then(body => body.data);
+        }
+
+        // 断线后指数退避重连，加随机抖动，避免服务重启后所有客户端同时重连
+        function scheduleReconnect() {
+            if (closed || retryTimer) {
+                return;
+            }
+            const delay = retryDelay / 2 + Math.random() * retryDelay / 2;
+            retryDelay = Math.min(retryDelay * 2, MAX_RETRY);
+            retryTimer = setTimeout(function() {
+                retryTimer = null;
+                connect();
+            }, delay);
+        }
+
+        function connect() {
+            if (closed) {
+                return;
+            }
+            requestTicket().then(ticket => {
+                if (closed) {
+                    return;
+                }
+                source = new EventSource(`${ticket.stream_url}?ticket=${encodeURIComponent(ticket.ticket)}`);
+                source.addEventListener('ready', function() {
+                    retryDelay = MIN_RETRY;
+                    // 断线期间可能错过事件，重新拉取一次
+                    call('onResync');
+                });
+                source.addEventListener('message', event => call('onMessage', parse(event)));
+                source.addEventListener('notification', event => call('onNotification', parse(event)));
+                source.addEventListener('resync', () => call('onResync'));
+                source.onerror = function() {
+                    // 票据只能用于建立连接，由EventSource自动重连会使用过期票据，改为重新获取票据
+                    source.close();
+                    source = null;
+                    scheduleReconnect();
+                };
+            }).catch(error => {
+                console.warn('推送连接失败:', error.message);
+                scheduleReconnect();
+            });
+        }
+
+        connect();
+
+        return {
+            close: function() {
+                closed = true;
+                if (retryTimer) {
+                    clearTimeout(retryTimer);
+                    retryTimer = null;
+                }
+                if (source) {
+                    source.close();
+                    source = null;
+                }
+            }
+        };
+    }
+
+    window.startPushChannel = startPushChannel;
+})(window);
@@ -0,0 +1,149 @@
+"""
+用户活跃时间记录
+verify-token、refresh-token等高频接口只在内存中记录用户最后活跃时间，
+由后台线程每隔ACTIVITY_FLUSH_INTERVAL秒合并成一条UPDATE批量写入数据库：
+- 同一用户在一个周期内多次活跃只保留最新时间
+- 待写入用户数超过ACTIVITY_MAX_PENDING时立即写入
+- 进程退出时（atexit）写入剩余数据
+"""
+import atexit
+import logging
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+
+from flask import has_app_context
+from sqlalchemy import case
+
+logger = logging.getLogger(__name__)
+
+# 单条UPDATE最多包含的用户数
+_BATCH_SIZE = 500
+
+
+class ActivityTracker:
+    """
+    最后活跃时间写缓冲
+
+    flush_interval为0时关闭缓冲，每次touch立即写入数据库
+    """
+
+    def __init__(self, flush_interval=5, max_pending=5000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.app = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stopped = False
+
+    def init_app(self, app):
+        """从应用配置读取参数，并注册退出时写入（全局实例只在第一次init_app时注册）"""
+        if self.app is None:
+            atexit.register(self.shutdown)
+        self.app = app
+        self.flush_interval = app.config.get('ACTIVITY_FLUSH_INTERVAL', self.flush_interval)
+        self.max_pending = app.config.get('ACTIVITY_MAX_PENDING', self.max_pending)
+
+    def touch(self, user_id, when=None):
+        """
+        记录用户活跃
+
+        参数:
+            user_id: 用户ID
+            when: 活跃时间，默认为当前时间
+        """
+        when = when or datetime.now()
+        if not self.flush_interval:
+            self._write({user_id: when})
+            return
+
+        with self._lock:
+            previous = self._pending.get(user_id)
+            if previous is None or when > previous:
+                self._pending[user_id] = when
+            pending_count = len(self._pending)
+
+        self._ensure_thread()
+        if pending_count >= self.max_pending:
+            self._wakeup.set()
+
+    def flush(self):
+        """把缓冲中的活跃时间写入数据库，返回写入的用户数"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                pending, self._pending = self._pending, {}
+
+            try:
+                self._write(pending)
+            except Exception as e:
+                logger.error(f"写入用户活跃时间失败，{len(pending)}条记录将在下次重试: {str(e)}")
+                with self._lock:
+                    for user_id, when in pending.items():
+                        current = self._pending.get(user_id)
+                        if current is None or when > current:
+                            self._pending[user_id] = when
+                return 0
+            return len(pending)
+
+    def shutdown(self):
+        """停止后台线程并写入剩余数据"""
+        self._stopped = True
+        self._wakeup.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"退出时写入用户活跃时间失败: {str(e)}")
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='activity-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"后台写入用户活跃时间异常: {str(e)}")
+
+    def _write(self, pending):
+        """每批生成一条 UPDATE user SET last_active = CASE id ... END WHERE id IN (...)"""
+        from app import db
+        from app.models.user import User
+
+        table = User.__table__
+        items = list(pending.items())
+        with self._app_context():
+            with db.engine.begin() as conn:
+                for start in range(0, len(items), _BATCH_SIZE):
+                    batch = dict(items[start:start + _BATCH_SIZE])
+                    conn.execute(
+                        table.update()
+                        .where(table.c.id.in_(list(batch.keys())))
+                        # updated_at赋值为自身，避免触发onupdate/ON UPDATE CURRENT_TIMESTAMP
+                        .values(last_active=case(batch, value=table.c.id), updated_at=table.c.updated_at)
+                    )
+        logger.debug(f"已写入{len(items)}个用户的活跃时间")
+
+    def _app_context(self):
+        if has_app_context() or self.app is None:
+            return nullcontext()
+        return self.app.app_context()
+
+
+# 全局活跃时间记录实例，在create_app中通过init_app加载配置
+activity_tracker = ActivityTracker()
@@ -2,7 +2,7 @@
 Auth0认证相关工具函数
 """
 import json
-import requests
+from app.utils.http_client import auth0_http
 from functools import wraps
 from urllib.parse import urlencode
 from flask import session, redirect, request, url_for, current_app, flash, jsonify
@@ -10,31 +10,17 @@ from jose import jwt
 import os
 from datetime import datetime
 import logging
+from app.utils.jwks import jwks_cache
+from app.utils.auth0_token import auth0_token_manager
+from app.utils.identity import set_current_user_id, current_identity
 
 def get_auth0_token():
     """
     获取Auth0 Management API的访问令牌
-    """
-    domain = current_app.config["AUTH0_DOMAIN"]
-    client_id = current_app.config["AUTH0_CLIENT_ID"]
-    client_secret = current_app.config["AUTH0_CLIENT_SECRET"]
-    
-    payload = {
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "audience": f"https://{domain}/api/v2/",
-        "grant_type": "client_credentials"
-    }
-    
-    response = requests.post(
-        f"https://{domain}/oauth/token", 
-        json=payload
-    )
     
-    if response.status_code != 200:
-        raise Exception(f"无法获取管理API令牌: {response.text}")
-    
-    return response.json()['access_token']
+    令牌由进程内共享的令牌管理器缓存并提前刷新
+    """
+    return auth0_token_manager.get_token()
 
 def requires_auth(f):
     """
@@ -55,6 +41,9 @@ def requires_auth(f):
                 
                 # 验证JWT令牌
                 verify_jwt_in_request()
+                # 推送票据只能用于建立推送连接（旧版本签发的票据是带push_ticket声明的JWT）
+                if get_jwt().get('push_ticket'):
+                    raise ValueError("推送票据不能用于API认证")
                 
                 # 获取用户ID
                 user_id = get_jwt_identity()
@@ -67,18 +56,8 @@ def requires_auth(f):
                 except Exception as jwt_error:
                     logger.warning(f"获取JWT额外信息失败: {str(jwt_error)}")
                 
-                # 认证成功，继续执行被装饰的函数
-                # 可选：从数据库获取用户信息并放入请求上下文
-                try:
-                    from app.models.user import User
-                    # 确保用户ID是整数
-                    if isinstance(user_id, str) and user_id.isdigit():
-                        user_id = int(user_id)
-                    user = User.query.get(user_id)
-                    if user:
-                        request.user = user
-                except Exception as db_error:
-                    logger.warning(f"从数据库获取用户信息失败: {str(db_error)}")
+                # 认证成功，记录当前用户ID，用户信息在需要时通过identity模块按请求加载一次
+                set_current_user_id(user_id)
                 
                 return f(*args, **kwargs)
             except Exception as jwt_error:
@@ -97,6 +76,7 @@ def requires_auth(f):
         user_id = session.get('user_id')
         if user_id:
             logger.info(f"会话认证成功，用户ID: {user_id}")
+            set_current_user_id(user_id)
             return f(*args, **kwargs)
         
         # 认证失败，检查是否API请求
@@ -195,6 +175,8 @@ def requires_admin(f):
                 # 获取用户ID和额外数据
                 user_id = get_jwt_identity()
                 jwt_data = get_jwt()
+                if jwt_data.get('push_ticket'):
+                    raise ValueError("推送票据不能用于API认证")
                 
                 logger.info(f"JWT验证成功，用户ID: {user_id}")
                 logger.info(f"JWT额外数据: {jwt_data.get('is_admin')}, {jwt_data.get('email')}")
@@ -211,13 +193,9 @@ def requires_admin(f):
                     flash('您没有管理员权限', 'danger')
                     return redirect(url_for('login'))
                 
-                # 查找用户 - 使用用户ID而不是auth0_id
-                from app.models.user import User
-                # 确保用户ID是整数
-                if isinstance(user_id, str) and user_id.isdigit():
-                    user_id = int(user_id)
-                
-                user = User.query.get(user_id)
+                # 查找用户身份 - 使用用户ID而不是auth0_id，优先使用缓存的精简身份信息
+                set_current_user_id(user_id)
+                user = current_identity()
                 
                 if not user:
                     logger.warning(f"找不到用户ID: {user_id}")
@@ -230,7 +208,7 @@ def requires_admin(f):
                     return redirect(url_for('login'))
                 
                 if not user.is_admin:
-                    logger.warning(f"用户 {user.name} 不是管理员")
+                    logger.warning(f"用户 {user.id} 不是管理员")
                     if request.is_json or request.headers.get('Accept') == 'application/json':
                         return jsonify({
                             "success": False,
@@ -240,8 +218,7 @@ def requires_admin(f):
                     flash('您没有管理员权限', 'danger')
                     return redirect(url_for('login'))
                 
-                # 验证通过，将用户信息放入请求上下文中
-                request.user = user
+                # 验证通过
                 return f(*args, **kwargs)
             except Exception as e:
                 # 令牌验证失败
@@ -287,29 +264,19 @@ def requires_admin(f):
 def validate_token(token):
     """
     验证JWT令牌
+    
+    签名公钥从进程内的JWKS缓存获取，不再每次请求jwks.json
     """
     domain = current_app.config["AUTH0_DOMAIN"]
-    jwks_url = f"https://{domain}/.well-known/jwks.json"
-    
-    # 获取jwks
-    jwks_response = requests.get(jwks_url)
-    jwks = jwks_response.json()
+    jwks_url = current_app.config.get("AUTH0_JWKS_URL") or f"https://{domain}/.well-known/jwks.json"
     
     # 解析token
     unverified_header = jwt.get_unverified_header(token)
-    rsa_key = {}
     
-    for key in jwks["keys"]:
-        if key["kid"] == unverified_header["kid"]:
-            rsa_key = {
-                "kty": key["kty"],
-                "kid": key["kid"],
-                "use": key["use"],
-                "n": key["n"],
-                "e": key["e"]
-            }
+    # 按kid获取已解析的公钥
+    rsa_key = jwks_cache.get_key(jwks_url, unverified_header.get("kid"))
     
-    if rsa_key:
+    if rsa_key is not None:
         try:
             payload = jwt.decode(
                 token,
@@ -339,7 +306,7 @@ def get_user_info(user_id):
         "Authorization": f"Bearer {token}"
     }
     
-    response = requests.get(
+    response = auth0_http.get(
         f"https://{domain}/api/v2/users/{user_id}",
         headers=headers
     )
@@ -365,7 +332,7 @@ def update_user_metadata(user_id, metadata):
         "user_metadata": metadata
     }
     
-    response = requests.patch(
+    response = auth0_http.patch(
         f"https://{domain}/api/v2/users/{user_id}",
         headers=headers,
         json=data
@@ -392,7 +359,7 @@ def resend_verification_email(user_id):
         "user_id": user_id
     }
     
-    response = requests.post(
+    response = auth0_http.post(
         f"https://{domain}/api/v2/jobs/verification-email",
         headers=headers,
         json=data
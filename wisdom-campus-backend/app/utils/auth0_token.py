@@ -0,0 +1,194 @@
+"""
+Auth0 Management API令牌管理
+进程内共享的client_credentials令牌缓存，所有认证模块统一从这里获取管理令牌：
+- 并发请求时同一时间只有一个线程请求/oauth/token，其余线程等待其结果
+- 令牌临近过期前在后台线程中提前刷新，请求线程继续使用当前令牌
+"""
+import time
+import logging
+import threading
+
+from flask import current_app
+from app.utils.http_client import auth0_http
+
+logger = logging.getLogger(__name__)
+
+
+class Auth0TokenError(Exception):
+    """获取Auth0管理令牌失败"""
+
+    def __init__(self, message, status_code=None, response_text=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response_text = response_text
+
+
+class _CachedToken:
+    """缓存的管理令牌"""
+
+    def __init__(self, access_token, expires_at, refresh_at):
+        self.access_token = access_token
+        self.expires_at = expires_at  # 超过该时间令牌不再使用
+        self.refresh_at = refresh_at  # 超过该时间开始后台刷新
+
+
+class Auth0TokenManager:
+    """
+    Auth0管理令牌管理器
+
+    令牌按(domain, client_id, audience)缓存，提前刷新时间取
+    AUTH0_TOKEN_REFRESH_MARGIN秒与令牌有效期10%中的较大值
+    """
+
+    def __init__(self, refresh_margin=300, timeout=10):
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self._tokens = {}
+        self._inflight = set()
+        self._generation = {}
+        self._errors = {}
+        self._cond = threading.Condition()
+
+    def init_app(self, app):
+        """从应用配置读取参数"""
+        self.refresh_margin = app.config.get('AUTH0_TOKEN_REFRESH_MARGIN', self.refresh_margin)
+        self.timeout = app.config.get('AUTH0_TOKEN_TIMEOUT', self.timeout)
+
+    def get_token(self):
+        """
+        获取Auth0管理API令牌
+
+        返回:
+            str: 访问令牌
+
+        异常:
+            Auth0TokenError: 无法获取令牌
+        """
+        credentials = self._credentials()
+        key = (credentials['domain'], credentials['client_id'], credentials['audience'])
+
+        with self._cond:
+            while True:
+                cached = self._tokens.get(key)
+                now = time.time()
+                if cached is not None and now < cached.expires_at:
+                    if now >= cached.refresh_at and key not in self._inflight:
+                        self._start_background_refresh(key, credentials)
+                    return cached.access_token
+
+                if key not in self._inflight:
+                    # 当前线程负责刷新
+                    self._inflight.add(key)
+                    break
+
+                # 已有线程在刷新，等待其完成后复用结果
+                generation = self._generation.get(key, 0)
+                self._cond.wait(self.timeout)
+                error = self._errors.get(key)
+                if error is not None and error[0] > generation:
+                    raise error[1]
+
+        return self._refresh(key, credentials)
+
+    def invalidate(self, token=None):
+        """
+        作废缓存的令牌（例如Management API返回401时）
+
+        参数:
+            token: 仅当缓存的令牌与之相同时才作废，为None时作废全部
+        """
+        with self._cond:
+            for key, cached in list(self._tokens.items()):
+                if token is None or cached.access_token == token:
+                    del self._tokens[key]
+
+    def _credentials(self):
+        domain = current_app.config.get('AUTH0_DOMAIN')
+        return {
+            'domain': domain,
+            'client_id': current_app.config.get('AUTH0_CLIENT_ID'),
+            'client_secret': current_app.config.get('AUTH0_CLIENT_SECRET'),
+            'audience': f"https://{domain}/api/v2/"
+        }
+
+    def _start_background_refresh(self, key, credentials):
+        """在持有锁的情况下调用"""
+        self._inflight.add(key)
+
+        def refresh():
+            try:
+                self._refresh(key, credentials)
+            except Auth0TokenError as e:
+                # 旧令牌仍然有效，下次请求会再次尝试刷新
+                logger.error(f"后台刷新Auth0管理令牌失败: {str(e)}")
+
+        threading.Thread(target=refresh, name='auth0-token-refresh', daemon=True).start()
+
+    def _refresh(self, key, credentials):
+        """请求新令牌并唤醒等待的线程，调用前key已加入_inflight，返回新令牌"""
+        error = None
+        try:
+            cached = self._request_token(credentials)
+        except Auth0TokenError as e:
+            error = e
+        except Exception as e:
+            error = Auth0TokenError(f"请求Auth0管理令牌时发生异常: {str(e)}")
+
+        with self._cond:
+            generation = self._generation.get(key, 0) + 1
+            self._generation[key] = generation
+            if error is None:
+                self._tokens[key] = cached
+                self._errors.pop(key, None)
+            else:
+                self._errors[key] = (generation, error)
+            self._inflight.discard(key)
+            self._cond.notify_all()
+
+        if error is not None:
+            raise error
+        return cached.access_token
+
+    def _request_token(self, credentials):
+        domain = credentials['domain']
+        payload = {
+            "client_id": credentials['client_id'],
+            "client_secret": credentials['client_secret'],
+            "audience": credentials['audience'],
+            "grant_type": "client_credentials"
+        }
+
+        response = auth0_http.post(
+            f"https://{domain}/oauth/token",
+            json=payload,
+            headers={"content-type": "application/json"},
+            timeout=self.timeout
+        )
+
+        if response.status_code != 200:
+            logger.error(f"获取Auth0管理令牌失败: HTTP {response.status_code}, 响应: {response.text}")
+            raise Auth0TokenError(
+                f"无法获取管理API令牌: {response.text}",
+                status_code=response.status_code,
+                response_text=response.text
+            )
+
+        token_data = response.json()
+        access_token = token_data.get('access_token')
+        if not access_token:
+            raise Auth0TokenError(f"Auth0响应中缺少access_token: {token_data}")
+
+        expires_in = token_data.get('expires_in', 86400)
+        now = time.time()
+        margin = min(max(self.refresh_margin, expires_in * 0.1), expires_in / 2)
+        skew = min(30, expires_in * 0.1)  # 预留网络延迟
+        logger.info(f"已获取Auth0管理令牌，有效期{expires_in}秒")
+        return _CachedToken(
+            access_token=access_token,
+            expires_at=now + expires_in - skew,
+            refresh_at=now + expires_in - margin
+        )
+
+
+# 全局令牌管理器实例，在create_app中通过init_app加载配置
+auth0_token_manager = Auth0TokenManager()
@@ -42,6 +42,12 @@ class ErrorCode:
     TASK_NOT_FOUND = 40002      # 任务不存在
     PLAN_NOT_FOUND = 40003      # 学习计划不存在
     FOCUS_RECORD_ERROR = 40004  # 专注记录错误
+    SCHEDULE_CONFLICT = 40005   # 课程时间冲突
+    ALREADY_CHECKED_IN = 40006  # 今日已打卡
+    
+    # 社区模块错误 (50xxx)
+    POST_NOT_FOUND = 50001      # 帖子不存在
+    COMMENT_NOT_FOUND = 50002   # 评论不存在
     
     # 错误信息映射
     messages = {
@@ -79,6 +85,12 @@ class ErrorCode:
         TASK_NOT_FOUND: "任务不存在",
         PLAN_NOT_FOUND: "学习计划不存在",
         FOCUS_RECORD_ERROR: "专注记录操作失败",
+        SCHEDULE_CONFLICT: "课程时间冲突",
+        ALREADY_CHECKED_IN: "今天已经打过卡了",
+        
+        # 社区模块错误
+        POST_NOT_FOUND: "帖子不存在",
+        COMMENT_NOT_FOUND: "评论不存在",
     }
     
     @classmethod
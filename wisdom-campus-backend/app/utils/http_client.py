@@ -0,0 +1,323 @@
+"""
+Auth0 HTTP客户端
+所有Auth0请求共用一个基于requests.Session的客户端：
+- 连接池与keep-alive，避免每次请求重新建立TCP+TLS连接
+- 按端点配置超时时间，避免Auth0响应缓慢时长时间占用工作线程
+- 有限次数的重试（指数退避+随机抖动），只重试可安全重试的请求；
+  /oauth/token只重试client_credentials授权，密码登录请求重试会被Auth0计为多次失败登录，只在连接阶段失败时重试
+- 熔断器：Auth0连续失败时快速失败，冷却后放行一次试探请求
+- 按端点统计请求数、失败数、延迟以及连接池复用情况
+"""
+import time
+import random
+import logging
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# 默认超时时间 (连接超时, 读取超时)，单位秒
+DEFAULT_TIMEOUTS = {
+    'default': (3.05, 10),
+    'oauth_token': (3.05, 10),
+    'userinfo': (3.05, 5),
+    'jwks': (3.05, 5),
+    'dbconnections': (3.05, 10),
+    'mgmt:users': (3.05, 10),
+    'mgmt:users-by-email': (3.05, 5),
+    'mgmt:jobs': (3.05, 10),
+}
+
+# 可安全重试的请求方法
+_IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+# 需要重试的响应状态码
+_RETRY_STATUS = frozenset([429, 502, 503, 504])
+# 可安全重试的/oauth/token授权类型（不计入Auth0的暴力破解防护）
+_RETRYABLE_GRANTS = frozenset(['client_credentials'])
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+
+class CircuitBreaker:
+    """
+    简单的三态熔断器
+
+    closed: 正常放行；连续失败达到failure_threshold次后打开
+    open: 拒绝所有请求；reset_timeout秒后进入half_open
+    half_open: 只放行一个试探请求，成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """判断是否放行请求"""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._trial_in_flight = False
+            if self.state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                logger.info("Auth0熔断器关闭，恢复正常请求")
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    logger.warning(f"Auth0连续失败{self.failures}次，熔断器打开{self.reset_timeout}秒")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class _EndpointStats:
+    """单个端点的统计数据，多个线程共用，计数在锁内更新"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.rejected = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.recent = deque(maxlen=200)
+
+    def incr(self, **counts):
+        """增加计数，如 incr(requests=1, rejected=1)"""
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def record_latency(self, latency):
+        with self._lock:
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.recent.append(latency)
+
+    def to_dict(self):
+        with self._lock:
+            recent = sorted(self.recent)
+            requests, errors, retries, rejected = self.requests, self.errors, self.retries, self.rejected
+            total_latency, max_latency = self.total_latency, self.max_latency
+        p95 = recent[int(len(recent) * 0.95) - 1] if recent else 0.0
+        completed = requests - rejected
+        return {
+            'requests': requests,
+            'errors': errors,
+            'retries': retries,
+            'rejected': rejected,
+            'avg_latency_ms': round(total_latency / completed * 1000, 2) if completed else 0.0,
+            'p95_latency_ms': round(p95 * 1000, 2),
+            'max_latency_ms': round(max_latency * 1000, 2)
+        }
+
+
+class Auth0HttpClient:
+    """
+    Auth0共享HTTP客户端
+
+    用法与requests一致，传入完整URL即可，例如:
+        auth0_http.get(f"https://{domain}/api/v2/users/{auth0_id}", headers=headers)
+    未显式传入timeout时按端点使用AUTH0_HTTP_TIMEOUTS中的配置
+    """
+
+    def __init__(self, pool_maxsize=20, max_retries=2, backoff_base=0.2, backoff_max=2.0,
+                 failure_threshold=5, reset_timeout=30, timeouts=None):
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置读取参数"""
+        self.pool_maxsize = app.config.get('AUTH0_HTTP_POOL_MAXSIZE', self.pool_maxsize)
+        self.max_retries = app.config.get('AUTH0_HTTP_MAX_RETRIES', self.max_retries)
+        self.timeouts.update(app.config.get('AUTH0_HTTP_TIMEOUTS', {}))
+        self.breaker.failure_threshold = app.config.get('AUTH0_CIRCUIT_FAILURE_THRESHOLD', self.breaker.failure_threshold)
+        self.breaker.reset_timeout = app.config.get('AUTH0_CIRCUIT_RESET_TIMEOUT', self.breaker.reset_timeout)
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_maxsize, max_retries=0)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def request(self, method, url, retry=None, **kwargs):
+        """
+        发送请求
+
+        参数:
+            method: 请求方法
+            url: 完整URL
+            retry: 是否允许重试，默认只重试幂等请求和client_credentials令牌请求；
+                不允许重试的请求仍会在连接超时（请求未发出）时重试
+            **kwargs: 传给requests的其他参数
+
+        返回:
+            requests.Response
+
+        异常:
+            CircuitOpenError: 熔断器打开
+            requests.exceptions.RequestException: 请求失败且重试用尽
+        """
+        method = method.upper()
+        endpoint = self.endpoint_name(url)
+        kwargs.setdefault('timeout', self.timeouts.get(endpoint, self.timeouts['default']))
+        if retry is None:
+            retry = method in _IDEMPOTENT_METHODS or (endpoint == 'oauth_token' and self._is_retryable_grant(kwargs))
+        stats = self._endpoint_stats(endpoint)
+
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                stats.incr(requests=1, rejected=1)
+                raise CircuitOpenError(f"Auth0服务暂时不可用（熔断中）: {endpoint}")
+
+            stats.incr(requests=1)
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                stats.record_latency(time.monotonic() - started)
+                stats.incr(errors=1)
+                self.breaker.record_failure()
+                # 连接阶段失败时请求未发出，非幂等请求也可以安全重试
+                can_retry = retry or isinstance(e, requests.exceptions.ConnectTimeout)
+                if can_retry and attempt < self.max_retries:
+                    attempt += 1
+                    stats.incr(retries=1)
+                    logger.warning(f"Auth0请求失败，第{attempt}次重试: {method} {endpoint}, {str(e)}")
+                    time.sleep(self._backoff(attempt))
+                    continue
+                raise
+
+            stats.record_latency(time.monotonic() - started)
+            if response.status_code >= 500 or response.status_code == 429:
+                stats.incr(errors=1)
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if retry and response.status_code in _RETRY_STATUS and attempt < self.max_retries:
+                    attempt += 1
+                    stats.incr(retries=1)
+                    logger.warning(f"Auth0返回{response.status_code}，第{attempt}次重试: {method} {endpoint}")
+                    time.sleep(self._backoff(attempt, response.headers.get('Retry-After')))
+                    continue
+            else:
+                self.breaker.record_success()
+            return response
+
+    def metrics(self):
+        """返回各端点统计、熔断器状态和连接池复用情况"""
+        with self._stats_lock:
+            endpoints = {name: stats.to_dict() for name, stats in self._stats.items()}
+
+        pools = {}
+        if self._session is not None:
+            for adapter in set(self._session.adapters.values()):
+                for pool_key in adapter.poolmanager.pools.keys():
+                    pool = adapter.poolmanager.pools[pool_key]
+                    pools[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                        'requests': pool.num_requests,
+                        'connections_created': pool.num_connections,
+                        'pool_hits': max(pool.num_requests - pool.num_connections, 0)
+                    }
+
+        return {
+            'endpoints': endpoints,
+            'pools': pools,
+            'circuit': {
+                'state': self.breaker.state,
+                'consecutive_failures': self.breaker.failures
+            }
+        }
+
+    @staticmethod
+    def endpoint_name(url):
+        """根据URL路径得到端点名称，如 /api/v2/users/xxx -> mgmt:users"""
+        path = urlsplit(url).path.strip('/')
+        if path.startswith('api/v2/'):
+            return 'mgmt:' + path[len('api/v2/'):].split('/')[0]
+        if path == '.well-known/jwks.json':
+            return 'jwks'
+        if path == 'oauth/token':
+            return 'oauth_token'
+        return path.split('/')[0] or 'default'
+
+    def _endpoint_stats(self, endpoint):
+        stats = self._stats.get(endpoint)
+        if stats is None:
+            with self._stats_lock:
+                stats = self._stats.setdefault(endpoint, _EndpointStats())
+        return stats
+
+    @staticmethod
+    def _is_retryable_grant(kwargs):
+        """/oauth/token请求的授权类型是否可以重试（只认json或表单中的grant_type）"""
+        body = kwargs.get('json')
+        if not isinstance(body, dict):
+            body = kwargs.get('data')
+        return isinstance(body, dict) and body.get('grant_type') in _RETRYABLE_GRANTS
+
+    def _backoff(self, attempt, retry_after=None):
+        """指数退避+全抖动，Retry-After优先（不超过backoff_max）"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+# 全局Auth0 HTTP客户端实例，在create_app中通过init_app加载配置
+auth0_http = Auth0HttpClient()
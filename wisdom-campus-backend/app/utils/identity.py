@@ -0,0 +1,148 @@
+"""
+请求级用户身份
+认证装饰器和接口处理函数共用同一个身份对象，每个请求最多查询一次User：
+- 完整的User对象按请求缓存在flask.g中，同一请求内重复获取不再查询数据库
+- 精简身份信息(id, is_admin, status, email_verified, current_semester_id)另外在进程内短时间缓存，
+  requires_admin、确定当前学期等只需要这些字段的场景可以跨请求复用，完全不查询数据库
+- 修改用户资料、管理员更新/删除用户后调用invalidate使缓存失效
+"""
+import logging
+from collections import namedtuple
+
+from flask import g, has_app_context
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# 精简的用户身份信息
+UserIdentity = namedtuple('UserIdentity', ['id', 'is_admin', 'status', 'email_verified', 'current_semester_id'])
+
+
+def normalize_user_id(user_id):
+    """JWT中的identity可能是字符串，统一转换为整数主键"""
+    if isinstance(user_id, str) and user_id.isdigit():
+        return int(user_id)
+    return user_id
+
+
+class IdentityLoader:
+    """
+    用户身份加载器
+
+    精简身份信息的跨请求缓存时间由USER_IDENTITY_CACHE_TTL控制，设为0时只保留请求级缓存
+    """
+
+    def __init__(self, ttl=30, maxsize=10000):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def init_app(self, app):
+        """从应用配置读取缓存参数"""
+        self.cache.configure(
+            maxsize=app.config.get('USER_IDENTITY_CACHE_MAXSIZE', self.cache.maxsize),
+            ttl=app.config.get('USER_IDENTITY_CACHE_TTL', self.cache.ttl)
+        )
+
+    def get_user(self, user_id):
+        """
+        获取完整的User对象，同一请求内只查询一次
+
+        参数:
+            user_id: 用户ID（整数或数字字符串）
+
+        返回:
+            User对象，不存在时返回None
+        """
+        from app.models.user import User
+
+        user_id = normalize_user_id(user_id)
+        if user_id is None:
+            return None
+
+        users = self._request_users()
+        if user_id in users:
+            return users[user_id]
+
+        user = User.query.get(user_id)
+        users[user_id] = user
+        if user is not None:
+            identity = self._to_identity(user)
+            self._request_identities()[user_id] = identity
+            self.cache.set(user_id, identity)
+        return user
+
+    def get_identity(self, user_id):
+        """
+        获取精简身份信息，依次查找请求级缓存、进程内缓存、数据库
+
+        返回:
+            UserIdentity，用户不存在时返回None
+        """
+        user_id = normalize_user_id(user_id)
+        if user_id is None:
+            return None
+
+        identities = self._request_identities()
+        if user_id in identities:
+            return identities[user_id]
+
+        identity = self.cache.get(user_id)
+        if identity is not None:
+            identities[user_id] = identity
+            return identity
+
+        user = self.get_user(user_id)
+        return identities.get(user_id) if user is not None else None
+
+    def invalidate(self, user_id):
+        """用户信息被修改或删除后调用，清除该用户的缓存"""
+        user_id = normalize_user_id(user_id)
+        self.cache.delete(user_id)
+        if has_app_context():
+            self._request_users().pop(user_id, None)
+            self._request_identities().pop(user_id, None)
+
+    @staticmethod
+    def _to_identity(user):
+        return UserIdentity(
+            id=user.id,
+            is_admin=bool(user.is_admin),
+            status=user.status,
+            email_verified=bool(user.email_verified),
+            current_semester_id=user.current_semester_id
+        )
+
+    @staticmethod
+    def _request_users():
+        if '_identity_users' not in g:
+            g._identity_users = {}
+        return g._identity_users
+
+    @staticmethod
+    def _request_identities():
+        if '_identities' not in g:
+            g._identities = {}
+        return g._identities
+
+
+# 全局身份加载器实例，在create_app中通过init_app加载配置
+identity_loader = IdentityLoader()
+
+
+def set_current_user_id(user_id):
+    """认证装饰器验证通过后记录当前请求的用户ID"""
+    g.current_user_id = normalize_user_id(user_id)
+
+
+def current_user_id():
+    """当前请求已认证的用户ID，未认证时返回None"""
+    return g.get('current_user_id')
+
+
+def current_identity():
+    """当前请求用户的精简身份信息"""
+    return identity_loader.get_identity(current_user_id())
+
+
+def current_user():
+    """当前请求用户的完整User对象"""
+    return identity_loader.get_user(current_user_id())
@@ -0,0 +1,71 @@
+"""
+JSON序列化后端
+API响应统一通过dumps()序列化为UTF-8字节，后端由JSON_BACKEND配置选择：
+- orjson: C实现，原生支持datetime/date；orjson不支持Decimal，Decimal通过default回调转换。
+  大列表由app.schemas.bulk批量序列化，Decimal字段已输出为float，不会逐个值回调
+- json: 标准库实现，未安装orjson时的回退方案
+- auto（默认）: 已安装orjson时使用orjson，否则使用标准库
+"""
+import json
+import logging
+from decimal import Decimal
+from datetime import datetime, date
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _default(obj):
+    """处理特殊类型：Decimal, datetime等"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def _orjson_dumps(obj):
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+else:
+    _orjson_dumps = None
+
+
+class JSONBackend:
+    """可切换的JSON序列化后端"""
+
+    def __init__(self, name='auto'):
+        self.name = None
+        self._dumps = _stdlib_dumps
+        self.use(name)
+
+    def init_app(self, app):
+        """从应用配置读取JSON_BACKEND"""
+        self.use(app.config.get('JSON_BACKEND', 'auto'))
+
+    def use(self, name):
+        """切换后端，指定的后端不可用时回退到标准库"""
+        if name in ('auto', 'orjson') and _orjson_dumps is not None:
+            self.name, self._dumps = 'orjson', _orjson_dumps
+        else:
+            if name == 'orjson':
+                logger.warning("未安装orjson，JSON序列化回退为标准库json")
+            self.name, self._dumps = 'json', _stdlib_dumps
+
+    def dumps(self, obj):
+        """序列化为UTF-8编码的JSON字节"""
+        return self._dumps(obj)
+
+
+# 全局JSON后端实例，在create_app中通过init_app加载配置
+json_backend = JSONBackend()
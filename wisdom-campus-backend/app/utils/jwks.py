@@ -0,0 +1,196 @@
+"""
+JWKS公钥缓存
+按kid缓存Auth0签名公钥（已解析的RSA公钥对象），遵循jwks.json响应的HTTP缓存头，
+过期后在后台刷新，仅在遇到未知kid时同步重新获取（带频率限制）
+"""
+import re
+import time
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+
+from jose import jwk
+from app.utils.http_client import auth0_http
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE_RE = re.compile(r'(?:s-maxage|max-age)\s*=\s*(\d+)', re.IGNORECASE)
+_STALE_IF_ERROR_RE = re.compile(r'stale-if-error\s*=\s*(\d+)', re.IGNORECASE)
+
+
+class _JWKSEntry:
+    """单个jwks_url对应的缓存条目"""
+
+    def __init__(self, keys, expires_at, stale_until, fetched_at):
+        self.keys = keys                # {kid: jose Key对象}
+        self.expires_at = expires_at    # 超过该时间需要后台刷新
+        self.stale_until = stale_until  # 超过该时间必须同步刷新
+        self.fetched_at = fetched_at    # 最近一次请求jwks.json的时间
+
+
+class JWKSCache:
+    """
+    进程内JWKS缓存
+
+    - 以jwks_url为单位缓存，条目内按kid保存已构造好的公钥，验证令牌时不再重复解析
+    - 缓存有效期取自响应的Cache-Control(max-age)/Expires头，缺省使用JWKS_DEFAULT_MAX_AGE
+    - 有效期过后继续返回旧公钥，同时在后台线程中刷新（同一时间只有一个刷新）
+    - 后台刷新和遇到未知kid时的同步重新获取，两次获取的间隔都不少于JWKS_MIN_REFETCH_INTERVAL秒
+    """
+
+    def __init__(self, default_max_age=600, min_refetch_interval=30, max_stale=86400, timeout=5):
+        self.default_max_age = default_max_age
+        self.min_refetch_interval = min_refetch_interval
+        self.max_stale = max_stale
+        self.timeout = timeout
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        self._refreshing = set()
+
+    def init_app(self, app):
+        """从应用配置读取缓存参数"""
+        self.default_max_age = app.config.get('JWKS_DEFAULT_MAX_AGE', self.default_max_age)
+        self.min_refetch_interval = app.config.get('JWKS_MIN_REFETCH_INTERVAL', self.min_refetch_interval)
+        self.max_stale = app.config.get('JWKS_MAX_STALE', self.max_stale)
+        self.timeout = app.config.get('JWKS_FETCH_TIMEOUT', self.timeout)
+
+    def get_key(self, jwks_url, kid):
+        """
+        获取kid对应的公钥
+
+        参数:
+            jwks_url: jwks.json地址
+            kid: 令牌头部中的kid
+
+        返回:
+            jose Key对象，找不到时返回None
+        """
+        now = time.monotonic()
+        entry = self._entries.get(jwks_url)
+
+        if entry is None or now >= entry.stale_until:
+            entry = self._fetch(jwks_url, since=entry.fetched_at if entry else None)
+        elif now >= entry.expires_at and now - entry.fetched_at >= self.min_refetch_interval:
+            # 响应为no-cache或max-age=0时有效期立即结束，后台刷新同样按最小间隔限频
+            self._refresh_in_background(jwks_url)
+
+        key = entry.keys.get(kid)
+        if key is None and now - entry.fetched_at >= self.min_refetch_interval:
+            # 未知kid可能是Auth0轮换了签名密钥，限频后同步重新获取
+            logger.info(f"JWKS中未找到kid={kid}，重新获取公钥集")
+            entry = self._fetch(jwks_url, since=entry.fetched_at)
+            key = entry.keys.get(kid)
+        return key
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def _fetch_lock(self, jwks_url):
+        with self._lock:
+            return self._fetch_locks.setdefault(jwks_url, threading.Lock())
+
+    def _fetch(self, jwks_url, since=None):
+        """
+        同步获取jwks.json，同一url并发时只请求一次
+
+        since为调用方看到的条目获取时间（没有条目时为None），
+        等锁期间其他线程已经获取到更新的公钥集时直接复用
+        """
+        with self._fetch_lock(jwks_url):
+            entry = self._entries.get(jwks_url)
+            if entry is not None and (since is None or entry.fetched_at > since) \
+                    and time.monotonic() < entry.stale_until:
+                return entry
+
+            try:
+                entry = self._download(jwks_url)
+            except Exception as e:
+                old_entry = self._entries.get(jwks_url)
+                if old_entry is None:
+                    raise
+                # 获取失败时继续使用旧公钥，并推迟下次尝试
+                logger.error(f"获取JWKS失败，继续使用缓存的公钥: {str(e)}")
+                old_entry.fetched_at = time.monotonic()
+                return old_entry
+
+            with self._lock:
+                self._entries[jwks_url] = entry
+            return entry
+
+    def _refresh_in_background(self, jwks_url):
+        with self._lock:
+            if jwks_url in self._refreshing:
+                return
+            self._refreshing.add(jwks_url)
+
+        def refresh():
+            try:
+                self._fetch(jwks_url, since=self._entries[jwks_url].fetched_at)
+            except Exception as e:
+                logger.error(f"后台刷新JWKS失败: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(jwks_url)
+
+        threading.Thread(target=refresh, name='jwks-refresh', daemon=True).start()
+
+    def _download(self, jwks_url):
+        response = auth0_http.get(jwks_url, timeout=self.timeout)
+        response.raise_for_status()
+        jwks = response.json()
+
+        keys = {}
+        for key_data in jwks.get('keys', []):
+            kid = key_data.get('kid')
+            if not kid or key_data.get('use', 'sig') != 'sig':
+                continue
+            try:
+                keys[kid] = jwk.construct(key_data, key_data.get('alg', 'RS256'))
+            except Exception as e:
+                logger.warning(f"无法解析JWKS中的公钥 kid={kid}: {str(e)}")
+
+        max_age, stale_if_error = self._parse_cache_headers(response.headers)
+        now = time.monotonic()
+        logger.info(f"已获取JWKS: {jwks_url}, 公钥数={len(keys)}, 缓存{max_age}秒")
+        return _JWKSEntry(
+            keys=keys,
+            expires_at=now + max_age,
+            stale_until=now + max_age + max(stale_if_error, self.max_stale),
+            fetched_at=now
+        )
+
+    def _parse_cache_headers(self, headers):
+        """解析Cache-Control/Expires，返回(max_age, stale_if_error)"""
+        cache_control = headers.get('Cache-Control', '')
+        max_age = None
+        stale_if_error = 0
+
+        if 'no-store' in cache_control or 'no-cache' in cache_control:
+            max_age = 0
+        else:
+            match = _MAX_AGE_RE.search(cache_control)
+            if match:
+                max_age = int(match.group(1))
+            elif headers.get('Expires'):
+                try:
+                    expires = parsedate_to_datetime(headers['Expires'])
+                    date = parsedate_to_datetime(headers['Date']) if headers.get('Date') else None
+                    if date is not None:
+                        max_age = max(int((expires - date).total_seconds()), 0)
+                except (TypeError, ValueError):
+                    pass
+
+        match = _STALE_IF_ERROR_RE.search(cache_control)
+        if match:
+            stale_if_error = int(match.group(1))
+
+        if max_age is None:
+            max_age = self.default_max_age
+        return max_age, stale_if_error
+
+
+# 全局JWKS缓存实例，在create_app中通过init_app加载配置
+jwks_cache = JWKSCache()
@@ -0,0 +1,183 @@
+"""
+游标分页工具
+基于键集（keyset）的分页，替代paginate()的COUNT(*) + OFFSET：
+- 按(created_at, id)等唯一且稳定的列组合排序，下一页从上一页最后一条记录之后开始；
+  排序列不能为NULL（NULL不满足比较条件，这些行会从分页中漏掉），可为NULL的列改用主键排序
+- 游标对客户端不透明（base64编码的JSON），只能原样传回
+- 总数可选：需要时执行一次COUNT并在进程内缓存一小段时间，作为近似总数返回
+"""
+import json
+import base64
+import hashlib
+import logging
+from datetime import datetime, date
+from decimal import Decimal
+
+from sqlalchemy import and_, or_
+
+from app.utils.cache import TTLCache
+from app.utils.response import api_success
+
+logger = logging.getLogger(__name__)
+
+# 近似总数缓存
+_total_cache = TTLCache(maxsize=1000, ttl=60)
+
+
+class InvalidCursor(ValueError):
+    """游标格式错误或与当前查询不匹配"""
+
+
+def encode_cursor(values):
+    """把排序列的值编码为游标字符串"""
+    encoded = []
+    for value in values:
+        if isinstance(value, datetime):
+            encoded.append({'dt': value.isoformat()})
+        elif isinstance(value, date):
+            encoded.append({'d': value.isoformat()})
+        elif isinstance(value, Decimal):
+            encoded.append({'dec': str(value)})
+        else:
+            encoded.append(value)
+    raw = json.dumps(encoded, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size=None):
+    """
+    解析游标字符串
+
+    参数:
+        cursor: encode_cursor生成的字符串
+        size: 期望的值个数，不一致时视为无效游标
+
+    异常:
+        InvalidCursor: 游标无效
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursor("无效的分页游标")
+    if not isinstance(values, list) or (size is not None and len(values) != size):
+        raise InvalidCursor("无效的分页游标")
+
+    decoded = []
+    for value in values:
+        try:
+            if isinstance(value, dict) and 'dt' in value:
+                value = datetime.fromisoformat(value['dt'])
+            elif isinstance(value, dict) and 'd' in value:
+                value = date.fromisoformat(value['d'])
+            elif isinstance(value, dict) and 'dec' in value:
+                value = Decimal(value['dec'])
+            elif isinstance(value, (dict, list)):
+                raise ValueError(value)
+        except (ValueError, TypeError, ArithmeticError):
+            raise InvalidCursor("无效的分页游标")
+        decoded.append(value)
+    return decoded
+
+
+class CursorPage:
+    """一页游标分页结果"""
+
+    def __init__(self, items, next_cursor, per_page, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+    def to_dict(self, items_key='items', serializer=None):
+        """转换为响应data，serializer用于序列化每条记录"""
+        items = [serializer(item) for item in self.items] if serializer else self.items
+        data = {
+            items_key: items,
+            'per_page': self.per_page,
+            'next_cursor': self.next_cursor,
+            'has_more': self.has_more
+        }
+        if self.total is not None:
+            data['total'] = self.total
+        return data
+
+
+def _after_condition(columns, values, descending):
+    """
+    生成"排在游标之后"的条件，例如两列降序时:
+    (c1 < v1) OR (c1 = v1 AND c2 < v2)
+    """
+    clauses = []
+    for index, column in enumerate(columns):
+        equals = [columns[i] == values[i] for i in range(index)]
+        beyond = column < values[index] if descending else column > values[index]
+        clauses.append(and_(*equals, beyond))
+    return or_(*clauses)
+
+
+def approximate_total(query, ttl=None):
+    """
+    查询总数，同一查询的结果在进程内缓存ttl秒（默认60秒），
+    翻页时不再每页执行COUNT(*)
+    """
+    statement = query.order_by(None).statement
+    try:
+        compiled = statement.compile(compile_kwargs={'literal_binds': True})
+        key_source = str(compiled)
+    except Exception:
+        compiled = statement.compile()
+        key_source = f'{compiled}|{sorted(compiled.params.items(), key=lambda item: item[0])!r}'
+    key = hashlib.sha1(key_source.encode('utf-8')).hexdigest()
+
+    total = _total_cache.get(key)
+    if total is None:
+        total = query.order_by(None).count()
+        _total_cache.set(key, total, ttl)
+    return total
+
+
+def cursor_paginate(query, order_columns, per_page=20, cursor=None, descending=True, with_total=False):
+    """
+    对查询进行游标分页
+
+    参数:
+        query: SQLAlchemy查询（不要带order_by）
+        order_columns: 排序列，组合必须唯一且不能为NULL，例如 (User.created_at, User.id)
+        per_page: 每页数量
+        cursor: 上一页返回的next_cursor，None表示第一页
+        descending: 是否降序（默认最新的在前）
+        with_total: 是否返回近似总数
+
+    返回:
+        CursorPage
+
+    异常:
+        InvalidCursor: 游标无效
+    """
+    order_columns = list(order_columns)
+    page_query = query
+    if cursor:
+        values = decode_cursor(cursor, size=len(order_columns))
+        page_query = page_query.filter(_after_condition(order_columns, values, descending))
+
+    ordering = [column.desc() if descending else column.asc() for column in order_columns]
+    rows = page_query.order_by(*ordering).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in order_columns])
+
+    total = approximate_total(query) if with_total else None
+    return CursorPage(rows, next_cursor, per_page, total)
+
+
+def api_cursor_page(page, items_key='items', serializer=None, message="操作成功"):
+    """以统一的api_success格式返回一页游标分页结果"""
+    return api_success(data=page.to_dict(items_key, serializer), message=message)
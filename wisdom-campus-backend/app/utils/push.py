@@ -0,0 +1,273 @@
+"""
+实时推送
+新私信、新通知通过Server-Sent Events推送给在线用户，客户端不再定时轮询：
+- PushHub维护本进程的长连接（用户ID -> 连接集合），publish把事件交给broker，
+  broker再调用每个进程的deliver放入该用户各个连接的队列
+- broker可以替换（PUSH_BROKER / broker参数，接口见MemoryBroker）：默认的进程内broker只投递给本进程的连接，
+  多进程部署时换成基于Redis PUB/SUB等的实现，每个进程订阅后调用deliver
+- 每个连接的队列有上限（PUSH_QUEUE_SIZE）：客户端读取太慢时丢弃积压的事件，改为发送一个resync事件，
+  客户端收到后通过REST接口重新拉取未读数，单个慢连接不会占用无限内存
+- 连接总数超过PUSH_MAX_CONNECTIONS时拒绝新连接；同一用户的连接超过PUSH_MAX_PER_USER时关闭最早的连接
+- 连接空闲时每隔PUSH_HEARTBEAT_INTERVAL秒发送注释行保活，同时发现已断开的连接
+- 推送票据由broker的claim占用一次（consume_ticket），多进程部署时跨进程的broker需用共享存储实现claim
+  （如Redis SET NX EX），进程内broker只能防止在同一进程中重复使用
+- 每个连接在等待事件时占用一个线程；保持大量连接需要gevent等协程服务器（gunicorn -k gevent），
+  队列和等待基于threading，打补丁后自动变为协程友好
+"""
+import logging
+import threading
+from collections import deque
+
+from werkzeug.utils import import_string
+
+from app.utils.cache import TTLCache
+from app.utils.json_backend import json_backend
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBroker:
+    """
+    进程内broker
+
+    接口:
+        start(deliver): 开始接收事件，收到事件时调用deliver(user_id, event)
+        publish(user_id, event): 发布事件给某个用户（所有进程）
+        claim(key, ttl): 原子地占用一个键，ttl秒内再次占用同一个键返回False（所有进程）
+        stop(): 停止接收
+    """
+
+    def __init__(self):
+        self._deliver = None
+        self._claimed = TTLCache(maxsize=100000, ttl=60)
+        self._claim_lock = threading.Lock()
+
+    def start(self, deliver):
+        self._deliver = deliver
+
+    def publish(self, user_id, event):
+        if self._deliver is not None:
+            self._deliver(user_id, event)
+
+    def claim(self, key, ttl):
+        with self._claim_lock:
+            if self._claimed.get(key) is not None:
+                return False
+            self._claimed.set(key, True, ttl)
+            return True
+
+    def stop(self):
+        self._deliver = None
+
+
+def format_event(event_type, data, event_id=None):
+    """按SSE格式编码一个事件"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event_type}')
+    lines.append('data: ' + json_backend.dumps(data).decode('utf-8'))
+    return '\n'.join(lines) + '\n\n'
+
+
+class PushConnection:
+    """一个客户端长连接，队列满时丢弃积压事件并在下一次读取时发送resync"""
+
+    __slots__ = ('user_id', 'queue_size', '_events', '_ready', '_lock', '_overflowed', '_closed', 'dropped')
+
+    def __init__(self, user_id, queue_size):
+        self.user_id = user_id
+        self.queue_size = queue_size
+        self._events = deque()
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._overflowed = False
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, event):
+        """放入事件，返回是否被接收（队列已满时返回False）"""
+        with self._lock:
+            if self._closed:
+                return False
+            if len(self._events) >= self.queue_size:
+                self.dropped += len(self._events) + 1
+                self._events.clear()
+                self._overflowed = True
+                accepted = False
+            else:
+                self._events.append(event)
+                accepted = True
+        self._ready.set()
+        return accepted
+
+    def take(self, timeout):
+        """
+        等待并取出全部待发送事件
+
+        返回:
+            (事件列表, 是否发生过溢出)，超时返回([], False)
+        """
+        self._ready.wait(timeout)
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            overflowed, self._overflowed = self._overflowed, False
+            self._ready.clear()
+        return events, overflowed
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        self._ready.set()
+
+    @property
+    def closed(self):
+        return self._closed
+
+
+class PushHub:
+    """
+    推送中心
+
+    在create_app中调用init_app加载配置并启动broker
+    """
+
+    def __init__(self, broker_factory=MemoryBroker, queue_size=100, max_connections=20000, max_per_user=5,
+                 heartbeat_interval=25):
+        self.broker_factory = broker_factory
+        self.broker = None
+        self.queue_size = queue_size
+        self.max_connections = max_connections
+        self.max_per_user = max_per_user
+        self.heartbeat_interval = heartbeat_interval
+        self._connections = {}  # 用户ID -> 连接集合
+        self._count = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self.delivered = 0
+        self.overflows = 0
+
+    def init_app(self, app):
+        """从应用配置读取参数并启动broker"""
+        self.queue_size = app.config.get('PUSH_QUEUE_SIZE', self.queue_size)
+        self.max_connections = app.config.get('PUSH_MAX_CONNECTIONS', self.max_connections)
+        self.max_per_user = app.config.get('PUSH_MAX_PER_USER', self.max_per_user)
+        self.heartbeat_interval = app.config.get('PUSH_HEARTBEAT_INTERVAL', self.heartbeat_interval)
+        broker_factory = app.config.get('PUSH_BROKER') or self.broker_factory
+        # 配置中也可以写成类的导入路径字符串
+        self.broker_factory = import_string(broker_factory) if isinstance(broker_factory, str) else broker_factory
+        if self.broker is not None:
+            self.broker.stop()
+        self.broker = self.broker_factory()
+        self.broker.start(self.deliver)
+
+    # ---- 连接 ----
+
+    def connect(self, user_id):
+        """
+        注册一个连接
+
+        返回:
+            PushConnection，超过连接数上限时返回None
+        """
+        with self._lock:
+            connections = self._connections.get(user_id)
+            if self._count >= self.max_connections:
+                return None
+            if connections is not None and len(connections) >= self.max_per_user:
+                # 同一用户打开的页面过多时关闭最早的连接
+                oldest = next(iter(connections))
+                del connections[oldest]
+                oldest.close()
+                self._count -= 1
+            connection = PushConnection(user_id, self.queue_size)
+            # dict保持插入顺序，当作有序集合使用
+            self._connections.setdefault(user_id, {})[connection] = None
+            self._count += 1
+        return connection
+
+    def disconnect(self, connection):
+        connection.close()
+        with self._lock:
+            connections = self._connections.get(connection.user_id)
+            if connections is not None and connection in connections:
+                del connections[connection]
+                self._count -= 1
+                if not connections:
+                    del self._connections[connection.user_id]
+
+    def stream(self, connection):
+        """
+        生成SSE响应内容，客户端断开（写入失败）时由服务器关闭生成器，连接随之注销
+
+        不持有应用上下文和数据库连接
+        """
+        try:
+            yield f'retry: 5000\n\n{format_event("ready", {"heartbeat": self.heartbeat_interval})}'
+            while not connection.closed:
+                events, overflowed = connection.take(self.heartbeat_interval)
+                if connection.closed:
+                    break
+                if overflowed:
+                    self.overflows += 1
+                    yield format_event('resync', {'reason': 'overflow'})
+                if events:
+                    yield ''.join(events)
+                elif not overflowed:
+                    yield ': ping\n\n'
+        finally:
+            self.disconnect(connection)
+
+    def consume_ticket(self, nonce, ttl):
+        """占用推送票据的nonce，票据已被使用过时返回False"""
+        if self.broker is None:
+            return False
+        return self.broker.claim(f'push-ticket:{nonce}', ttl)
+
+    # ---- 发布 ----
+
+    def publish(self, user_id, event_type, data):
+        """向某个用户推送事件（经过broker，多进程部署时送达所有进程）；推送失败不影响调用方"""
+        if self.broker is None:
+            return
+        with self._lock:
+            self._sequence += 1
+            event_id = self._sequence
+        try:
+            self.broker.publish(user_id, format_event(event_type, data, event_id))
+        except Exception as e:
+            logger.error(f"发布推送事件失败: {str(e)}")
+
+    def publish_many(self, events):
+        """批量推送，events为(user_id, event_type, data)的可迭代对象"""
+        for user_id, event_type, data in events:
+            self.publish(user_id, event_type, data)
+
+    def deliver(self, user_id, event):
+        """broker回调：把已编码的事件放入该用户在本进程的全部连接"""
+        with self._lock:
+            connections = list(self._connections.get(user_id, ()))
+        for connection in connections:
+            if connection.put(event):
+                self.delivered += 1
+
+    # ---- 状态 ----
+
+    def online_users(self):
+        with self._lock:
+            return list(self._connections)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'connections': self._count,
+                'users': len(self._connections),
+                'max_connections': self.max_connections,
+                'delivered': self.delivered,
+                'overflows': self.overflows,
+            }
+
+
+# 全局推送中心实例，在create_app中通过init_app加载配置
+push_hub = PushHub()
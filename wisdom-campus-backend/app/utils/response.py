@@ -2,12 +2,14 @@
 统一API响应格式工具
 提供标准化的API响应格式，确保所有API返回结构一致
 """
-from flask import jsonify, make_response
+from flask import current_app
 import json
 from decimal import Decimal
 from datetime import datetime, date
+from app.utils.json_backend import json_backend
 
 # 自定义JSON编码器，处理特殊类型：Decimal, datetime等
+# 用于Flask自带的jsonify，api_*响应函数使用json_backend序列化
 class CustomJSONEncoder(json.JSONEncoder):
     """自定义JSON编码器，用于处理特殊类型的序列化"""
     def default(self, obj):
@@ -42,10 +44,7 @@ def api_response(success=True, message="", data=None, code=200, http_status=200)
         "message": message,
         "data": data
     }
-    # 创建响应对象并设置Content-Type
-    resp = make_response(jsonify(response), http_status)
-    resp.headers['Content-Type'] = 'application/json; charset=utf-8'
-    return resp
+    return _json_response(response, http_status)
 
 def api_success(data=None, message="操作成功", code=0):
     """返回成功的API响应"""
@@ -55,8 +54,7 @@ def api_success(data=None, message="操作成功", code=0):
         "message": message,
         "data": data or {}
     }
-    # 使用Flask的jsonify函数，它会自动使用应用配置的JSON编码器
-    return jsonify(response)
+    return _json_response(response)
 
 def api_error(message="操作失败", code=1, status_code=400, errors=None):
     """返回错误的API响应"""
@@ -66,5 +64,12 @@ def api_error(message="操作失败", code=1, status_code=400, errors=None):
         "message": message,
         "errors": errors or {}
     }
-    # 使用Flask的jsonify函数，它会自动使用应用配置的JSON编码器
-    return jsonify(response), status_code 
\ No newline at end of file
+    return _json_response(response), status_code
+
+def _json_response(body, status=200):
+    """直接用json_backend序列化响应体并构造Response，不经过jsonify和JSONEncoder"""
+    return current_app.response_class(
+        json_backend.dumps(body),
+        status=status,
+        content_type=current_app.config.get('JSONIFY_MIMETYPE', 'application/json')
+    )
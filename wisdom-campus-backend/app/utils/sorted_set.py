@@ -0,0 +1,110 @@
+"""
+有序集合存储
+按分数从高到低排列的成员集合，接口与Redis的ZSET对应（add/remove/score/page/trim/card），
+可以替换为基于Redis等外部存储的实现，在多个进程间共享：
+- MemorySortedSetStore: 进程内实现，每个集合是一个按(-分数, -成员)升序的列表加成员到分数的字典，
+  新增/删除为一次二分查找加列表插入，取一页为二分定位后切片，复杂度O(log n + 页大小)
+- 分数相同时成员（整数）大的在前，(分数, 成员)组合可以作为翻页的游标
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+
+class SortedSet:
+    """单个有序集合，非线程安全，由MemorySortedSetStore加锁访问"""
+
+    __slots__ = ('_keys', '_scores')
+
+    def __init__(self):
+        self._keys = []
+        self._scores = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, member, score):
+        old = self._scores.get(member)
+        if old is not None:
+            if old == score:
+                return
+            self._discard_key((-old, -member))
+        self._scores[member] = score
+        insort(self._keys, (-score, -member))
+
+    def remove(self, member):
+        score = self._scores.pop(member, None)
+        if score is not None:
+            self._discard_key((-score, -member))
+
+    def _discard_key(self, key):
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+
+    def score(self, member):
+        return self._scores.get(member)
+
+    def page(self, after=None, limit=20):
+        """
+        返回排在after之后的limit个(成员, 分数)
+
+        参数:
+            after: 上一页最后一项的(分数, 成员)，None表示从头开始
+        """
+        start = bisect_right(self._keys, (-after[0], -after[1])) if after is not None else 0
+        return [
+            (-negative_member, -negative_score)
+            for negative_score, negative_member in self._keys[start:start + limit]
+        ]
+
+    def trim(self, max_size):
+        """只保留分数最高的max_size个成员"""
+        for _, negative_member in self._keys[max_size:]:
+            del self._scores[-negative_member]
+        del self._keys[max_size:]
+
+
+class MemorySortedSetStore:
+    """进程内有序集合存储，线程安全"""
+
+    def __init__(self):
+        self._sets = {}
+        self._lock = threading.Lock()
+
+    def add(self, key, member, score):
+        with self._lock:
+            sorted_set = self._sets.get(key)
+            if sorted_set is None:
+                sorted_set = self._sets[key] = SortedSet()
+            sorted_set.add(member, score)
+
+    def remove(self, key, member):
+        with self._lock:
+            sorted_set = self._sets.get(key)
+            if sorted_set is not None:
+                sorted_set.remove(member)
+
+    def score(self, key, member):
+        with self._lock:
+            sorted_set = self._sets.get(key)
+            return sorted_set.score(member) if sorted_set is not None else None
+
+    def page(self, key, after=None, limit=20):
+        with self._lock:
+            sorted_set = self._sets.get(key)
+            return sorted_set.page(after, limit) if sorted_set is not None else []
+
+    def trim(self, key, max_size):
+        with self._lock:
+            sorted_set = self._sets.get(key)
+            if sorted_set is not None:
+                sorted_set.trim(max_size)
+
+    def card(self, key):
+        with self._lock:
+            sorted_set = self._sets.get(key)
+            return len(sorted_set) if sorted_set is not None else 0
+
+    def clear(self):
+        with self._lock:
+            self._sets.clear()
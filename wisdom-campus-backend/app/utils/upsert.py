@@ -0,0 +1,93 @@
+"""
+批量插入或更新（upsert）
+按数据库方言生成 INSERT ... ON DUPLICATE KEY UPDATE（MySQL）或
+INSERT ... ON CONFLICT DO UPDATE（SQLite/PostgreSQL），一批记录一次executemany写入：
+- replace: 冲突时用新值覆盖的列
+- increment: 冲突时在原值上累加的列（计数器、汇总值）
+
+语句不带具体的值，编译结果可以被SQLAlchemy缓存复用；PyMySQL的executemany会把整批参数
+改写为一条多行INSERT，SQLite在驱动内逐行执行，都不会产生每行一次的Python往返。
+其他数据库回退为逐行UPDATE，未命中时INSERT
+"""
+import logging
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+logger = logging.getLogger(__name__)
+
+
+def build_upsert(dialect_name, table, key_columns, replace=(), increment=()):
+    """
+    构造upsert语句，执行时以字典列表作为参数
+
+    参数:
+        dialect_name: 数据库方言名称（connection.dialect.name）
+        table: sqlalchemy.Table
+        key_columns: 唯一键列名，MySQL依赖表上对应的唯一索引
+        replace: 冲突时覆盖的列名
+        increment: 冲突时累加的列名
+
+    返回:
+        可执行的语句，不支持的方言返回None
+    """
+    if dialect_name == 'mysql':
+        stmt = mysql.insert(table)
+        inserted = stmt.inserted
+        updates = {name: inserted[name] for name in replace}
+        updates.update({name: table.c[name] + inserted[name] for name in increment})
+        if not updates:
+            # 没有需要更新的列时，冲突行保持不变
+            updates = {key_columns[0]: table.c[key_columns[0]]}
+        return stmt.on_duplicate_key_update(updates)
+
+    if dialect_name in ('sqlite', 'postgresql'):
+        module = sqlite if dialect_name == 'sqlite' else postgresql
+        stmt = module.insert(table)
+        excluded = stmt.excluded
+        updates = {name: excluded[name] for name in replace}
+        updates.update({name: table.c[name] + excluded[name] for name in increment})
+        if not updates:
+            return stmt.on_conflict_do_nothing(index_elements=list(key_columns))
+        return stmt.on_conflict_do_update(index_elements=list(key_columns), set_=updates)
+
+    return None
+
+
+def upsert_rows(connection, table, rows, key_columns, replace=(), increment=(), batch_size=1000):
+    """
+    分批upsert
+
+    参数:
+        connection: SQLAlchemy连接（或session.connection()）
+        rows: 字典列表，每个字典包含相同的列
+        其余参数同build_upsert
+
+    返回:
+        写入的记录数
+    """
+    if not rows:
+        return 0
+
+    stmt = build_upsert(connection.dialect.name, table, key_columns, replace, increment)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        if stmt is not None:
+            connection.execute(stmt, batch)
+        else:
+            _fallback_upsert(connection, table, batch, key_columns, replace, increment)
+    return len(rows)
+
+
+def _fallback_upsert(connection, table, rows, key_columns, replace, increment):
+    """不支持upsert语法的数据库：逐行UPDATE，未命中时INSERT"""
+    for row in rows:
+        condition = [table.c[name] == row[name] for name in key_columns]
+        values = {name: row[name] for name in replace}
+        values.update({name: table.c[name] + row[name] for name in increment})
+        if values:
+            result = connection.execute(table.update().where(*condition).values(values))
+            if result.rowcount:
+                continue
+        elif connection.execute(table.select().where(*condition)).first() is not None:
+            continue
+        connection.execute(table.insert().values(row))
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+学期数据归档脚本
+把已结束（Semester.status为completed）且超过宽限期的学期的学习数据移入归档表，可由cron定期执行
+
+用法:
+    python scripts/archive_semesters.py                      # 归档所有符合条件且尚未归档的学期
+    python scripts/archive_semesters.py --semester-id 3      # 只归档指定学期（已归档的学期会移走之后补写的记录）
+    python scripts/archive_semesters.py --semester-id 3 --force
+"""
+import os
+import sys
+import argparse
+
+# 添加项目根目录到Python路径
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='学期数据归档')
+    parser.add_argument('--semester-id', type=int, action='append', dest='semester_ids', help='只归档指定学期，可重复')
+    parser.add_argument('--force', action='store_true', help='不检查学期状态和宽限期')
+    parser.add_argument('--batch-size', type=int, default=None, help='每个事务移动的行数')
+    args = parser.parse_args()
+
+    from app import create_app
+    from app.api.v1.learning.semester_archive import semester_archiver, SemesterArchiveError
+
+    app = create_app()
+    with app.app_context():
+        if args.batch_size:
+            semester_archiver.batch_size = args.batch_size
+        if args.semester_ids:
+            results = {}
+            for semester_id in args.semester_ids:
+                try:
+                    results[semester_id] = semester_archiver.archive_semester(semester_id, force=args.force)
+                except SemesterArchiveError as e:
+                    print(f"学期 {semester_id}: {e}")
+        else:
+            results = semester_archiver.archive_completed()
+
+    if not results:
+        print("没有需要归档的学期")
+    for semester_id, stats in results.items():
+        if stats is None:
+            print(f"学期 {semester_id}: 不存在")
+            continue
+        print(f"学期 {semester_id}: " + ', '.join(f'{name} {count} 条' for name, count in stats.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+"""
+打卡日历回填脚本
+由check_in表批量重建每个用户每学期的打卡位图，并修正连续打卡天数；上线打卡日历后执行一次，之后可按需执行
+
+用法:
+    python scripts/backfill_checkin_calendar.py [--user-id 1 --user-id 2] [--chunk-size 500]
+"""
+import os
+import sys
+import argparse
+
+# 添加项目根目录到Python路径
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='打卡日历回填')
+    parser.add_argument('--user-id', type=int, action='append', dest='user_ids', help='只处理指定用户，可重复')
+    parser.add_argument('--chunk-size', type=int, default=500, help='每个事务处理的用户数')
+    args = parser.parse_args()
+
+    from app import create_app
+    from app.api.v1.learning.checkin_calendar import backfill
+
+    app = create_app()
+    with app.app_context():
+        result = backfill(user_ids=args.user_ids, chunk_size=args.chunk_size)
+    print(f"用户 {result['users']} 个，打卡记录 {result['check_ins']} 条，"
+          f"日历 {result['calendars']} 行，修正连续天数 {result['streaks_fixed']} 条")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+"""
+私信会话回填脚本
+为历史私信补写会话键(pair_key)，并由message表重建全部会话摘要（最后一条私信、未读数）；上线私信会话后执行一次
+
+用法:
+    python scripts/backfill_conversations.py [--chunk-size 1000]
+"""
+import os
+import sys
+import argparse
+
+# 添加项目根目录到Python路径
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='私信会话回填')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='每个事务处理的行数')
+    args = parser.parse_args()
+
+    from app import create_app
+    from app.api.v1.community.inbox import rebuild_conversations
+
+    app = create_app()
+    with app.app_context():
+        result = rebuild_conversations(chunk_size=args.chunk_size)
+    print(f"补写会话键 {result['messages']} 条，重建会话 {result['conversations']} 行")
+
+
+if __name__ == '__main__':
+    main()
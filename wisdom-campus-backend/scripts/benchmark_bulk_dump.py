@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+批量序列化性能测试
+对比用户列表的三种序列化方式：
+  - schema.dump: 原来的ORM对象 + 逐个user_schema.dump
+  - dump_objects: ORM对象 + BulkSerializer.dump_objects
+  - dump_rows: BulkSerializer.query()只查需要的列 + dump_rows，不构造ORM对象
+
+用法:
+    python scripts/benchmark_bulk_dump.py [--rows 1000 10000] [--repeat 3]
+
+使用内存SQLite数据库，分别统计"查询+序列化"和"仅序列化"的耗时
+"""
+import os
+import sys
+import time
+import argparse
+from decimal import Decimal
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+
+def best_of(repeat, func):
+    """运行repeat次，返回最短耗时（毫秒）和最后一次的结果"""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def seed(db, rows):
+    from app.models.user import User, UserProfile, Major
+
+    db.drop_all()
+    db.create_all()
+    majors = [Major(name=f'专业{i}', college=f'学院{i % 5}') for i in range(20)]
+    db.session.add_all(majors)
+    db.session.flush()
+    created = datetime(2023, 9, 1, 8, 30, 0)
+    for i in range(rows):
+        user = User(
+            student_id=f'2023{i:06d}',
+            auth0_id=f'auth0|{i:024d}',
+            name=f'学生{i}',
+            email=f'student{i}@example.com',
+            email_verified=bool(i % 2),
+            bio='热爱学习，喜欢编程。',
+            major_id=majors[i % len(majors)].id if i % 4 else None,
+            gpa=Decimal('3.25'),
+            created_at=created + timedelta(minutes=i),
+        )
+        if i % 2:
+            user.profile = UserProfile(learning_style='visual', preferred_time='evening')
+        db.session.add(user)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量序列化性能测试')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = 'sqlite://'
+    import logging
+    logging.disable(logging.WARNING)
+
+    from sqlalchemy.orm import joinedload, selectinload
+    from app import create_app, db
+    from app.models.user import User
+    from app.schemas.user import user_schema, user_bulk_serializer
+    from app.utils.json_backend import json_backend
+
+    app = create_app()
+    with app.app_context():
+        for rows in args.rows:
+            seed(db, rows)
+
+            def load_objects():
+                db.session.expunge_all()
+                return User.query.options(joinedload(User.major), selectinload(User.profile)).order_by(User.id).all()
+
+            def load_rows():
+                return user_bulk_serializer.query().order_by(User.id).all()
+
+            objects = load_objects()
+            row_data = load_rows()
+
+            full = {
+                'schema.dump': best_of(args.repeat, lambda: [user_schema.dump(u) for u in load_objects()]),
+                'dump_objects': best_of(args.repeat, lambda: user_bulk_serializer.dump_objects(load_objects())),
+                'dump_rows': best_of(args.repeat, lambda: user_bulk_serializer.dump_rows(load_rows())),
+            }
+            only = {
+                'schema.dump': best_of(args.repeat, lambda: [user_schema.dump(u) for u in objects]),
+                'dump_objects': best_of(args.repeat, lambda: user_bulk_serializer.dump_objects(objects)),
+                'dump_rows': best_of(args.repeat, lambda: user_bulk_serializer.dump_rows(row_data)),
+            }
+
+            # Decimal字段批量序列化后为float，按API响应的JSON编码结果比较
+            reference = json_backend.dumps(only['schema.dump'][1])
+            same = json_backend.dumps(only['dump_objects'][1]) == reference \
+                and json_backend.dumps(full['dump_rows'][1]) == reference
+
+            print(f'\n{rows} 行（输出与schema.dump一致: {"是" if same else "否"}）:')
+            print(f'  {"":<16}{"查询+序列化":>14}{"仅序列化":>14}')
+            for name in full:
+                print(f'  {name:<16}{full[name][0]:>12.1f}ms{only[name][0]:>12.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
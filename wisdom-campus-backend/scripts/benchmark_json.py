@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+API响应序列化性能测试
+对比大用户列表在各阶段的耗时：
+  - marshmallow: users_schema.dump
+  - jsonify: 原来的jsonify + CustomJSONEncoder
+  - json / orjson: app.utils.json_backend的两种后端，分别序列化users_schema.dump的结果（gpa为Decimal，
+    每个值都要回调default）和user_bulk_serializer.dump_objects的结果（Decimal已转换为float）
+
+用法:
+    python scripts/benchmark_json.py [--rows 1000 10000] [--repeat 5]
+
+不需要数据库，用内存中构造的User对象测试
+"""
+import os
+import sys
+import time
+import argparse
+from decimal import Decimal
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+
+def best_of(repeat, func):
+    """运行repeat次，返回最短耗时（毫秒）"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def build_users(count):
+    from app.models.user import User, UserProfile, Major
+
+    majors = [Major(id=i, name=f'专业{i}', college=f'学院{i % 5}') for i in range(20)]
+    created = datetime(2023, 9, 1, 8, 30, 0)
+    users = []
+    for i in range(count):
+        user = User(
+            id=i + 1,
+            student_id=f'2023{i:06d}',
+            auth0_id=f'auth0|{i:024d}',
+            name=f'学生{i}',
+            nickname=f'同学{i}',
+            email=f'student{i}@example.com',
+            email_verified=bool(i % 2),
+            avatar_url=f'https://example.com/avatar/{i}.png',
+            bio='热爱学习，喜欢编程。' * 3,
+            major_id=majors[i % len(majors)].id,
+            total_study_time=i * 7,
+            gpa=Decimal('3.25'),
+            exp_points=i * 3,
+            level=1 + i % 10,
+            is_admin=False,
+            created_at=created + timedelta(minutes=i),
+            updated_at=created + timedelta(minutes=i, seconds=30),
+            status='active'
+        )
+        user.major = majors[i % len(majors)]
+        user.profile = UserProfile(id=i + 1, learning_style='visual', preferred_time='evening', avg_focus_duration=45)
+        users.append(user)
+    return users
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API响应序列化性能测试')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+    import logging
+    logging.disable(logging.WARNING)
+
+    from flask import jsonify
+    from app import create_app
+    from app.schemas.user import users_schema, user_bulk_serializer
+    from app.utils.json_backend import json_backend
+
+    app = create_app()
+    backends = ['json']
+    json_backend.use('orjson')
+    if json_backend.name == 'orjson':
+        backends.append('orjson')
+    else:
+        print('未安装orjson，只测试标准库后端')
+
+    with app.app_context():
+        for rows in args.rows:
+            users = build_users(rows)
+            dumped = users_schema.dump(users)
+            body = {'success': True, 'code': 0, 'message': '操作成功', 'data': {'users': dumped}}
+            bulk_body = {'success': True, 'code': 0, 'message': '操作成功',
+                         'data': {'users': user_bulk_serializer.dump_objects(users)}}
+
+            results = {
+                'marshmallow dump': best_of(args.repeat, lambda: users_schema.dump(users)),
+                'bulk dump_objects': best_of(args.repeat, lambda: user_bulk_serializer.dump_objects(users)),
+                'jsonify + CustomJSONEncoder': best_of(args.repeat, lambda: jsonify(body).get_data()),
+            }
+            for name in backends:
+                json_backend.use(name)
+                results[f'json_backend({name}) Decimal'] = best_of(args.repeat, lambda: json_backend.dumps(body))
+                results[f'json_backend({name}) bulk'] = best_of(args.repeat, lambda: json_backend.dumps(bulk_body))
+
+            print(f'\n{rows} 行:')
+            for name, elapsed in results.items():
+                print(f'  {name:<34}{elapsed:>10.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
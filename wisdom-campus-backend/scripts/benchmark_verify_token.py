@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+verify-token接口吞吐量测试
+对比每次请求同步写入last_active（ACTIVITY_FLUSH_INTERVAL=0）与缓冲批量写入两种方式
+
+用法:
+    python scripts/benchmark_verify_token.py [--requests 2000] [--threads 8] [--users 50]
+
+默认使用临时SQLite文件数据库，可通过 --database-url 指定其他数据库（会在其中建表并写入测试用户）
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+# 添加项目根目录到Python路径
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+
+def run(database_url, flush_interval, total_requests, threads, users):
+    os.environ['DATABASE_URL'] = database_url
+
+    from app import create_app, db
+    from app.models.user import User
+    from app.utils.activity import activity_tracker
+    from flask_jwt_extended import create_access_token
+
+    app = create_app()
+    app.config['ACTIVITY_FLUSH_INTERVAL'] = flush_interval
+    activity_tracker.init_app(app)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        tokens = []
+        for i in range(users):
+            user = User(name=f'bench{i}', email=f'bench{i}@example.com', auth0_id=f'mock|bench{i}')
+            db.session.add(user)
+            db.session.flush()
+            tokens.append(create_access_token(identity=str(user.id)))
+        db.session.commit()
+
+    per_thread = total_requests // threads
+    errors = []
+
+    def worker(index):
+        client = app.test_client()
+        for n in range(per_thread):
+            token = tokens[(index + n) % len(tokens)]
+            response = client.get('/api/v1/auth/verify-token', headers={'Authorization': f'Bearer {token}'})
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    flushed = activity_tracker.flush()
+    done = per_thread * threads
+    print(f"  请求数: {done}, 失败: {len(errors)}, 耗时: {elapsed:.2f}s, 吞吐量: {done / elapsed:.1f} req/s, 退出前写入: {flushed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='verify-token吞吐量测试')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    for label, interval in (('同步写入 (ACTIVITY_FLUSH_INTERVAL=0)', 0), ('缓冲批量写入 (ACTIVITY_FLUSH_INTERVAL=5)', 5)):
+        database_url = args.database_url
+        if database_url is None:
+            path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+            database_url = f'sqlite:///{path}'
+        print(label)
+        run(database_url, interval, args.requests, args.threads, args.users)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+"""
+实时推送长连接压测脚本
+在一台机器上保持大量空闲SSE连接，统计建立成功率、心跳和事件送达延迟
+
+服务端（已安装gevent时使用gevent服务器，每个连接一个协程；否则退回线程服务器，每个连接一个线程）:
+    python scripts/loadtest_push_stream.py serve [--port 5001] [--heartbeat 25] [--broadcast-interval 10]
+
+客户端（asyncio，每个连接一个不同的用户）:
+    python scripts/loadtest_push_stream.py connect [--url http://127.0.0.1:5001] [--connections 10000]
+        [--rate 500] [--hold 60]
+
+serve的--broadcast-interval每隔若干秒向所有在线用户推送一个带发送时间的notification事件，
+connect据此计算送达延迟（服务端和客户端需在同一台机器上）
+"""
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+import threading
+from urllib.parse import urlsplit
+
+# 添加项目根目录到Python路径
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+
+def raise_fd_limit():
+    """把打开文件数的软限制提高到硬限制，每个连接占用一个文件描述符"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux单位为KB，macOS为字节
+    return round(usage / 1024 / (1024 if sys.platform == 'darwin' else 1), 1)
+
+
+def percentile(values, ratio):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(int(len(values) * ratio), len(values) - 1)], 2)
+
+
+# ---- 服务端 ----
+
+def serve(args):
+    try:
+        from gevent import monkey
+        monkey.patch_all()
+        from gevent.pywsgi import WSGIServer
+    except ImportError:
+        WSGIServer = None
+
+    limit = raise_fd_limit()
+    from app import create_app
+    from app.utils.push import push_hub
+
+    app = create_app()
+    push_hub.heartbeat_interval = args.heartbeat
+    push_hub.max_connections = max(push_hub.max_connections, args.max_connections)
+
+    def broadcast():
+        while True:
+            time.sleep(args.broadcast_interval)
+            users = push_hub.online_users()
+            sent_at = time.time()
+            push_hub.publish_many((user_id, 'notification', {'title': '压测', 'sent_at': sent_at}) for user_id in users)
+            print(f"[{time.strftime('%H:%M:%S')}] {push_hub.stats()}，本次推送 {len(users)} 个用户，"
+                  f"耗时 {(time.time() - sent_at) * 1000:.1f}ms，内存峰值 {peak_rss_mb()}MB", flush=True)
+
+    if args.broadcast_interval:
+        threading.Thread(target=broadcast, name='push-broadcast', daemon=True).start()
+
+    print(f"文件描述符上限 {limit}，心跳间隔 {args.heartbeat}s，最大连接数 {push_hub.max_connections}")
+    if WSGIServer is not None:
+        print(f"使用gevent服务器监听 {args.host}:{args.port}")
+        WSGIServer((args.host, args.port), app, log=None, backlog=args.backlog).serve_forever()
+    else:
+        from werkzeug.serving import run_simple
+        print(f"未安装gevent，使用线程服务器监听 {args.host}:{args.port}（每个连接占用一个线程，不适合上万连接）")
+        run_simple(args.host, args.port, app, threaded=True, use_reloader=False)
+
+
+# ---- 客户端 ----
+
+class Stats:
+    def __init__(self):
+        self.connecting = 0
+        self.established = 0
+        self.active = 0
+        self.failed = {}
+        self.heartbeats = 0
+        self.events = 0
+        self.latencies = []
+
+    def fail(self, reason):
+        self.failed[reason] = self.failed.get(reason, 0) + 1
+
+
+async def hold_connection(host, port, path, ticket, stats, deadline):
+    stats.connecting += 1
+    writer = None
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write((f'GET {path}?ticket={ticket} HTTP/1.1\r\nHost: {host}:{port}\r\n'
+                      f'Accept: text/event-stream\r\nConnection: keep-alive\r\n\r\n').encode('ascii'))
+        await writer.drain()
+        status = await asyncio.wait_for(reader.readline(), timeout=30)
+        if b' 200 ' not in status:
+            stats.fail(status.decode('latin-1').strip() or 'empty response')
+            return
+        stats.established += 1
+        stats.active += 1
+        try:
+            event = None
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    line = await asyncio.wait_for(reader.readline(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if not line:
+                    stats.fail('server closed')
+                    break
+                line = line.rstrip(b'\r\n')
+                if line.startswith(b': ping'):
+                    stats.heartbeats += 1
+                elif line.startswith(b'event: '):
+                    event = line[7:].decode()
+                elif line.startswith(b'data: ') and event == 'notification':
+                    stats.events += 1
+                    sent_at = json.loads(line[6:]).get('sent_at')
+                    if sent_at:
+                        stats.latencies.append((time.time() - sent_at) * 1000)
+        finally:
+            stats.active -= 1
+    except (OSError, asyncio.TimeoutError) as e:
+        stats.fail(type(e).__name__)
+    finally:
+        stats.connecting -= 1
+        if writer is not None:
+            writer.close()
+
+
+async def run_clients(args, tickets):
+    parts = urlsplit(args.url)
+    host, port = parts.hostname, parts.port or 80
+    stats = Stats()
+    started = time.monotonic()
+    deadline = started + args.connections / args.rate + args.hold
+    tasks = []
+
+    async def report():
+        while time.monotonic() < deadline:
+            await asyncio.sleep(5)
+            print(f"[{time.monotonic() - started:5.0f}s] 保持 {stats.active}，已建立 {stats.established}，"
+                  f"失败 {sum(stats.failed.values())}，心跳 {stats.heartbeats}，事件 {stats.events}", flush=True)
+
+    reporter = asyncio.ensure_future(report())
+    for index in range(args.connections):
+        tasks.append(asyncio.ensure_future(
+            hold_connection(host, port, '/api/v1/push/stream', tickets(index), stats, deadline)
+        ))
+        # 按--rate匀速建立连接
+        delay = started + (index + 1) / args.rate - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    await asyncio.gather(*tasks)
+    reporter.cancel()
+    return stats
+
+
+def connect(args):
+    limit = raise_fd_limit()
+    if limit is not None and limit < args.connections + 100:
+        print(f"警告: 文件描述符上限 {limit} 小于连接数，请先执行 ulimit -n")
+
+    from app import create_app
+    from app.api.v1.push.stream import create_ticket
+
+    app = create_app()
+    # 票据用服务端相同的密钥在本地签发（每个连接建立前签发，票据只能使用一次），压测用户不需要存在于数据库中
+    with app.app_context():
+        stats = asyncio.run(run_clients(args, lambda index: create_ticket(args.user_offset + index)[0]))
+    print(f"\n连接数 {args.connections}，建立成功 {stats.established}，失败 {stats.failed or 0}")
+    print(f"心跳 {stats.heartbeats}，事件 {stats.events}，送达延迟 p50={percentile(stats.latencies, 0.5)}ms "
+          f"p99={percentile(stats.latencies, 0.99)}ms，客户端内存峰值 {peak_rss_mb()}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='实时推送长连接压测')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='启动推送服务端')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    serve_parser.add_argument('--port', type=int, default=5001, help='监听端口')
+    serve_parser.add_argument('--heartbeat', type=int, default=25, help='空闲连接的保活间隔（秒）')
+    serve_parser.add_argument('--max-connections', type=int, default=20000, help='最大连接数')
+    serve_parser.add_argument('--backlog', type=int, default=4096, help='监听队列长度')
+    serve_parser.add_argument('--broadcast-interval', type=float, default=10,
+                              help='向所有在线用户推送测试事件的间隔（秒），0表示不推送')
+
+    connect_parser = subparsers.add_parser('connect', help='建立并保持大量连接')
+    connect_parser.add_argument('--url', default='http://127.0.0.1:5001', help='服务端地址')
+    connect_parser.add_argument('--connections', type=int, default=10000, help='连接数')
+    connect_parser.add_argument('--rate', type=float, default=500, help='每秒新建的连接数')
+    connect_parser.add_argument('--hold', type=float, default=60, help='全部建立后保持的时间（秒）')
+    connect_parser.add_argument('--user-offset', type=int, default=1000000, help='压测用户ID的起始值')
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        serve(args)
+    else:
+        connect(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+"""
+点赞计数修正脚本
+按like_record重新统计帖子和评论的点赞数并修正likes_count（进程异常退出时可能丢失未写入的增量），可由cron定期执行
+
+用法:
+    python scripts/reconcile_like_counts.py [--target-type post] [--target-id 1 --target-id 2] [--chunk-size 1000]
+"""
+import os
+import sys
+import argparse
+
+# 添加项目根目录到Python路径
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='点赞计数修正')
+    parser.add_argument('--target-type', choices=['post', 'comment'], action='append', dest='target_types',
+                        help='只修正指定类型，可重复，默认帖子和评论')
+    parser.add_argument('--target-id', type=int, action='append', dest='target_ids',
+                        help='只修正指定ID，可重复（需要同时指定--target-type）')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='每个事务处理的目标数')
+    args = parser.parse_args()
+    if args.target_ids and not args.target_types:
+        parser.error('--target-id需要同时指定--target-type')
+
+    from app import create_app
+    from app.api.v1.community.like_counter import like_counter, TARGET_TYPES
+
+    app = create_app()
+    with app.app_context():
+        for target_type in args.target_types or TARGET_TYPES:
+            result = like_counter.reconcile(target_type, target_ids=args.target_ids, chunk_size=args.chunk_size)
+            print(f"{target_type}: 检查 {result['checked']} 个，修正 {result['fixed']} 个")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+"""
+学习计划进度修正脚本
+按task表重新统计每个学习计划的任务数、完成数并修正进度，可由cron定期执行
+
+用法:
+    python scripts/reconcile_plan_progress.py [--plan-id 1 --plan-id 2] [--chunk-size 1000]
+"""
+import os
+import sys
+import argparse
+
+# 添加项目根目录到Python路径
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='学习计划进度修正')
+    parser.add_argument('--plan-id', type=int, action='append', dest='plan_ids', help='只修正指定计划，可重复')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='每个事务处理的计划数')
+    args = parser.parse_args()
+
+    from app import create_app
+    from app.api.v1.learning.plan_progress import plan_progress
+
+    app = create_app()
+    with app.app_context():
+        result = plan_progress.reconcile(plan_ids=args.plan_ids, chunk_size=args.chunk_size)
+    print(f"检查 {result['checked']} 个学习计划，修正 {result['fixed']} 个")
+
+
+if __name__ == '__main__':
+    main()
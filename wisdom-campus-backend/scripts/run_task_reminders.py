@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""
+任务截止提醒调度进程
+单独运行提醒调度器，Web进程保持TASK_REMINDER_ENABLED关闭，多进程部署时提醒不会重复发送；
+Web进程中创建、修改的任务在TASK_REMINDER_RELOAD_INTERVAL秒内由本进程重新加载
+
+用法:
+    python scripts/run_task_reminders.py
+"""
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+
+def main():
+    # 在加载配置前开启调度器
+    os.environ['TASK_REMINDER_ENABLED'] = '1'
+
+    from app import create_app
+    from app.api.v1.learning.reminders import reminder_scheduler
+
+    create_app()
+    print(f"任务截止提醒调度器已启动，提前 {reminder_scheduler.lead} 提醒，"
+          f"每 {reminder_scheduler.reload_interval} 重新加载任务")
+    try:
+        while True:
+            time.sleep(60)
+            print(f"[{time.strftime('%H:%M:%S')}] 待提醒 {reminder_scheduler.pending_count()} 个，"
+                  f"已发送 {reminder_scheduler.fired} 条", flush=True)
+    except KeyboardInterrupt:
+        reminder_scheduler.shutdown()
+
+
+if __name__ == '__main__':
+    main()
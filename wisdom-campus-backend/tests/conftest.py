@@ -0,0 +1,98 @@
+"""
+测试公共夹具
+每个测试使用独立的内存SQLite数据库，关闭提醒调度器、培养方案预加载等后台组件
+"""
+import os
+import sys
+import logging
+import threading
+
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['TASK_REMINDER_ENABLED'] = '0'
+
+from sqlalchemy import event
+
+from app import create_app, db as _db
+from app.config import development
+
+
+class TestingConfig:
+    """在开发环境配置的基础上关闭后台组件"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TASK_REMINDER_ENABLED = False
+    CURRICULUM_PRELOAD = False
+    # 关闭写缓冲的后台线程，请求中直接写入
+    FOCUS_FLUSH_INTERVAL = 0
+    LIKE_FLUSH_INTERVAL = 0
+    ACTIVITY_FLUSH_INTERVAL = 0
+    USER_IDENTITY_CACHE_TTL = 0
+
+
+for _name in dir(development):
+    if _name.isupper() and not hasattr(TestingConfig, _name):
+        setattr(TestingConfig, _name, getattr(development, _name))
+
+
+@pytest.fixture
+def app():
+    """
+    测试应用，不保持应用上下文：测试客户端的每个请求使用自己的上下文（请求级缓存g不会跨请求保留），
+    直接操作数据库时使用 with app.app_context()
+    """
+    from app.api.v1.learning.checkin_calendar import invalidate_semesters
+
+    logging.disable(logging.WARNING)
+    app = create_app(TestingConfig)
+    # 学期缓存是进程级的，不能带到下一个测试的数据库
+    invalidate_semesters()
+    with app.app_context():
+        _db.create_all()
+    yield app
+    with app.app_context():
+        _db.session.remove()
+        _db.drop_all()
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+class StatementCounter:
+    """只统计当前线程（测试客户端处理请求的线程）执行的SQL，不包括后台线程的批量写入"""
+
+    def __init__(self):
+        self.statements = []
+        self._thread_id = threading.get_ident()
+
+    def __call__(self, conn, cursor, statement, *args):
+        if threading.get_ident() == self._thread_id:
+            self.statements.append(statement)
+
+    def __len__(self):
+        return len(self.statements)
+
+    def clear(self):
+        self.statements.clear()
+
+
+@pytest.fixture
+def count_statements(app, db):
+    counter = StatementCounter()
+    engine = db.get_engine(app)
+    event.listen(engine, 'before_cursor_execute', counter)
+    yield counter
+    event.remove(engine, 'before_cursor_execute', counter)
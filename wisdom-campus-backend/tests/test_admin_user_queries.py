@@ -0,0 +1,70 @@
+"""管理员用户接口的SQL查询次数不随每页用户数增长（没有N+1查询）"""
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app.models.user import User, UserProfile, Major
+
+
+@pytest.fixture
+def admin_headers(app, db):
+    with app.app_context():
+        return _create_users(db)
+
+
+def _create_users(db):
+    majors = [Major(name=f'专业{i}', college=f'学院{i % 3}') for i in range(10)]
+    db.session.add_all(majors)
+    db.session.flush()
+    admin = User(name='admin', email='admin@example.com', auth0_id='mock|admin', is_admin=True)
+    db.session.add(admin)
+    for i in range(120):
+        user = User(
+            name=f'学生{i}',
+            email=f'student{i}@example.com',
+            student_id=f'2023{i:05d}',
+            auth0_id=f'mock|student{i}',
+            major_id=majors[i % len(majors)].id
+        )
+        user.profile = UserProfile(learning_style='visual')
+        db.session.add(user)
+    db.session.commit()
+    token = create_access_token(identity=str(admin.id), additional_claims={'is_admin': True})
+    return {'Authorization': f'Bearer {token}', 'Accept': 'application/json'}
+
+
+def _count(client, count_statements, headers, path):
+    count_statements.clear()
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return len(count_statements)
+
+
+@pytest.mark.parametrize('query', ['', '&page=1', '&keyword=2023'])
+def test_user_list_query_count_independent_of_page_size(client, count_statements, admin_headers, query):
+    small = _count(client, count_statements, admin_headers, f'/api/v1/user/admin/users?per_page=10{query}')
+    large = _count(client, count_statements, admin_headers, f'/api/v1/user/admin/users?per_page=100{query}')
+    assert small == large
+
+
+def test_user_detail_loads_major_and_profile_with_user(app, client, count_statements, admin_headers):
+    with app.app_context():
+        user_id = User.query.filter_by(student_id='202300001').one().id
+    assert _count(client, count_statements, admin_headers, f'/api/v1/user/admin/users/{user_id}') <= 3
+
+
+def test_cursor_pages_include_users_without_created_at(app, db, client, admin_headers):
+    with app.app_context():
+        db.session.execute(User.__table__.update().where(User.id % 3 == 0).values(created_at=None))
+        db.session.commit()
+        expected = sorted((user.id for user in User.query), reverse=True)
+
+    seen, cursor = [], None
+    while True:
+        path = '/api/v1/user/admin/users?per_page=25&with_total=1' + (f'&cursor={cursor}' if cursor else '')
+        data = client.get(path, headers=admin_headers).get_json()['data']
+        seen.extend(user['id'] for user in data['users'])
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+    assert seen == expected
+    assert data['total'] == len(expected)
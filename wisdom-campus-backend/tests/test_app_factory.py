@@ -0,0 +1,12 @@
+"""重复创建应用不会在全局实例上重复注册退出钩子"""
+import atexit
+
+from tests.conftest import TestingConfig
+from app import create_app
+
+
+def test_create_app_registers_exit_hooks_once(app):
+    registered = atexit._ncallbacks()
+    create_app(TestingConfig)
+    create_app(TestingConfig)
+    assert atexit._ncallbacks() == registered
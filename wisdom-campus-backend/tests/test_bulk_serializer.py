@@ -0,0 +1,25 @@
+"""批量序列化输出不含Decimal，JSON编码结果与schema.dump一致"""
+from decimal import Decimal
+
+from app.models.user import User, Major, UserProfile
+from app.schemas.user import user_schema, user_bulk_serializer
+from app.utils.json_backend import json_backend
+
+
+def test_bulk_dump_outputs_floats_for_decimal_fields(app, db):
+    with app.app_context():
+        major = Major(name='计算机', college='信息学院')
+        user = User(name='学生', email='s@example.com', auth0_id='mock|s', student_id='20240001',
+                    gpa=Decimal('3.10'), major=major)
+        user.profile = UserProfile(learning_style='visual')
+        db.session.add(user)
+        db.session.commit()
+
+        rows = user_bulk_serializer.dump_rows(user_bulk_serializer.query().all())
+        objects = user_bulk_serializer.dump_objects([user])
+        reference = json_backend.dumps([user_schema.dump(user)])
+
+    assert isinstance(rows[0]['gpa'], float)
+    assert not [key for key, value in rows[0].items() if isinstance(value, Decimal)]
+    assert json_backend.dumps(rows) == reference
+    assert json_backend.dumps(objects) == reference
@@ -0,0 +1,47 @@
+"""最长连续打卡天数由打卡日历位图计算，不扫描打卡历史"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.api.v1.learning.checkin_calendar import check_in, get_streak
+from app.models.user import User, Semester
+
+
+@pytest.fixture
+def user_id(app, db):
+    with app.app_context():
+        db.session.add_all([
+            Semester(name='2024-秋', start_date=date(2024, 9, 1), end_date=date(2025, 1, 15), status='completed'),
+            Semester(name='2025-春', start_date=date(2025, 1, 16), end_date=date(2025, 6, 30), status='active'),
+        ])
+        user = User(name='学生', email='s@example.com', auth0_id='mock|s', student_id='20240001')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def _check_in(db, user_id, days):
+    for day in days:
+        check_in(db.session, user_id, day)
+        db.session.commit()
+
+
+def _days(start, count):
+    return [start + timedelta(days=i) for i in range(count)]
+
+
+def test_longest_streak_spans_adjacent_semesters(app, db, user_id, count_statements):
+    with app.app_context():
+        _check_in(db, user_id, _days(date(2024, 9, 1), 3) + _days(date(2025, 1, 13), 6) + [date(2025, 3, 1)])
+        count_statements.clear()
+        streak = get_streak(user_id, date(2025, 3, 1))
+    assert streak == {'checked_in_today': True, 'current_streak': 1, 'longest_streak': 6}
+    assert not [statement for statement in count_statements.statements if 'check_in_archive' in statement]
+
+
+def test_longest_streak_includes_days_outside_semesters(app, db, user_id):
+    with app.app_context():
+        _check_in(db, user_id, _days(date(2025, 6, 28), 5))
+        streak = get_streak(user_id, date(2025, 7, 2))
+    assert streak['current_streak'] == 5
+    assert streak['longest_streak'] == 5
@@ -0,0 +1,45 @@
+"""仪表盘汇总缓存命中时只做一次缓存查找，不查询数据库"""
+from datetime import date, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app.models.user import User, Semester
+from app.utils.identity import identity_loader
+
+
+@pytest.fixture
+def identity_cache(app):
+    """测试配置只保留请求级身份缓存，这里打开跨请求缓存"""
+    identity_loader.cache.configure(ttl=30)
+    yield identity_loader.cache
+    identity_loader.cache.configure(ttl=app.config['USER_IDENTITY_CACHE_TTL'])
+
+
+def _create_user(db, current_semester=False):
+    today = date.today()
+    semester = Semester(name='本学期', start_date=today - timedelta(days=30), end_date=today + timedelta(days=90),
+                        status='active')
+    db.session.add(semester)
+    db.session.flush()
+    user = User(name='学生', email='student@example.com', student_id='202300001', auth0_id='mock|student',
+                current_semester_id=semester.id if current_semester else None)
+    db.session.add(user)
+    db.session.commit()
+    token = create_access_token(identity=str(user.id))
+    return {'Authorization': f'Bearer {token}', 'Accept': 'application/json'}
+
+
+@pytest.mark.parametrize('current_semester', [True, False])
+def test_warm_dashboard_runs_no_statements(app, db, client, count_statements, identity_cache, current_semester):
+    with app.app_context():
+        headers = _create_user(db, current_semester)
+
+    first = client.get('/api/v1/learning/dashboard', headers=headers)
+    assert first.status_code == 200, first.get_data(as_text=True)
+
+    count_statements.clear()
+    second = client.get('/api/v1/learning/dashboard', headers=headers)
+    assert second.status_code == 200
+    assert second.get_json()['data'] == first.get_json()['data']
+    assert count_statements.statements == []
@@ -0,0 +1,113 @@
+"""专注记录写缓冲：坏记录隔离、重试上限、时间范围和每日时长上限"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.api.v1.learning.focus_ingest import FocusIngestBuffer, parse_event
+from app.models.learning import FocusRecord
+from app.models.user import User
+
+
+@pytest.fixture
+def user_id(app, db):
+    with app.app_context():
+        user = User(name='学生', email='s@example.com', auth0_id='mock|s', total_study_time=0)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def buffer(app):
+    buffer = FocusIngestBuffer(flush_interval=60, max_retries=3, max_minutes_per_day=600)
+    buffer.app = app
+    # 不启动后台线程，由测试调用flush
+    buffer._ensure_thread = lambda: None
+    return buffer
+
+
+def _row(user_id, key, start_time, duration=30):
+    return {'user_id': user_id, 'start_time': start_time, 'duration': duration, 'focus_score': None,
+            'task_id': None, 'client_key': key}
+
+
+def _state(app, db, user_id):
+    with app.app_context():
+        keys = sorted(key for key, in db.session.query(FocusRecord.client_key))
+        return keys, db.session.get(User, user_id).total_study_time
+
+
+def test_bad_row_is_isolated(app, db, user_id, buffer, monkeypatch):
+    insert = buffer._insert
+
+    def failing_insert(conn, rows):
+        if any(row['client_key'] == 'bad' for row in rows):
+            raise IntegrityError('INSERT', {}, Exception('foreign key constraint fails'))
+        return insert(conn, rows)
+
+    monkeypatch.setattr(buffer, '_insert', failing_insert)
+    start = datetime.now() - timedelta(hours=5)
+    buffer.add([_row(user_id, key, start + timedelta(minutes=40 * i)) for i, key in enumerate('abcdefg')]
+               + [_row(user_id, 'bad', start)])
+
+    assert buffer.flush() == 7
+    assert buffer.pending_count() == 0
+    assert [row['client_key'] for row, _ in buffer.dead_letters] == ['bad']
+    assert _state(app, db, user_id) == (list('abcdefg'), 210)
+
+
+def test_transient_errors_are_retried_up_to_limit(app, db, user_id, buffer, monkeypatch):
+    def unavailable(rows):
+        raise OperationalError('INSERT', {}, Exception('server has gone away'))
+
+    monkeypatch.setattr(buffer, '_write', unavailable)
+    buffer.add([_row(user_id, 'a', datetime.now() - timedelta(hours=1))])
+    for _ in range(2):
+        assert buffer.flush() == 0
+        assert buffer.pending_count() == 1
+    assert buffer.flush() == 0
+    assert buffer.pending_count() == 0
+    assert len(buffer.dead_letters) == 1
+
+
+def test_daily_limit_counts_existing_records(app, db, user_id, buffer):
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    buffer.add([_row(user_id, f'old{i}', day + timedelta(hours=i), 60) for i in range(9)])
+    assert buffer.flush() == 9
+
+    buffer.add([_row(user_id, 'fits', day + timedelta(hours=10), 60),
+                _row(user_id, 'over', day + timedelta(hours=12), 60),
+                _row(user_id, 'next_day', day + timedelta(days=1, minutes=1), 60)])
+    assert buffer.flush() == 2
+    assert buffer.rejected == 1
+    keys, total = _state(app, db, user_id)
+    assert 'over' not in keys and total == 660
+
+
+def test_parse_event_bounds_start_time():
+    now = datetime(2026, 10, 17, 12, 0)
+
+    def parse(start_time, duration=30):
+        return parse_event({'session_id': 's', 'start_time': start_time.isoformat(), 'duration': duration},
+                           1, now)[2]
+
+    assert parse(now - timedelta(hours=1)) is None
+    assert parse(now - timedelta(days=30)) is not None
+    # 结束时间晚于当前时间
+    assert parse(now - timedelta(minutes=10), duration=60) is not None
+
+
+def test_request_rejects_events_over_daily_limit(app, client, user_id):
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(identity=str(user_id))
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    events = [{'session_id': f's{i}', 'start_time': (start + timedelta(hours=9 * i)).isoformat(), 'duration': 500}
+              for i in range(3)]
+    response = client.post('/api/v1/learning/focus/events', json={'events': events},
+                           headers={'Authorization': f'Bearer {token}'})
+    data = response.get_json()['data']
+    assert data['accepted'] == 2
+    assert [error['index'] for error in data['errors']] == [2]
@@ -0,0 +1,42 @@
+"""JWKS响应不允许缓存时，后台刷新也按最小间隔限频"""
+import time
+
+from app.utils.jwks import JWKSCache, _JWKSEntry
+
+JWKS_URL = 'https://example.auth0.com/.well-known/jwks.json'
+
+
+class CountingJWKSCache(JWKSCache):
+    """不请求网络，模拟Cache-Control: no-cache的响应（有效期为0）"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.downloads = 0
+
+    def _download(self, jwks_url):
+        self.downloads += 1
+        now = time.monotonic()
+        return _JWKSEntry(keys={'kid-1': object()}, expires_at=now, stale_until=now + self.max_stale, fetched_at=now)
+
+
+def _wait_for_refresh(cache):
+    deadline = time.monotonic() + 2
+    while cache._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_no_cache_response_is_not_refetched_on_every_request():
+    cache = CountingJWKSCache(min_refetch_interval=30)
+    for _ in range(50):
+        assert cache.get_key(JWKS_URL, 'kid-1') is not None
+        _wait_for_refresh(cache)
+    assert cache.downloads == 1
+
+
+def test_expired_keys_refresh_in_background_after_min_interval():
+    cache = CountingJWKSCache(min_refetch_interval=30)
+    cache.get_key(JWKS_URL, 'kid-1')
+    cache._entries[JWKS_URL].fetched_at -= 30
+    cache.get_key(JWKS_URL, 'kid-1')
+    _wait_for_refresh(cache)
+    assert cache.downloads == 2
@@ -0,0 +1,54 @@
+"""推送票据：只能建立一次SSE连接，不能作为API令牌"""
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app.api.v1.push.stream import create_ticket, redeem_ticket
+from app.models.user import User
+
+
+@pytest.fixture
+def user_headers(app, db):
+    with app.app_context():
+        user = User(name='学生', email='s@example.com', auth0_id='mock|s')
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+    return {'Authorization': f'Bearer {token}', 'Accept': 'application/json'}
+
+
+def _ticket(client, headers):
+    response = client.post('/api/v1/push/ticket', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()['data']['ticket']
+
+
+def test_ticket_is_not_an_api_token(client, user_headers):
+    ticket = _ticket(client, user_headers)
+    response = client.get('/api/v1/community/conversations/unread-count',
+                          headers={'Authorization': f'Bearer {ticket}', 'Accept': 'application/json'})
+    assert response.status_code == 401
+
+
+def test_legacy_jwt_ticket_is_rejected_by_requires_auth(app, client, user_headers):
+    with app.app_context():
+        ticket = create_access_token(identity='1', additional_claims={'push_ticket': True})
+    response = client.get('/api/v1/community/conversations/unread-count',
+                          headers={'Authorization': f'Bearer {ticket}', 'Accept': 'application/json'})
+    assert response.status_code == 401
+
+
+def test_ticket_is_single_use(app):
+    with app.app_context():
+        ticket, _ = create_ticket(42)
+        assert redeem_ticket(ticket) == 42
+        assert redeem_ticket(ticket) is None
+        assert redeem_ticket(ticket + 'x') is None
+
+
+def test_stream_rejects_reused_ticket(client, user_headers):
+    ticket = _ticket(client, user_headers)
+    response = client.get(f'/api/v1/push/stream?ticket={ticket}', buffered=False)
+    assert response.status_code == 200
+    assert next(iter(response.response)).startswith(b'retry:')
+    response.close()
+    assert client.get(f'/api/v1/push/stream?ticket={ticket}').status_code == 401
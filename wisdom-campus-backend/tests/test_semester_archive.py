@@ -0,0 +1,70 @@
+"""学期归档后成绩仍然每个(学生, 课程)只有一行，补录、更正成绩不会重复计入GPA"""
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app.api.v1.learning.grade_import import import_grade_file
+from app.api.v1.learning.semester_archive import semester_archiver
+from app.models.archive import archive_tables
+from app.models.learning import Course, Grade, GradeSummary
+from app.models.user import User, Semester
+
+
+@pytest.fixture
+def setup(app, db):
+    with app.app_context():
+        semester = Semester(name='2024-秋', start_date=date(2024, 9, 1), end_date=date(2025, 1, 15),
+                            status='completed')
+        db.session.add(semester)
+        db.session.flush()
+        db.session.add_all([
+            Course(name='高等数学', code='MATH101', credit=4, semester_id=semester.id),
+            User(name='学生', email='s@example.com', auth0_id='mock|s', student_id='20240001'),
+        ])
+        db.session.commit()
+        return semester.id
+
+
+def _import(app, tmp_path, score):
+    path = tmp_path / f'grades_{score}.csv'
+    path.write_text(f'学号,课程代码,成绩\n20240001,MATH101,{score}\n', encoding='utf-8')
+    with app.app_context():
+        return import_grade_file(str(path), 'grades.csv')
+
+
+def _grades(app, db):
+    with app.app_context():
+        user = User.query.filter_by(student_id='20240001').one()
+        summary = GradeSummary.query.filter_by(user_id=user.id).one()
+        hot = [float(score) for score, in db.session.query(Grade.score)]
+        archived = [float(score) for score in db.session.execute(select(archive_tables['grade'].c.score)).scalars()]
+        return summary.course_count, float(user.gpa), hot, archived
+
+
+def test_import_after_archive_updates_archived_grade(app, db, tmp_path, setup):
+    _import(app, tmp_path, 90)
+    assert _grades(app, db) == (1, 4.0, [90.0], [])
+
+    with app.app_context():
+        semester_archiver.archive_semester(setup, force=True)
+    assert _grades(app, db) == (1, 4.0, [], [90.0])
+
+    result = _import(app, tmp_path, 60)
+    assert result['archived'] == 1
+    assert _grades(app, db) == (1, 1.0, [], [60.0])
+
+
+def test_rearchive_replaces_archived_grade(app, db, tmp_path, setup):
+    _import(app, tmp_path, 90)
+    with app.app_context():
+        semester_archiver.archive_semester(setup, force=True)
+        # 直接写入热表的更正成绩（不经过成绩导入）
+        user = User.query.filter_by(student_id='20240001').one()
+        course = Course.query.filter_by(code='MATH101').one()
+        db.session.execute(Grade.__table__.insert().values(user_id=user.id, course_id=course.id, score=75))
+        db.session.commit()
+        semester_archiver.archive_semester(setup, force=True)
+
+        archived = db.session.execute(select(archive_tables['grade'].c.score)).scalars().all()
+        assert [float(score) for score in archived] == [75.0]
@@ -0,0 +1,67 @@
+"""管理员用户搜索：分档匹配都使用前缀或全文索引，不使用前后模糊的LIKE"""
+import pytest
+from sqlalchemy import event
+
+from app.api.v1.user.search import search_users
+from app.models.user import User
+
+
+@pytest.fixture
+def users(app, db):
+    with app.app_context():
+        rows = [
+            ('张三', 'zhangsan@example.com', '202300001'),
+            ('张三丰', 'zsf@example.com', '202300002'),
+            ('李张', 'lizhang@example.com', '202300003'),
+            ('王五', 'wangwu@example.com', 'S2023001'),
+            ('赵六', 's2023@example.com', None),
+        ]
+        for name, email, student_id in rows:
+            db.session.add(User(name=name, email=email, student_id=student_id, auth0_id=f'mock|{email}'))
+        db.session.commit()
+
+
+def _search(keyword, limit=20, cursor=None):
+    users, next_cursor = search_users(keyword, limit=limit, cursor=cursor)
+    return [user.name for user in users], next_cursor
+
+
+def test_student_id_prefix_matches_ids_with_letters(app, users):
+    with app.app_context():
+        assert _search('S2023')[0] == ['王五', '赵六']
+
+
+def test_exact_student_id_ranks_before_prefix(app, users):
+    with app.app_context():
+        assert _search('202300002')[0] == ['张三丰']
+        assert _search('2023000')[0] == ['张三', '张三丰', '李张']
+
+
+def test_name_fallback_matches_prefix_only(app, users):
+    with app.app_context():
+        # 非MySQL数据库没有全文索引，姓名只按前缀匹配，"李张"不会因为中间的"张"被匹配
+        assert _search('张')[0] == ['张三', '张三丰']
+
+
+def test_cursor_pages_through_buckets(app, users):
+    with app.app_context():
+        first, cursor = _search('S2023', limit=1)
+        second, last_cursor = _search('S2023', limit=1, cursor=cursor)
+        assert (first, second, last_cursor) == (['王五'], ['赵六'], None)
+
+
+def test_no_leading_wildcard(app, db, users):
+    parameters = []
+
+    def capture(conn, cursor, statement, params, *args):
+        parameters.extend(params if isinstance(params, (list, tuple)) else params.values())
+
+    with app.app_context():
+        engine = db.get_engine(app)
+        event.listen(engine, 'before_cursor_execute', capture)
+        try:
+            for keyword in ('张', '张三', 'S2023', 'zsf@'):
+                search_users(keyword)
+        finally:
+            event.remove(engine, 'before_cursor_execute', capture)
+    assert not [value for value in parameters if isinstance(value, str) and value.startswith('%')]